@@ -0,0 +1,117 @@
+"""
+Compares the per operation cost of the JOSETransport crypto backends.
+
+Each backend signs and verifies a request JWT, encrypts and decrypts a JWE
+request body, and decrypts an RSA-OAEP encrypted auth package using a 2048
+bit key. Signatures produced by the backends are checked to be identical and
+each backend's JWEs are decrypted by the other.
+
+Usage:
+    python benchmarks/crypto_backends.py [--iterations N]
+
+Requires the cryptography extra: pip install launchkey[cryptography]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+from Cryptodome.Cipher import PKCS1_OAEP
+from Cryptodome.PublicKey import RSA
+from jwkest.jwk import RSAKey
+from jwkest.jwt import JWT
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from launchkey.transports import JWKESTBackend, \
+    CryptographyBackend  # noqa: E402 pylint: disable=wrong-import-position
+
+RSA_KEY = RSA.generate(2048)
+PRIVATE_KEY = RSAKey(key=RSA_KEY, kid="kid")
+PUBLIC_KEY = RSAKey(key=RSA_KEY.publickey(), kid="kid")
+CLAIMS = {"iss": "svc:e5a0c2de-4f8e-11e8-9c2d-fa7ae01bbebc", "aud": "lka",
+          "sub": "svc:e5a0c2de-4f8e-11e8-9c2d-fa7ae01bbebc",
+          "nbf": 1500000000, "exp": 1500000005, "iat": 1500000000,
+          "jti": "2c5f2a6e-6b8d-4a1e-8f0e-7c1b2c3d4e5f",
+          "request": {"meth": "POST", "path": "/service/v3/auths"}}
+BODY = json.dumps({"username": "user", "context": "x" * 200})
+
+
+def time_calls(function, iterations):
+    """
+    :return: Average microseconds per call
+    """
+    function()
+    start = time.perf_counter()
+    for _ in range(iterations):
+        function()
+    return (time.perf_counter() - start) / iterations * 1000000
+
+
+def run_benchmark(backend, iterations):
+    """
+    :return: dict of average microseconds per call by operation name
+    """
+    compact = backend.sign_compact(CLAIMS, "RS512", PRIVATE_KEY)
+    jwt = JWT().unpack(compact)
+    signing_input = jwt.b64part[0] + b"." + jwt.b64part[1]
+    jwe = backend.encrypt_compact(BODY, "RSA-OAEP", "A256CBC-HS512",
+                                  PUBLIC_KEY)
+    oaep_key = backend.load_rsa_oaep_key(PRIVATE_KEY)
+    oaep_ciphertext = PKCS1_OAEP.new(RSA_KEY.publickey()).encrypt(b"x" * 64)
+    return {
+        "sign_compact": time_calls(
+            lambda: backend.sign_compact(CLAIMS, "RS512", PRIVATE_KEY),
+            iterations),
+        "verify_compact": time_calls(
+            lambda: backend.verify_compact(signing_input, jwt.part[2],
+                                           "RS512", PUBLIC_KEY),
+            iterations),
+        "encrypt_compact": time_calls(
+            lambda: backend.encrypt_compact(BODY, "RSA-OAEP", "A256CBC-HS512",
+                                            PUBLIC_KEY),
+            iterations),
+        "decrypt_compact": time_calls(
+            lambda: backend.decrypt_compact(jwe, [PRIVATE_KEY]), iterations),
+        "decrypt_rsa_oaep": time_calls(
+            lambda: backend.decrypt_rsa_oaep(oaep_ciphertext, oaep_key),
+            iterations),
+    }
+
+
+def check_compatibility(first, second):
+    """
+    Ensures the backends produce the same signatures and can decrypt each
+    other's JWEs
+    """
+    assert first.sign_compact(CLAIMS, "RS512", PRIVATE_KEY) == \
+        second.sign_compact(CLAIMS, "RS512", PRIVATE_KEY)
+    for encrypter, decrypter in ((first, second), (second, first)):
+        jwe = encrypter.encrypt_compact(BODY, "RSA-OAEP", "A256CBC-HS512",
+                                        PUBLIC_KEY)
+        assert decrypter.decrypt_compact(jwe, [PRIVATE_KEY]).decode() == BODY
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--iterations", type=int, default=500)
+    args = parser.parse_args()
+
+    backends = [JWKESTBackend(), CryptographyBackend()]
+    check_compatibility(*backends)
+    results = [run_benchmark(backend, args.iterations)
+               for backend in backends]
+
+    print("%d iterations, microseconds per call" % args.iterations)
+    print("%-18s %14s %20s %8s" % ("", "JWKESTBackend", "CryptographyBackend",
+                                   "speedup"))
+    for operation in results[0]:
+        print("%-18s %14.1f %20.1f %7.1fx" % (
+            operation, results[0][operation], results[1][operation],
+            results[0][operation] / results[1][operation]))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+"""
+Compares concurrent request throughput of the pooled HTTP/1.1
+RequestsTransport against the multiplexed HTTP2Transport.
+
+Each transport is pointed at a local stand-in server which answers every
+request with a small JSON body after a fixed delay, simulating the round trip
+to the LaunchKey API. Requests are issued from a thread pool larger than the
+HTTP/1.1 connection pool so the cost of connection contention is visible.
+
+Usage:
+    python benchmarks/http2_transport.py [--requests N] [--threads N]
+        [--latency SECONDS] [--pool-size N]
+
+Requires the http2 extra: pip install launchkey[http2]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import h2.config
+import h2.connection
+import h2.events
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from launchkey.transports import HTTP2Transport, \
+    RequestsTransport  # noqa: E402 pylint: disable=wrong-import-position
+
+RESPONSE_BODY = json.dumps({"api_time": "2017-01-01T00:00:00Z"}).encode()
+
+
+def _unused_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_http1_server(latency):
+    """
+    Starts a threaded HTTP/1.1 keep-alive server in the background
+    :return: Base URL of the server
+    """
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def _respond(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            if length:
+                self.rfile.read(length)
+            time.sleep(latency)
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(RESPONSE_BODY)))
+            self.end_headers()
+            self.wfile.write(RESPONSE_BODY)
+
+        do_GET = do_POST = do_PUT = do_DELETE = do_PATCH = _respond
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", _unused_port()), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return "http://127.0.0.1:%s" % server.server_address[1]
+
+
+class _H2Protocol(asyncio.Protocol):
+    """Plain text HTTP/2 (h2c) server protocol answering every stream"""
+
+    def __init__(self, latency):
+        self._latency = latency
+        self._conn = h2.connection.H2Connection(
+            config=h2.config.H2Configuration(client_side=False))
+        self._transport = None
+
+    def connection_made(self, transport):
+        self._transport = transport
+        self._conn.initiate_connection()
+        transport.write(self._conn.data_to_send())
+
+    def data_received(self, data):
+        for event in self._conn.receive_data(data):
+            if isinstance(event, h2.events.DataReceived):
+                self._conn.acknowledge_received_data(
+                    event.flow_controlled_length, event.stream_id)
+            elif isinstance(event, h2.events.StreamEnded):
+                asyncio.ensure_future(self._respond(event.stream_id))
+        self._transport.write(self._conn.data_to_send())
+
+    async def _respond(self, stream_id):
+        await asyncio.sleep(self._latency)
+        self._conn.send_headers(stream_id, [
+            (":status", "200"),
+            ("content-type", "application/json"),
+            ("content-length", str(len(RESPONSE_BODY))),
+        ])
+        self._conn.send_data(stream_id, RESPONSE_BODY, end_stream=True)
+        self._transport.write(self._conn.data_to_send())
+
+
+def start_http2_server(latency):
+    """
+    Starts an h2c server on a background event loop
+    :return: Base URL of the server
+    """
+    port = _unused_port()
+    loop = asyncio.new_event_loop()
+    started = threading.Event()
+
+    def run():
+        asyncio.set_event_loop(loop)
+        loop.run_until_complete(loop.create_server(
+            lambda: _H2Protocol(latency), "127.0.0.1", port))
+        started.set()
+        loop.run_forever()
+
+    threading.Thread(target=run, daemon=True).start()
+    started.wait()
+    return "http://127.0.0.1:%s" % port
+
+
+def run_benchmark(transport, url, requests, threads):
+    """
+    Sends requests concurrently through the transport
+    :return: Tuple of elapsed seconds and list of per request latencies
+    """
+    transport.set_url(url, True)
+    transport.get("/public/v3/ping")  # Warm up the connection
+
+    def timed_request(_):
+        start = time.perf_counter()
+        response = transport.get("/public/v3/ping")
+        assert response.status_code == 200
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        latencies = list(executor.map(timed_request, range(requests)))
+    return time.perf_counter() - start, sorted(latencies)
+
+
+def _report(name, elapsed, latencies, requests):
+    print("%-28s %8.1f req/s   p50 %6.1f ms   p99 %6.1f ms" % (
+        name, requests / elapsed,
+        latencies[len(latencies) // 2] * 1000,
+        latencies[int(len(latencies) * 0.99) - 1] * 1000))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--threads", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.02)
+    parser.add_argument("--pool-size", type=int, default=10)
+    args = parser.parse_args()
+
+    http1_url = start_http1_server(args.latency)
+    http2_url = start_http2_server(args.latency)
+    print("%d requests, %d threads, %.0f ms simulated latency" % (
+        args.requests, args.threads, args.latency * 1000))
+
+    pooled = RequestsTransport(pooled=True, pool_maxsize=args.pool_size,
+                               pool_block=True)
+    elapsed, latencies = run_benchmark(pooled, http1_url, args.requests,
+                                       args.threads)
+    _report("HTTP/1.1 pooled (%d conns)" % args.pool_size, elapsed,
+            latencies, args.requests)
+    print("%-28s %s" % ("", pooled.connection_stats))
+    pooled.close()
+
+    multiplexed = HTTP2Transport(prior_knowledge=True)
+    elapsed, latencies = run_benchmark(multiplexed, http2_url, args.requests,
+                                       args.threads)
+    _report("HTTP/2 multiplexed (1 conn)", elapsed, latencies, args.requests)
+    multiplexed.close()
+
+
+if __name__ == "__main__":
+    main()
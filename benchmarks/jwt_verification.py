@@ -0,0 +1,119 @@
+"""
+Compares JWT verification of webhooks and API responses by JOSETransport
+against the previous approach of parsing each JWT a second time and
+verifying it against every cached LaunchKey API public key.
+
+The public key cache is filled with the given number of keys to reflect a
+long running process which has seen several rotated API keys.
+
+Usage:
+    python benchmarks/jwt_verification.py [--iterations N] [--cached-keys N]
+"""
+
+import argparse
+import os
+import sys
+import time
+from uuid import uuid4
+
+from Cryptodome.PublicKey import RSA
+from jwkest.jwk import RSAKey, import_rsa_key
+from jwkest.jws import JWS
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from launchkey.transports import \
+    JOSETransport  # noqa: E402 pylint: disable=wrong-import-position
+
+ISSUER_ID = str(uuid4())
+SIGNING_KID = "signing-kid"
+PRIVATE_KEY = RSA.generate(2048).exportKey("PEM").decode()
+
+
+class LegacyJOSETransport(JOSETransport):
+    """
+    JOSETransport verifying JWTs by parsing them again and trying all cached
+    public keys
+    """
+
+    def _get_jwt_payload(self, jwt, public_key):
+        self._cache_public_key(SIGNING_KID, public_key)
+        return JWS().verify_compact(b".".join(jwt.b64part).decode(),
+                                    keys=self.api_public_keys)
+
+
+def build_transport(transport_class, cached_keys):
+    """
+    Creates a transport with a warm public key cache
+    :return: JOSETransport
+    """
+    transport = transport_class(http_client=object())
+    transport.set_issuer("svc", ISSUER_ID, PRIVATE_KEY)
+    transport._server_time_difference = 0, time.time() + 3600
+    public_key = import_rsa_key(PRIVATE_KEY).publickey()
+    for index in range(cached_keys - 1):
+        transport._public_key_cache["rotated-kid-%d" % index] = \
+            RSAKey(key=public_key, kid="rotated-kid-%d" % index)
+    transport._public_key_cache[SIGNING_KID] = \
+        RSAKey(key=public_key, kid=SIGNING_KID)
+    return transport
+
+
+def sign(transport, segment_name, segment):
+    """
+    Signs claims the way the LaunchKey API does
+    :return: compact JWT
+    """
+    now = int(time.time())
+    claims = {"iss": transport.audience, "aud": transport.issuer,
+              "sub": transport.issuer, "nbf": now, "iat": now,
+              "exp": now + 3600, "jti": "jti", segment_name: segment}
+    key = RSAKey(key=import_rsa_key(PRIVATE_KEY), kid=SIGNING_KID)
+    return JWS(claims, alg="RS512", kid=SIGNING_KID).sign_compact(keys=[key])
+
+
+def time_calls(function, iterations):
+    """
+    :return: Average microseconds per call
+    """
+    function()
+    start = time.perf_counter()
+    for _ in range(iterations):
+        function()
+    return (time.perf_counter() - start) / iterations * 1000000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--cached-keys", type=int, nargs="+",
+                        default=[1, 16, 64])
+    args = parser.parse_args()
+
+    body = '{"auth_request": "value"}'
+    print("%d iterations" % args.iterations)
+    for cached_keys in args.cached_keys:
+        print("\n%d cached API public keys" % cached_keys)
+        for transport_class in (LegacyJOSETransport, JOSETransport):
+            transport = build_transport(transport_class, cached_keys)
+            content_hash = transport._get_content_hash(body, "S256")
+            webhook = sign(transport, "request", {
+                "meth": "POST", "path": "/webhook", "hash": content_hash,
+                "func": "S256"})
+            headers = {"X-IOV-JWT": sign(transport, "response", {
+                "status": 200, "hash": content_hash, "func": "S256"})}
+
+            webhook_us = time_calls(
+                lambda: transport.verify_jwt_request(
+                    webhook, transport.issuer, "POST", "/webhook", body),
+                args.iterations)
+            response_us = time_calls(
+                lambda: transport.verify_jwt_response(
+                    headers, "jti", body, transport.issuer, 200),
+                args.iterations)
+            print("  %-22s webhook %8.1f us   response %8.1f us" % (
+                transport_class.__name__, webhook_us, response_us))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Compares the throughput of JOSETransport private key operations performed
+in the calling process against ProcessPoolCryptoBackend.
+
+Concurrent threads each decrypt webhook style JWE packages, decrypt RSA-OAEP
+auth packages, and sign request JWTs with a 2048 bit key the way a busy
+webhook receiver does.
+
+Usage:
+    python benchmarks/process_pool.py [--operations N] [--threads N ...]
+                                      [--workers N]
+"""
+
+import argparse
+import os
+import sys
+import time
+from base64 import b64encode
+from concurrent.futures import ThreadPoolExecutor
+
+from Cryptodome.Cipher import PKCS1_OAEP
+from Cryptodome.PublicKey import RSA
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from launchkey import \
+    transports  # noqa: E402 pylint: disable=wrong-import-position
+
+RSA_KEY = RSA.generate(2048)
+PRIVATE_KEY = RSA_KEY.exportKey("PEM").decode()
+ISSUER_ID = "e5a0c2de-4f8e-11e8-9c2d-fa7ae01bbebc"
+
+
+def build_transport(backend):
+    """
+    :return: JOSETransport with the benchmark key as its signing and
+    encryption key
+    """
+    transport = transports.JOSETransport(http_client=object(),
+                                         crypto_backend=backend)
+    transport.set_issuer("svc", ISSUER_ID, PRIVATE_KEY)
+    transport.add_encryption_private_key(PRIVATE_KEY)
+    transport._server_time_difference = 0, time.time() + 3600
+    return transport
+
+
+def build_operations(transport):
+    """
+    :return: List of callables performing each private key operation
+    """
+    kid = transport.issuer_private_keys[0].kid
+    jwe = transports.JWKESTBackend().encrypt_compact(
+        '{"auth_request": "value"}', "RSA-OAEP", "A256CBC-HS512",
+        transport.issuer_private_keys[0])
+    rsa_package = b64encode(
+        PKCS1_OAEP.new(RSA_KEY.publickey()).encrypt(b"x" * 64))
+    return [
+        lambda: transport.decrypt_response(jwe),
+        lambda: transport.decrypt_rsa_response(rsa_package, kid),
+        lambda: transport._build_jwt_signature("POST", "/path", "jti",
+                                               "svc:subject"),
+    ]
+
+
+def operations_per_second(transport, operations, threads):
+    """
+    :return: Number of operations completed per second
+    """
+    calls = build_operations(transport)
+    for call in calls:
+        call()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(threads) as executor:
+        list(executor.map(lambda index: calls[index % len(calls)](),
+                          range(operations)))
+    return operations / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--operations", type=int, default=600)
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    pool = transports.ProcessPoolCryptoBackend(max_workers=args.workers)
+    inline = build_transport(transports.JWKESTBackend())
+    pooled = build_transport(pool)
+    print("%d operations, %d workers, operations per second"
+          % (args.operations, args.workers))
+    print("%-8s %12s %12s %8s" % ("threads", "in-process", "pooled",
+                                  "speedup"))
+    for threads in args.threads:
+        inline_ops = operations_per_second(inline, args.operations, threads)
+        pooled_ops = operations_per_second(pooled, args.operations, threads)
+        print("%-8d %12.1f %12.1f %7.1fx" % (threads, inline_ops, pooled_ops,
+                                             pooled_ops / inline_ops))
+    print("pool stats: %s" % pool.stats)
+    pool.shutdown()
+
+
+if __name__ == "__main__":
+    main()
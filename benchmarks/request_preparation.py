@@ -0,0 +1,131 @@
+"""
+Measures the requests per second JOSETransport can prepare, signing the
+JWT of GET requests and encrypting and signing POST requests, against the
+previous approach of rebuilding the User-Agent and JSON body formatting for
+every request.
+
+No HTTP requests are made. The API public key and server time difference
+are cached before measuring. Each transport is measured several times with
+the order of the transports alternating between repeats, and the median
+and best rates are reported.
+
+Usage:
+    python benchmarks/request_preparation.py [--iterations N] [--repeats N]
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from uuid import uuid4
+
+from Cryptodome.PublicKey import RSA
+from jwkest.jwk import RSAKey, import_rsa_key
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from launchkey import \
+    SDK_VERSION  # noqa: E402 pylint: disable=wrong-import-position
+from launchkey.transports import \
+    JOSETransport  # noqa: E402 pylint: disable=wrong-import-position
+from launchkey.transports.timing import \
+    NULL_TIMING  # noqa: E402 pylint: disable=wrong-import-position
+
+ISSUER_ID = str(uuid4())
+SUBJECT = "svc:%s" % uuid4()
+API_KID = "api-kid"
+PRIVATE_KEY = RSA.generate(2048).exportKey("PEM").decode()
+BODY = {"username": "user", "context": "Log in to the application",
+        "title": "Login", "ttl": 300, "push_title": "Login request",
+        "push_body": "Please respond to the login request"}
+
+
+class LegacyJOSETransport(JOSETransport):
+    """
+    JOSETransport rebuilding the constant parts of each request
+    """
+
+    def _encrypt_request(self, data):
+        return self._crypto_backend.encrypt_compact(
+            json.dumps(data), self.jwe_cek_encryption,
+            self.jwe_claims_encryption, self._find_key_by_kid(API_KID))
+
+    def _build_jose_request(self, method, path, subject, jti, data=None,
+                            timing=NULL_TIMING):
+        headers, body = super()._build_jose_request(
+            method, path, subject, jti, data, timing)
+        headers["User-Agent"] = f"PythonServiceSDK/{SDK_VERSION} " \
+                                f"({platform.system()} {platform.release()})"
+        return headers, body
+
+
+def build_transport(transport_class):
+    """
+    Creates a transport with warm metadata caches
+    :return: JOSETransport
+    """
+    transport = transport_class(http_client=object())
+    transport.set_issuer("svc", ISSUER_ID, PRIVATE_KEY)
+    transport._server_time_difference = 0, time.time() + 3600
+    transport.update_and_return_active_encryption_kid = lambda: API_KID
+    transport._public_key_cache[API_KID] = RSAKey(
+        key=import_rsa_key(PRIVATE_KEY).publickey(), kid=API_KID)
+    return transport
+
+
+def time_calls(function, iterations):
+    """
+    :return: Calls per second
+    """
+    function()
+    start = time.perf_counter()
+    for _ in range(iterations):
+        function()
+    return iterations / (time.perf_counter() - start)
+
+
+def measure(transport_class, iterations):
+    """
+    :return: Tuple of signing and signing+encrypting calls per second
+    """
+    transport = build_transport(transport_class)
+    signing = time_calls(
+        lambda: transport._build_jose_request(
+            "GET", "/service/v3/auths/id", SUBJECT, str(uuid4())),
+        iterations)
+    encrypting = time_calls(
+        lambda: transport._build_jose_request(
+            "POST", "/service/v3/auths", SUBJECT, str(uuid4()), BODY),
+        iterations)
+    return signing, encrypting
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    transport_classes = [LegacyJOSETransport, JOSETransport]
+    results = {transport_class: [] for transport_class in transport_classes}
+    for _ in range(args.repeats):
+        for transport_class in transport_classes:
+            results[transport_class].append(
+                measure(transport_class, args.iterations))
+        transport_classes.reverse()
+
+    print("%d iterations, %d repeats" % (args.iterations, args.repeats))
+    for transport_class, rates in results.items():
+        signing, encrypting = zip(*rates)
+        print("  %-20s signing median %8.1f best %8.1f req/s   "
+              "signing+encrypting median %8.1f best %8.1f req/s" % (
+                  transport_class.__name__,
+                  statistics.median(signing), max(signing),
+                  statistics.median(encrypting), max(encrypting)))
+
+
+if __name__ == "__main__":
+    main()
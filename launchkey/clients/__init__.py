@@ -2,3 +2,11 @@
 from .directory import DirectoryClient  # noqa: F401
 from .organization import OrganizationClient  # noqa: F401
 from .service import ServiceClient  # noqa: F401
+from .async_directory import AsyncDirectoryClient  # noqa: F401
+from .async_organization import AsyncOrganizationClient  # noqa: F401
+from .async_service import AsyncServiceClient  # noqa: F401
+from .poller import AuthorizationResponsePoller, \
+    AsyncAuthorizationResponsePoller, ResponseLatencyModel  # noqa: F401
+from .waiters import AuthorizationResponseRegistry  # noqa: F401
+from .broker import ResponseBroker, InProcessResponseBroker, \
+    SQLiteResponseBroker  # noqa: F401
@@ -0,0 +1,190 @@
+"""Shared functionality for asyncio clients"""
+
+# pylint: disable=too-many-arguments, invalid-overridden-method
+
+from ..utils.shared import deprecated
+from .base import async_api_call
+
+
+class AsyncServiceManagingMixin(object):
+    """
+    Coroutine equivalents of the Service management methods in
+    launchkey.clients.base.ServiceManagingBaseClient. To be mixed in ahead of
+    a ServiceManagingBaseClient subclass using an AsyncJOSETransport.
+    """
+
+    @async_api_call
+    async def create_service(self, name, description=None, icon=None,
+                             callback_url=None, active=True):
+        """
+        Creates a Service. See ServiceManagingBaseClient.create_service.
+        :return: String - ID of the Service that is created
+        """
+        response = await self._transport.post(
+            self._service_base_path, self._subject, name=name,
+            description=description, icon=icon, callback_url=callback_url,
+            active=active)
+        return response.data['id']
+
+    @async_api_call
+    async def get_all_services(self):
+        """
+        Retrieves all Services belonging to the subject entity. See
+        ServiceManagingBaseClient.get_all_services.
+        :return: List - launchkey.entities.service.Service
+        """
+        response = await self._transport.get(self._service_base_path,
+                                             self._subject)
+        return self._build_services(response)
+
+    @async_api_call
+    async def get_services(self, service_ids):
+        """
+        Retrieves Services based on an input list of Service IDs. See
+        ServiceManagingBaseClient.get_services.
+        :return: List - launchkey.entities.service.Service
+        """
+        response = await self._transport.post(
+            "{}/list".format(self._service_base_path), self._subject,
+            service_ids=[str(service_id) for service_id in service_ids])
+        return self._build_services(response)
+
+    @async_api_call
+    async def get_service(self, service_id):
+        """
+        Retrieves a Service based on an input Service ID. See
+        ServiceManagingBaseClient.get_service.
+        :return: launchkey.entities.service.Service
+        """
+        response = await self._transport.post(
+            "{}/list".format(self._service_base_path), self._subject,
+            service_ids=[str(service_id)])
+        return self._build_service(response)
+
+    @async_api_call
+    async def update_service(self, service_id, name=False, description=False,
+                             icon=False, callback_url=False, active=None):
+        """
+        Updates a Service's general settings. See
+        ServiceManagingBaseClient.update_service.
+        :return:
+        """
+        kwargs = self._update_service_kwargs(service_id, name, description,
+                                             icon, callback_url, active)
+        await self._transport.patch(self._service_base_path, self._subject,
+                                    **kwargs)
+
+    @async_api_call
+    async def add_service_public_key(self, service_id, public_key,
+                                     expires=None, active=None,
+                                     key_type=None):
+        """
+        Adds a public key to a Service. See
+        ServiceManagingBaseClient.add_service_public_key.
+        :return: MD5 fingerprint (key_id) of the public key
+        """
+        kwargs = self._add_public_key_kwargs(
+            {"service_id": str(service_id), "public_key": public_key},
+            expires, active, key_type)
+        response = await self._transport.post(
+            "{}/keys".format(self._service_base_path[0:-1]),
+            self._subject, **kwargs)
+        return response.data['key_id']
+
+    @async_api_call
+    async def get_service_public_keys(self, service_id):
+        """
+        Retrieves a list of Public Keys belonging to a Service. See
+        ServiceManagingBaseClient.get_service_public_keys.
+        :return: List - launchkey.entities.shared.PublicKey
+        """
+        response = await self._transport.post(
+            "{}/keys/list".format(self._service_base_path[0:-1]),
+            self._subject, service_id=str(service_id))
+        return self._build_public_keys(response)
+
+    @async_api_call
+    async def remove_service_public_key(self, service_id, key_id):
+        """
+        Removes a public key from a Service. See
+        ServiceManagingBaseClient.remove_service_public_key.
+        :return:
+        """
+        await self._transport.delete(
+            "{}/keys".format(self._service_base_path[0:-1]),
+            self._subject, service_id=str(service_id), key_id=key_id)
+
+    @async_api_call
+    async def update_service_public_key(self, service_id, key_id,
+                                        expires=False, active=None):
+        """
+        Updates a public key from a Service. See
+        ServiceManagingBaseClient.update_service_public_key.
+        :return:
+        """
+        kwargs = self._update_public_key_kwargs(
+            {"service_id": str(service_id), "key_id": key_id}, expires, active)
+        await self._transport.patch(
+            "{}/keys".format(self._service_base_path[0:-1]),
+            self._subject, **kwargs)
+
+    @deprecated
+    async def get_service_policy(self, service_id):
+        """
+        NOTE: This method is being deprecated. Use
+        `get_advanced_service_policy` instead!
+
+        Retrieves a Service's Security Policy. See
+        ServiceManagingBaseClient.get_service_policy.
+        :return: launchkey.entities.service.ServiceSecurityPolicy or None
+        """
+        return self._build_service_security_policy(
+            await self.get_advanced_service_policy(service_id))
+
+    @async_api_call
+    async def get_advanced_service_policy(self, service_id):
+        """
+        Retrieves a Service's Security Policy. See
+        ServiceManagingBaseClient.get_advanced_service_policy.
+        :return: ConditionalGeoFencePolicy, FactorsPolicy, MethodAmountPolicy
+        or LegacyPolicy
+        """
+        response = await self._transport.post(
+            "{}/policy/item".format(self._service_base_path[0:-1]),
+            self._subject, service_id=str(service_id))
+        return self._build_advanced_service_policy(response)
+
+    @deprecated
+    async def set_service_policy(self, service_id, policy):
+        """
+        NOTE: This method is being deprecated. Use
+        `set_advanced_service_policy` instead!
+
+        Sets a Service's Security Policy. See
+        ServiceManagingBaseClient.set_service_policy.
+        :return:
+        """
+        await self.set_advanced_service_policy(service_id, policy)
+
+    @async_api_call
+    async def set_advanced_service_policy(self, service_id, policy):
+        """
+        Sets a Service's Security Policy. See
+        ServiceManagingBaseClient.set_advanced_service_policy.
+        :return:
+        """
+        await self._transport.put(
+            "{}/policy".format(self._service_base_path[0:-1]),
+            self._subject, service_id=str(service_id),
+            policy=policy.to_dict())
+
+    @async_api_call
+    async def remove_service_policy(self, service_id):
+        """
+        Resets a Service's Security Policy back to default. See
+        ServiceManagingBaseClient.remove_service_policy.
+        :return:
+        """
+        await self._transport.delete(
+            "{}/policy".format(self._service_base_path[0:-1]),
+            self._subject, service_id=str(service_id))
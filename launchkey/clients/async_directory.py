@@ -0,0 +1,116 @@
+"""Asyncio Directory Client module"""
+
+# pylint: disable=invalid-overridden-method
+
+from ..entities.validation import DirectoryGetDeviceResponseValidator, \
+    DirectoryGetSessionsValidator, DirectoryUserTOTPValidator
+from ..entities.directory import Session, Device, DirectoryUserTOTP
+from ..utils.shared import XiovJWTService
+from .async_base import AsyncServiceManagingMixin
+from .base import async_api_call
+from .directory import DirectoryClient
+
+
+class AsyncDirectoryClient(AsyncServiceManagingMixin, DirectoryClient):
+    """
+    Client for interacting with Directory endpoints on an asyncio event loop.
+    Every API method is a coroutine equivalent of the same method in
+    launchkey.clients.DirectoryClient and requires an
+    launchkey.transports.AsyncJOSETransport.
+    """
+
+    @async_api_call
+    async def link_device(self, user_id, ttl=None):
+        """
+        Begin the process of Linking a Subscriber Authenticator Device with an
+        End User. See DirectoryClient.link_device.
+        :return: launchkey.entities.directory.DirectoryUserDeviceLinkData
+        """
+        response = await self._transport.post(
+            "/directory/v3/devices", self._subject,
+            **self._link_device_kwargs(user_id, ttl))
+        return self._build_device_link_data(response)
+
+    @async_api_call
+    async def get_linked_devices(self, user_id):
+        """
+        Get a list of Subscriber Authenticator Devices for a Directory User.
+        See DirectoryClient.get_linked_devices.
+        :return: List - launchkey.entities.directory.Device
+        """
+        response = await self._transport.post("/directory/v3/devices/list",
+                                              self._subject,
+                                              identifier=user_id)
+        return [
+            Device(
+                self._validate_response(d, DirectoryGetDeviceResponseValidator)
+            ) for d in response.data
+        ]
+
+    @async_api_call
+    async def unlink_device(self, user_id, device_id):
+        """
+        Unlink a users device. See DirectoryClient.unlink_device.
+        """
+        await self._transport.delete("/directory/v3/devices", self._subject,
+                                     identifier=user_id,
+                                     device_id=str(device_id))
+
+    @async_api_call
+    async def end_all_service_sessions(self, user_id):
+        """
+        End Service User Sessions for all Services in which a Session was
+        started for the Directory User. See
+        DirectoryClient.end_all_service_sessions.
+        """
+        await self._transport.delete("/directory/v3/sessions", self._subject,
+                                     identifier=user_id)
+
+    @async_api_call
+    async def get_all_service_sessions(self, user_id):
+        """
+        Retrieves all Service Sessions that belong to a User. See
+        DirectoryClient.get_all_service_sessions.
+        :return: List - launchkey.entities.directory.Session
+        """
+        response = await self._transport.post("/directory/v3/sessions/list",
+                                              self._subject,
+                                              identifier=user_id)
+        return [
+            Session(self._validate_response(session,
+                                            DirectoryGetSessionsValidator))
+            for session in response.data
+        ]
+
+    @async_api_call
+    async def generate_user_totp(self, user_id):
+        """
+        Generates a TOTP secret for a Directory User. See
+        DirectoryClient.generate_user_totp.
+        :return: launchkey.entities.directory.DirectoryUserTOTP
+        """
+        response = await self._transport.post("/directory/v3/totp",
+                                              self._subject,
+                                              identifier=user_id)
+        data = self._validate_response(response, DirectoryUserTOTPValidator)
+        return DirectoryUserTOTP(data)
+
+    @async_api_call
+    async def remove_user_totp(self, user_id):
+        """
+        Removes the TOTP configuration for a Directory User. See
+        DirectoryClient.remove_user_totp.
+        """
+        await self._transport.delete("/directory/v3/totp", self._subject,
+                                     identifier=user_id)
+
+    async def handle_webhook(self, body, headers, method, path):
+        """
+        Handle a Directory webhook callback. The public key which signed the
+        request is retrieved without blocking before the request is verified.
+        See DirectoryClient.handle_webhook.
+        :return: launchkey.entities.directory.DeviceLinkCompletionResponse
+        """
+        await self._transport.load_public_key_for_jwt(
+            XiovJWTService.get_compact_jwt(headers))
+        return super().handle_webhook(body, headers, method, path)
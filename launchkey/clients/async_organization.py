@@ -0,0 +1,175 @@
+""" Asyncio Organization Client """
+
+# pylint: disable=too-many-arguments, invalid-overridden-method
+
+from ..entities.directory import Directory
+from ..entities.validation import DirectoryValidator
+from .async_base import AsyncServiceManagingMixin
+from .base import async_api_call
+from .organization import OrganizationClient
+
+
+class AsyncOrganizationClient(AsyncServiceManagingMixin, OrganizationClient):
+    """
+    Organization Client for interacting with Organization endpoints on an
+    asyncio event loop. Every API method is a coroutine equivalent of the
+    same method in launchkey.clients.OrganizationClient and requires an
+    launchkey.transports.AsyncJOSETransport.
+    """
+
+    @async_api_call
+    async def create_directory(self, name):
+        """
+        Creates a new Directory. See OrganizationClient.create_directory.
+        :return: String - ID of the Directory that is created
+        """
+        response = await self._transport.post("/organization/v3/directories",
+                                              self._subject, name=name)
+        return response.data['id']
+
+    @async_api_call
+    async def get_all_directories(self):
+        """
+        Retrieves all Directories belonging to an Organization. See
+        OrganizationClient.get_all_directories.
+        :return: List - launchkey.entities.directory.Directory
+        """
+        response = await self._transport.get("/organization/v3/directories",
+                                             self._subject)
+        return [
+            Directory(self._validate_response(directory, DirectoryValidator))
+            for directory in response.data]
+
+    @async_api_call
+    async def get_directories(self, directory_ids):
+        """
+        Retrieves a list of Directories belonging to an Organization. See
+        OrganizationClient.get_directories.
+        :return: List - launchkey.entities.directory.Directory
+        """
+        response = await self._transport.post(
+            "/organization/v3/directories/list", self._subject,
+            directory_ids=[str(directory_id) for directory_id in
+                           directory_ids])
+        return [
+            Directory(self._validate_response(directory, DirectoryValidator))
+            for directory in response.data]
+
+    @async_api_call
+    async def get_directory(self, directory_id):
+        """
+        Retrieves a Directory based on an input Directory ID. See
+        OrganizationClient.get_directory.
+        :return: launchkey.entities.directory.Directory
+        """
+        response = await self._transport.post(
+            "/organization/v3/directories/list", self._subject,
+            directory_ids=[str(directory_id)])
+        return Directory(self._validate_response(response.data[0],
+                                                 DirectoryValidator))
+
+    @async_api_call
+    async def update_directory(self, directory_id, ios_p12=False,
+                               android_key=False, active=None,
+                               denial_context_inquiry_enabled=None,
+                               webhook_url=False):
+        """
+        Updates a Directories's settings. See
+        OrganizationClient.update_directory.
+        :return:
+        """
+        kwargs = self._update_directory_kwargs(
+            directory_id, ios_p12, android_key, active,
+            denial_context_inquiry_enabled, webhook_url)
+        await self._transport.patch("/organization/v3/directories",
+                                    self._subject, **kwargs)
+
+    @async_api_call
+    async def get_directory_public_keys(self, directory_id):
+        """
+        Retrieves a list of Public Keys belonging to a Directory. See
+        OrganizationClient.get_directory_public_keys.
+        :return: List - launchkey.entities.shared.PublicKey
+        """
+        response = await self._transport.post(
+            "/organization/v3/directory/keys/list", self._subject,
+            directory_id=str(directory_id))
+        return self._build_public_keys(response)
+
+    @async_api_call
+    async def add_directory_public_key(self, directory_id, public_key,
+                                       expires=None, active=None,
+                                       key_type=None):
+        """
+        Adds a public key to an Directory. See
+        OrganizationClient.add_directory_public_key.
+        :return: MD5 fingerprint (key_id) of the public key
+        """
+        kwargs = self._add_public_key_kwargs(
+            {"directory_id": str(directory_id), "public_key": public_key},
+            expires, active, key_type)
+        response = await self._transport.post(
+            "/organization/v3/directory/keys", self._subject, **kwargs)
+        return response.data['key_id']
+
+    @async_api_call
+    async def remove_directory_public_key(self, directory_id, key_id):
+        """
+        Removes a public key from a Directory. See
+        OrganizationClient.remove_directory_public_key.
+        :return:
+        """
+        await self._transport.delete("/organization/v3/directory/keys",
+                                     self._subject,
+                                     directory_id=str(directory_id),
+                                     key_id=key_id)
+
+    @async_api_call
+    async def update_directory_public_key(self, directory_id, key_id,
+                                          expires=False, active=None):
+        """
+        Updates a public key from a Directory. See
+        OrganizationClient.update_directory_public_key.
+        :return:
+        """
+        kwargs = self._update_public_key_kwargs(
+            {"directory_id": str(directory_id), "key_id": key_id}, expires,
+            active)
+        await self._transport.patch("/organization/v3/directory/keys",
+                                    self._subject, **kwargs)
+
+    @async_api_call
+    async def generate_and_add_directory_sdk_key(self, directory_id):
+        """
+        Generates and adds an SDK Key to a Directory. See
+        OrganizationClient.generate_and_add_directory_sdk_key.
+        :return: The generated SDK Key
+        """
+        response = await self._transport.post(
+            "/organization/v3/directory/sdk-keys",
+            self._subject, directory_id=str(directory_id))
+        return response.data['sdk_key']
+
+    @async_api_call
+    async def remove_directory_sdk_key(self, directory_id, sdk_key):
+        """
+        Removes an SDK Key from a Directory. See
+        OrganizationClient.remove_directory_sdk_key.
+        :return:
+        """
+        await self._transport.delete("/organization/v3/directory/sdk-keys",
+                                     self._subject,
+                                     directory_id=str(directory_id),
+                                     sdk_key=sdk_key)
+
+    @async_api_call
+    async def get_all_directory_sdk_keys(self, directory_id):
+        """
+        Retrieves all SDK Keys belonging to a Directory. See
+        OrganizationClient.get_all_directory_sdk_keys.
+        :return: List of SDK Keys
+        """
+        response = await self._transport.post(
+            "/organization/v3/directory/sdk-keys/list",
+            self._subject, directory_id=str(directory_id))
+        return response.data
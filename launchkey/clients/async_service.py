@@ -0,0 +1,158 @@
+"""Asyncio Service Client"""
+
+# pylint: disable=too-many-arguments, invalid-overridden-method
+
+import warnings
+
+from launchkey.transports.deadline import call_deadline
+from launchkey.utils.shared import XiovJWTService, deprecated
+from .base import async_api_call
+from .poller import AsyncAuthorizationResponsePoller
+from .service import ServiceClient
+
+
+class AsyncServiceClient(ServiceClient):
+    """
+    Service Client for interacting with Service endpoints on an asyncio event
+    loop. Every API method is a coroutine equivalent of the same method in
+    launchkey.clients.ServiceClient and requires an
+    launchkey.transports.AsyncJOSETransport.
+    """
+
+    def _make_response_poller(self):
+        return AsyncAuthorizationResponsePoller(self)
+
+    @async_api_call
+    async def authorize(self, user, context=None, policy=None, title=None,
+                        ttl=None, push_title=None, push_body=None):
+        """
+        Authorize a transaction for the provided user. See
+        ServiceClient.authorize.
+        :return: String - Unique identifier for tracking status of the
+        authorization request
+        """
+        warnings.warn('This method has been deprecated and will be removed'
+                      ' in a future major release!', DeprecationWarning)
+        auth = await self.authorization_request(user, context, policy, title,
+                                                ttl, push_title, push_body)
+        return auth.auth_request
+
+    @async_api_call
+    async def authorization_request(self, user, context=None, policy=None,
+                                    title=None, ttl=None, push_title=None,
+                                    push_body=None, denial_reasons=None,
+                                    deadline=None):
+        """
+        Authorize a transaction for the provided user. See
+        ServiceClient.authorization_request.
+        :return AuthorizationResponse: Unique identifier for tracking status
+        of the authorization request
+        """
+        kwargs = self._authorization_request_kwargs(
+            user, context, policy, title, ttl, push_title, push_body,
+            denial_reasons)
+        with call_deadline(deadline):
+            response = await self._transport.post("/service/v3/auths",
+                                                  self._subject, **kwargs)
+        return self._wait_for_response(
+            self._build_authorization_request(response))
+
+    @async_api_call
+    async def get_advanced_authorization_response(self,
+                                                  authorization_request_id,
+                                                  deadline=None):
+        """
+        Request the response for a previous authorization call. See
+        ServiceClient.get_advanced_authorization_response.
+        :return: None if the user has not responded otherwise a
+        launchkey.entities.service.AdvancedAuthorizationResponse
+        """
+        with call_deadline(deadline):
+            response = await self._transport.get(
+                "/service/v3/auths/%s" % authorization_request_id,
+                self._subject)
+        return self._build_advanced_authorization_response(response)
+
+    @deprecated
+    async def get_authorization_response(self, authorization_request_id):
+        """
+        NOTE: This method is being deprecated. Use
+        `get_advanced_authorization_response` instead!
+
+        Request the response for a previous authorization call. See
+        ServiceClient.get_authorization_response.
+        :return: None if the user has not responded otherwise a
+        launchkey.entities.service.AuthorizationResponse
+        """
+        return self._build_authorization_response(
+            await self.get_advanced_authorization_response(
+                authorization_request_id))
+
+    @async_api_call
+    async def cancel_authorization_request(self, authorization_request_id):
+        """
+        Request to cancel an authorization request for the End User. See
+        ServiceClient.cancel_authorization_request.
+        """
+        await self._transport.delete(
+            "/service/v3/auths/%s" % authorization_request_id,
+            self._subject)
+
+    @async_api_call
+    async def session_start(self, user, authorization_request_id):
+        """
+        Request to start a Service Session for the End User. See
+        ServiceClient.session_start.
+        """
+        await self._transport.post("/service/v3/sessions",
+                                   self._subject,
+                                   username=user,
+                                   auth_request=authorization_request_id)
+
+    @async_api_call
+    async def session_end(self, user):
+        """
+        Request to end a Service Session for the End User. See
+        ServiceClient.session_end.
+        """
+        await self._transport.delete("/service/v3/sessions",
+                                     self._subject,
+                                     username=user)
+
+    @async_api_call
+    async def verify_totp(self, user, otp, deadline=None):
+        """
+        Verifies a given TOTP is valid for a given user. See
+        ServiceClient.verify_totp.
+        :return: Boolean stating whether the given OTP code is valid.
+        """
+        with call_deadline(deadline):
+            response = await self._transport.post(
+                "/service/v3/totp", self._subject, identifier=user, otp=otp)
+        return self._build_totp_verification(response)
+
+    async def handle_advanced_webhook(self, body, headers, method=None,
+                                      path=None):
+        """
+        Handle an advanced webhook callback. The public key which signed the
+        request is retrieved without blocking before the request is verified.
+        See ServiceClient.handle_advanced_webhook.
+        :return: launchkey.entities.service.SessionEndRequest or
+        launchkey.entities.service.AdvancedAuthorizationResponse
+        """
+        await self._transport.load_public_key_for_jwt(
+            XiovJWTService.get_compact_jwt(headers))
+        return super().handle_advanced_webhook(body, headers, method, path)
+
+    @deprecated
+    async def handle_webhook(self, body, headers, method=None, path=None):
+        """
+        NOTE: This method is being deprecated. Use `handle_advanced_webhook`
+        instead!
+
+        Handle a webhook callback. See ServiceClient.handle_webhook.
+        :return: launchkey.entities.service.SessionEndRequest or
+        launchkey.entities.service.AuthorizationResponse
+        """
+        return self._build_webhook_response(
+            await self.handle_advanced_webhook(body, headers, method, path))
@@ -2,6 +2,7 @@
 
 # pylint: disable=too-few-public-methods, too-many-arguments
 
+from contextlib import ExitStack, contextmanager
 from functools import wraps
 from uuid import UUID
 import warnings
@@ -25,7 +26,9 @@ from launchkey.exceptions import InvalidEntityID, LaunchKeyAPIException, \
     AuthorizationInProgress, Conflict, AuthorizationResponseExists, \
     AuthorizationRequestCanceled, UnknownPolicyException, InvalidFenceType
 from launchkey.transports.base import APIResponse
+from launchkey.utils.metrics import active_metrics
 from launchkey.utils.shared import iso_format, deprecated
+from launchkey.utils import tracing
 
 ERROR_CODE_MAP = {
     "ARG-001": InvalidParameters,
@@ -57,6 +60,57 @@ STATUS_CODE_MAP = {
 }
 
 
+def _map_api_exception(cause):
+    """
+    Maps a LaunchKey API Exception to the specific exception for its error
+    code or status code
+    :param cause: launchkey.exceptions.LaunchKeyAPIException
+    :return: The mapped exception or None if there is no mapping
+    """
+    if not isinstance(cause.message, dict) \
+            or 'error_code' not in cause.message \
+            or 'error_detail' not in cause.message:
+        error_code = "HTTP-%s" % cause.status_code
+        error_detail = "%s" % cause.reason
+        error_data = None
+    else:
+        error_code = cause.message.get('error_code')
+        error_detail = cause.message.get('error_detail')
+        error_data = cause.message.get('error_data')
+    status_code = cause.status_code
+    if error_code in ERROR_CODE_MAP:
+        return ERROR_CODE_MAP[error_code](error_detail, status_code,
+                                          error_data=error_data)
+    if status_code in STATUS_CODE_MAP:
+        return STATUS_CODE_MAP[status_code](error_detail, status_code,
+                                            error_data=error_data)
+    return None
+
+
+@contextmanager
+def _instrument_api_call(method, client, metrics, tracer):
+    """
+    Records metrics and a span for a client method call made within the
+    context
+    :param method: Qualified name of the client method
+    :param client: Client instance making the call
+    :param metrics: launchkey.utils.metrics.SDKMetrics or None
+    :param tracer: launchkey.utils.tracing.Tracer or None
+    """
+    with ExitStack() as stack:
+        if tracer is not None:
+            attributes = {"launchkey.method": method}
+            subject = tracing.subject_type(getattr(client, "_subject",
+                                                   None))
+            if subject is not None:
+                attributes["launchkey.subject_type"] = subject
+            stack.enter_context(tracer.start_span("launchkey." + method,
+                                                  attributes))
+        if metrics is not None:
+            stack.enter_context(metrics.time_api_call(method, client))
+        yield
+
+
 def api_call(function_):
     """
     Decorator for handling LaunchKey API Exceptions
@@ -64,32 +118,60 @@ def api_call(function_):
     :return:
     """
 
+    def call(*args, **kwargs):
+        try:
+            return function_(*args, **kwargs)
+        except LaunchKeyAPIException as cause:
+            mapped = _map_api_exception(cause)
+            if mapped is not None:
+                raise mapped from cause
+            raise
+
     @wraps(function_)
     def wrapper(*args, **kwargs):
         """Decorator function"""
 
+        metrics = active_metrics()
+        tracer = tracing.active_tracer()
+        if metrics is None and tracer is None:
+            return call(*args, **kwargs)
+        with _instrument_api_call(function_.__qualname__,
+                                  args[0] if args else None, metrics,
+                                  tracer):
+            return call(*args, **kwargs)
+
+    return wrapper
+
+
+def async_api_call(function_):
+    """
+    Decorator for handling LaunchKey API Exceptions in coroutines
+    :param function_:
+    :return:
+    """
+
+    async def call(*args, **kwargs):
         try:
-            return function_(*args, **kwargs)
+            return await function_(*args, **kwargs)
         except LaunchKeyAPIException as cause:
-            if not isinstance(cause.message, dict) \
-                    or 'error_code' not in cause.message \
-                    or 'error_detail' not in cause.message:
-                error_code = "HTTP-%s" % cause.status_code
-                error_detail = "%s" % cause.reason
-                error_data = None
-            else:
-                error_code = cause.message.get('error_code')
-                error_detail = cause.message.get('error_detail')
-                error_data = cause.message.get('error_data')
-            status_code = cause.status_code
-            if error_code in ERROR_CODE_MAP:
-                raise ERROR_CODE_MAP[error_code](error_detail, status_code,
-                                                 error_data=error_data)
-            if status_code in STATUS_CODE_MAP:
-                raise STATUS_CODE_MAP[status_code](error_detail, status_code,
-                                                   error_data=error_data)
+            mapped = _map_api_exception(cause)
+            if mapped is not None:
+                raise mapped from cause
             raise
 
+    @wraps(function_)
+    async def wrapper(*args, **kwargs):
+        """Decorator function"""
+
+        metrics = active_metrics()
+        tracer = tracing.active_tracer()
+        if metrics is None and tracer is None:
+            return await call(*args, **kwargs)
+        with _instrument_api_call(function_.__qualname__,
+                                  args[0] if args else None, metrics,
+                                  tracer):
+            return await call(*args, **kwargs)
+
     return wrapper
 
 
@@ -136,7 +218,94 @@ class ServiceManagingBaseClient(BaseClient):
     def __init__(self, subject_type, subject_id, transport, service_base_path):
 
         super().__init__(subject_type, subject_id, transport)
-        self.__service_base_path = service_base_path
+        self._service_base_path = service_base_path
+
+    def _build_services(self, response):
+        """
+        Builds Services from a service list response
+        :param response: launchkey.transports.base.APIResponse
+        :return: List - launchkey.entities.service.Service
+        """
+        services = []
+
+        for service_data in response.data:
+            validated_data = self._validate_response(
+                service_data, ServiceValidator)
+            service = Service(validated_data)
+            services.append(service)
+
+        return services
+
+    def _build_service(self, response):
+        """
+        Builds the first Service from a service list response
+        :param response: launchkey.transports.base.APIResponse
+        :return: launchkey.entities.service.Service
+        """
+        service_data = self._validate_response(response.data[0],
+                                               ServiceValidator)
+        return Service(service_data)
+
+    def _build_public_keys(self, response):
+        """
+        Builds PublicKeys from a public key list response
+        :param response: launchkey.transports.base.APIResponse
+        :return: List - launchkey.entities.shared.PublicKey
+        """
+        public_keys = []
+
+        for key in response.data:
+            key_data = self._validate_response(key, PublicKeyValidator)
+            public_key = PublicKey(key_data)
+            public_keys.append(public_key)
+
+        return public_keys
+
+    @staticmethod
+    def _update_service_kwargs(service_id, name, description, icon,
+                               callback_url, active):
+        """
+        Builds the request data for updating a Service
+        :return: dict
+        """
+        kwargs = {"service_id": str(service_id)}
+        if name is not False:
+            kwargs['name'] = name
+        if description is not False:
+            kwargs['description'] = description
+        if icon is not False:
+            kwargs['icon'] = icon
+        if callback_url is not False:
+            kwargs['callback_url'] = callback_url
+        if active is not None:
+            kwargs['active'] = active
+        return kwargs
+
+    @staticmethod
+    def _add_public_key_kwargs(kwargs, expires, active, key_type):
+        """
+        Adds the optional public key attributes to request data
+        :return: dict
+        """
+        if expires is not None:
+            kwargs['date_expires'] = iso_format(expires)
+        if active is not None:
+            kwargs['active'] = active
+        if key_type is not None:
+            kwargs['key_type'] = key_type.value
+        return kwargs
+
+    @staticmethod
+    def _update_public_key_kwargs(kwargs, expires, active):
+        """
+        Adds the optional public key update attributes to request data
+        :return: dict
+        """
+        if active is not None:
+            kwargs['active'] = active
+        if expires is not False:
+            kwargs['date_expires'] = iso_format(expires)
+        return kwargs
 
     @api_call
     def create_service(self, name, description=None, icon=None,
@@ -156,7 +325,7 @@ class ServiceManagingBaseClient(BaseClient):
         already taken
         :return: String - ID of the Service that is created
         """
-        return self._transport.post(self.__service_base_path,
+        return self._transport.post(self._service_base_path,
                                     self._subject, name=name,
                                     description=description,
                                     icon=icon, callback_url=callback_url,
@@ -170,18 +339,10 @@ class ServiceManagingBaseClient(BaseClient):
         Service details
         """
         response = self._transport.get(
-            self.__service_base_path,
+            self._service_base_path,
             self._subject)
 
-        services = []
-
-        for service_data in response.data:
-            validated_data = self._validate_response(
-                service_data, ServiceValidator)
-            service = Service(validated_data)
-            services.append(service)
-
-        return services
+        return self._build_services(response)
 
     @api_call
     def get_services(self, service_ids):
@@ -196,18 +357,10 @@ class ServiceManagingBaseClient(BaseClient):
         string_service_ids = [str(service_id) for service_id in service_ids]
 
         response = self._transport.post(
-            "{}/list".format(self.__service_base_path),
+            "{}/list".format(self._service_base_path),
             self._subject, service_ids=string_service_ids)
 
-        services = []
-
-        for service_data in response.data:
-            validated_data = self._validate_response(
-                service_data, ServiceValidator)
-            service = Service(validated_data)
-            services.append(service)
-
-        return services
+        return self._build_services(response)
 
     @api_call
     def get_service(self, service_id):
@@ -220,14 +373,10 @@ class ServiceManagingBaseClient(BaseClient):
         Service details
         """
         response = self._transport.post(
-            "{}/list".format(self.__service_base_path),
+            "{}/list".format(self._service_base_path),
             self._subject, service_ids=[str(service_id)])
 
-        service_data = self._validate_response(response.data[0],
-                                               ServiceValidator)
-        service = Service(service_data)
-
-        return service
+        return self._build_service(response)
 
     @api_call
     def update_service(self, service_id, name=False, description=False,
@@ -250,18 +399,9 @@ class ServiceManagingBaseClient(BaseClient):
         found matching the input ID
         :return:
         """
-        kwargs = {"service_id": str(service_id)}
-        if name is not False:
-            kwargs['name'] = name
-        if description is not False:
-            kwargs['description'] = description
-        if icon is not False:
-            kwargs['icon'] = icon
-        if callback_url is not False:
-            kwargs['callback_url'] = callback_url
-        if active is not None:
-            kwargs['active'] = active
-        self._transport.patch(self.__service_base_path, self._subject,
+        kwargs = self._update_service_kwargs(service_id, name, description,
+                                             icon, callback_url, active)
+        self._transport.patch(self._service_base_path, self._subject,
                               **kwargs)
 
     # pylint: disable = duplicate-code
@@ -288,16 +428,12 @@ class ServiceManagingBaseClient(BaseClient):
         :return: MD5 fingerprint (key_id) of the public key,
         IE: e0:2f:a9:5a:76:92:6b:b5:4d:24:67:19:d1:8a:0a:75
         """
-        kwargs = {"service_id": str(service_id), "public_key": public_key}
-        if expires is not None:
-            kwargs['date_expires'] = iso_format(expires)
-        if active is not None:
-            kwargs['active'] = active
-        if key_type is not None:
-            kwargs['key_type'] = key_type.value
+        kwargs = self._add_public_key_kwargs(
+            {"service_id": str(service_id), "public_key": public_key},
+            expires, active, key_type)
 
         key_id = self._transport.post(
-            "{}/keys".format(self.__service_base_path[0:-1]),
+            "{}/keys".format(self._service_base_path[0:-1]),
             self._subject, **kwargs).data['key_id']
         return key_id
 
@@ -315,17 +451,10 @@ class ServiceManagingBaseClient(BaseClient):
         :return: List - launchkey.entities.shared.PublicKey
         """
         response = self._transport.post(
-            "{}/keys/list".format(self.__service_base_path[0:-1]),
+            "{}/keys/list".format(self._service_base_path[0:-1]),
             self._subject, service_id=str(service_id))
 
-        public_keys = []
-
-        for key in response.data:
-            key_data = self._validate_response(key, PublicKeyValidator)
-            public_key = PublicKey(key_data)
-            public_keys.append(public_key)
-
-        return public_keys
+        return self._build_public_keys(response)
 
     @api_call
     def remove_service_public_key(self, service_id, key_id):
@@ -348,7 +477,7 @@ class ServiceManagingBaseClient(BaseClient):
         :return:
         """
         self._transport.delete(
-            "{}/keys".format(self.__service_base_path[0:-1]),
+            "{}/keys".format(self._service_base_path[0:-1]),
             self._subject, service_id=str(service_id), key_id=key_id)
 
     @api_call
@@ -369,14 +498,11 @@ class ServiceManagingBaseClient(BaseClient):
         either does not exist or you do not have sufficient permissions.
         :return:
         """
-        kwargs = {"service_id": str(service_id), "key_id": key_id}
-        if active is not None:
-            kwargs['active'] = active
-        if expires is not False:
-            kwargs['date_expires'] = iso_format(expires)
+        kwargs = self._update_public_key_kwargs(
+            {"service_id": str(service_id), "key_id": key_id}, expires, active)
 
         self._transport.patch(
-            "{}/keys".format(self.__service_base_path[0:-1]),
+            "{}/keys".format(self._service_base_path[0:-1]),
             self._subject, **kwargs)
 
     @deprecated
@@ -394,7 +520,18 @@ class ServiceManagingBaseClient(BaseClient):
         :return: None if policy returned from `get_advanced_service_policy` is
         not a legacy policy
         """
-        current_policy = self.get_advanced_service_policy(service_id)
+        return self._build_service_security_policy(
+            self.get_advanced_service_policy(service_id))
+
+    @staticmethod
+    def _build_service_security_policy(current_policy):
+        """
+        Converts a LegacyPolicy into a ServiceSecurityPolicy
+        :param current_policy: Policy returned from
+        `get_advanced_service_policy`
+        :return: launchkey.entities.service.ServiceSecurityPolicy or None if
+        the policy is not a legacy policy
+        """
         if not isinstance(current_policy, LegacyPolicy):
             warnings.warn("Policy received was not a legacy policy and cannot "
                           "be converted into a ServiceSecurityPolicy.",
@@ -449,9 +586,17 @@ class ServiceManagingBaseClient(BaseClient):
         received
         """
         response = self._transport.post(
-            "{}/policy/item".format(self.__service_base_path[0:-1]),
+            "{}/policy/item".format(self._service_base_path[0:-1]),
             self._subject, service_id=str(service_id))
+        return self._build_advanced_service_policy(response)
 
+    def _build_advanced_service_policy(self, response):
+        """
+        Builds a policy from a service policy response
+        :param response: launchkey.transports.base.APIResponse
+        :return: ConditionalGeoFencePolicy, FactorsPolicy, MethodAmountPolicy
+        or LegacyPolicy
+        """
         policy_data = self._validate_response(response.data,
                                               ServiceSecurityPolicyValidator)
 
@@ -609,7 +754,7 @@ class ServiceManagingBaseClient(BaseClient):
         :return:
         """
         self._transport.put(
-            "{}/policy".format(self.__service_base_path[0:-1]),
+            "{}/policy".format(self._service_base_path[0:-1]),
             self._subject, service_id=str(service_id),
             policy=policy.to_dict())
 
@@ -623,5 +768,5 @@ class ServiceManagingBaseClient(BaseClient):
         :return:
         """
         self._transport.delete(
-            "{}/policy".format(self.__service_base_path[0:-1]),
+            "{}/policy".format(self._service_base_path[0:-1]),
             self._subject, service_id=str(service_id))
@@ -0,0 +1,408 @@
+"""Brokers sharing handled webhooks between the workers of a service"""
+
+import json
+import logging
+import sqlite3
+import threading
+from collections import deque
+from time import monotonic, time
+
+from launchkey.entities.service import AdvancedAuthorizationResponse, \
+    SessionEndRequest
+from launchkey.exceptions import UnexpectedDeviceResponse
+
+DEFAULT_RETENTION = 300.0
+DEFAULT_MAX_MESSAGES = 10000
+DEFAULT_POLL_INTERVAL = 0.1
+
+KIND_AUTHORIZATION_RESPONSE = "authorization_response"
+KIND_SESSION_END = "session_end"
+
+LOGGER = logging.getLogger(__name__)
+
+
+class ResponseBroker(object):
+    """
+    Interface for sharing the AdvancedAuthorizationResponse and
+    SessionEndRequest results of ServiceClient.handle_advanced_webhook with
+    the waiters of any worker. Results are retained for a bounded time so
+    waiters subscribing after a webhook was handled still receive it.
+    Implementations must be safe to use from multiple threads.
+    """
+
+    def publish(self, result):
+        """
+        Publishes a handled webhook
+        :param result: launchkey.entities.service.AdvancedAuthorizationResponse
+        or launchkey.entities.service.SessionEndRequest
+        :return: None
+        """
+        raise NotImplementedError
+
+    def subscribe(self, callback, authorization_request_id=None,
+                  service_user_hash=None):
+        """
+        Subscribes to the results of an authorization request or user.
+        Retained results matching the subscription are delivered
+        immediately.
+        :param callback: Callable given each matching result. It may be
+        called from another thread.
+        :param authorization_request_id: Receive the response to this
+        authorization request
+        :param service_user_hash: Receive the responses and session ends of
+        this user
+        :return: Subscription
+        """
+        raise NotImplementedError
+
+    def close(self):
+        """
+        Releases the resources of the broker
+        :return: None
+        """
+
+
+class Subscription(object):
+    """
+    Subscription of a callback to the results of a ResponseBroker
+    """
+
+    def __init__(self, index, callback, authorization_request_id=None,
+                 service_user_hash=None):
+        """
+        :param index: SubscriptionIndex holding the subscription
+        :param callback: Callable given each matching result
+        :param authorization_request_id: Authorization request ID to match
+        :param service_user_hash: Service user hash to match
+        """
+        if authorization_request_id is None and service_user_hash is None:
+            raise ValueError("An authorization_request_id or "
+                             "service_user_hash is required")
+        self._index = index
+        self.callback = callback
+        self.authorization_request_id = authorization_request_id
+        self.service_user_hash = service_user_hash
+
+    def matches(self, authorization_request_id, service_user_hash):
+        """
+        :return: bool stating whether a result with the given identifiers
+        is delivered to the subscription
+        """
+        return (self.authorization_request_id is not None and
+                self.authorization_request_id == authorization_request_id) \
+            or (self.service_user_hash is not None and
+                self.service_user_hash == service_user_hash)
+
+    def close(self):
+        """
+        Stops receiving results
+        :return: None
+        """
+        self._index.remove(self)
+
+
+class SubscriptionIndex(object):
+    """
+    Thread safe index of the subscriptions of a broker in this process
+    """
+
+    def __init__(self):
+        self._by_request = {}
+        self._by_user = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        with self._lock:
+            return len(set().union(*self._by_request.values(),
+                                   *self._by_user.values()))
+
+    def add(self, callback, authorization_request_id=None,
+            service_user_hash=None):
+        """
+        :return: New Subscription
+        """
+        subscription = Subscription(self, callback, authorization_request_id,
+                                    service_user_hash)
+        with self._lock:
+            for key, index in ((authorization_request_id, self._by_request),
+                               (service_user_hash, self._by_user)):
+                if key is not None:
+                    index.setdefault(key, set()).add(subscription)
+        return subscription
+
+    def remove(self, subscription):
+        """
+        :return: None
+        """
+        with self._lock:
+            for key, index in (
+                    (subscription.authorization_request_id,
+                     self._by_request),
+                    (subscription.service_user_hash, self._by_user)):
+                subscriptions = index.get(key)
+                if subscriptions is not None:
+                    subscriptions.discard(subscription)
+                    if not subscriptions:
+                        del index[key]
+
+    def find(self, authorization_request_id, service_user_hash):
+        """
+        :return: List of the subscriptions matching the identifiers of a
+        result
+        """
+        with self._lock:
+            return list(
+                self._by_request.get(authorization_request_id, set()) |
+                self._by_user.get(service_user_hash, set()))
+
+
+def _identifiers(result):
+    return getattr(result, "authorization_request_id", None), \
+        result.service_user_hash
+
+
+def _notify(subscription, result):
+    """
+    Gives a result to a subscriber, logging rather than raising its errors so
+    that the other subscribers still receive their results
+    """
+    try:
+        subscription.callback(result)
+    except Exception:  # pylint: disable=broad-except
+        LOGGER.exception("Response broker subscriber failed")
+
+
+def _deliver(subscriptions, result):
+    for subscription in subscriptions:
+        _notify(subscription, result)
+
+
+def _deliver_each(subscription, results):
+    for result in results:
+        _notify(subscription, result)
+
+
+class InProcessResponseBroker(ResponseBroker):
+    """
+    ResponseBroker delivering results to subscribers in this process, for
+    applications whose webhooks and waiters share a process
+    """
+
+    def __init__(self, retention=DEFAULT_RETENTION,
+                 max_messages=DEFAULT_MAX_MESSAGES):
+        """
+        :param retention: Seconds results are retained for late subscribers
+        :param max_messages: Maximum number of retained results
+        """
+        self.retention = retention
+        self._subscriptions = SubscriptionIndex()
+        self._retained = deque(maxlen=max_messages)
+        self._lock = threading.Lock()
+
+    def _prune(self, now):
+        while self._retained and \
+                self._retained[0][0] <= now - self.retention:
+            self._retained.popleft()
+
+    def publish(self, result):
+        """
+        Publishes a handled webhook. See ResponseBroker.publish.
+        """
+        with self._lock:
+            now = monotonic()
+            self._prune(now)
+            self._retained.append((now, result))
+            subscriptions = self._subscriptions.find(*_identifiers(result))
+        _deliver(subscriptions, result)
+
+    def subscribe(self, callback, authorization_request_id=None,
+                  service_user_hash=None):
+        """
+        Subscribes to the results of an authorization request or user. See
+        ResponseBroker.subscribe.
+        """
+        with self._lock:
+            subscription = self._subscriptions.add(
+                callback, authorization_request_id, service_user_hash)
+            self._prune(monotonic())
+            retained = [result for _, result in self._retained
+                        if subscription.matches(*_identifiers(result))]
+        _deliver_each(subscription, retained)
+        return subscription
+
+
+# pylint: disable=too-many-instance-attributes,too-many-arguments
+class SQLiteResponseBroker(ResponseBroker):
+    """
+    ResponseBroker sharing results between the worker processes of a host
+    through a SQLite database. A listener thread polls the database for
+    new results while there are subscribers.
+
+    Authorization responses are stored as received in the webhook, with the
+    device response still encrypted to the service key, and decoded by the
+    subscribing worker with its own transport. The database must be in a
+    directory which only the user running the SDK can write to.
+    """
+
+    def __init__(self, path, transport, retention=DEFAULT_RETENTION,
+                 max_messages=DEFAULT_MAX_MESSAGES,
+                 poll_interval=DEFAULT_POLL_INTERVAL):
+        """
+        :param path: Path of the SQLite database file
+        :param transport: Transport of the service client decrypting the
+        device responses, IE launchkey.transports.JOSETransport
+        :param retention: Seconds results are retained for late subscribers
+        :param max_messages: Maximum number of retained results
+        :param poll_interval: Seconds between the checks for new results
+        """
+        self.path = path
+        self.retention = retention
+        self.max_messages = max_messages
+        self.poll_interval = poll_interval
+        self._transport = transport
+        self._subscriptions = SubscriptionIndex()
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, timeout=5.0,
+                                           check_same_thread=False,
+                                           isolation_level=None)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS launchkey_webhooks ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, published REAL NOT NULL, "
+            "authorization_request_id TEXT, service_user_hash TEXT, "
+            "kind TEXT NOT NULL, payload TEXT NOT NULL)")
+        for column in ("authorization_request_id", "service_user_hash"):
+            self._connection.execute(
+                "CREATE INDEX IF NOT EXISTS launchkey_webhooks_%s ON "
+                "launchkey_webhooks (%s)" % (column, column))
+        self._last_id = self._connection.execute(
+            "SELECT COALESCE(MAX(id), 0) FROM launchkey_webhooks"
+        ).fetchone()[0]
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    @staticmethod
+    def _encode(result):
+        if isinstance(result, SessionEndRequest):
+            return KIND_SESSION_END, json.dumps(
+                {"service_user_hash": result.service_user_hash,
+                 "logout_requested": result.logout_requested})
+        return KIND_AUTHORIZATION_RESPONSE, json.dumps(result.data)
+
+    def _decode(self, kind, payload):
+        """
+        :return: The decoded result or None when it cannot be decoded by
+        this worker
+        """
+        data = json.loads(payload)
+        if kind == KIND_SESSION_END:
+            return SessionEndRequest(data["service_user_hash"],
+                                     data["logout_requested"])
+        try:
+            return AdvancedAuthorizationResponse(data, self._transport)
+        except (UnexpectedDeviceResponse, KeyError):
+            return None
+
+    def publish(self, result):
+        """
+        Publishes a handled webhook to all workers using the database and
+        removes the results past their retention. See
+        ResponseBroker.publish.
+        """
+        kind, payload = self._encode(result)
+        authorization_request_id, service_user_hash = _identifiers(result)
+        now = time()
+        with self._lock:
+            self._connection.execute("BEGIN IMMEDIATE")
+            try:
+                cursor = self._connection.execute(
+                    "INSERT INTO launchkey_webhooks (published, "
+                    "authorization_request_id, service_user_hash, kind, "
+                    "payload) VALUES (?, ?, ?, ?, ?)",
+                    (now, authorization_request_id, service_user_hash, kind,
+                     payload))
+                self._connection.execute(
+                    "DELETE FROM launchkey_webhooks WHERE published <= ? OR "
+                    "id <= ?", (now - self.retention,
+                                cursor.lastrowid - self.max_messages))
+                self._connection.execute("COMMIT")
+            except BaseException:
+                self._connection.execute("ROLLBACK")
+                raise
+
+    def subscribe(self, callback, authorization_request_id=None,
+                  service_user_hash=None):
+        """
+        Subscribes to the results of an authorization request or user. See
+        ResponseBroker.subscribe.
+        """
+        with self._lock:
+            subscription = self._subscriptions.add(
+                callback, authorization_request_id, service_user_hash)
+            rows = self._connection.execute(
+                "SELECT kind, payload FROM launchkey_webhooks WHERE id <= ? "
+                "AND published > ? AND (authorization_request_id = ? OR "
+                "service_user_hash = ?) ORDER BY id",
+                (self._last_id, time() - self.retention,
+                 authorization_request_id, service_user_hash)).fetchall()
+            if self._thread is None:
+                self._stop_event.clear()
+                self._thread = threading.Thread(
+                    target=self._run, name="launchkey-response-broker",
+                    daemon=True)
+                self._thread.start()
+        _deliver_each(subscription, [
+            result for result in (self._decode(*row) for row in rows)
+            if result is not None])
+        return subscription
+
+    def poll(self):
+        """
+        Delivers the results published since the last poll to the matching
+        subscribers
+        :return: Number of results delivered
+        """
+        deliveries = []
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT id, authorization_request_id, service_user_hash, "
+                "kind, payload FROM launchkey_webhooks WHERE id > ? "
+                "ORDER BY id", (self._last_id,)).fetchall()
+            for row_id, authorization_request_id, service_user_hash, kind, \
+                    payload in rows:
+                self._last_id = row_id
+                subscriptions = self._subscriptions.find(
+                    authorization_request_id, service_user_hash)
+                if subscriptions:
+                    deliveries.append((subscriptions, kind, payload))
+        for subscriptions, kind, payload in deliveries:
+            try:
+                result = self._decode(kind, payload)
+            except Exception:  # pylint: disable=broad-except
+                LOGGER.exception("Unable to decode a %s result of the "
+                                 "response broker", kind)
+                continue
+            if result is not None:
+                _deliver(subscriptions, result)
+        return len(deliveries)
+
+    def _run(self):
+        while not self._stop_event.wait(self.poll_interval):
+            if len(self._subscriptions):
+                try:
+                    self.poll()
+                except Exception:  # pylint: disable=broad-except
+                    # Such as the database being locked by another worker
+                    LOGGER.exception("Response broker poll failed")
+
+    def close(self):
+        """
+        Stops the listener thread and closes the database connection
+        :return: None
+        """
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        with self._lock:
+            self._connection.close()
@@ -48,13 +48,30 @@ class DirectoryClient(ServiceManagingBaseClient):
         :return: launchkey.entities.directory.DirectoryUserDeviceLinkData -
         Contains data needed to complete the linking process
         """
+        response = self._transport.post("/directory/v3/devices",
+                                        self._subject,
+                                        **self._link_device_kwargs(user_id,
+                                                                   ttl))
+        return self._build_device_link_data(response)
+
+    @staticmethod
+    def _link_device_kwargs(user_id, ttl):
+        """
+        Builds the request data for linking a device. See link_device for
+        parameter details.
+        :return: dict
+        """
         kwargs = {"identifier": user_id}
         if ttl is not None:
             kwargs['ttl'] = ttl
+        return kwargs
 
-        response = self._transport.post("/directory/v3/devices",
-                                        self._subject,
-                                        **kwargs)
+    def _build_device_link_data(self, response):
+        """
+        Validates the response to a device link request
+        :param response: launchkey.transports.base.APIResponse
+        :return: launchkey.entities.directory.DirectoryUserDeviceLinkData
+        """
         data = self._validate_response(
             response,
             DirectoryUserDeviceLinkResponseValidator)
@@ -102,6 +102,20 @@ class OrganizationClient(ServiceManagingBaseClient):
         not correct
         :return:
         """
+        kwargs = self._update_directory_kwargs(
+            directory_id, ios_p12, android_key, active,
+            denial_context_inquiry_enabled, webhook_url)
+        self._transport.patch("/organization/v3/directories", self._subject,
+                              **kwargs)
+
+    @staticmethod
+    def _update_directory_kwargs(directory_id, ios_p12, android_key, active,
+                                 denial_context_inquiry_enabled, webhook_url):
+        """
+        Builds the request data for updating a Directory. See
+        update_directory for parameter details.
+        :return: dict
+        """
         kwargs = {"directory_id": str(directory_id)}
         if ios_p12 is not False:
             kwargs['ios_p12'] = encodebytes(ios_p12).decode(
@@ -115,8 +129,7 @@ class OrganizationClient(ServiceManagingBaseClient):
                 denial_context_inquiry_enabled
         if webhook_url is not False:
             kwargs['webhook_url'] = webhook_url
-        self._transport.patch("/organization/v3/directories", self._subject,
-                              **kwargs)
+        return kwargs
 
     @api_call
     def get_directory_public_keys(self, directory_id):
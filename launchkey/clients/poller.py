@@ -0,0 +1,626 @@
+"""Pollers waiting on the responses of many authorization requests"""
+
+import asyncio
+import heapq
+import itertools
+import threading
+from bisect import bisect_right, insort
+from collections import deque
+from concurrent.futures import Future, InvalidStateError, ThreadPoolExecutor
+from time import monotonic
+
+from launchkey.exceptions import RateLimited, CircuitBreakerOpen, \
+    DeadlineExceeded
+from launchkey.transports.retry import RetryPolicy
+
+DEFAULT_INTERVAL = 1.0
+DEFAULT_MAX_WORKERS = 10
+DEFAULT_MIN_INTERVAL = 0.25
+DEFAULT_MAX_INTERVAL = 15.0
+DEFAULT_TARGET_PROBABILITY = 0.1
+DEFAULT_MIN_SAMPLES = 20
+DEFAULT_WINDOW_SIZE = 1000
+
+
+class PendingAuthorization(object):  # pylint: disable=too-few-public-methods
+    """
+    Authorization request waiting for a response
+    """
+
+    __slots__ = ("authorization_request_id", "future", "submitted", "expires",
+                 "polls")
+
+    def __init__(self, authorization_request_id, future, submitted,
+                 expires=None):
+        """
+        :param authorization_request_id: Unique identifier returned by
+        authorization_request()
+        :param future: Future receiving the response
+        :param submitted: Monotonic time the request was given to the poller
+        :param expires: Monotonic time after which the request is canceled
+        or None
+        """
+        self.authorization_request_id = authorization_request_id
+        self.future = future
+        self.submitted = submitted
+        self.expires = expires
+        self.polls = 0
+
+    def expired(self, now):
+        """
+        :param now: Current monotonic time
+        :return: bool stating whether the caller's deadline has passed
+        """
+        return self.expires is not None and now >= self.expires
+
+
+class PollSchedule(object):
+    """
+    Priority queue of pending authorizations by their next poll time
+    """
+
+    def __init__(self):
+        self._heap = []
+        self._sequence = itertools.count()
+
+    def __len__(self):
+        return len(self._heap)
+
+    def push(self, when, pending):
+        """
+        :param when: Monotonic time of the next poll
+        :param pending: PendingAuthorization
+        :return: None
+        """
+        heapq.heappush(self._heap, (when, next(self._sequence), pending))
+
+    def pop_due(self, now):
+        """
+        :param now: Current monotonic time
+        :return: List of the pending authorizations due to be polled
+        """
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            due.append(heapq.heappop(self._heap)[2])
+        return due
+
+    def next_time(self):
+        """
+        :return: Monotonic time of the earliest poll or None when empty
+        """
+        return self._heap[0][0] if self._heap else None
+
+    def clear(self):
+        """
+        Removes all pending authorizations
+        :return: List of the removed pending authorizations
+        """
+        pending = [entry[2] for entry in self._heap]
+        self._heap = []
+        return pending
+
+
+# pylint: disable=too-many-arguments
+class ResponseLatencyModel(object):
+    """
+    Thread safe model of how long users of each service take to respond to
+    authorization requests, learned from the most recent responses. It
+    spaces polls so that each one has about target_probability chance of
+    finding a response which has not arrived yet. Polls are dense while
+    responses usually arrive and sparse in the long tail.
+
+    A model may be shared by the pollers of several services.
+    """
+
+    def __init__(self, min_interval=DEFAULT_MIN_INTERVAL,
+                 max_interval=DEFAULT_MAX_INTERVAL,
+                 target_probability=DEFAULT_TARGET_PROBABILITY,
+                 min_samples=DEFAULT_MIN_SAMPLES,
+                 window_size=DEFAULT_WINDOW_SIZE):
+        """
+        :param min_interval: Shortest number of seconds between two polls
+        :param max_interval: Longest number of seconds between two polls
+        :param target_probability: Chance of a poll finding the response
+        given it had not arrived at the previous poll
+        :param min_samples: Number of responses of a service needed before
+        its intervals are learned
+        :param window_size: Number of the most recent responses of a service
+        kept
+        """
+        if not 0 < target_probability <= 1:
+            raise ValueError("target_probability must be in (0, 1]")
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.target_probability = target_probability
+        self.min_samples = min_samples
+        self.window_size = window_size
+        # Service to the recorded latencies in arrival and sorted order
+        self._samples = {}
+        self._lock = threading.Lock()
+
+    def record(self, service, seconds):
+        """
+        Records the time a user took to respond
+        :param service: Key of the service IE the client subject
+        :param seconds: Seconds from the submission of the authorization
+        request to its response being received
+        :return: None
+        """
+        with self._lock:
+            arrivals, ordered = self._samples.setdefault(
+                service, (deque(), []))
+            if len(arrivals) >= self.window_size:
+                oldest = arrivals.popleft()
+                del ordered[bisect_right(ordered, oldest) - 1]
+            arrivals.append(seconds)
+            insort(ordered, seconds)
+
+    def get_interval(self, service, elapsed, default):
+        """
+        :param service: Key of the service IE the client subject
+        :param elapsed: Seconds the authorization request has been pending
+        :param default: Interval used until enough responses are recorded
+        :return: Seconds to wait before the next poll
+        """
+        with self._lock:
+            ordered = self._samples.get(service, (None, ()))[1]
+            if len(ordered) < self.min_samples:
+                return default
+            start = bisect_right(ordered, elapsed)
+            remaining = len(ordered) - start
+            if not remaining:
+                return self.max_interval
+            # Wait for the share of the responses still to come matching the
+            # target probability
+            count = max(1, int(self.target_probability * remaining))
+            interval = ordered[start + count - 1] - elapsed
+        return min(max(interval, self.min_interval), self.max_interval)
+
+    @property
+    def stats(self):
+        """
+        :return: dict of each service to the number of recorded "samples"
+        and their "median" and "p90" in seconds
+        """
+        with self._lock:
+            return {
+                service: {
+                    "samples": len(ordered),
+                    "median": ordered[(len(ordered) - 1) // 2],
+                    "p90": ordered[int(0.9 * (len(ordered) - 1))]}
+                for service, (_, ordered) in self._samples.items()}
+
+
+def _is_transient(error):
+    """
+    :param error: Exception raised while polling
+    :return: bool stating whether polling should continue
+    """
+    if isinstance(error, (RateLimited, CircuitBreakerOpen) +
+                  RetryPolicy.network_errors):
+        return True
+    status_code = getattr(getattr(error, "response", None), "status_code",
+                          None)
+    return status_code is not None and status_code >= 500
+
+
+def _resolve(future, result=None, error=None):
+    """
+    Sets the outcome of a future unless the caller canceled it
+    """
+    try:
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+    except (InvalidStateError, asyncio.InvalidStateError):
+        pass
+
+
+# pylint: disable=too-many-instance-attributes
+class BaseAuthorizationResponsePoller(object):
+    """
+    Shared logic of the synchronous and asyncio pollers
+    """
+
+    def __init__(self, client, interval, latency_model=None,
+                 max_polls_per_second=None):
+        """
+        :param client: Service client polling the LaunchKey API
+        :param interval: Seconds between the polls of each authorization
+        :param latency_model: Optional ResponseLatencyModel learning the
+        intervals
+        :param max_polls_per_second: Optional budget of polls per second
+        shared by all pending authorizations
+        """
+        self._client = client
+        self.interval = interval
+        self.latency_model = latency_model
+        self.max_polls_per_second = max_polls_per_second
+        self._service = getattr(client, "_subject", None)
+        self._schedule = PollSchedule()
+        self._closed = False
+        self._counts = {"submitted": 0, "completed": 0, "polls": 0,
+                        "expired": 0, "resolved_elsewhere": 0,
+                        "cancelled": 0}
+        # Polls made for the authorizations which are no longer pending
+        self._finished_polls = 0
+
+    def _new_pending(self, authorization_request_id, future, deadline):
+        now = monotonic()
+        self._counts["submitted"] += 1
+        pending = PendingAuthorization(
+            authorization_request_id, future, now,
+            None if deadline is None else now + deadline)
+        if self.latency_model is not None:
+            future.add_done_callback(lambda _: self._record_latency(pending))
+        return pending
+
+    def _record_latency(self, pending):
+        """
+        Records how long the user took to respond once the future of an
+        authorization resolves with a response, whether it came from a poll
+        or was resolved elsewhere such as by a webhook
+        :return: None
+        """
+        future = pending.future
+        if not future.cancelled() and future.exception() is None:
+            self.latency_model.record(self._service,
+                                      monotonic() - pending.submitted)
+
+    def _next_poll_time(self, pending, now):
+        """
+        :return: Monotonic time at which to poll a pending authorization
+        next
+        """
+        interval = self.interval
+        if self.latency_model is not None:
+            interval = self.latency_model.get_interval(
+                self._service, now - pending.submitted, self.interval)
+        if self.max_polls_per_second:
+            # Polling every pending authorization at this interval stays
+            # within the budget
+            interval = max(interval, (len(self._schedule) + 1) /
+                           float(self.max_polls_per_second))
+        when = now + interval
+        if pending.expires is not None:
+            when = min(when, pending.expires)
+        return when
+
+    def _first_poll_time(self, pending, delay):
+        """
+        :return: Monotonic time at which to poll a new pending authorization
+        """
+        if delay is None:
+            return self._next_poll_time(pending, pending.submitted)
+        when = pending.submitted + delay
+        if pending.expires is not None:
+            when = min(when, pending.expires)
+        return when
+
+    def _handle_outcome(self, pending, response=None, error=None):
+        """
+        Completes the future of a polled authorization when the poll gave a
+        final outcome
+        :return: bool stating whether it must be polled again
+        """
+        pending.polls += 1
+        self._counts["polls"] += 1
+        if error is not None and not _is_transient(error):
+            self._finish(pending, "completed")
+            _resolve(pending.future, error=error)
+            return False
+        if error is None and response is not None:
+            self._finish(pending, "completed")
+            _resolve(pending.future, response)
+            return False
+        return True
+
+    def _finish(self, pending, outcome):
+        self._counts[outcome] += 1
+        self._finished_polls += pending.polls
+
+    def _finish_resolved(self, pending):
+        """
+        Accounts for an authorization whose future was completed outside the
+        poller, by a webhook, or canceled by the caller or by closing the
+        poller
+        :return: None
+        """
+        self._finish(pending, "cancelled" if pending.future.cancelled()
+                     else "resolved_elsewhere")
+
+    def _expire(self, pending):
+        self._finish(pending, "expired")
+        _resolve(pending.future, error=DeadlineExceeded(
+            "Authorization request %s was not responded to before the "
+            "deadline and was canceled" % pending.authorization_request_id))
+
+    @property
+    def pending(self):
+        """
+        :return: Number of authorizations waiting for their next poll
+        """
+        return len(self._schedule)
+
+    @property
+    def stats(self):
+        """
+        :return: dict with the number of authorizations "submitted",
+        "completed" by a response or error, "expired" by the caller's
+        deadline, "resolved_elsewhere" such as by a webhook, and
+        "cancelled", the number of "polls" made, and the average
+        "polls_per_authorization" of the authorizations no longer pending
+        """
+        stats = dict(self._counts)
+        finished = stats["completed"] + stats["expired"] + \
+            stats["resolved_elsewhere"] + stats["cancelled"]
+        stats["polls_per_authorization"] = \
+            self._finished_polls / float(finished) if finished else 0.0
+        return stats
+
+
+class AuthorizationResponsePoller(BaseAuthorizationResponsePoller):
+    """
+    Polls the responses of any number of authorization requests with a
+    single scheduling thread and a bounded pool of worker threads. Each
+    request is polled every interval seconds with
+    ServiceClient.get_advanced_authorization_response until it is responded
+    to, times out, or is canceled.
+
+    Connection errors, 5xx errors, RateLimited, and CircuitBreakerOpen are
+    retried on the next poll. Any other error, such as RequestTimedOut or
+    AuthorizationRequestCanceled, is set on the future.
+    """
+
+    def __init__(self, client, interval=DEFAULT_INTERVAL,
+                 max_workers=DEFAULT_MAX_WORKERS, latency_model=None,
+                 max_polls_per_second=None):
+        """
+        :param client: launchkey.clients.ServiceClient
+        :param interval: Seconds between the polls of each authorization, or
+        until latency_model has learned the intervals
+        :param max_workers: Maximum number of concurrent polls
+        :param latency_model: Optional ResponseLatencyModel polling densely
+        while users usually respond and sparsely afterwards
+        :param max_polls_per_second: Optional budget of polls per second
+        shared by all pending authorizations. Intervals are stretched evenly
+        when there are too many to poll within it.
+        """
+        super().__init__(client, interval, latency_model,
+                         max_polls_per_second)
+        self._executor = ThreadPoolExecutor(
+            max_workers, thread_name_prefix="launchkey-poller")
+        self._condition = threading.Condition()
+        self._thread = None
+
+    def submit(self, authorization_request_id, deadline=None, callback=None,
+               delay=None):
+        """
+        Starts polling for the response to an authorization request
+        :param authorization_request_id: Unique identifier returned by
+        authorization_request()
+        :param deadline: Seconds after which the authorization request is
+        canceled with cancel_authorization_request and the future raises
+        launchkey.exceptions.DeadlineExceeded. None waits until the request
+        is responded to or times out.
+        :param callback: Optional callable given the future once it is done
+        :param delay: Optional seconds before the first poll. Polling stops
+        without a request if the future is resolved in the meantime, for
+        example by a webhook.
+        :return: concurrent.futures.Future resolving to a
+        launchkey.entities.service.AdvancedAuthorizationResponse. Canceling
+        it stops polling.
+        :raises RuntimeError: when the poller is closed
+        """
+        future = Future()
+        if callback is not None:
+            future.add_done_callback(callback)
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("The poller is closed")
+            pending = self._new_pending(authorization_request_id, future,
+                                        deadline)
+            self._schedule.push(self._first_poll_time(pending, delay),
+                                pending)
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="launchkey-poller-scheduler",
+                    daemon=True)
+                self._thread.start()
+            self._condition.notify()
+        return future
+
+    def _run(self):
+        with self._condition:
+            while not self._closed:
+                now = monotonic()
+                for pending in self._schedule.pop_due(now):
+                    self._executor.submit(self._poll, pending)
+                next_time = self._schedule.next_time()
+                self._condition.wait(
+                    None if next_time is None else next_time - now)
+
+    def _poll(self, pending):
+        if pending.future.done():
+            with self._condition:
+                self._finish_resolved(pending)
+            return
+        if pending.expired(monotonic()):
+            self._cancel_authorization(pending)
+            return
+        response = error = None
+        try:
+            response = self._client.get_advanced_authorization_response(
+                pending.authorization_request_id)
+        except Exception as raised:  # pylint: disable=broad-except
+            error = raised
+        with self._condition:
+            if not self._handle_outcome(pending, response, error):
+                return
+            if self._closed:
+                pending.future.cancel()
+                self._finish_resolved(pending)
+                return
+            self._schedule.push(self._next_poll_time(pending, monotonic()),
+                                pending)
+            self._condition.notify()
+
+    def _cancel_authorization(self, pending):
+        try:
+            self._client.cancel_authorization_request(
+                pending.authorization_request_id)
+        except Exception:  # pylint: disable=broad-except
+            pass
+        with self._condition:
+            self._expire(pending)
+
+    def close(self, wait=True):
+        """
+        Stops polling and cancels the futures of all pending authorizations
+        :param wait: Whether to wait for polls in progress to finish
+        :return: None
+        """
+        with self._condition:
+            self._closed = True
+            pending = self._schedule.clear()
+            self._condition.notify()
+        for entry in pending:
+            entry.future.cancel()
+        with self._condition:
+            for entry in pending:
+                self._finish_resolved(entry)
+        if self._thread is not None:
+            self._thread.join()
+        self._executor.shutdown(wait)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+class AsyncAuthorizationResponsePoller(BaseAuthorizationResponsePoller):
+    """
+    Polls the responses of any number of authorization requests from a
+    single task on the running event loop with at most max_concurrency
+    polls at once. It behaves like AuthorizationResponsePoller and
+    requires a launchkey.clients.AsyncServiceClient.
+    """
+
+    def __init__(self, client, interval=DEFAULT_INTERVAL,
+                 max_concurrency=DEFAULT_MAX_WORKERS, latency_model=None,
+                 max_polls_per_second=None):
+        """
+        :param client: launchkey.clients.AsyncServiceClient
+        :param interval: Seconds between the polls of each authorization, or
+        until latency_model has learned the intervals
+        :param max_concurrency: Maximum number of concurrent polls
+        :param latency_model: Optional ResponseLatencyModel
+        :param max_polls_per_second: Optional budget of polls per second
+        shared by all pending authorizations
+        """
+        super().__init__(client, interval, latency_model,
+                         max_polls_per_second)
+        self.max_concurrency = max_concurrency
+        self._semaphore = None
+        self._wakeup = None
+        self._task = None
+        self._polls = set()
+
+    def submit(self, authorization_request_id, deadline=None, callback=None,
+               delay=None):
+        """
+        Starts polling for the response to an authorization request. Must be
+        called on the event loop. See AuthorizationResponsePoller.submit.
+        :return: asyncio.Future resolving to a
+        launchkey.entities.service.AdvancedAuthorizationResponse
+        :raises RuntimeError: when the poller is closed
+        """
+        if self._closed:
+            raise RuntimeError("The poller is closed")
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        if callback is not None:
+            future.add_done_callback(callback)
+        pending = self._new_pending(authorization_request_id, future,
+                                    deadline)
+        self._schedule.push(self._first_poll_time(pending, delay), pending)
+        if self._task is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._wakeup = asyncio.Event()
+            self._task = loop.create_task(self._run())
+        self._wakeup.set()
+        return future
+
+    async def _run(self):
+        while not self._closed:
+            now = monotonic()
+            for pending in self._schedule.pop_due(now):
+                task = asyncio.ensure_future(self._poll(pending))
+                self._polls.add(task)
+                task.add_done_callback(self._polls.discard)
+            next_time = self._schedule.next_time()
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(
+                    self._wakeup.wait(),
+                    None if next_time is None else next_time - now)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _poll(self, pending):
+        async with self._semaphore:
+            if pending.future.done():
+                self._finish_resolved(pending)
+                return
+            if pending.expired(monotonic()):
+                await self._cancel_authorization(pending)
+                return
+            response = error = None
+            try:
+                response = \
+                    await self._client.get_advanced_authorization_response(
+                        pending.authorization_request_id)
+            except Exception as raised:  # pylint: disable=broad-except
+                error = raised
+        if not self._handle_outcome(pending, response, error):
+            return
+        if self._closed:
+            pending.future.cancel()
+            self._finish_resolved(pending)
+            return
+        self._schedule.push(self._next_poll_time(pending, monotonic()),
+                            pending)
+        self._wakeup.set()
+
+    async def _cancel_authorization(self, pending):
+        try:
+            await self._client.cancel_authorization_request(
+                pending.authorization_request_id)
+        except Exception:  # pylint: disable=broad-except
+            pass
+        self._expire(pending)
+
+    async def aclose(self):
+        """
+        Stops polling, cancels the futures of all pending authorizations,
+        and waits for polls in progress to finish
+        :return: None
+        """
+        self._closed = True
+        for entry in self._schedule.clear():
+            entry.future.cancel()
+            self._finish_resolved(entry)
+        if self._task is not None:
+            self._wakeup.set()
+            await self._task
+        if self._polls:
+            await asyncio.gather(*self._polls, return_exceptions=True)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        await self.aclose()
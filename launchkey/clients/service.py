@@ -2,6 +2,7 @@
 
 # pylint: disable=too-many-arguments
 
+import logging
 import warnings
 from json import loads
 
@@ -9,6 +10,7 @@ from launchkey.exceptions import InvalidParameters, \
     UnableToDecryptWebhookRequest, UnexpectedAuthorizationResponse, \
     UnexpectedAPIResponse, UnexpectedWebhookRequest, XiovJWTValidationFailure,\
     XiovJWTDecryptionFailure
+from launchkey.transports.deadline import call_deadline
 from launchkey.utils.shared import XiovJWTService, deprecated
 from launchkey.entities.validation import AuthorizationResponseValidator, \
     AuthorizeSSEValidator, AuthorizeValidator, ServiceTOTPVerificationValidator
@@ -16,6 +18,10 @@ from launchkey.entities.service import AuthPolicy, AuthorizationResponse, \
     SessionEndRequest, AuthorizationRequest, AdvancedAuthorizationResponse, \
     DenialReason
 from .base import BaseClient, api_call
+from .poller import AuthorizationResponsePoller
+from .waiters import AuthorizationResponseRegistry, DEFAULT_FALLBACK_AFTER
+
+LOGGER = logging.getLogger(__name__)
 
 
 class ServiceClient(BaseClient):
@@ -24,6 +30,59 @@ class ServiceClient(BaseClient):
     def __init__(self, subject_id, transport):
         super().__init__('svc', subject_id, transport)
         self.x_iov_jwt_service = XiovJWTService(self._transport, self._subject)
+        self.response_registry = None
+        self.response_poller = None
+        self.response_broker = None
+        self._fallback_after = None
+
+    def enable_webhook_waiters(self, registry=None, poller=None,
+                               fallback_after=DEFAULT_FALLBACK_AFTER,
+                               broker=None):
+        """
+        Makes the AuthorizationRequest returned by authorization_request
+        carry a response_future which resolves to the
+        AdvancedAuthorizationResponse as soon as handle_advanced_webhook
+        handles its webhook. Requests whose webhook has not arrived after
+        fallback_after seconds are polled for instead.
+        :param registry: AuthorizationResponseRegistry shared with the
+        clients handling the webhooks. A new one is used by default.
+        :param poller: AuthorizationResponsePoller polling for the responses
+        whose webhook is late. One polling with this client is created by
+        default and must be closed by the caller.
+        :param fallback_after: Seconds to wait for a webhook before polling
+        :param broker: Optional launchkey.clients.broker.ResponseBroker which
+        handle_advanced_webhook publishes to and the waiters subscribe to,
+        for webhooks handled by other workers
+        :return: None
+        """
+        self.response_registry = registry or AuthorizationResponseRegistry()
+        self.response_poller = poller or self._make_response_poller()
+        self.response_broker = broker
+        self._fallback_after = fallback_after
+
+    def _make_response_poller(self):
+        return AuthorizationResponsePoller(self)
+
+    def _wait_for_response(self, authorization_request):
+        """
+        Gives an AuthorizationRequest a future resolving to its response when
+        webhook waiters are enabled
+        :param authorization_request:
+        launchkey.entities.service.AuthorizationRequest
+        :return: The given authorization_request
+        """
+        if self.response_registry is not None:
+            authorization_request_id = authorization_request.auth_request
+            future = self.response_poller.submit(
+                authorization_request_id, delay=self._fallback_after)
+            self.response_registry.register(authorization_request_id, future)
+            if self.response_broker is not None:
+                subscription = self.response_broker.subscribe(
+                    self.response_registry.resolve,
+                    authorization_request_id=authorization_request_id)
+                future.add_done_callback(lambda _: subscription.close())
+            authorization_request.response_future = future
+        return authorization_request
 
     @api_call
     def authorize(self, user, context=None, policy=None, title=None, ttl=None,
@@ -80,7 +139,8 @@ class ServiceClient(BaseClient):
     @api_call
     def authorization_request(self, user, context=None, policy=None,
                               title=None, ttl=None, push_title=None,
-                              push_body=None, denial_reasons=None):
+                              push_body=None, denial_reasons=None,
+                              deadline=None):
         """
         Authorize a transaction for the provided user. This get_service_service
         method would be utilized if you are using this as a secondary factor
@@ -113,6 +173,10 @@ class ServiceClient(BaseClient):
         are given the defaults will be used. If a list is provided and denial
         context inquiry is not enabled for the Directory, this request will
         error. This feature is only available for Directory Services.
+        :param deadline: Seconds the call may take, including retries and
+        the server time and public key requests it needs, before
+        launchkey.exceptions.DeadlineExceeded is raised. None for no
+        deadline.
         :raise: launchkey.exceptions.InvalidParameters - Input parameters were
         not correct
         :raise: launchkey.exceptions.InvalidPolicyInput - Input policy was not
@@ -130,9 +194,30 @@ class ServiceClient(BaseClient):
         request already exists for the requesting user. That request either
         needs to be responded to, expire out, or be canceled with
         cancel_authorization_request().
+        :raise: launchkey.exceptions.DeadlineExceeded - The deadline passed
+        before the LaunchKey API responded
         :return AuthorizationResponse: Unique identifier for tracking status
         of the authorization request
         """
+        with call_deadline(deadline):
+            response = self._transport.post(
+                "/service/v3/auths", self._subject,
+                **self._authorization_request_kwargs(
+                    user, context, policy, title, ttl, push_title, push_body,
+                    denial_reasons))
+        return self._wait_for_response(
+            self._build_authorization_request(response))
+
+    @staticmethod
+    def _authorization_request_kwargs(user, context, policy, title, ttl,
+                                      push_title, push_body, denial_reasons):
+        """
+        Builds the request data for an authorization request. See
+        authorization_request for parameter details.
+        :return: dict
+        :raise: launchkey.exceptions.InvalidParameters - Input parameters were
+        not correct
+        """
         kwargs = {'username': user}
         if context is not None:
             kwargs['context'] = context
@@ -167,19 +252,30 @@ class ServiceClient(BaseClient):
                 )
             kwargs['denial_reasons'] = parsed_reasons
 
-        response = self._transport.post("/service/v3/auths",
-                                        self._subject, **kwargs)
+        return kwargs
+
+    def _build_authorization_request(self, response):
+        """
+        Builds an AuthorizationRequest from an authorization request response
+        :param response: launchkey.transports.base.APIResponse
+        :return: launchkey.entities.service.AuthorizationRequest
+        """
         data = self._validate_response(response, AuthorizeValidator)
         return AuthorizationRequest(data.get('auth_request'),
                                     data.get('push_package'),
                                     data.get('device_ids'))
 
     @api_call
-    def get_advanced_authorization_response(self, authorization_request_id):
+    def get_advanced_authorization_response(self, authorization_request_id,
+                                            deadline=None):
         """
         Request the response for a previous authorization call.
         :param authorization_request_id: Unique identifier returned by
         authorization_request()
+        :param deadline: Seconds the call may take, including retries and
+        the server time and public key requests it needs, before
+        launchkey.exceptions.DeadlineExceeded is raised. None for no
+        deadline.
         :raise: launchkey.exceptions.InvalidParameters - Input parameters were
         not correct
         :raise: launchkey.exceptions.RequestTimedOut - The authorization
@@ -188,15 +284,26 @@ class ServiceClient(BaseClient):
         :raise: launchkey.exceptions.AuthorizationRequestCanceled - The
         authorization request has been canceled so a response cannot be
         retrieved.
+        :raise: launchkey.exceptions.DeadlineExceeded - The deadline passed
+        before the LaunchKey API responded
         :return: None if the user has not responded otherwise a
         launchkey.entities.service.AdvancedAuthorizationResponse object
                  with the user's response
         in it
         """
-        response = self._transport.get(
-            "/service/v3/auths/%s" % authorization_request_id,
-            self._subject)
+        with call_deadline(deadline):
+            response = self._transport.get(
+                "/service/v3/auths/%s" % authorization_request_id,
+                self._subject)
+        return self._build_advanced_authorization_response(response)
 
+    def _build_advanced_authorization_response(self, response):
+        """
+        Builds an AdvancedAuthorizationResponse from an authorization response
+        :param response: launchkey.transports.base.APIResponse
+        :return: None if the user has not responded otherwise a
+        launchkey.entities.service.AdvancedAuthorizationResponse
+        """
         if response.status_code == 204:
             authorization_response = None
         else:
@@ -232,9 +339,18 @@ class ServiceClient(BaseClient):
                  with the user's response
         in it
         """
-        advanced_authorization_response = \
-            self.get_advanced_authorization_response(authorization_request_id)
+        return self._build_authorization_response(
+            self.get_advanced_authorization_response(authorization_request_id))
 
+    @staticmethod
+    def _build_authorization_response(advanced_authorization_response):
+        """
+        Converts an AdvancedAuthorizationResponse into a legacy
+        AuthorizationResponse
+        :param advanced_authorization_response:
+        launchkey.entities.service.AdvancedAuthorizationResponse or None
+        :return: launchkey.entities.service.AuthorizationResponse or None
+        """
         if not advanced_authorization_response:
             return None
 
@@ -297,20 +413,35 @@ class ServiceClient(BaseClient):
                                username=user)
 
     @api_call
-    def verify_totp(self, user, otp):
+    def verify_totp(self, user, otp, deadline=None):
         """
         Verifies a given TOTP is valid for a given user.
         :param user: Unique value identifying the End User in your
         system. This value was used to create the Directory User and Link
         Device.
         :param otp: 6-8 digit OTP code for to verify.
+        :param deadline: Seconds the call may take, including retries and
+        the server time and public key requests it needs, before
+        launchkey.exceptions.DeadlineExceeded is raised. None for no
+        deadline.
         :return: Boolean stating whether the given OTP code is valid.
         :raise: launchkey.exceptions.EntityNotFound - Unable to find TOTP
         configuration for given user.
+        :raise: launchkey.exceptions.DeadlineExceeded - The deadline passed
+        before the LaunchKey API responded
+        """
+        with call_deadline(deadline):
+            response = self._transport.post("/service/v3/totp",
+                                            self._subject, identifier=user,
+                                            otp=otp)
+        return self._build_totp_verification(response)
+
+    def _build_totp_verification(self, response):
+        """
+        Parses a TOTP verification response
+        :param response: launchkey.transports.base.APIResponse
+        :return: Boolean stating whether the given OTP code is valid.
         """
-        response = self._transport.post("/service/v3/totp",
-                                        self._subject, identifier=user,
-                                        otp=otp)
         data = self._validate_response(
             response,
             ServiceTOTPVerificationValidator)
@@ -391,8 +522,28 @@ class ServiceClient(BaseClient):
         except XiovJWTValidationFailure as reason:
             raise UnexpectedWebhookRequest(reason) from reason
 
+        if not self._publish_webhook_result(result) and \
+                self.response_registry is not None and \
+                not isinstance(result, SessionEndRequest):
+            self.response_registry.resolve(result)
         return result
 
+    def _publish_webhook_result(self, result):
+        """
+        Publishes a handled webhook to the response broker. A broker failure
+        is logged rather than failing the webhook.
+        :return: bool stating whether the result was published
+        """
+        if self.response_broker is None:
+            return False
+        try:
+            self.response_broker.publish(result)
+        except Exception:  # pylint: disable=broad-except
+            LOGGER.exception("Unable to publish the webhook result to the "
+                             "response broker")
+            return False
+        return True
+
     @deprecated
     def handle_webhook(self, body, headers, method=None, path=None):
         """
@@ -430,9 +581,20 @@ class ServiceClient(BaseClient):
         :raises launchkey.exceptions.WebhookAuthorizationError: when the
         "Authorization" header in the headers.
         """
-        advanced_authorization_response = self.handle_advanced_webhook(
-            body, headers, method, path)
+        return self._build_webhook_response(
+            self.handle_advanced_webhook(body, headers, method, path))
 
+    @staticmethod
+    def _build_webhook_response(advanced_authorization_response):
+        """
+        Converts the result of handle_advanced_webhook into the legacy result
+        of handle_webhook
+        :param advanced_authorization_response:
+        launchkey.entities.service.SessionEndRequest or
+        launchkey.entities.service.AdvancedAuthorizationResponse
+        :return: launchkey.entities.service.SessionEndRequest or
+        launchkey.entities.service.AuthorizationResponse
+        """
         if isinstance(advanced_authorization_response, SessionEndRequest):
             return advanced_authorization_response
 
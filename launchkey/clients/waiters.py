@@ -0,0 +1,104 @@
+"""Correlation of authorization response webhooks with their waiters"""
+
+import asyncio
+import threading
+from collections import OrderedDict
+from concurrent.futures import InvalidStateError
+
+DEFAULT_FALLBACK_AFTER = 30.0
+DEFAULT_MAX_UNCLAIMED = 1000
+
+
+def _set_result(future, result):
+    try:
+        future.set_result(result)
+    except (InvalidStateError, asyncio.InvalidStateError):
+        pass
+
+
+class AuthorizationResponseRegistry(object):
+    """
+    Thread safe registry of the futures waiting on authorization responses
+    keyed by authorization request ID. Webhooks resolve the matching future
+    when they are handled. asyncio futures are resolved on their own event
+    loop so webhooks may be handled from any thread.
+
+    Responses arriving before their future is registered are kept, up to
+    max_unclaimed of them, and resolve it as soon as it is registered.
+    """
+
+    def __init__(self, max_unclaimed=DEFAULT_MAX_UNCLAIMED):
+        """
+        :param max_unclaimed: Maximum number of responses kept for
+        authorization requests without a registered future
+        """
+        self.max_unclaimed = max_unclaimed
+        self._waiters = {}
+        self._unclaimed = OrderedDict()
+        self._lock = threading.Lock()
+
+    def register(self, authorization_request_id, future):
+        """
+        Registers a future to resolve with the response to an authorization
+        request
+        :param authorization_request_id: Unique identifier returned by
+        authorization_request()
+        :param future: concurrent.futures.Future or asyncio.Future
+        :return: None
+        """
+        with self._lock:
+            response = self._unclaimed.pop(authorization_request_id, None)
+            if response is None:
+                self._waiters[authorization_request_id] = future
+        if response is not None:
+            self._resolve(future, response)
+        else:
+            future.add_done_callback(
+                lambda done: self.discard(authorization_request_id, done))
+
+    def discard(self, authorization_request_id, future=None):
+        """
+        Stops waiting on an authorization request
+        :param authorization_request_id: Unique identifier returned by
+        authorization_request()
+        :param future: Only discard this future when given
+        :return: None
+        """
+        with self._lock:
+            if future is None or \
+                    self._waiters.get(authorization_request_id) is future:
+                self._waiters.pop(authorization_request_id, None)
+
+    def resolve(self, response):
+        """
+        Resolves the future waiting on an authorization response
+        :param response:
+        launchkey.entities.service.AdvancedAuthorizationResponse
+        :return: bool stating whether a future was waiting on the response
+        """
+        authorization_request_id = response.authorization_request_id
+        with self._lock:
+            future = self._waiters.pop(authorization_request_id, None)
+            if future is None:
+                self._unclaimed[authorization_request_id] = response
+                while len(self._unclaimed) > self.max_unclaimed:
+                    self._unclaimed.popitem(last=False)
+                return False
+        self._resolve(future, response)
+        return True
+
+    @staticmethod
+    def _resolve(future, response):
+        if isinstance(future, asyncio.Future):
+            future.get_loop().call_soon_threadsafe(
+                _set_result, future, response)
+        else:
+            _set_result(future, response)
+
+    @property
+    def pending(self):
+        """
+        :return: Number of futures waiting on a response
+        """
+        with self._lock:
+            return len(self._waiters)
@@ -487,6 +487,9 @@ class AuthorizationRequest(object):
         self.auth_request = auth_request
         self.push_package = push_package
         self.device_ids = device_ids
+        # Future resolving to the AdvancedAuthorizationResponse when the
+        # client has webhook waiters enabled
+        self.response_future = None
 
     def __repr__(self):
         return "AuthorizationRequest <" \
@@ -129,6 +129,13 @@ class RequestTimedOut(LaunchKeyAPIException):
     """Generic API 408 Error - Request timed out"""
 
 
+class DeadlineExceeded(LaunchKeyAPIException):
+    """
+    The deadline of a call ran out before the LaunchKey API responded. Unlike
+    RequestTimedOut, it is raised by the SDK rather than the LaunchKey API.
+    """
+
+
 class Conflict(LaunchKeyAPIException):
     """Generic API 409 Error - Conflict"""
 
@@ -306,3 +313,12 @@ class XiovJWTValidationFailure(LaunchKeyAPIException):
 
 class XiovJWTDecryptionFailure(LaunchKeyAPIException):
     """x-iov-jwt decryption failure"""
+
+
+class CircuitBreakerOpen(LaunchKeyAPIException):
+    """
+    The circuit breaker of the HTTP transport is open because the LaunchKey
+    API is failing or slow. The request was not sent. The number of seconds
+    until a request will be let through to probe the API is in
+    data["retry_after"].
+    """
@@ -3,3 +3,6 @@
 from .directory import DirectoryFactory  # noqa: F401
 from .organization import OrganizationFactory  # noqa: F401
 from .service import ServiceFactory  # noqa: F401
+from .directory import AsyncDirectoryFactory  # noqa: F401
+from .organization import AsyncOrganizationFactory  # noqa: F401
+from .service import AsyncServiceFactory  # noqa: F401
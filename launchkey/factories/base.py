@@ -3,7 +3,7 @@
 # pylint: disable=too-many-arguments,too-few-public-methods
 
 import warnings
-from ..transports import JOSETransport
+from ..transports import JOSETransport, RequestsTransport
 from ..utils.shared import UUIDHelper
 
 
@@ -17,25 +17,38 @@ class BaseFactory(object):
     """
 
     def __init__(self, issuer, issuer_id, private_key, url, testing,
-                 transport):
+                 transport, pooled_connections=False, rate_limiter=None):
         """
         :param issuer: Issuer type that will be translated directly to the
         JOSE transport layer as an issuer. IE: svc, dir, org
         :param issuer_id: UUID of the issuer
-        :param private_key: PEM formatted private key string. This key will be
-                            used for signing requests. It will also be used for
-                            decrypting requests when a dual purpose key is
-                            given. If a separate encryption key is desired it
-                            can be added via the add_encryption_private_key
-                            method.
+        :param private_key: PEM formatted private key string or
+                            launchkey.transports.PrivateKeyMaterial. This key
+                            will be used for signing requests. It will also be
+                            used for decrypting requests when a dual purpose
+                            key is given. If a separate encryption key is
+                            desired it can be added via the
+                            add_encryption_private_key method.
         :param url: URL for the LaunchKey API
         :param testing: Boolean stating whether testing mode is being used.
         This will determine whether SSL validation
         occurs.
+        :param transport: Instantiated transport object. When None, a
+        JOSETransport will be created.
+        :param pooled_connections: Boolean stating whether the default
+        transport should reuse pooled keep-alive connections to the LaunchKey
+        API. Ignored when a transport is given.
+        :param rate_limiter: Optional
+        launchkey.transports.AdaptiveRateLimiter given to the default
+        transport and shared by every client the factory creates. Ignored
+        when a transport is given.
         """
         self._issuer_id = UUIDHelper().from_string(issuer_id)
-        self._transport = transport if transport is not None \
-            else JOSETransport()
+        if transport is None:
+            transport = JOSETransport(
+                http_client=RequestsTransport(pooled=pooled_connections),
+                rate_limiter=rate_limiter)
+        self._transport = transport
         self._transport.set_url(url, testing)
         # Set the issue which will set the given key as the signature key
         self._transport.set_issuer(issuer, issuer_id, private_key)
@@ -3,7 +3,9 @@
 # pylint: disable=too-many-arguments
 
 from .. import LAUNCHKEY_PRODUCTION
-from ..clients import DirectoryClient, OrganizationClient, ServiceClient
+from ..clients import DirectoryClient, OrganizationClient, ServiceClient, \
+    AsyncDirectoryClient, AsyncOrganizationClient, AsyncServiceClient
+from ..transports import AsyncJOSETransport
 from .base import BaseFactory
 
 
@@ -13,10 +15,12 @@ class OrganizationFactory(BaseFactory):
     """
 
     def __init__(self, organization_id, private_key, url=LAUNCHKEY_PRODUCTION,
-                 testing=False, transport=None):
+                 testing=False, transport=None, pooled_connections=False,
+                 rate_limiter=None):
         """
         :param organization_id: UUID for the requesting organization
-        :param private_key: PEM formatted private key string
+        :param private_key: PEM formatted private key string or
+        launchkey.transports.PrivateKeyMaterial
         :param url: URL for the LaunchKey API
         :param testing: Boolean stating whether testing mode is being used.
         This will determine whether SSL validation occurs.
@@ -26,10 +30,18 @@ class OrganizationFactory(BaseFactory):
         hashing algorithms, this is where you would do it. IE:
         JOSETransport(jwt_algorithm="RS512", jwe_cek_encryption="RSA-OAEP",
         jwe_claims_encryption="A256CBC-HS512", content_hash_algorithm="S256")
+        :param pooled_connections: Boolean stating whether the default
+        transport should reuse pooled keep-alive connections to the LaunchKey
+        API. Ignored when a transport is given.
+        :param rate_limiter: Optional
+        launchkey.transports.AdaptiveRateLimiter given to the default
+        transport and shared by every client the factory creates. Ignored
+        when a transport is given.
         """
         super().__init__('org', organization_id,
                          private_key, url, testing,
-                         transport)
+                         transport, pooled_connections,
+                         rate_limiter)
 
     def make_directory_client(self, directory_id):
         """
@@ -53,3 +65,54 @@ class OrganizationFactory(BaseFactory):
         :return: launchkey.clients.ServiceClient
         """
         return ServiceClient(service_id, self._transport)
+
+
+class AsyncOrganizationFactory(OrganizationFactory):
+    """
+    Factory for creating asyncio clients when representing a LaunchKey
+    Organization
+    """
+
+    def __init__(self, organization_id, private_key, url=LAUNCHKEY_PRODUCTION,
+                 testing=False, transport=None, rate_limiter=None):
+        """
+        :param organization_id: UUID for the requesting organization
+        :param private_key: PEM formatted private key string or
+        launchkey.transports.PrivateKeyMaterial
+        :param url: URL for the LaunchKey API
+        :param testing: Boolean stating whether testing mode is being used.
+        This will determine whether SSL validation occurs.
+        :param: transport: Instantiated transport object. Defaults to
+        launchkey.transports.AsyncJOSETransport. Any transport given must be
+        an asyncio transport.
+        :param rate_limiter: Optional
+        launchkey.transports.AdaptiveRateLimiter given to the default
+        transport and shared by every client the factory creates. Ignored
+        when a transport is given.
+        """
+        super().__init__(organization_id, private_key, url, testing,
+                         transport if transport is not None
+                         else AsyncJOSETransport(rate_limiter=rate_limiter))
+
+    def make_directory_client(self, directory_id):
+        """
+        Retrieves an asyncio client to make directory calls.
+        :param directory_id: Directory id
+        :return: launchkey.clients.AsyncDirectoryClient
+        """
+        return AsyncDirectoryClient(directory_id, self._transport)
+
+    def make_organization_client(self):
+        """
+        Retrieves an asyncio client to make organization calls.
+        :return: launchkey.clients.AsyncOrganizationClient
+        """
+        return AsyncOrganizationClient(self._issuer_id, self._transport)
+
+    def make_service_client(self, service_id):
+        """
+        Retrieves an asyncio client to make service calls.
+        :param service_id: Service id
+        :return: launchkey.clients.AsyncServiceClient
+        """
+        return AsyncServiceClient(service_id, self._transport)
@@ -3,7 +3,9 @@
 # pylint: disable=too-many-arguments
 
 from .. import LAUNCHKEY_PRODUCTION
-from ..clients import ServiceClient
+from ..clients import ServiceClient, \
+    AsyncServiceClient
+from ..transports import AsyncJOSETransport
 from .base import BaseFactory
 
 
@@ -13,10 +15,12 @@ class ServiceFactory(BaseFactory):
     """
 
     def __init__(self, service_id, private_key, url=LAUNCHKEY_PRODUCTION,
-                 testing=False, transport=None):
+                 testing=False, transport=None, pooled_connections=False,
+                 rate_limiter=None):
         """
         :param service_id: UUID for the requesting service
-        :param private_key: PEM formatted private key string
+        :param private_key: PEM formatted private key string or
+        launchkey.transports.PrivateKeyMaterial
         :param url: URL for the LaunchKey API
         :param testing: Boolean stating whether testing mode is being used.
         This will determine whether SSL validation occurs.
@@ -26,9 +30,17 @@ class ServiceFactory(BaseFactory):
         hashing algorithms, this is where you would do it. IE:
         JOSETransport(jwt_algorithm="RS512", jwe_cek_encryption="RSA-OAEP",
         jwe_claims_encryption="A256CBC-HS512", content_hash_algorithm="S256")
+        :param pooled_connections: Boolean stating whether the default
+        transport should reuse pooled keep-alive connections to the LaunchKey
+        API. Ignored when a transport is given.
+        :param rate_limiter: Optional
+        launchkey.transports.AdaptiveRateLimiter given to the default
+        transport and shared by every client the factory creates. Ignored
+        when a transport is given.
         """
         super().__init__('svc', service_id, private_key,
-                         url, testing, transport)
+                         url, testing, transport, pooled_connections,
+                         rate_limiter)
 
     def make_service_client(self):
         """
@@ -36,3 +48,38 @@ class ServiceFactory(BaseFactory):
         :return: launchkey.clients.ServiceClient
         """
         return ServiceClient(self._issuer_id, self._transport)
+
+
+class AsyncServiceFactory(ServiceFactory):
+    """
+    Factory for creating asyncio clients when representing a LaunchKey
+    Service Profile
+    """
+
+    def __init__(self, service_id, private_key, url=LAUNCHKEY_PRODUCTION,
+                 testing=False, transport=None, rate_limiter=None):
+        """
+        :param service_id: UUID for the requesting service
+        :param private_key: PEM formatted private key string or
+        launchkey.transports.PrivateKeyMaterial
+        :param url: URL for the LaunchKey API
+        :param testing: Boolean stating whether testing mode is being used.
+        This will determine whether SSL validation occurs.
+        :param: transport: Instantiated transport object. Defaults to
+        launchkey.transports.AsyncJOSETransport. Any transport given must be
+        an asyncio transport.
+        :param rate_limiter: Optional
+        launchkey.transports.AdaptiveRateLimiter given to the default
+        transport and shared by every client the factory creates. Ignored
+        when a transport is given.
+        """
+        super().__init__(service_id, private_key, url, testing,
+                         transport if transport is not None
+                         else AsyncJOSETransport(rate_limiter=rate_limiter))
+
+    def make_service_client(self):
+        """
+        Retrieves an asyncio client to make service calls.
+        :return: launchkey.clients.AsyncServiceClient
+        """
+        return AsyncServiceClient(self._issuer_id, self._transport)
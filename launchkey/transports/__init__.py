@@ -1,3 +1,16 @@
 """ Transports for communicating with the LaunchKey API """
 from .jose_auth import JOSETransport  # noqa: F401
 from .http import RequestsTransport  # noqa: F401
+from .http2 import HTTP2Transport  # noqa: F401
+from .shared_cache import SharedCache, FileSharedCache  # noqa: F401
+from .crypto import CryptoBackend, JWKESTBackend, \
+    CryptographyBackend  # noqa: F401
+from .crypto_pool import ProcessPoolCryptoBackend  # noqa: F401
+from .key_material import PrivateKeyMaterial  # noqa: F401
+from .timing import RequestTiming, EndpointLatencyHistograms  # noqa: F401
+from .rate_limit import AdaptiveRateLimiter  # noqa: F401
+from .retry import RetryPolicy  # noqa: F401
+from .circuit_breaker import CircuitBreaker  # noqa: F401
+from .deadline import call_deadline  # noqa: F401
+from .async_http import AsyncHTTPTransport  # noqa: F401
+from .async_jose_auth import AsyncJOSETransport  # noqa: F401
@@ -0,0 +1,155 @@
+""" Asyncio transport for communicating with the LaunchKey API over HTTP"""
+
+import asyncio
+
+from .deadline import deadline_timeouts
+from .httpx_base import BaseHTTPXTransport, httpx
+
+DEFAULT_MAX_CONNECTIONS = 100
+DEFAULT_MAX_KEEPALIVE_CONNECTIONS = 20
+
+
+class AsyncHTTPTransport(BaseHTTPXTransport):
+    """
+    Transport class for performing HTTP based queries on an asyncio event
+    loop using the httpx library. All request methods are coroutines with the
+    same signature as launchkey.transports.RequestsTransport.
+    """
+
+    def __init__(self, max_connections=DEFAULT_MAX_CONNECTIONS,
+                 max_keepalive_connections=DEFAULT_MAX_KEEPALIVE_CONNECTIONS,
+                 http2=False, circuit_breaker=None):
+        """
+        :param max_connections: Maximum number of concurrent connections to
+        the LaunchKey API.
+        :param max_keepalive_connections: Maximum number of idle connections
+        to keep alive for reuse.
+        :param http2: Boolean stating whether HTTP/2 should be negotiated.
+        Requires the h2 package.
+        :param circuit_breaker: Optional launchkey.transports.CircuitBreaker
+        making requests fail fast while the LaunchKey API is failing or slow.
+        """
+        super().__init__(max_connections, max_keepalive_connections,
+                         circuit_breaker)
+        self.http2 = http2
+        self._closing = set()
+
+    def _get_client(self):
+        """
+        Retrieves the httpx.AsyncClient, creating it when necessary
+        :return: httpx.AsyncClient
+        """
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                verify=self.verify_ssl,
+                follow_redirects=self.allow_redirects,
+                http2=self.http2,
+                limits=self._get_limits()
+            )
+        return self._client
+
+    async def aclose(self):
+        """
+        Closes all open connections
+        :return: None
+        """
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def _reset_client(self):
+        """
+        Closes the connections of the current client so that a new one is
+        created on the next request. When an event loop is running the
+        client is closed by a task on that loop.
+        :return: None
+        """
+        client, self._client = self._client, None
+        if client is None:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            asyncio.run(client.aclose())
+        else:
+            task = loop.create_task(client.aclose())
+            self._closing.add(task)
+            task.add_done_callback(self._closing.discard)
+
+    async def _request(self, method, path, headers, data):
+        """
+        Sends an HTTP request to the LaunchKey API and parses the response
+        :param method: Lowercase HTTP method name
+        :param path: Path or endpoint that will be hit
+        :param headers: Headers to add onto the request
+        :param data: Dictionary or bytes to be sent. For GET requests this is
+        sent in the query string, otherwise it is sent as the body.
+        :return: launchkey.transports.base.APIResponse
+        :raises launchkey.exceptions.CircuitBreakerOpen: when the circuit
+        breaker is open
+        :raises launchkey.exceptions.DeadlineExceeded: when the deadline of
+        the call passed before a response was received
+        """
+        with deadline_timeouts(httpx.TimeoutException):
+            if self.circuit_breaker is None:
+                return await self._send(method, path, headers, data)
+            with self.circuit_breaker.call():
+                return await self._send(method, path, headers, data)
+
+    async def _send(self, method, path, headers, data):
+        client = self._get_client()
+        response = await client.request(
+            method.upper(), self.url + path, headers=headers,
+            **self._get_request_kwargs(method, data, client))
+        return self._parse_response(response)
+
+    async def get(self, path, headers=None, data=None):
+        """
+        Performs an HTTP GET request against the LaunchKey API
+        :param path: Path or endpoint that will be hit
+        :param headers: Headers to add onto the request
+        :param data: Dictionary or bytes to be sent in the query string for
+        the request.
+        :return:
+        """
+        return await self._request("get", path, headers, data)
+
+    async def post(self, path, headers=None, data=None):
+        """
+        Performs and HTTP POST request against the LaunchKey API
+        :param path: Path or endpoint that will be hit
+        :param headers: Headers to add onto the request
+        :param data: Dictionary or bytes to send in the body of the request.
+        :return:
+        """
+        return await self._request("post", path, headers, data)
+
+    async def put(self, path, headers=None, data=None):
+        """
+        Performs and HTTP PUT request against the LaunchKey API
+        :param path: Path or endpoint that will be hit
+        :param headers: Headers to add onto the request
+        :param data: Dictionary or bytes to send in the body of the request.
+        :return:
+        """
+        return await self._request("put", path, headers, data)
+
+    async def delete(self, path, headers=None, data=None):
+        """
+        Performs and HTTP DELETE request against the LaunchKey API
+        :param path: Path or endpoint that will be hit
+        :param headers: Headers to add onto the request
+        :param data: Dictionary or bytes to send in the body of the request.
+        :return:
+        """
+        return await self._request("delete", path, headers, data)
+
+    async def patch(self, path, headers=None, data=None):
+        """
+        Performs and HTTP PATCH request against the LaunchKey API
+        :param path: Path or endpoint that will be hit
+        :param headers: Headers to add onto the request
+        :param data: Dictionary or bytes to send in the body of the request.
+        :return:
+        """
+        return await self._request("patch", path, headers, data)
@@ -0,0 +1,374 @@
+""" Asyncio JOSE based transport"""
+
+# pylint: disable=too-many-arguments, invalid-overridden-method
+
+import asyncio
+from time import time
+
+from ..exceptions import UnexpectedAPIResponse
+from .async_http import AsyncHTTPTransport
+from .deadline import acquire_within_deadline_async
+from .jose_auth import JOSETransport, SHARED_PUBLIC_KEY_PREFIX
+from .refresher import AsyncMetadataRefresher
+from .retry import retry_attempts_async
+from .shared_cache import DEFAULT_PUBLIC_KEY_TTL
+from .timing import PHASE_HTTP, PHASE_METADATA, PHASE_RATE_LIMIT, \
+    endpoint_name
+
+
+class AsyncJOSETransport(JOSETransport):
+    """
+    Asyncio transport to wrap an asyncio HTTP transport for providing
+    request/response validation, encryption, and decryption.
+
+    All request methods are coroutines. The server time difference and API
+    public keys are fetched asynchronously before they are needed, so the
+    signing, encryption, and verification code shared with
+    launchkey.transports.JOSETransport never blocks on the network.
+    """
+
+    def __init__(self, jwt_algorithm="RS512", jwe_cek_encryption="RSA-OAEP",
+                 jwe_claims_encryption="A256CBC-HS512",
+                 content_hash_algorithm="S256", http_client=None,
+                 shared_cache=None, public_key_cache=None,
+                 crypto_backend=None, rate_limiter=None, retry_policy=None):
+        """
+        :param jwt_algorithm: JWT Signing algorithm
+                              Currently supported: RS256, RS384, RS512
+        :param jwe_cek_encryption: JWE algorithm to use with CEK encryption
+        Currently supported: RSA-OAEP
+        :param jwe_claims_encryption: JWE algorithm to use for claims
+        encryption.
+        Currently supported: A256CBC-HS512
+        :param content_hash_algorithm: Hashing algorithm for signing
+        content body.
+        Currently supported: S256, S384, S512 (shortened forms of SHAxxx)
+        :param http_client: Asyncio HTTP transport to contact the LaunchKey
+        api after JOSE processing is complete. Defaults to
+        launchkey.transports.AsyncHTTPTransport
+        :param shared_cache: Optional
+        launchkey.transports.shared_cache.SharedCache used to share the API
+        public keys, active encryption key, and server time difference with
+        the transports of other processes.
+        :param public_key_cache: Optional
+        launchkey.transports.key_cache.PublicKeyCache to configure the size
+        of the API public key cache and how long unknown key IDs are
+        remembered.
+        :param crypto_backend: Optional
+        launchkey.transports.crypto.CryptoBackend performing signing,
+        verification, encryption, and decryption.
+        :param rate_limiter: Optional
+        launchkey.transports.AdaptiveRateLimiter which delays
+        requests without blocking the event loop.
+        :param retry_policy: Optional launchkey.transports.RetryPolicy
+        retrying GET requests and POST requests to /list endpoints without
+        blocking the event loop.
+        """
+        super().__init__(
+            jwt_algorithm, jwe_cek_encryption, jwe_claims_encryption,
+            content_hash_algorithm,
+            http_client if http_client is not None else AsyncHTTPTransport(),
+            shared_cache, public_key_cache, crypto_backend, rate_limiter,
+            retry_policy)
+        self._metadata_lock = None
+
+    def _get_metadata_lock(self):
+        """
+        Retrieves the lock guarding metadata fetches so that concurrent
+        coroutines share a single request to the LaunchKey API.
+        :return: asyncio.Lock
+        """
+        if self._metadata_lock is None:
+            self._metadata_lock = asyncio.Lock()
+        return self._metadata_lock
+
+    def _get_public_key_fetch_lock(self, kid):
+        """
+        Retrieves the lock guarding the retrieval of a public key by `kid`
+        so that concurrent coroutines share a single request
+        :param kid: string of the `kid`
+        :return: asyncio.Lock
+        """
+        lock = self._public_key_fetch_locks.get(kid)
+        if lock is None:
+            lock = self._public_key_fetch_locks[kid] = asyncio.Lock()
+        return lock
+
+    @property
+    def server_time_difference(self):
+        """
+        The time drag between the sdk and the Launchkey API as of the last
+        call to refresh_server_time_difference.
+        """
+        return self._server_time_difference[0]
+
+    def update_and_return_active_encryption_kid(self):
+        """
+        :return: Currently active key id as of the last call to
+        refresh_active_encryption_kid
+        """
+        return self._current_kid[0]
+
+    @property
+    def api_public_keys(self):
+        """
+        List of RSA keys that have been generated from public keys supplied
+        by the LaunchKey API.
+        :return: List of RSAKeys
+        """
+        return self._public_key_cache.values()
+
+    def _make_metadata_refresher(self, refresh_ahead, min_backoff,
+                                 max_backoff):
+        """
+        Background refreshing runs as an asyncio task on the running event
+        loop, so start_background_refresh must be called from a coroutine.
+        :return: launchkey.transports.refresher.AsyncMetadataRefresher
+        """
+        return AsyncMetadataRefresher(self, refresh_ahead, min_backoff,
+                                      max_backoff)
+
+    def _find_key_by_kid(self, kid):
+        """
+        Finds a public key within the public key cache given a `kid`. Keys
+        must have been loaded with load_public_key beforehand.
+        :param kid: string of the `kid`
+        :return: RSAKey
+        :raises UnexpectedAPIResponse: if the key has not been loaded
+        """
+        key = self._public_key_cache.get(kid)
+        if not key:
+            raise UnexpectedAPIResponse("Key was not found.")
+        return key
+
+    async def refresh_server_time_difference(self):
+        """
+        Retrieves the time drag between the sdk and the LaunchKey API when
+        the cached value has expired. With start_background_refresh, the
+        last known value is used while it is renewed in the background.
+        :return: The time difference
+        """
+        if not self._server_time_difference_expired(int(time())) or \
+                self._can_serve_stale(self._server_time_difference[1]):
+            self._server_time_hits += 1
+        else:
+            self._server_time_misses += 1
+            await self._refresh_server_time_difference()
+        return self._server_time_difference[0]
+
+    async def _refresh_server_time_difference(self, force=False):
+        """
+        Retrieves and caches the time difference between the sdk and the
+        LaunchKey API if it has expired. Concurrent coroutines share one
+        request.
+        :param force: Boolean stating whether to refresh even when the cached
+        value has not expired.
+        :return: None
+        """
+        async with acquire_within_deadline_async(self._get_metadata_lock()):
+            now = int(time())
+            if (force or self._server_time_difference_expired(now)) and \
+                    not self._load_shared_server_time_difference():
+                response = await self._http_client.get("/public/v3/ping",
+                                                       data={})
+                self._handle_ping_api_response(response, now)
+                self._share_server_time_difference()
+
+    async def refresh_active_encryption_kid(self):
+        """
+        Retrieves the current `kid` and public key from the LaunchKey API
+        when the cached value has expired. With start_background_refresh, the
+        last known key is used while it is renewed in the background.
+        :return: Currently active key id
+        """
+        if self._current_kid_expired(int(time())) and \
+                not self._can_serve_stale(self._current_kid[1]):
+            await self._refresh_active_encryption_kid()
+        return self._current_kid[0]
+
+    async def _refresh_active_encryption_kid(self, force=False):
+        """
+        Retrieves and caches the current `kid` and public key from the
+        LaunchKey API if it has expired. Concurrent coroutines share one
+        request.
+        :param force: Boolean stating whether to refresh even when the cached
+        value has not expired.
+        :return: None
+        """
+        async with acquire_within_deadline_async(self._get_metadata_lock()):
+            now = int(time())
+            if (force or self._current_kid_expired(now)) and \
+                    not self._load_shared_current_kid():
+                response = await self._http_client.get(
+                    "/public/v3/public-key", data={})
+                kid, public_key = self._handle_public_key_api_response(
+                    response)
+                self._set_current_kid(kid, public_key, now)
+                self._share_current_kid(public_key)
+
+    async def load_public_key(self, kid):
+        """
+        Ensures the public key for the given `kid` is in the public key
+        cache, retrieving it from the LaunchKey API if necessary. Concurrent
+        loads of the same missing `kid` share one request. Key IDs the
+        LaunchKey API recently reported as not found are not requested again.
+        :param kid: string of the `kid`
+        :return: RSAKey
+        :raises UnexpectedAPIResponse: when the key was not found
+        """
+        if kid not in self._public_key_cache:
+            if self._public_key_cache.is_not_found(kid):
+                raise UnexpectedAPIResponse("Key was not found.")
+            async with acquire_within_deadline_async(
+                    self._get_public_key_fetch_lock(kid)):
+                try:
+                    if not self._public_key_cache.peek(kid):
+                        if self._public_key_cache.is_not_found(kid):
+                            raise UnexpectedAPIResponse("Key was not found.")
+                        self._cache_public_key(
+                            kid, await self._get_shared_key_by_kid(kid))
+                finally:
+                    self._public_key_fetch_locks.pop(kid, None)
+        return self._public_key_cache[kid]
+
+    async def _get_shared_key_by_kid(self, kid):
+        """
+        Gets a public key by `kid` from the shared cache, retrieving it from
+        the LaunchKey API and sharing it when it is not in the shared cache.
+        :param kid: string of the `kid`
+        :return: string of the public key
+        :raises UnexpectedAPIResponse: when the key was not found
+        """
+        public_key = None
+        if self._shared_cache is not None:
+            public_key = self._shared_cache.get(
+                SHARED_PUBLIC_KEY_PREFIX + kid)
+        if not isinstance(public_key, str):
+            response = await self._http_client.get(
+                "/public/v3/public-key/%s" % kid, data={})
+            if response.status_code == 404:
+                self._public_key_cache.add_not_found(kid)
+            public_key = self._handle_public_key_api_response(response)[1]
+            if self._shared_cache is not None:
+                self._shared_cache.set(SHARED_PUBLIC_KEY_PREFIX + kid,
+                                       public_key, DEFAULT_PUBLIC_KEY_TTL)
+        return public_key
+
+    async def load_public_key_for_jwt(self, compact_jwt):
+        """
+        Ensures the public key which signed a compact JWT is in the public
+        key cache. Malformed JWTs are ignored so that verification can
+        report them.
+        :param compact_jwt: The compact JWT
+        :return: None
+        """
+        kid = self._get_kid_from_compact_jwt(compact_jwt)
+        if kid is not None:
+            await self.load_public_key(kid)
+
+    async def _process_jose_request(self, method, path, subject, data=None):
+        """
+        Performs a JOSE request
+        :param method: Request method IE get, put, post, delete
+        :param path: Path or endpoint that will be hit
+        :param subject: Subject for which the request is issued for
+        :param data: The data that will be submitted in the body of the request
+        :return:
+        """
+        retries = self._start_retries(method, path)
+        with self._observe_jose_request(method, path, subject,
+                                        retries) as outcome:
+            timing = outcome.timing
+            jti, response = await retry_attempts_async(
+                lambda: self._attempt_jose_request(method, path, subject,
+                                                   data, timing),
+                retries, timing)
+            if response.status_code != 401:
+                await self.load_public_key_for_jwt(
+                    response.headers.get("X-IOV-JWT"))
+                timing.lap(PHASE_METADATA)
+            return outcome.finish(
+                self._process_jose_response(response, jti, subject, timing))
+
+    async def _attempt_jose_request(self, method, path, subject, data,
+                                    timing):
+        """
+        Builds and sends a JOSE request signed with a new JTI once the
+        metadata it needs has been fetched
+        :param timing: RequestTiming recording the phases of the request
+        :return: tuple of the JTI and the unprocessed response
+        """
+        if self._rate_limiter is not None:
+            await self._rate_limiter.acquire_async(
+                subject, endpoint_name(method, path))
+            timing.lap(PHASE_RATE_LIMIT)
+        await self.refresh_server_time_difference()
+        if data:
+            await self.refresh_active_encryption_kid()
+        timing.lap(PHASE_METADATA)
+        jti, headers, body = self._prepare_jose_request(method, path, subject,
+                                                        data, timing)
+        response = await getattr(self._http_client, method.lower())(
+            path, data=body, headers=headers)
+        timing.lap(PHASE_HTTP)
+        self._record_rate_limit(method, path, subject, response)
+        return jti, response
+
+    async def get(self, path, subject=None, **kwargs):
+        """
+        Performs an HTTP GET request against the LaunchKey API
+        :param path: Path or endpoint that will be hit
+        :param subject: Subject for which the request is issued for
+        :param kwargs: Any additional KWARGs will be parameters that are
+        tacked onto the url
+        :return:
+        """
+        if subject:
+            return await self._process_jose_request('get', path, subject)
+        return await self._http_client.get(path, data=kwargs)
+
+    async def post(self, path, subject=None, **kwargs):
+        """
+        Performs an HTTP POST request against the LaunchKey API
+        :param path: Path or endpoint that will be hit
+        :param subject: Subject for which the request is issued for
+        :param kwargs: Any additional KWARGs will be converted to data
+        parameters
+        :return:
+        """
+        return await self._process_jose_request('post', path, subject, kwargs)
+
+    async def put(self, path, subject=None, **kwargs):
+        """
+        Performs an HTTP PUT request against the LaunchKey API
+        :param path: Path or endpoint that will be hit
+        :param subject: Subject for which the request is issued for
+        :param kwargs: Any additional KWARGs will be converted to data
+        parameters
+        :return:
+        """
+        return await self._process_jose_request('put', path, subject, kwargs)
+
+    async def delete(self, path, subject=None, **kwargs):
+        """
+        Performs an HTTP DELETE request against the LaunchKey API
+        :param path: Path or endpoint that will be hit
+        :param subject: Subject for which the request is issued for
+        :param kwargs: Any additional KWARGs will be converted to data
+        parameters
+        :return:
+        """
+        return await self._process_jose_request('delete', path, subject,
+                                                kwargs)
+
+    async def patch(self, path, subject=None, **kwargs):
+        """
+        Performs an HTTP PATCH request against the LaunchKey API
+        :param path: Path or endpoint that will be hit
+        :param subject: Subject for which the request is issued for
+        :param kwargs: Any additional KWARGs will be converted to data
+        parameters
+        :return:
+        """
+        return await self._process_jose_request('patch', path, subject,
+                                                kwargs)
@@ -0,0 +1,209 @@
+""" Circuit breaker failing fast while the LaunchKey API is unhealthy """
+
+import threading
+from collections import deque
+from contextlib import contextmanager
+from time import monotonic
+
+from ..exceptions import CircuitBreakerOpen
+
+STATE_CLOSED = "closed"
+STATE_OPEN = "open"
+STATE_HALF_OPEN = "half_open"
+
+DEFAULT_FAILURE_RATE = 0.5
+DEFAULT_SLOW_CALL_DURATION = 10.0
+DEFAULT_SLOW_CALL_RATE = 0.8
+DEFAULT_WINDOW_SIZE = 20
+DEFAULT_MIN_CALLS = 10
+DEFAULT_RESET_TIMEOUT = 30.0
+DEFAULT_HALF_OPEN_CALLS = 1
+
+
+# pylint: disable=too-many-instance-attributes, too-many-arguments
+class CircuitBreaker(object):
+    """
+    Thread safe circuit breaker for the HTTP transports. The outcome of the
+    most recent calls is kept in a window. Calls raising an exception, such
+    as connection errors, timeouts, and 5xx responses, are failures. Calls
+    taking at least slow_call_duration are slow.
+
+    The breaker opens when the failure rate or the slow call rate of the
+    window reaches its threshold. While it is open calls raise
+    launchkey.exceptions.CircuitBreakerOpen without being made. After
+    reset_timeout it is half open and lets half_open_calls calls through to
+    probe the API. It closes when they all succeed and opens again when any
+    of them fails or is slow.
+    """
+
+    def __init__(self, failure_rate=DEFAULT_FAILURE_RATE,
+                 slow_call_duration=DEFAULT_SLOW_CALL_DURATION,
+                 slow_call_rate=DEFAULT_SLOW_CALL_RATE,
+                 window_size=DEFAULT_WINDOW_SIZE, min_calls=DEFAULT_MIN_CALLS,
+                 reset_timeout=DEFAULT_RESET_TIMEOUT,
+                 half_open_calls=DEFAULT_HALF_OPEN_CALLS):
+        """
+        :param failure_rate: Ratio of failed calls in the window at which the
+        breaker opens
+        :param slow_call_duration: Seconds at which a call is slow. None
+        disables tripping on latency.
+        :param slow_call_rate: Ratio of slow calls in the window at which the
+        breaker opens
+        :param window_size: Number of the most recent calls considered
+        :param min_calls: Number of calls the window must hold before the
+        breaker can open
+        :param reset_timeout: Seconds the breaker stays open before probing
+        :param half_open_calls: Number of probe calls which must succeed to
+        close the breaker
+        """
+        self.failure_rate = failure_rate
+        self.slow_call_duration = slow_call_duration
+        self.slow_call_rate = slow_call_rate
+        self.min_calls = min(min_calls, window_size)
+        self.reset_timeout = reset_timeout
+        self.half_open_calls = half_open_calls
+        # Tuples of whether each call failed and whether it was slow
+        self._window = deque(maxlen=window_size)
+        self._state = STATE_CLOSED
+        self._opened_at = None
+        self._probes = 0
+        self._probe_successes = 0
+        self._lock = threading.Lock()
+
+    def _update_state(self, now):
+        if self._state == STATE_OPEN and \
+                now - self._opened_at >= self.reset_timeout:
+            self._state = STATE_HALF_OPEN
+            self._probes = 0
+            self._probe_successes = 0
+
+    def _open(self, now):
+        self._state = STATE_OPEN
+        self._opened_at = now
+        self._window.clear()
+
+    def _rates(self):
+        calls = len(self._window)
+        if not calls:
+            return 0.0, 0.0
+        failed = sum(1 for failure, _ in self._window if failure)
+        slow = sum(1 for _, is_slow in self._window if is_slow)
+        return failed / float(calls), slow / float(calls)
+
+    def before_call(self):
+        """
+        Checks that a call may be made
+        :return: None
+        :raises launchkey.exceptions.CircuitBreakerOpen: when the breaker is
+        open or all probes of a half open breaker are in progress
+        """
+        with self._lock:
+            now = monotonic()
+            self._update_state(now)
+            if self._state == STATE_CLOSED:
+                return
+            if self._state == STATE_HALF_OPEN and \
+                    self._probes < self.half_open_calls:
+                self._probes += 1
+                return
+            state = self._state
+            retry_after = max(
+                self._opened_at + self.reset_timeout - now, 0.0)
+        raise CircuitBreakerOpen(
+            "The LaunchKey API circuit breaker is %s" % state,
+            error_data={"retry_after": retry_after})
+
+    def record(self, duration, failed):
+        """
+        Records the outcome of a call allowed by before_call
+        :param duration: Seconds the call took
+        :param failed: Boolean stating whether the call failed
+        :return: None
+        """
+        slow = self.slow_call_duration is not None and \
+            duration >= self.slow_call_duration
+        with self._lock:
+            now = monotonic()
+            if self._state == STATE_HALF_OPEN:
+                if failed or slow:
+                    self._open(now)
+                else:
+                    self._probe_successes += 1
+                    if self._probe_successes >= self.half_open_calls:
+                        self._state = STATE_CLOSED
+                return
+            if self._state == STATE_OPEN:
+                return
+            self._window.append((failed, slow))
+            if len(self._window) < self.min_calls:
+                return
+            failure_rate, slow_call_rate = self._rates()
+            if failure_rate >= self.failure_rate or \
+                    slow_call_rate >= self.slow_call_rate:
+                self._open(now)
+
+    @contextmanager
+    def call(self):
+        """
+        Context for a call which fails fast while the breaker is open and is
+        recorded as failed when it raises an exception
+        :raises launchkey.exceptions.CircuitBreakerOpen: when the call may
+        not be made
+        """
+        self.before_call()
+        start = monotonic()
+        try:
+            yield
+        except Exception:
+            self.record(monotonic() - start, True)
+            raise
+        except BaseException:
+            # Cancelled calls say nothing about the API but must give back
+            # their probe
+            self._release_probe()
+            raise
+        self.record(monotonic() - start, False)
+
+    def _release_probe(self):
+        with self._lock:
+            if self._state == STATE_HALF_OPEN and self._probes:
+                self._probes -= 1
+
+    def reset(self):
+        """
+        Closes the breaker and forgets all recorded calls
+        :return: None
+        """
+        with self._lock:
+            self._state = STATE_CLOSED
+            self._window.clear()
+
+    @property
+    def state(self):
+        """
+        :return: STATE_CLOSED, STATE_OPEN, or STATE_HALF_OPEN
+        """
+        with self._lock:
+            self._update_state(monotonic())
+            return self._state
+
+    @property
+    def stats(self):
+        """
+        State of the breaker for health checks
+        :return: dict with the "state", the number of "calls" in the window,
+        their "failure_rate" and "slow_call_rate", and "retry_after", the
+        seconds until an open breaker probes the API or None
+        """
+        with self._lock:
+            now = monotonic()
+            self._update_state(now)
+            failure_rate, slow_call_rate = self._rates()
+            retry_after = None
+            if self._state == STATE_OPEN:
+                retry_after = max(
+                    self._opened_at + self.reset_timeout - now, 0.0)
+            return {"state": self._state, "calls": len(self._window),
+                    "failure_rate": failure_rate,
+                    "slow_call_rate": slow_call_rate,
+                    "retry_after": retry_after}
@@ -0,0 +1,79 @@
+""" Estimation of the clock difference between the SDK and LaunchKey API """
+
+import threading
+from collections import deque
+from email.utils import mktime_tz, parsedate_tz
+from time import time
+
+from .. import API_CACHE_TIME
+
+DEFAULT_MAX_SAMPLES = 15
+
+
+class ClockSkewEstimator(object):
+    """
+    Estimates the time difference between the SDK and the LaunchKey API from
+    server timestamps observed on normal traffic, such as the `iat` claim of
+    response JWTs and the HTTP Date header. The estimate is the median of the
+    most recent samples so a single delayed response does not skew it.
+    """
+
+    def __init__(self, max_samples=DEFAULT_MAX_SAMPLES,
+                 max_age=API_CACHE_TIME):
+        """
+        :param max_samples: Number of most recent samples used for the
+        estimate.
+        :param max_age: Number of seconds after which a sample is no longer
+        used for the estimate.
+        """
+        self.max_age = max_age
+        self._samples = deque(maxlen=max_samples)
+        self._lock = threading.Lock()
+
+    def add_sample(self, server_time, local_time=None):
+        """
+        Records a server timestamp observed at the given local time
+        :param server_time: int unix timestamp reported by the LaunchKey API
+        :param local_time: int unix timestamp of when the server time was
+        observed. Defaults to now.
+        :return: The updated time difference estimate
+        """
+        if local_time is None:
+            local_time = int(time())
+        with self._lock:
+            self._samples.append((local_time - int(server_time), local_time))
+            return self._estimate(local_time)
+
+    def offset(self, now=None):
+        """
+        :param now: int of the current unix timestamp. Defaults to now.
+        :return: The estimated time difference in seconds between the SDK and
+        the LaunchKey API or None when there are no recent samples
+        """
+        if now is None:
+            now = int(time())
+        with self._lock:
+            return self._estimate(now)
+
+    def _estimate(self, now):
+        offsets = sorted(offset for offset, observed_at in self._samples
+                         if now - observed_at <= self.max_age)
+        if not offsets:
+            return None
+        return offsets[len(offsets) // 2]
+
+    @staticmethod
+    def parse_date_header(headers):
+        """
+        Retrieves the time from the HTTP Date header of a response
+        :param headers: Response headers
+        :return: int unix timestamp or None if the header is missing or
+        malformed
+        """
+        try:
+            for name, value in headers.items():
+                if name.lower() == "date":
+                    return mktime_tz(parsedate_tz(value))
+        except (AttributeError, TypeError, ValueError, IndexError):
+            pass
+        return None
@@ -0,0 +1,355 @@
+""" Cryptographic backends performing the JOSE operations of JOSETransport """
+
+import hmac
+import os
+import threading
+import zlib
+from collections import OrderedDict
+from hashlib import sha256, sha384, sha512
+from struct import pack
+
+from Cryptodome.Cipher import PKCS1_OAEP
+from jwkest import BadSignature
+from jwkest.jwe import JWE, JWEnc, DecryptionFailed, NotSupportedAlgorithm
+from jwkest.jws import JWS, JWSig, SIGNER_ALGS
+from jwkest.jwt import b64encode_item
+
+try:
+    from cryptography.exceptions import InvalidSignature
+    from cryptography.hazmat.primitives import hashes
+    from cryptography.hazmat.primitives import padding as block_padding
+    from cryptography.hazmat.primitives.asymmetric import padding, rsa
+    from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, \
+        modes
+except ImportError:  # pragma: no cover
+    rsa = None
+
+# Number of bytes in each half of the content encryption key and the digest
+# used for the HMAC of the AES-CBC with HMAC JWE content encryption algorithms
+CBC_HMAC_ENCRYPTION = {
+    "A128CBC-HS256": (16, sha256),
+    "A192CBC-HS384": (24, sha384),
+    "A256CBC-HS512": (32, sha512),
+}
+
+KEY_CACHE_SIZE = 256
+
+
+class CryptoBackend(object):
+    """
+    Interface for the signing, verification, encryption, and decryption
+    performed by launchkey.transports.JOSETransport. Keys are
+    jwkest.jwk.RSAKey objects unless stated otherwise. Backends must produce
+    tokens which any other backend can verify or decrypt.
+    """
+
+    def sign_compact(self, claims, alg, key):
+        """
+        Signs claims as a compact JWS
+        :param claims: dict of the JWT claims
+        :param alg: JWS algorithm, e.g. RS512
+        :param key: RSAKey of the private signing key
+        :return: string of the compact JWS
+        """
+        raise NotImplementedError
+
+    def verify_compact(self, signing_input, signature, alg, key):
+        """
+        Verifies the signature of a compact JWS
+        :param signing_input: bytes of the encoded header and payload
+        segments of the JWS joined by a period
+        :param signature: bytes of the decoded signature segment
+        :param alg: JWS algorithm from the JWS headers
+        :param key: RSAKey of the public key
+        :return: None
+        :raises jwkest.BadSignature: when the signature is not valid
+        """
+        raise NotImplementedError
+
+    def encrypt_compact(self, plaintext, alg, enc, key):
+        """
+        Encrypts data as a compact JWE
+        :param plaintext: string to encrypt
+        :param alg: JWE key encryption algorithm, e.g. RSA-OAEP
+        :param enc: JWE content encryption algorithm, e.g. A256CBC-HS512
+        :param key: RSAKey of the recipient's public key
+        :return: string of the compact JWE
+        """
+        raise NotImplementedError
+
+    def decrypt_compact(self, token, keys):
+        """
+        Decrypts a compact JWE with the first key able to decrypt it
+        :param token: string of the compact JWE
+        :param keys: List of RSAKey private keys to try
+        :return: bytes of the decrypted content
+        :raises jwkest.jwe.DecryptionFailed: when no key could decrypt it
+        """
+        raise NotImplementedError
+
+    def load_rsa_oaep_key(self, key):
+        """
+        Prepares a private key for decrypt_rsa_oaep
+        :param key: RSAKey of the private key
+        :return: Backend specific key object
+        """
+        raise NotImplementedError
+
+    def decrypt_rsa_oaep(self, ciphertext, key):
+        """
+        Decrypts data encrypted with RSA-OAEP using SHA-1
+        :param ciphertext: bytes to decrypt
+        :param key: Key returned by load_rsa_oaep_key
+        :return: bytes of the decrypted data
+        """
+        raise NotImplementedError
+
+    def forget_key(self, key):
+        """
+        Discards anything the backend cached for a key which is no longer
+        used, such as a removed or rotated private key
+        :param key: RSAKey
+        :return: None
+        """
+
+
+class JWKESTBackend(CryptoBackend):
+    """
+    CryptoBackend using pyjwkest and pycryptodomex
+    """
+
+    def sign_compact(self, claims, alg, key):
+        return JWS(claims, alg=alg).sign_compact(keys=[key])
+
+    def verify_compact(self, signing_input, signature, alg, key):
+        SIGNER_ALGS[alg].verify(signing_input, signature,
+                                key.get_key(alg=alg, private=False))
+
+    def encrypt_compact(self, plaintext, alg, enc, key):
+        return JWE(plaintext, alg=alg, enc=enc).encrypt(keys=[key])
+
+    def decrypt_compact(self, token, keys):
+        return JWE().decrypt(token, keys=keys)
+
+    def load_rsa_oaep_key(self, key):
+        return PKCS1_OAEP.new(key.key)
+
+    def decrypt_rsa_oaep(self, ciphertext, key):
+        return key.decrypt(ciphertext)
+
+
+class _KeyCache(object):
+    """
+    Thread safe LRU cache of the keys converted by a CryptographyBackend
+    """
+
+    def __init__(self, size):
+        self._size = size
+        self._keys = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, numbers, load):
+        """
+        :param numbers: tuple of the key numbers identifying the key
+        :param load: Callable converting the key when it is not cached
+        :return: The converted key
+        """
+        with self._lock:
+            key = self._keys.get(numbers)
+            if key is not None:
+                self._keys.move_to_end(numbers)
+                return key
+        key = load()
+        with self._lock:
+            key = self._keys.setdefault(numbers, key)
+            while len(self._keys) > self._size:
+                self._keys.popitem(last=False)
+        return key
+
+    def discard(self, numbers):
+        """
+        :return: None
+        """
+        with self._lock:
+            self._keys.pop(numbers, None)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._keys)
+
+
+def _public_numbers(key):
+    return key.key.n, key.key.e
+
+
+def _private_numbers(key):
+    rsa_key = key.key
+    return rsa_key.n, rsa_key.e, rsa_key.d, rsa_key.p, rsa_key.q
+
+
+def _load_private_key(modulus, exponent, private_exponent, prime_p, prime_q):
+    return rsa.RSAPrivateNumbers(
+        prime_p, prime_q, private_exponent,
+        rsa.rsa_crt_dmp1(private_exponent, prime_p),
+        rsa.rsa_crt_dmq1(private_exponent, prime_q),
+        rsa.rsa_crt_iqmp(prime_p, prime_q),
+        rsa.RSAPublicNumbers(exponent, modulus)).private_key()
+
+
+class CryptographyBackend(CryptoBackend):
+    """
+    CryptoBackend using the OpenSSL bindings of the cryptography package.
+    Headers and serialization are shared with pyjwkest so signatures are
+    identical to those of JWKESTBackend. Keys are converted once and cached
+    by the backend until they are forgotten or evicted.
+    """
+
+    def __init__(self, key_cache_size=KEY_CACHE_SIZE):
+        """
+        :param key_cache_size: Maximum number of converted public keys, and
+        of converted private keys, kept by the backend
+        """
+        if rsa is None:
+            raise ImportError("The cryptography package is required for this "
+                              "backend. Install it with: "
+                              "pip install launchkey[cryptography]")
+        self._hashes = {"RS256": hashes.SHA256, "RS384": hashes.SHA384,
+                        "RS512": hashes.SHA512}
+        self._oaep_hashes = {"RSA-OAEP": hashes.SHA1,
+                             "RSA-OAEP-256": hashes.SHA256}
+        self._public_keys = _KeyCache(key_cache_size)
+        self._private_keys = _KeyCache(key_cache_size)
+
+    def _public_key(self, key):
+        modulus, exponent = _public_numbers(key)
+        return self._public_keys.get(
+            (modulus, exponent),
+            lambda: rsa.RSAPublicNumbers(exponent, modulus).public_key())
+
+    def _private_key(self, key):
+        numbers = _private_numbers(key)
+        return self._private_keys.get(numbers,
+                                      lambda: _load_private_key(*numbers))
+
+    def forget_key(self, key):
+        self._public_keys.discard(_public_numbers(key))
+        if key.key.has_private():
+            self._private_keys.discard(_private_numbers(key))
+
+    def _hash(self, alg):
+        try:
+            return self._hashes[alg]()
+        except KeyError:
+            raise NotSupportedAlgorithm(alg) from None
+
+    def _oaep(self, alg):
+        try:
+            digest = self._oaep_hashes[alg]
+        except KeyError:
+            raise NotSupportedAlgorithm(alg) from None
+        return padding.OAEP(mgf=padding.MGF1(algorithm=digest()),
+                            algorithm=digest(), label=None)
+
+    def sign_compact(self, claims, alg, key):
+        headers = {"alg": alg}
+        if key.kid:
+            headers["kid"] = key.kid
+        signing_input = JWSig(**headers).pack(parts=[claims])
+        signature = self._private_key(key).sign(
+            signing_input.encode("utf-8"), padding.PKCS1v15(),
+            self._hash(alg))
+        return ".".join([signing_input,
+                         b64encode_item(signature).decode("utf-8")])
+
+    def verify_compact(self, signing_input, signature, alg, key):
+        try:
+            self._public_key(key).verify(signature, signing_input,
+                                         padding.PKCS1v15(), self._hash(alg))
+        except InvalidSignature:
+            raise BadSignature() from None
+
+    def encrypt_compact(self, plaintext, alg, enc, key):
+        try:
+            key_length, digest = CBC_HMAC_ENCRYPTION[enc]
+        except KeyError:
+            raise NotSupportedAlgorithm(enc) from None
+        headers = {"alg": alg, "enc": enc}
+        if key.kid:
+            headers["kid"] = key.kid
+        jwe = JWEnc(**headers)
+        cek = os.urandom(key_length * 2)
+        encrypted_key = self._public_key(key).encrypt(cek, self._oaep(alg))
+        return jwe.pack(parts=[encrypted_key] + self._encrypt_content(
+            cek, digest, jwe.b64_encode_header(), plaintext.encode("utf-8")))
+
+    def _encrypt_content(self, cek, digest, aad, plaintext):
+        """
+        :return: List of the initialization vector, ciphertext, and
+        authentication tag
+        """
+        key_length = len(cek) // 2
+        init_vector = os.urandom(16)
+        padder = block_padding.PKCS7(128).padder()
+        padded = padder.update(plaintext) + padder.finalize()
+        encryptor = Cipher(algorithms.AES(cek[key_length:]),
+                           modes.CBC(init_vector)).encryptor()
+        ciphertext = encryptor.update(padded) + encryptor.finalize()
+        tag = self._authentication_tag(cek[:key_length], digest, aad,
+                                       init_vector, ciphertext)
+        return [init_vector, ciphertext, tag]
+
+    @staticmethod
+    def _authentication_tag(mac_key, digest, aad, init_vector, ciphertext):
+        mac_input = aad + init_vector + ciphertext + pack("!Q", 8 * len(aad))
+        return hmac.new(mac_key, mac_input, digest).digest()[:len(mac_key)]
+
+    def decrypt_compact(self, token, keys):
+        jwe = JWEnc().unpack(token)
+        try:
+            key_length, digest = CBC_HMAC_ENCRYPTION[jwe.headers["enc"]]
+        except KeyError:
+            raise NotSupportedAlgorithm(jwe.headers.get("enc")) from None
+        oaep = self._oaep(jwe.headers.get("alg"))
+        for key in keys:
+            try:
+                cek = self._private_key(key).decrypt(jwe.encrypted_key(),
+                                                     oaep)
+            except ValueError:
+                continue
+            if len(cek) != key_length * 2:
+                continue
+            plaintext = self._decrypt_content(jwe, cek, digest)
+            if plaintext is not None:
+                if jwe.headers.get("zip") == "DEF":
+                    plaintext = zlib.decompress(plaintext)
+                return plaintext
+        raise DecryptionFailed(
+            "No available key that could decrypt the message")
+
+    def _decrypt_content(self, jwe, cek, digest):
+        """
+        :return: bytes of the plaintext or None when the authentication tag
+        or padding is not valid
+        """
+        key_length = len(cek) // 2
+        init_vector = jwe.initialization_vector()
+        ciphertext = jwe.ciphertext()
+        expected_tag = self._authentication_tag(
+            cek[:key_length], digest, jwe.b64_protected_header(), init_vector,
+            ciphertext)
+        if not hmac.compare_digest(expected_tag, jwe.authentication_tag()):
+            return None
+        try:
+            decryptor = Cipher(algorithms.AES(cek[key_length:]),
+                               modes.CBC(init_vector)).decryptor()
+            padded = decryptor.update(ciphertext) + decryptor.finalize()
+            unpadder = block_padding.PKCS7(128).unpadder()
+            return unpadder.update(padded) + unpadder.finalize()
+        except ValueError:
+            return None
+
+    def load_rsa_oaep_key(self, key):
+        return self._private_key(key)
+
+    def decrypt_rsa_oaep(self, ciphertext, key):
+        return key.decrypt(ciphertext, self._oaep("RSA-OAEP"))
@@ -0,0 +1,295 @@
+""" Crypto backend running private key operations in worker processes """
+
+import os
+import threading
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, \
+    TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+
+from Cryptodome.PublicKey import RSA
+from jwkest.jwk import RSAKey
+
+from .crypto import CryptoBackend, JWKESTBackend
+from .deadline import check_deadline, limit_timeout
+
+DEFAULT_PENDING_PER_WORKER = 4
+DEFAULT_PENDING_TIMEOUT = 0.5
+DEFAULT_RESULT_TIMEOUT = 10
+
+# RSA-OAEP key returned by ProcessPoolCryptoBackend.load_rsa_oaep_key. The
+# kid is None when the key can not be used by the worker processes.
+PooledRSAOAEPKey = namedtuple("PooledRSAOAEPKey", ["kid", "local_key"])
+
+# State of the current worker process set by _initialize_worker
+_WORKER = {}
+
+
+class UnknownWorkerKey(Exception):
+    """
+    Raised in a worker process when it was not given the requested key
+    """
+
+
+def _initialize_worker(backend, keys):
+    """
+    Loads the private keys of a worker process once when it starts
+    :param backend: CryptoBackend performing the operations
+    :param keys: dict of PEM formatted private keys by `kid`
+    """
+    _WORKER["backend"] = backend
+    _WORKER["keys"] = {kid: RSAKey(key=RSA.importKey(pem), kid=kid)
+                       for kid, pem in keys.items()}
+    _WORKER["rsa_oaep_keys"] = {}
+
+
+def _worker_key(kid):
+    try:
+        return _WORKER["keys"][kid]
+    except KeyError:
+        raise UnknownWorkerKey(kid) from None
+
+
+def _sign_compact(claims, alg, kid):
+    return _WORKER["backend"].sign_compact(claims, alg, _worker_key(kid))
+
+
+def _decrypt_compact(token, kids):
+    return _WORKER["backend"].decrypt_compact(
+        token, [_worker_key(kid) for kid in kids])
+
+
+def _decrypt_rsa_oaep(ciphertext, kid):
+    key = _WORKER["rsa_oaep_keys"].get(kid)
+    if key is None:
+        key = _WORKER["backend"].load_rsa_oaep_key(_worker_key(kid))
+        _WORKER["rsa_oaep_keys"][kid] = key
+    return _WORKER["backend"].decrypt_rsa_oaep(ciphertext, key)
+
+
+class ProcessPoolCryptoBackend(CryptoBackend):
+    # pylint: disable=too-many-instance-attributes, too-many-arguments
+    """
+    CryptoBackend which signs and decrypts with private keys in a pool of
+    worker processes so that CPU bound RSA operations of concurrent requests
+    and webhooks are not limited by the GIL of a single process.
+
+    Private keys are sent to the workers once when the pool starts. Each
+    operation only sends the `kid` of the key and the data to sign or
+    decrypt. Adding a key not yet known by the workers replaces the pool
+    once in-flight operations finish.
+
+    Operations submitted while max_pending operations are already
+    outstanding wait up to pending_timeout, and no longer than the deadline
+    of the call, for one of them to finish. Public key operations,
+    operations with keys lacking a `kid`, operations still waiting after
+    pending_timeout, and operations failing due to a broken pool are
+    performed synchronously in the calling process. Submitted operations
+    are awaited up to result_timeout, and no longer than the deadline of the
+    call, before running in the calling process as well.
+    """
+
+    def __init__(self, backend=None, max_workers=None, max_pending=None,
+                 mp_context=None, pending_timeout=DEFAULT_PENDING_TIMEOUT,
+                 result_timeout=DEFAULT_RESULT_TIMEOUT):
+        """
+        :param backend: CryptoBackend performing the operations in the
+        workers and the calling process. Defaults to
+        launchkey.transports.crypto.JWKESTBackend.
+        :param max_workers: Number of worker processes. Defaults to the
+        number of CPUs.
+        :param max_pending: Maximum number of operations queued or running
+        in the workers before operations wait for room. Defaults to
+        DEFAULT_PENDING_PER_WORKER per worker.
+        :param mp_context: Optional multiprocessing context used to start the
+        workers
+        :param pending_timeout: Seconds an operation waits for room in the
+        workers before running in the calling process, or None to wait until
+        the deadline of the call
+        :param result_timeout: Seconds to wait for a worker to complete an
+        operation before running it in the calling process, or None to wait
+        until the deadline of the call
+        """
+        self._backend = backend if backend is not None else JWKESTBackend()
+        self._max_workers = max_workers or os.cpu_count() or 1
+        self._pending = threading.BoundedSemaphore(
+            max_pending or self._max_workers * DEFAULT_PENDING_PER_WORKER)
+        self._mp_context = mp_context
+        self._pending_timeout = pending_timeout
+        self._result_timeout = result_timeout
+        self._keys = {}
+        self._executor = None
+        self._lock = threading.Lock()
+        self._offloaded = 0
+        self._fallbacks = 0
+        self._saturated = 0
+
+    @property
+    def stats(self):
+        """
+        Number of operations performed by the workers, the number which
+        fell back to the calling process, and the number of those fallbacks
+        which gave up waiting for room in the saturated workers
+        :return: dict with offloaded, fallbacks, and saturated counts
+        """
+        with self._lock:
+            return {"offloaded": self._offloaded, "fallbacks": self._fallbacks,
+                    "saturated": self._saturated}
+
+    def shutdown(self, wait=True):
+        """
+        Stops the worker processes. A new pool is started by the next
+        private key operation.
+        :param wait: Whether to wait for in-flight operations to finish
+        :return: None
+        """
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait)
+
+    def _register(self, key):
+        """
+        Makes a private key available to the workers
+        :param key: RSAKey of the private key
+        :return: Boolean - Whether the workers can use the key
+        """
+        if not key.kid:
+            return False
+        with self._lock:
+            if key.kid in self._keys:
+                return True
+            self._keys[key.kid] = key.key.exportKey("PEM")
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False)
+        return True
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self._max_workers,
+                    mp_context=self._mp_context,
+                    initializer=_initialize_worker,
+                    initargs=(self._backend, dict(self._keys)))
+            return self._executor
+
+    def _discard_executor(self, executor):
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+        executor.shutdown(wait=False)
+
+    def _count(self, offloaded, saturated=False):
+        with self._lock:
+            if offloaded:
+                self._offloaded += 1
+            else:
+                self._fallbacks += 1
+                self._saturated += saturated
+
+    def _acquire_pending(self):
+        """
+        Waits for room in the workers up to pending_timeout and the deadline
+        of the current call
+        :return: Boolean - Whether room was acquired
+        :raises launchkey.exceptions.DeadlineExceeded: when the deadline of
+        the call passed before room was acquired
+        """
+        # Released when the operation completes rather than in this scope
+        # pylint: disable=consider-using-with
+        timeout = limit_timeout(self._pending_timeout, check_deadline())
+        if self._pending.acquire(timeout=timeout):
+            return True
+        check_deadline()
+        return False
+
+    def _run(self, function, args, fallback):
+        """
+        Runs an operation in the workers or in the calling process when the
+        workers stay saturated, are unavailable, or do not complete it in
+        time
+        :param function: Module level function to run in a worker
+        :param args: Tuple of arguments for function
+        :param fallback: Callable performing the operation in this process
+        :return: Result of the operation
+        :raises launchkey.exceptions.DeadlineExceeded: when the deadline of
+        the call passed while waiting for room in the workers or for the
+        result of the operation
+        """
+        if not self._acquire_pending():
+            self._count(False, saturated=True)
+            return fallback()
+        executor = self._get_executor()
+        try:
+            future = executor.submit(function, *args)
+        except (BrokenProcessPool, RuntimeError):
+            # The pool broke or was replaced after a new key was registered
+            self._pending.release()
+            self._count(False)
+            return fallback()
+        future.add_done_callback(lambda _: self._pending.release())
+        try:
+            result = future.result(
+                timeout=limit_timeout(self._result_timeout, check_deadline()))
+        except FutureTimeoutError:
+            # A running operation can not be cancelled. Its room in the
+            # workers is released once it completes.
+            future.cancel()
+            check_deadline()
+            self._count(False)
+            return fallback()
+        except (BrokenProcessPool, UnknownWorkerKey) as reason:
+            if isinstance(reason, BrokenProcessPool):
+                self._discard_executor(executor)
+            self._count(False)
+            return fallback()
+        self._count(True)
+        return result
+
+    def sign_compact(self, claims, alg, key):
+        if not self._register(key):
+            return self._backend.sign_compact(claims, alg, key)
+        return self._run(
+            _sign_compact, (claims, alg, key.kid),
+            lambda: self._backend.sign_compact(claims, alg, key))
+
+    def verify_compact(self, signing_input, signature, alg, key):
+        self._backend.verify_compact(signing_input, signature, alg, key)
+
+    def encrypt_compact(self, plaintext, alg, enc, key):
+        return self._backend.encrypt_compact(plaintext, alg, enc, key)
+
+    def decrypt_compact(self, token, keys):
+        keys = list(keys)
+        registered = [self._register(key) for key in keys]
+        if not all(registered):
+            return self._backend.decrypt_compact(token, keys)
+        return self._run(
+            _decrypt_compact, (token, [key.kid for key in keys]),
+            lambda: self._backend.decrypt_compact(token, keys))
+
+    def load_rsa_oaep_key(self, key):
+        return PooledRSAOAEPKey(key.kid if self._register(key) else None,
+                                self._backend.load_rsa_oaep_key(key))
+
+    def decrypt_rsa_oaep(self, ciphertext, key):
+        if key.kid is None:
+            return self._backend.decrypt_rsa_oaep(ciphertext, key.local_key)
+        return self._run(
+            _decrypt_rsa_oaep, (ciphertext, key.kid),
+            lambda: self._backend.decrypt_rsa_oaep(ciphertext, key.local_key))
+
+    def forget_key(self, key):
+        """
+        Discards a private key from the calling process backend and from the
+        workers, whose pool is replaced once in-flight operations finish
+        """
+        self._backend.forget_key(key)
+        with self._lock:
+            if self._keys.pop(key.kid, None) is None:
+                return
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False)
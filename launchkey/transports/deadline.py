@@ -0,0 +1,128 @@
+""" Deadlines limiting how long calls to the LaunchKey API may take """
+
+import asyncio
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from time import monotonic
+
+from ..exceptions import DeadlineExceeded
+
+# Monotonic time at which the calls of the current context must be done
+_DEADLINE = ContextVar("launchkey_deadline", default=None)
+
+
+@contextmanager
+def call_deadline(seconds):
+    """
+    Limits the requests made within the context, including their retries,
+    rate limiting waits, and the server time and public key requests they
+    need, to the given number of seconds. A nested deadline can only
+    shorten the deadline it is in. The deadline follows the context into
+    coroutines but not into other threads.
+    :param seconds: Seconds the calls may take or None for no deadline
+    """
+    if seconds is None:
+        yield
+        return
+    expires = monotonic() + seconds
+    current = _DEADLINE.get()
+    if current is not None:
+        expires = min(expires, current)
+    token = _DEADLINE.set(expires)
+    try:
+        yield
+    finally:
+        _DEADLINE.reset(token)
+
+
+def remaining_time():
+    """
+    :return: Seconds left until the deadline of the current context or
+    None when there is no deadline
+    """
+    expires = _DEADLINE.get()
+    if expires is None:
+        return None
+    return expires - monotonic()
+
+
+def check_deadline():
+    """
+    :return: Seconds left until the deadline of the current context or
+    None when there is no deadline
+    :raises launchkey.exceptions.DeadlineExceeded: when the deadline has
+    passed
+    """
+    remaining = remaining_time()
+    if remaining is not None and remaining <= 0:
+        raise DeadlineExceeded("The deadline of the call was exceeded")
+    return remaining
+
+
+@contextmanager
+def acquire_within_deadline(lock):
+    """
+    Holds a lock, waiting for it no longer than the deadline of the current
+    context. Without a deadline the lock is waited for indefinitely.
+    :param lock: threading.Lock
+    :raises launchkey.exceptions.DeadlineExceeded: when the deadline passes
+    before the lock is acquired
+    """
+    remaining = check_deadline()
+    if not lock.acquire(timeout=-1 if remaining is None else remaining):
+        raise DeadlineExceeded("The deadline of the call was exceeded")
+    try:
+        yield
+    finally:
+        lock.release()
+
+
+@asynccontextmanager
+async def acquire_within_deadline_async(lock):
+    """
+    Holds an asyncio lock, waiting for it no longer than the deadline of the
+    current context. Without a deadline the lock is waited for indefinitely.
+    :param lock: asyncio.Lock
+    :raises launchkey.exceptions.DeadlineExceeded: when the deadline passes
+    before the lock is acquired
+    """
+    try:
+        await asyncio.wait_for(lock.acquire(), check_deadline())
+    except asyncio.TimeoutError:
+        raise DeadlineExceeded(
+            "The deadline of the call was exceeded") from None
+    try:
+        yield
+    finally:
+        lock.release()
+
+
+def limit_timeout(timeout, remaining):
+    """
+    :param timeout: Timeout in seconds or None for no timeout
+    :param remaining: Seconds left until the deadline or None
+    :return: The timeout shortened to the time left until the deadline
+    """
+    if remaining is None:
+        return timeout
+    if timeout is None:
+        return remaining
+    return min(timeout, remaining)
+
+
+@contextmanager
+def deadline_timeouts(timeout_errors):
+    """
+    Raises launchkey.exceptions.DeadlineExceeded in place of the timeout
+    errors of an HTTP library raised within the context after the deadline
+    of the current context has passed
+    :param timeout_errors: Exception class or tuple of exception classes
+    """
+    try:
+        yield
+    except timeout_errors as reason:
+        remaining = remaining_time()
+        if remaining is not None and remaining <= 0:
+            raise DeadlineExceeded(
+                "The deadline of the call was exceeded") from reason
+        raise
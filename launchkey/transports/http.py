@@ -1,9 +1,19 @@
 """ Transport for communicating with the LaunchKey API of HTTP"""
 
+# pylint: disable=too-many-arguments, too-many-instance-attributes
+
 import requests
+from requests.adapters import HTTPAdapter
 
 from .. import LAUNCHKEY_PRODUCTION
+from ..utils.tracing import active_tracer
 from .base import APIResponse, APIErrorResponse
+from .deadline import check_deadline, deadline_timeouts, limit_timeout
+
+DEFAULT_POOL_CONNECTIONS = 10
+DEFAULT_POOL_MAXSIZE = 10
+DEFAULT_CONNECT_TIMEOUT = 5.0
+DEFAULT_READ_TIMEOUT = 30.0
 
 
 class RequestsTransport(object):
@@ -17,18 +27,117 @@ class RequestsTransport(object):
     verify_ssl = True
     allow_redirects = False
 
+    def __init__(self, pooled=False, pool_connections=DEFAULT_POOL_CONNECTIONS,
+                 pool_maxsize=DEFAULT_POOL_MAXSIZE, pool_block=False,
+                 circuit_breaker=None, connect_timeout=DEFAULT_CONNECT_TIMEOUT,
+                 read_timeout=DEFAULT_READ_TIMEOUT):
+        """
+        :param pooled: Boolean stating whether requests should be sent
+        through a long lived requests.Session. When enabled, connections
+        to the LaunchKey API are kept alive and reused between requests,
+        avoiding a new TCP and TLS handshake for every call.
+        :param pool_connections: Number of per host connection pools to
+        cache when pooled.
+        :param pool_maxsize: Maximum number of connections to keep alive per
+        host when pooled.
+        :param pool_block: Boolean stating whether requests should wait for a
+        free connection rather than open one beyond pool_maxsize. Setting
+        this enforces pool_maxsize as a hard per host connection limit.
+        :param circuit_breaker: Optional launchkey.transports.CircuitBreaker
+        making requests fail fast with
+        launchkey.exceptions.CircuitBreakerOpen while the LaunchKey API is
+        failing or slow.
+        :param connect_timeout: Seconds to wait for a connection to the
+        LaunchKey API or None to wait indefinitely.
+        :param read_timeout: Seconds to wait for the LaunchKey API to send
+        data or None to wait indefinitely.
+        """
+        self.pooled = pooled
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.pool_block = pool_block
+        self.circuit_breaker = circuit_breaker
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self._session = self._create_session() if pooled else None
+
+    def _create_session(self):
+        """
+        Creates a requests Session with a connection pooling adapter mounted
+        for both HTTP and HTTPS.
+        :return: requests.Session
+        """
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=self.pool_connections,
+                              pool_maxsize=self.pool_maxsize,
+                              pool_block=self.pool_block)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+
+    @property
+    def _requester(self):
+        """
+        Object performing the actual HTTP calls. This is the pooled session
+        when pooling is enabled and the requests module otherwise.
+        """
+        return self._session if self._session is not None else requests
+
     def set_url(self, url, testing):
         """
         :param url: Base url for the querying LaunchKey API
         :param testing: Boolean stating whether testing mode is being
         performed. This will determine whether SSL should be verified.
         """
+        if self._session is not None and url != self.url:
+            self.close()
+            self._session = self._create_session()
         self.url = url
         self.testing = testing
         self.verify_ssl = not self.testing
 
+    def close(self):
+        """
+        Closes all pooled connections. The transport remains usable and will
+        open new connections as needed.
+        :return: None
+        """
+        if self._session is not None:
+            self._session.close()
+
+    @property
+    def connection_stats(self):
+        """
+        Counters for the pooled connections of the transport. Counts are
+        reset whenever the pool is replaced by set_url.
+        :return: dict containing the number of connections "opened", the
+        number of "requests" sent, and the number of requests that "reused"
+        an already open connection.
+        """
+        opened = 0
+        sent = 0
+        if self._session is not None:
+            for adapter in set(self._session.adapters.values()):
+                pool_manager = adapter.poolmanager
+                for key in pool_manager.pools.keys():
+                    pool = pool_manager.pools.get(key)
+                    if pool is not None:
+                        opened += pool.num_connections
+                        sent += pool.num_requests
+        return {"opened": opened, "requests": sent,
+                "reused": max(sent - opened, 0)}
+
+    @classmethod
+    def _parse_response(cls, response):
+        tracer = active_tracer()
+        if tracer is None:
+            return cls._parse_api_response(response)
+        with tracer.start_span("launchkey.parse_response", {
+                "http.status_code": response.status_code}):
+            return cls._parse_api_response(response)
+
     @staticmethod
-    def _parse_response(response):
+    def _parse_api_response(response):
         try:
             data = response.json()
         except ValueError:
@@ -50,6 +159,34 @@ class RequestsTransport(object):
 
         return parsed_response
 
+    def _request(self, method, path, headers, **kwargs):
+        """
+        Sends an HTTP request to the LaunchKey API and parses the response
+        :param method: Lowercase HTTP method name
+        :param path: Path or endpoint that will be hit
+        :param headers: Headers to add onto the request
+        :param kwargs: Additional keyword arguments for requests
+        :return: launchkey.transports.base.APIResponse
+        :raises launchkey.exceptions.CircuitBreakerOpen: when the circuit
+        breaker is open
+        :raises launchkey.exceptions.DeadlineExceeded: when the deadline of
+        the call passed before a response was received
+        """
+        remaining = check_deadline()
+        kwargs["timeout"] = (limit_timeout(self.connect_timeout, remaining),
+                             limit_timeout(self.read_timeout, remaining))
+        with deadline_timeouts(requests.exceptions.Timeout):
+            if self.circuit_breaker is None:
+                return self._send(method, path, headers, **kwargs)
+            with self.circuit_breaker.call():
+                return self._send(method, path, headers, **kwargs)
+
+    def _send(self, method, path, headers, **kwargs):
+        response = getattr(self._requester, method)(
+            self.url + path, headers=headers, verify=self.verify_ssl,
+            allow_redirects=self.allow_redirects, **kwargs)
+        return self._parse_response(response)
+
     def get(self, path, headers=None, data=None):
         """
         Performs an HTTP GET request against the LaunchKey API
@@ -59,10 +196,7 @@ class RequestsTransport(object):
         the request.
         :return:
         """
-        response = requests.get(self.url + path, params=data,
-                                headers=headers, verify=self.verify_ssl,
-                                allow_redirects=self.allow_redirects)
-        return self._parse_response(response)
+        return self._request("get", path, headers, params=data)
 
     def post(self, path, headers=None, data=None):
         """
@@ -73,10 +207,7 @@ class RequestsTransport(object):
         body of the request.
         :return:
         """
-        response = requests.post(self.url + path, data=data,
-                                 headers=headers, verify=self.verify_ssl,
-                                 allow_redirects=self.allow_redirects)
-        return self._parse_response(response)
+        return self._request("post", path, headers, data=data)
 
     def put(self, path, headers=None, data=None):
         """
@@ -87,10 +218,7 @@ class RequestsTransport(object):
         body of the request.
         :return:
         """
-        response = requests.put(self.url + path, data=data,
-                                headers=headers, verify=self.verify_ssl,
-                                allow_redirects=self.allow_redirects)
-        return self._parse_response(response)
+        return self._request("put", path, headers, data=data)
 
     def delete(self, path, headers=None, data=None):
         """
@@ -101,11 +229,7 @@ class RequestsTransport(object):
         body of the request.
         :return:
         """
-        response = requests.delete(self.url + path, data=data,
-                                   headers=headers,
-                                   verify=self.verify_ssl,
-                                   allow_redirects=self.allow_redirects)
-        return self._parse_response(response)
+        return self._request("delete", path, headers, data=data)
 
     def patch(self, path, headers=None, data=None):
         """
@@ -116,7 +240,4 @@ class RequestsTransport(object):
         body of the request.
         :return:
         """
-        response = requests.patch(self.url + path, data=data,
-                                  headers=headers, verify=self.verify_ssl,
-                                  allow_redirects=self.allow_redirects)
-        return self._parse_response(response)
+        return self._request("patch", path, headers, data=data)
@@ -0,0 +1,156 @@
+""" Transport for communicating with the LaunchKey API over HTTP/2"""
+
+import threading
+
+from .deadline import deadline_timeouts
+from .httpx_base import BaseHTTPXTransport, httpx
+
+DEFAULT_MAX_CONNECTIONS = 10
+DEFAULT_MAX_KEEPALIVE_CONNECTIONS = 10
+
+
+class HTTP2Transport(BaseHTTPXTransport):
+    """
+    Transport class for performing HTTP based queries over HTTP/2 using the
+    httpx library. Requests made concurrently from multiple threads are
+    multiplexed as separate streams over a single connection to the
+    LaunchKey API rather than each requiring their own connection. It has the
+    same interface as launchkey.transports.RequestsTransport and may be used
+    as the http_client of a launchkey.transports.JOSETransport.
+    """
+
+    def __init__(self, max_connections=DEFAULT_MAX_CONNECTIONS,
+                 max_keepalive_connections=DEFAULT_MAX_KEEPALIVE_CONNECTIONS,
+                 prior_knowledge=False, circuit_breaker=None):
+        """
+        :param max_connections: Maximum number of concurrent connections to
+        the LaunchKey API. Only reached when the server does not support
+        HTTP/2 and requests fall back to HTTP/1.1.
+        :param max_keepalive_connections: Maximum number of idle connections
+        to keep alive for reuse.
+        :param prior_knowledge: Boolean stating whether HTTP/2 should be used
+        without negotiation. This disables HTTP/1.1 and is required for
+        HTTP/2 over plain text (h2c) connections.
+        :param circuit_breaker: Optional launchkey.transports.CircuitBreaker
+        making requests fail fast while the LaunchKey API is failing or slow.
+        """
+        super().__init__(max_connections, max_keepalive_connections,
+                         circuit_breaker)
+        self.prior_knowledge = prior_knowledge
+        self._client_lock = threading.Lock()
+
+    def _get_client(self):
+        """
+        Retrieves the httpx.Client, creating it when necessary
+        :return: httpx.Client
+        """
+        client = self._client
+        if client is None:
+            with self._client_lock:
+                if self._client is None:
+                    self._client = httpx.Client(
+                        verify=self.verify_ssl,
+                        follow_redirects=self.allow_redirects,
+                        http1=not self.prior_knowledge,
+                        http2=True,
+                        limits=self._get_limits()
+                    )
+                client = self._client
+        return client
+
+    def close(self):
+        """
+        Closes all open connections. The transport remains usable and will
+        open a new connection as needed.
+        :return: None
+        """
+        with self._client_lock:
+            if self._client is not None:
+                self._client.close()
+                self._client = None
+
+    def _reset_client(self):
+        """
+        Closes the connections of the current client so that a new one is
+        created on the next request
+        :return: None
+        """
+        self.close()
+
+    def _request(self, method, path, headers, data):
+        """
+        Sends an HTTP request to the LaunchKey API and parses the response
+        :param method: Lowercase HTTP method name
+        :param path: Path or endpoint that will be hit
+        :param headers: Headers to add onto the request
+        :param data: Dictionary or bytes to be sent. For GET requests this is
+        sent in the query string, otherwise it is sent as the body.
+        :return: launchkey.transports.base.APIResponse
+        :raises launchkey.exceptions.CircuitBreakerOpen: when the circuit
+        breaker is open
+        :raises launchkey.exceptions.DeadlineExceeded: when the deadline of
+        the call passed before a response was received
+        """
+        with deadline_timeouts(httpx.TimeoutException):
+            if self.circuit_breaker is None:
+                return self._send(method, path, headers, data)
+            with self.circuit_breaker.call():
+                return self._send(method, path, headers, data)
+
+    def _send(self, method, path, headers, data):
+        client = self._get_client()
+        response = client.request(
+            method.upper(), self.url + path, headers=headers,
+            **self._get_request_kwargs(method, data, client))
+        return self._parse_response(response)
+
+    def get(self, path, headers=None, data=None):
+        """
+        Performs an HTTP GET request against the LaunchKey API
+        :param path: Path or endpoint that will be hit
+        :param headers: Headers to add onto the request
+        :param data: Dictionary or bytes to be sent in the query string for
+        the request.
+        :return:
+        """
+        return self._request("get", path, headers, data)
+
+    def post(self, path, headers=None, data=None):
+        """
+        Performs and HTTP POST request against the LaunchKey API
+        :param path: Path or endpoint that will be hit
+        :param headers: Headers to add onto the request
+        :param data: Dictionary or bytes to send in the body of the request.
+        :return:
+        """
+        return self._request("post", path, headers, data)
+
+    def put(self, path, headers=None, data=None):
+        """
+        Performs and HTTP PUT request against the LaunchKey API
+        :param path: Path or endpoint that will be hit
+        :param headers: Headers to add onto the request
+        :param data: Dictionary or bytes to send in the body of the request.
+        :return:
+        """
+        return self._request("put", path, headers, data)
+
+    def delete(self, path, headers=None, data=None):
+        """
+        Performs and HTTP DELETE request against the LaunchKey API
+        :param path: Path or endpoint that will be hit
+        :param headers: Headers to add onto the request
+        :param data: Dictionary or bytes to send in the body of the request.
+        :return:
+        """
+        return self._request("delete", path, headers, data)
+
+    def patch(self, path, headers=None, data=None):
+        """
+        Performs and HTTP PATCH request against the LaunchKey API
+        :param path: Path or endpoint that will be hit
+        :param headers: Headers to add onto the request
+        :param data: Dictionary or bytes to send in the body of the request.
+        :return:
+        """
+        return self._request("patch", path, headers, data)
@@ -0,0 +1,126 @@
+""" Shared logic for transports built on the httpx library """
+
+try:
+    import httpx
+except ImportError:  # pragma: no cover
+    httpx = None
+
+from .. import LAUNCHKEY_PRODUCTION
+from .base import APIResponse, APIErrorResponse
+from .deadline import check_deadline, limit_timeout
+
+
+class BaseHTTPXTransport(object):  # pylint: disable=too-few-public-methods
+    """
+    Base class for transports performing HTTP based queries using the httpx
+    library. Subclasses provide the client and the request methods.
+    """
+
+    url = LAUNCHKEY_PRODUCTION
+    testing = False
+    verify_ssl = True
+    allow_redirects = False
+
+    def __init__(self, max_connections, max_keepalive_connections,
+                 circuit_breaker=None):
+        """
+        :param max_connections: Maximum number of concurrent connections to
+        the LaunchKey API.
+        :param max_keepalive_connections: Maximum number of idle connections
+        to keep alive for reuse.
+        :param circuit_breaker: Optional launchkey.transports.CircuitBreaker
+        making requests fail fast with
+        launchkey.exceptions.CircuitBreakerOpen while the LaunchKey API is
+        failing or slow.
+        """
+        if httpx is None:
+            raise ImportError("The httpx package is required for this "
+                              "transport. Install it with: "
+                              "pip install launchkey[async] or "
+                              "pip install launchkey[http2]")
+        self.max_connections = max_connections
+        self.max_keepalive_connections = max_keepalive_connections
+        self.circuit_breaker = circuit_breaker
+        self._client = None
+
+    def set_url(self, url, testing):
+        """
+        :param url: Base url for the querying LaunchKey API
+        :param testing: Boolean stating whether testing mode is being
+        performed. This will determine whether SSL should be verified.
+        """
+        self.url = url
+        self.testing = testing
+        self.verify_ssl = not self.testing
+        # SSL verification is a client level setting in httpx so a new client
+        # is created on the next request.
+        self._reset_client()
+
+    def _reset_client(self):
+        """
+        Discards the current client so that a new one is created on the next
+        request
+        :return: None
+        """
+        self._client = None
+
+    def _get_limits(self):
+        """
+        :return: httpx.Limits for the client connection pool
+        """
+        return httpx.Limits(
+            max_connections=self.max_connections,
+            max_keepalive_connections=self.max_keepalive_connections
+        )
+
+    @staticmethod
+    def _get_request_kwargs(method, data, client=None):
+        """
+        Builds the httpx keyword arguments for the request data
+        :param method: Lowercase HTTP method name
+        :param data: Dictionary or bytes to be sent. For GET requests this is
+        sent in the query string, otherwise it is sent as the body.
+        :param client: httpx client whose timeouts are shortened to the
+        deadline of the current context, if any
+        :return: dict
+        :raises launchkey.exceptions.DeadlineExceeded: when the deadline has
+        passed
+        """
+        kwargs = {}
+        remaining = check_deadline()
+        if remaining is not None and client is not None:
+            timeout = client.timeout
+            kwargs["timeout"] = httpx.Timeout(
+                connect=limit_timeout(timeout.connect, remaining),
+                read=limit_timeout(timeout.read, remaining),
+                write=limit_timeout(timeout.write, remaining),
+                pool=limit_timeout(timeout.pool, remaining))
+        if method == "get":
+            kwargs["params"] = data
+        elif isinstance(data, (str, bytes)):
+            kwargs["content"] = data
+        elif data is not None:
+            kwargs["data"] = data
+        return kwargs
+
+    @staticmethod
+    def _parse_response(response):
+        try:
+            data = response.json()
+        except ValueError:
+            data = response.text
+
+        if response.status_code >= 500:
+            response.raise_for_status()
+
+        if response.status_code < 400:
+            parsed_response = APIResponse(data, response.headers,
+                                          response.status_code,
+                                          raw_data=response.text)
+        else:
+            parsed_response = APIErrorResponse(data, response.headers,
+                                               response.status_code,
+                                               response.reason_phrase,
+                                               response.text)
+
+        return parsed_response
@@ -1,23 +1,24 @@
 """ JOSE based transport"""
 
 # pylint: disable=too-many-instance-attributes, too-many-arguments
+# pylint: disable=too-many-lines, too-many-public-methods
 
 import warnings
 import json
 import platform
+import threading
 
 from base64 import b64decode
+from contextlib import ExitStack, contextmanager
 from uuid import UUID, uuid4
-from hashlib import sha256, sha384, sha512, md5
+from hashlib import sha256, sha384, sha512
 from time import time
 from calendar import timegm
 from dateutil.parser import parse
-from Cryptodome.PublicKey import RSA
-from Cryptodome.Cipher import PKCS1_OAEP
-from jwkest import JWKESTException
+from jwkest import JWKESTException, WrongNumberOfParts
 from jwkest.jwk import RSAKey, import_rsa_key
-from jwkest.jws import JWS, NoSuitableSigningKeys
-from jwkest.jwe import JWE, JWEnc
+from jwkest.jws import NoSuitableSigningKeys, SignerAlgError
+from jwkest.jwe import JWEnc
 from jwkest.jwt import JWT, BadSyntax
 
 from ..exceptions import InvalidEntityID, InvalidPrivateKey, \
@@ -28,8 +29,55 @@ from .. import VALID_JWT_ISSUER_LIST, API_CACHE_TIME, \
     JOSE_SUPPORTED_CONTENT_HASH_ALGS, JOSE_SUPPORTED_JWE_ALGS, \
     JOSE_SUPPORTED_JWE_ENCS, JOSE_SUPPORTED_JWT_ALGS, \
     JOSE_AUDIENCE, JOSE_JWT_LEEWAY, SDK_VERSION
+from ..utils.tracing import active_tracer, subject_type
 from .http import RequestsTransport
 from .base import APIErrorResponse
+from .clock import ClockSkewEstimator
+from .deadline import acquire_within_deadline
+from .crypto import JWKESTBackend
+from .key_cache import PublicKeyCache
+from .key_material import load_private_key_material
+from .key_registry import PrivateKeyRegistry, PrivateKeyList
+from .shared_cache import DEFAULT_PUBLIC_KEY_TTL
+from .timing import RequestTiming, NULL_TIMING, PHASE_ENCRYPT, PHASE_HASH, \
+    PHASE_SIGN, PHASE_HTTP, PHASE_VERIFY, PHASE_DECRYPT, PHASE_PARSE, \
+    PHASE_RATE_LIMIT, PHASE_METADATA, endpoint_name
+from .refresher import MetadataRefresher, DEFAULT_REFRESH_AHEAD, \
+    DEFAULT_MIN_BACKOFF, DEFAULT_MAX_BACKOFF
+from .retry import retry_attempts
+
+# Constant parts of every JOSE request computed once per process
+USER_AGENT = f"PythonServiceSDK/{SDK_VERSION} " \
+             f"({platform.system()} {platform.release()})"
+AUTHORIZATION_PREFIX = "IOV-JWT "
+COMPACT_JSON_SEPARATORS = (",", ":")
+
+SHARED_SERVER_TIME_DIFFERENCE_KEY = "server-time-difference"
+SHARED_CURRENT_KID_KEY = "current-kid"
+SHARED_PUBLIC_KEY_PREFIX = "public-key:"
+
+
+class _JOSERequestOutcome(object):  # pylint: disable=too-few-public-methods
+    """
+    Timing and final status of a JOSE request observed by
+    JOSETransport._observe_jose_request
+    """
+
+    def __init__(self, timing):
+        """
+        :param timing: RequestTiming recording the phases of the request
+        """
+        self.timing = timing
+        self.status_code = None
+
+    def finish(self, response):
+        """
+        Records the final response of the request
+        :param response: Response object with decrypted data
+        :return: The response
+        """
+        self.status_code = response.status_code
+        return response
 
 
 class JOSETransport(object):
@@ -41,7 +89,9 @@ class JOSETransport(object):
 
     def __init__(self, jwt_algorithm="RS512", jwe_cek_encryption="RSA-OAEP",
                  jwe_claims_encryption="A256CBC-HS512",
-                 content_hash_algorithm="S256", http_client=None):
+                 content_hash_algorithm="S256", http_client=None,
+                 shared_cache=None, public_key_cache=None,
+                 crypto_backend=None, rate_limiter=None, retry_policy=None):
         """
         :param jwt_algorithm: JWT Signing algorithm
                               Currently supported: RS256, RS384, RS512
@@ -56,20 +106,73 @@ class JOSETransport(object):
         Currently supported: S256, S384, S512 (shortened forms of SHAxxx)
         :param http_client: HTTP transport to contact the LaunchKey api after
         JOSE processing is complete
+        :param shared_cache: Optional
+        launchkey.transports.shared_cache.SharedCache used to share the API
+        public keys, active encryption key, and server time difference with
+        the transports of other processes. Values found in it are used
+        instead of requesting them from the LaunchKey API.
+        :param public_key_cache: Optional
+        launchkey.transports.key_cache.PublicKeyCache to configure the size
+        of the API public key cache and how long unknown key IDs are
+        remembered.
+        :param crypto_backend: Optional
+        launchkey.transports.crypto.CryptoBackend performing signing,
+        verification, encryption, and decryption. Defaults to
+        launchkey.transports.crypto.JWKESTBackend.
+        :param rate_limiter: Optional
+        launchkey.transports.AdaptiveRateLimiter which delays
+        requests to stay within its rates and slows down when the LaunchKey
+        API responds with a 429.
+        :param retry_policy: Optional launchkey.transports.RetryPolicy
+        retrying GET requests and POST requests to /list endpoints on
+        connection errors, 5xx, and 429 responses. Each attempt is signed
+        with a new JTI.
         """
         self.issuer = None
         self.issuer_id = None
         self.signing_key = None
         self.loaded_issuer_private_keys = {}
-        self.issuer_private_keys = []
+
+        # Issuer private keys used for decryption indexed by `kid`
+        self._private_keys = PrivateKeyRegistry()
+
+        # Parsed issuer private keys indexed by PEM, evicted once a key is
+        # neither the signing key nor used for decryption
+        self._key_materials = {}
         self._server_time_difference = None, None
+        self._server_time_hits = 0
+        self._server_time_misses = 0
+
+        # Server timestamps seen on responses used to keep the server time
+        # difference current without pinging the LaunchKey API.
+        self._clock_skew = ClockSkewEstimator()
 
         # Single key ID with timestamp of when it was set.
         self._current_kid = None, None
 
-        # Dictionary of public keys with `kid` being the dict key
-        # and the public key being the value
-        self._public_key_cache = {}
+        # Bounded cache of public keys with `kid` being the key and the
+        # public key being the value
+        self._public_key_cache = public_key_cache \
+            if public_key_cache is not None else PublicKeyCache()
+
+        # Locks ensuring only one thread at a time fetches each piece of
+        # metadata from the LaunchKey API. Other threads needing the same
+        # metadata wait for that fetch and use its result.
+        self._server_time_difference_lock = threading.Lock()
+        self._current_kid_lock = threading.Lock()
+        self._public_key_fetch_locks_lock = threading.Lock()
+        self._public_key_fetch_locks = {}
+        self._metadata_refresher = None
+        self._shared_cache = shared_cache
+        self._crypto_backend = crypto_backend \
+            if crypto_backend is not None else JWKESTBackend()
+
+        self._rate_limiter = rate_limiter
+        self._retry_policy = retry_policy
+
+        # Callables given a RequestTiming after each JOSE request. Replaced
+        # rather than mutated so requests can iterate it without a lock.
+        self._timing_hooks = ()
 
         self.jwt_algorithm = self.__verify_supported_algorithm(
             jwt_algorithm, JOSE_SUPPORTED_JWT_ALGS)
@@ -96,43 +199,36 @@ class JOSETransport(object):
         return algorithm
 
     @staticmethod
-    def __get_jti():
+    def _get_jti():
         """Retrieves a unique JWT ID"""
         return str(uuid4())
 
     @staticmethod
-    def __generate_key_id(rsa_key):
+    def _unpack_api_response_jwt(headers):
         """
-        Generates a key id to be used in JWE + JWT. It is based on the digest
-        of the key.
-        :param rsa_key: RSA private key in string format
-        :return:
-        """
-        key = RSA.importKey(rsa_key)
-        md5digest = md5(key.publickey().exportKey('DER')).hexdigest()
-        return ":".join(
-            md5digest[i:i + 2] for i in range(0, len(md5digest), 2))
-
-    @staticmethod
-    def __get_kid_from_api_response_headers(headers):
-        """
-        Gets `kid` property from a JWT token within the headers of a
-        LaunchKey API response.
+        Splits and decodes the JWT within the headers of a LaunchKey API
+        response.
         :param headers: Response headers
-        :return: string of the `kid`
+        :return: Unpacked jwkest.jwt.JWT
         :raises launchkey.exceptions.UnexpectedAPIResponse: if unable to unpack
             the JWT or if the JWT header does not exist
-        :raises launchkey.exceptions.JWTValidationFailure: if `kid` is missing
-            or invalid
         """
         try:
-            jwt = headers.get("X-IOV-JWT")
-            jwt_headers = JWT().unpack(jwt).headers
+            return JWT().unpack(headers.get("X-IOV-JWT"))
         except (BadSyntax, IndexError, ValueError) as jwt_error:
             raise UnexpectedAPIResponse("JWT was missing or malformed in API "
                                         "response.") from jwt_error
 
-        kid = jwt_headers.get("kid")
+    @staticmethod
+    def _get_kid_from_jwt(jwt):
+        """
+        Gets `kid` property from the headers of an unpacked JWT.
+        :param jwt: Unpacked jwkest.jwt.JWT
+        :return: string of the `kid`
+        :raises launchkey.exceptions.JWTValidationFailure: if `kid` is missing
+            or invalid
+        """
+        kid = jwt.headers.get("kid")
 
         if not isinstance(kid, str):
             raise JWTValidationFailure("`kid` header in JWT was missing or"
@@ -165,22 +261,154 @@ class JOSETransport(object):
     @property
     def server_time_difference(self):
         """
-        The time drag between the sdk and the Launchkey API. The result is
-        cached for API_CACHE_TIME
+        The time drag between the sdk and the Launchkey API. It is estimated
+        from the server time of responses to JOSE requests and the LaunchKey
+        API is only pinged when no response has been received within
+        API_CACHE_TIME. With start_background_refresh, the value is instead
+        renewed in the background when it expires.
         """
-        now = int(time())
-        if self._server_time_difference[1] is None or now - \
-                self._server_time_difference[1] > API_CACHE_TIME:
-            response = self.get("/public/v3/ping", None)
-            try:
-                self._server_time_difference = now - self.parse_api_time(
-                    response.data['api_time']), now
-            except (KeyError, ValueError, TypeError):
-                raise UnexpectedAPIResponse(
-                    "Unexpected api time received: %s" % response.data) \
-                    from None
+        return self._lookup_server_time_difference()
+
+    def _lookup_server_time_difference(self):
+        """
+        Retrieves the server time difference, counting the lookup as a cache
+        hit or miss
+        :return: int of the server time difference
+        """
+        if self._server_time_difference_expired(int(time())) and \
+                not self._can_serve_stale(self._server_time_difference[1]):
+            self._server_time_misses += 1
+            self._refresh_server_time_difference()
+        else:
+            self._server_time_hits += 1
         return self._server_time_difference[0]
 
+    def _loaded_server_time_difference(self):
+        """
+        Retrieves the server time difference loaded for the current request
+        without counting another lookup, looking it up when it has never
+        been loaded
+        :return: int of the server time difference
+        """
+        difference = self._server_time_difference[0]
+        if difference is None:
+            return self.server_time_difference
+        return difference
+
+    @property
+    def server_time_cache_stats(self):
+        """
+        Counters of server time difference lookups
+        :return: dict of the "hits" served from the cached value and the
+        "misses" which required it to be refreshed
+        """
+        return {"hits": self._server_time_hits,
+                "misses": self._server_time_misses}
+
+    def _refresh_server_time_difference(self, force=False):
+        """
+        Retrieves and caches the time difference between the sdk and the
+        LaunchKey API if it has expired. Concurrent callers share one request.
+        :param force: Boolean stating whether to refresh even when the cached
+        value has not expired.
+        :return:
+        """
+        with acquire_within_deadline(self._server_time_difference_lock):
+            now = int(time())
+            if (force or self._server_time_difference_expired(now)) and \
+                    not self._load_shared_server_time_difference():
+                response = self.get("/public/v3/ping", None)
+                self._handle_ping_api_response(response, now)
+                self._share_server_time_difference()
+
+    def _load_shared_server_time_difference(self):
+        """
+        Uses the server time difference from the shared cache when it is
+        newer than the current one
+        :return: Boolean stating whether a value was loaded
+        """
+        if self._shared_cache is None:
+            return False
+        entry = self._shared_cache.get(SHARED_SERVER_TIME_DIFFERENCE_KEY)
+        try:
+            difference, timestamp = int(entry[0]), int(entry[1])
+        except (TypeError, ValueError, IndexError, KeyError):
+            return False
+        current_timestamp = self._server_time_difference[1]
+        if current_timestamp is not None and timestamp <= current_timestamp:
+            return False
+        self._server_time_difference = difference, timestamp
+        return True
+
+    def _share_server_time_difference(self):
+        """
+        Stores the current server time difference in the shared cache
+        :return:
+        """
+        if self._shared_cache is not None:
+            difference, timestamp = self._server_time_difference
+            self._shared_cache.set(
+                SHARED_SERVER_TIME_DIFFERENCE_KEY, [difference, timestamp],
+                timestamp + API_CACHE_TIME - int(time()))
+
+    def _server_time_difference_expired(self, now):
+        """
+        Determines whether the cached server time difference must be
+        refreshed
+        :param now: int of the current unix timestamp
+        :return: Boolean
+        """
+        return self._server_time_difference[1] is None or \
+            now - self._server_time_difference[1] > API_CACHE_TIME
+
+    def _handle_ping_api_response(self, response, now):
+        """
+        Parses a LaunchKey ping API response and caches the time difference
+        between the sdk and the LaunchKey API.
+        :param response: Response object
+        :param now: int of the unix timestamp when the request was made
+        :return:
+        :raises UnexpectedAPIResponse: if the response does not contain a
+            valid api_time
+        """
+        try:
+            api_time = self.parse_api_time(response.data['api_time'])
+        except (KeyError, ValueError, TypeError):
+            raise UnexpectedAPIResponse(
+                "Unexpected api time received: %s" % response.data) \
+                from None
+        self._record_server_time(api_time, now)
+
+    def _record_server_time(self, server_time, now=None):
+        """
+        Adds a server time observed on a LaunchKey API response to the clock
+        skew estimate and caches the resulting time difference.
+        :param server_time: int unix timestamp of the LaunchKey API
+        :param now: int of the unix timestamp when the server time was
+        observed. Defaults to now.
+        :return:
+        """
+        if now is None:
+            now = int(time())
+        self._server_time_difference = \
+            self._clock_skew.add_sample(server_time, now), now
+
+    def _record_response_server_time(self, response, payload=None):
+        """
+        Records the server time of a response using the `iat` claim of its
+        verified JWT payload, falling back to the HTTP Date header.
+        :param response: Response object from the http client
+        :param payload: Verified JWT payload of the response or None
+        :return:
+        """
+        server_time = payload.get("iat") if isinstance(payload, dict) \
+            else None
+        if not isinstance(server_time, int) or isinstance(server_time, bool):
+            server_time = ClockSkewEstimator.parse_date_header(
+                response.headers)
+        if server_time is not None:
+            self._record_server_time(server_time)
+
     @property
     def api_public_keys(self):
         """
@@ -191,24 +419,165 @@ class JOSETransport(object):
         """
         if not self._public_key_cache:
             self.update_and_return_active_encryption_kid()
-        return list(self._public_key_cache.values())
+        return self._public_key_cache.values()
+
+    @property
+    def public_key_cache_stats(self):
+        """
+        Counters of the API public key cache
+        :return: dict of the "hits", "misses", "evictions", and
+        "negative_hits" of the cache and its current "size" and
+        "negative_size"
+        """
+        return self._public_key_cache.stats
 
     def update_and_return_active_encryption_kid(self):
         """
         Determines whether a new current key is necessary, and if so, retrieves
         new `kid` and public key from LaunchKey API, sets the current `kid`
-        with current timestamp, and caches the new key.
+        with current timestamp, and caches the new key. The last known key
+        is used while it is renewed in the background when
+        start_background_refresh has been called.
         :return: Currently active key id
         """
-        now = int(time())
+        if self._current_kid_expired(int(time())) and \
+                not self._can_serve_stale(self._current_kid[1]):
+            self._refresh_active_encryption_kid()
+        return self._current_kid[0]
+
+    def _refresh_active_encryption_kid(self, force=False):
+        """
+        Retrieves and caches the current `kid` and public key from the
+        LaunchKey API if it has expired. Concurrent callers share one request.
+        :param force: Boolean stating whether to refresh even when the cached
+        value has not expired.
+        :return:
+        """
+        with acquire_within_deadline(self._current_kid_lock):
+            now = int(time())
+            if (force or self._current_kid_expired(now)) and \
+                    not self._load_shared_current_kid():
+                new_kid, new_public_key = self._get_current_kid_and_key()
+                self._set_current_kid(new_kid, new_public_key, now)
+                self._share_current_kid(new_public_key)
+
+    def _load_shared_current_kid(self):
+        """
+        Uses the active encryption `kid` and public key from the shared cache
+        when it is newer than the current one
+        :return: Boolean stating whether a value was loaded
+        """
+        if self._shared_cache is None:
+            return False
+        entry = self._shared_cache.get(SHARED_CURRENT_KID_KEY)
+        try:
+            kid, public_key, timestamp = entry
+            timestamp = int(timestamp)
+        except (TypeError, ValueError):
+            return False
+        if not isinstance(kid, str) or not isinstance(public_key, str):
+            return False
+        current_timestamp = self._current_kid[1]
+        if isinstance(current_timestamp, int) and \
+                timestamp <= current_timestamp:
+            return False
+        try:
+            self._set_current_kid(kid, public_key, timestamp)
+        except UnexpectedAPIResponse:
+            return False
+        return True
+
+    def _share_current_kid(self, public_key):
+        """
+        Stores the active encryption `kid` and its public key in the shared
+        cache
+        :param public_key: string of the public key
+        :return:
+        """
+        if self._shared_cache is not None:
+            kid, timestamp = self._current_kid
+            self._shared_cache.set(
+                SHARED_CURRENT_KID_KEY, [kid, public_key, timestamp],
+                timestamp + API_CACHE_TIME - int(time()))
+            self._shared_cache.set(SHARED_PUBLIC_KEY_PREFIX + kid,
+                                   public_key, DEFAULT_PUBLIC_KEY_TTL)
+
+    def _can_serve_stale(self, refreshed_at):
+        """
+        Determines whether an expired cached value may still be used because
+        the background refresher is renewing it
+        :param refreshed_at: unix timestamp of when the value was cached or
+        None if it has never been retrieved
+        :return: Boolean
+        """
+        return refreshed_at is not None and \
+            self._metadata_refresher is not None and \
+            self._metadata_refresher.running
+
+    def start_background_refresh(self, refresh_ahead=DEFAULT_REFRESH_AHEAD,
+                                 min_backoff=DEFAULT_MIN_BACKOFF,
+                                 max_backoff=DEFAULT_MAX_BACKOFF):
+        """
+        Starts a daemon thread which renews the server time difference and
+        active encryption key before they expire. While it runs, requests
+        keep using the last known values instead of waiting on the LaunchKey
+        API when they expire. Values which have never been retrieved are
+        fetched immediately.
+        :param refresh_ahead: Number of seconds before API_CACHE_TIME elapses
+        that values are renewed
+        :param min_backoff: Seconds to wait before retrying the first failed
+        refresh. The wait doubles with each consecutive failure.
+        :param max_backoff: Maximum seconds to wait between retries
+        :return: launchkey.transports.refresher.MetadataRefresher
+        """
+        self.stop_background_refresh()
+        self._metadata_refresher = self._make_metadata_refresher(
+            refresh_ahead, min_backoff, max_backoff)
+        self._metadata_refresher.start()
+        return self._metadata_refresher
+
+    def _make_metadata_refresher(self, refresh_ahead, min_backoff,
+                                 max_backoff):
+        """
+        :return: launchkey.transports.refresher.MetadataRefresher used by
+        start_background_refresh
+        """
+        return MetadataRefresher(self, refresh_ahead, min_backoff,
+                                 max_backoff)
+
+    def stop_background_refresh(self, timeout=None):
+        """
+        Stops the background refresher started by start_background_refresh.
+        Expired values are once again refreshed by the request needing them.
+        :param timeout: Maximum number of seconds to wait for an in-flight
+        refresh to finish
+        :return:
+        """
+        if self._metadata_refresher is not None:
+            self._metadata_refresher.stop(timeout)
+            self._metadata_refresher = None
+
+    def _current_kid_expired(self, now):
+        """
+        Determines whether the current encryption `kid` must be refreshed
+        :param now: int of the current unix timestamp
+        :return: Boolean
+        """
         current_kid, current_kid_timestamp = self._current_kid
+        return (not current_kid or
+                not isinstance(current_kid_timestamp, int)) or \
+            now - current_kid_timestamp > API_CACHE_TIME
 
-        if (not current_kid or not isinstance(current_kid_timestamp, int)) \
-                or now - current_kid_timestamp > API_CACHE_TIME:
-            new_kid, new_public_key = self._get_current_kid_and_key()
-            self._current_kid = new_kid, now
-            self._cache_public_key(new_kid, new_public_key)
-        return self._current_kid[0]
+    def _set_current_kid(self, kid, public_key, now):
+        """
+        Sets the current encryption `kid` and caches its public key
+        :param kid: string of the `kid`
+        :param public_key: string of the public key
+        :param now: int of the unix timestamp when the key was retrieved
+        :return:
+        """
+        self._cache_public_key(kid, public_key)
+        self._current_kid = kid, now
 
     def _get_key_by_kid(self, kid):
         """
@@ -217,6 +586,8 @@ class JOSETransport(object):
         :return: string of the public key
         """
         response = self.get("/public/v3/public-key/%s" % kid)
+        if response.status_code == 404:
+            self._public_key_cache.add_not_found(kid)
         return self._handle_public_key_api_response(response)[1]
 
     def _get_current_kid_and_key(self):
@@ -255,42 +626,154 @@ class JOSETransport(object):
         :param public_key: string of the public key
         :return:
         """
-        if not self._public_key_cache.get(kid):
+        if kid not in self._public_key_cache:
             try:
                 rsa_key = RSAKey(key=import_rsa_key(public_key), kid=kid)
             except (TypeError, ValueError) as rsa_error:
                 raise UnexpectedAPIResponse("RSA parsing error for public key"
                                             ": %s" % public_key) from rsa_error
 
-            self._public_key_cache[kid] = rsa_key
+            self._public_key_cache.setdefault(kid, rsa_key)
 
     def _find_key_by_kid(self, kid):
         """
         Finds a public key within the public key cache given a `kid`. If
-        none exists, retrieves from the LaunchKey API by `kid`.
+        none exists, retrieves it from the LaunchKey API by `kid` and caches
+        it. Concurrent lookups of the same missing `kid` share one request.
+        Key IDs the LaunchKey API recently reported as not found are not
+        requested again.
         :param kid: string of the `kid`
-        :return: string of the public key
+        :return: RSAKey of the public key
+        :raises UnexpectedAPIResponse: when the key was not found
         """
         key = self._public_key_cache.get(kid)
         if not key:
-            return self._get_key_by_kid(kid)
+            if self._public_key_cache.is_not_found(kid):
+                raise UnexpectedAPIResponse("Key was not found.")
+            with acquire_within_deadline(self._get_public_key_fetch_lock(kid)):
+                try:
+                    key = self._public_key_cache.peek(kid)
+                    if not key:
+                        if self._public_key_cache.is_not_found(kid):
+                            raise UnexpectedAPIResponse("Key was not found.")
+                        self._cache_public_key(
+                            kid, self._get_shared_key_by_kid(kid))
+                        key = self._public_key_cache.peek(kid)
+                finally:
+                    with self._public_key_fetch_locks_lock:
+                        self._public_key_fetch_locks.pop(kid, None)
 
         return key
 
-    def add_encryption_private_key(self, private_key):
+    def _get_shared_key_by_kid(self, kid):
+        """
+        Gets a public key by `kid` from the shared cache, retrieving it from
+        the LaunchKey API and sharing it when it is not in the shared cache.
+        :param kid: string of the `kid`
+        :return: string of the public key
+        """
+        if self._shared_cache is None:
+            return self._get_key_by_kid(kid)
+        public_key = self._shared_cache.get(SHARED_PUBLIC_KEY_PREFIX + kid)
+        if not isinstance(public_key, str):
+            public_key = self._get_key_by_kid(kid)
+            self._shared_cache.set(SHARED_PUBLIC_KEY_PREFIX + kid, public_key,
+                                   DEFAULT_PUBLIC_KEY_TTL)
+        return public_key
+
+    def _get_public_key_fetch_lock(self, kid):
+        """
+        Retrieves the lock guarding the retrieval of a public key by `kid`
+        :param kid: string of the `kid`
+        :return: threading.Lock
+        """
+        with acquire_within_deadline(self._public_key_fetch_locks_lock):
+            return self._public_key_fetch_locks.setdefault(kid,
+                                                           threading.Lock())
+
+    @property
+    def issuer_private_keys(self):
+        """
+        :return: List of the unexpired issuer private keys available for
+        decryption in the order they were added. Keys appended to or removed
+        from the list are added to or removed from the transport.
+        """
+        self._remove_expired_private_keys()
+        return PrivateKeyList(self._private_keys.values(),
+                              self.add_encryption_private_key,
+                              self.remove_encryption_private_key)
+
+    @issuer_private_keys.setter
+    def issuer_private_keys(self, private_keys):
+        """
+        Replaces the issuer private keys available for decryption
+        :param private_keys: Iterable of PEM formatted private keys,
+        launchkey.transports.PrivateKeyMaterial, or jwkest RSAKey
+        """
+        materials = [load_private_key_material(private_key,
+                                               self._key_materials)
+                     for private_key in private_keys]
+        kids = {material.kid for material in materials}
+        for kid in self._private_keys.kids():
+            if kid not in kids:
+                self.remove_encryption_private_key(kid)
+        for material in materials:
+            self.add_encryption_private_key(material)
+
+    def add_encryption_private_key(self, private_key, expires_at=None):
         """
         Adds a private key to the list of keys available for decryption
+        :param private_key: PEM formatted private key,
+        launchkey.transports.PrivateKeyMaterial, or jwkest RSAKey
+        :param expires_at: Optional unix timestamp after which the key is
+        retired and no longer used for decryption
         :return: Boolean - Whether the key is already in the list
         """
-        new_key = RSAKey(key=import_rsa_key(private_key),
-                         kid=self.__generate_key_id(private_key))
-        for key in self.issuer_private_keys:
-            if new_key.kid == key.kid:
-                return False
-        self.issuer_private_keys.append(new_key)
-        self.loaded_issuer_private_keys[new_key.kid] = PKCS1_OAEP.new(
-            RSA.importKey(private_key))
-        return True
+        self._remove_expired_private_keys()
+        key_material = load_private_key_material(private_key,
+                                                 self._key_materials)
+        if key_material.kid in self._private_keys:
+            return False
+        self.loaded_issuer_private_keys.setdefault(
+            key_material.kid,
+            self._crypto_backend.load_rsa_oaep_key(key_material.jwk))
+        return self._private_keys.add(key_material.kid, key_material.jwk,
+                                      expires_at)
+
+    def remove_encryption_private_key(self, kid):
+        """
+        Removes a retired private key from the keys available for decryption
+        :param kid: Key ID of the private key
+        :return: Boolean - Whether the key was removed
+        """
+        key = self._private_keys.get(kid)
+        self.loaded_issuer_private_keys.pop(kid, None)
+        if key is None:
+            return False
+        removed = self._private_keys.remove(kid)
+        self._retire_private_key(key)
+        return removed
+
+    def _remove_expired_private_keys(self):
+        for kid, key in self._private_keys.pop_expired():
+            self.loaded_issuer_private_keys.pop(kid, None)
+            self._retire_private_key(key)
+
+    def _retire_private_key(self, key):
+        """
+        Discards the parsed and loaded forms of a private key once it is
+        neither the signing key nor used for decryption
+        :param key: RSAKey which was removed or replaced
+        :return: None
+        """
+        if key.kid in self._private_keys or (
+                self.signing_key is not None and
+                self.signing_key.kid == key.kid):
+            return
+        self._crypto_backend.forget_key(key)
+        for pem, material in list(self._key_materials.items()):
+            if material.kid == key.kid:
+                self._key_materials.pop(pem, None)
 
     def add_issuer_key(self, private_key):
         """
@@ -318,8 +801,10 @@ class JOSETransport(object):
         Set the issuer credentials
         :param issuer: Issuer entity type (svc, dir, or org)
         :param issuer_id: Identifier for the issuer entity
-        :param private_key: PEM formatted private key for issuer entity which
-                            will be used for signing requests.
+        :param private_key: PEM formatted private key or
+                            launchkey.transports.PrivateKeyMaterial for
+                            issuer entity which will be used for signing
+                            requests.
         :return: None
         :raises launchkey.exceptions.InvalidEntityID: when issuer_id is not
         valid
@@ -338,22 +823,23 @@ class JOSETransport(object):
                 from None
         self.issuer = "%s:%s" % (issuer, issuer_id)
         try:
-            self.signing_key = RSAKey(
-                key=import_rsa_key(private_key),
-                kid=self.__generate_key_id(private_key)
-            )
+            signing_key = load_private_key_material(
+                private_key, self._key_materials).jwk
         except ValueError as rsa_error:
             raise InvalidPrivateKey(
                 "Invalid private key. Please ensure you are submitting "
                 "a string representation of a PEM private key.") from rsa_error
+        previous_key, self.signing_key = self.signing_key, signing_key
+        if previous_key is not None and previous_key is not signing_key:
+            self._retire_private_key(previous_key)
 
     def _get_jwt_signature(self, params):
         try:
             if self.signing_key is None:
                 raise NoSuitableSigningKeys
 
-            jws = JWS(params, alg=self.jwt_algorithm)
-            return jws.sign_compact(keys=[self.signing_key])
+            return self._crypto_backend.sign_compact(
+                params, self.jwt_algorithm, self.signing_key)
         except NoSuitableSigningKeys as signing_error:
             raise NoIssuerKey(
                 "An issuer key wasn't loaded. "
@@ -370,7 +856,7 @@ class JOSETransport(object):
         :param subject: The subject entity of the request
         :return:
         """
-        current = int(time()) - self.server_time_difference
+        current = int(time()) - self._loaded_server_time_difference()
         expires = current + 5
 
         params = {
@@ -392,14 +878,34 @@ class JOSETransport(object):
             params["request"]["hash"] = content_hash
             params["request"]["func"] = self.content_hash_algorithm
 
-        return "IOV-JWT %s" % self._get_jwt_signature(params)
+        return AUTHORIZATION_PREFIX + self._get_jwt_signature(params)
 
-    def _get_jwt_payload(self, compact_jwt):
+    def _get_jwt_payload(self, jwt, public_key):
+        """
+        Verifies the signature of an unpacked JWT with the public key matching
+        its `kid` and returns its claims without parsing the JWT again
+        :param jwt: Unpacked jwkest.jwt.JWT
+        :param public_key: RSAKey identified by the `kid` of the JWT
+        :return: The JWT claims
+        :raises jwkest.JWKESTException: when the JWT algorithm is not
+        supported or the signature is not valid
+        :raises launchkey.exceptions.InvalidJWTResponse: when the JWT is not a
+        signed JWT
+        """
+        if len(jwt.part) != 3:
+            raise InvalidJWTResponse("Received JWT is not valid") \
+                from WrongNumberOfParts(len(jwt.part))
         try:
-            return JWS().verify_compact(compact_jwt, keys=self.api_public_keys)
-        except (AttributeError, BadSyntax) as jws_error:
-            raise InvalidJWTResponse(
-                "Received JWT is not valid: %s" % compact_jwt) from jws_error
+            alg = jwt.headers.get("alg")
+            if alg not in JOSE_SUPPORTED_JWT_ALGS:
+                raise SignerAlgError("Unsupported algorithm: %s" % alg)
+            signing_input = jwt.b64part[0] + b"." + jwt.b64part[1]
+        except (AttributeError, TypeError) as jws_error:
+            raise InvalidJWTResponse("Received JWT is not valid") \
+                from jws_error
+        self._crypto_backend.verify_compact(signing_input, jwt.part[2], alg,
+                                            public_key)
+        return jwt.payload()
 
     @staticmethod
     def _get_content_hash(body, hash_function):
@@ -427,11 +933,59 @@ class JOSETransport(object):
         :param data: Information to be encrypted
         :return: JWE formatted string
         """
-        jwe = JWE(json.dumps(data), alg=self.jwe_cek_encryption,
-                  enc=self.jwe_claims_encryption)
         # Retrieve the active API encryption KID
         current_kid = self.update_and_return_active_encryption_kid()
-        return jwe.encrypt(keys=[self._public_key_cache[current_kid]])
+        return self._crypto_backend.encrypt_compact(
+            json.dumps(data, separators=COMPACT_JSON_SEPARATORS),
+            self.jwe_cek_encryption,
+            self.jwe_claims_encryption, self._find_key_by_kid(current_kid))
+
+    def add_timing_hook(self, hook):
+        """
+        Registers a callable which is given a
+        launchkey.transports.timing.RequestTiming with the duration of each
+        phase of every JOSE request once it completes. Exceptions raised by
+        hooks are ignored.
+        :param hook: Callable accepting a RequestTiming, such as
+        launchkey.transports.timing.EndpointLatencyHistograms
+        :return: None
+        """
+        self._timing_hooks = self._timing_hooks + (hook,)
+
+    def remove_timing_hook(self, hook):
+        """
+        Unregisters a callable registered with add_timing_hook
+        :param hook: Callable to remove
+        :return: None
+        """
+        self._timing_hooks = tuple(
+            existing for existing in self._timing_hooks if existing != hook)
+
+    def _start_timing(self, method, path, subject):
+        """
+        :return: RequestTiming when timing hooks are registered, otherwise
+        None
+        """
+        if not self._timing_hooks:
+            return None
+        return RequestTiming(method, path, subject)
+
+    def _report_timing(self, timing, status_code=None, error=None):
+        """
+        Finishes a request timing and gives it to the timing hooks
+        :param timing: RequestTiming of the request
+        :param status_code: HTTP status code of the response, if any
+        :param error: Exception raised by the request, if any
+        :return: None
+        """
+        if error is not None and status_code is None:
+            status_code = getattr(error, "status_code", None)
+        timing.finish(status_code, error)
+        for hook in self._timing_hooks:
+            try:
+                hook(timing)
+            except Exception:  # pylint: disable=broad-except
+                pass
 
     def _process_jose_request(self, method, path, subject, data=None):
         """
@@ -442,12 +996,200 @@ class JOSETransport(object):
         :param data: The data that will be submitted in the body of the request
         :return:
         """
-        jti = self.__get_jti()
+        retries = self._start_retries(method, path)
+        with self._observe_jose_request(method, path, subject,
+                                        retries) as outcome:
+            timing = outcome.timing
+            jti, response = retry_attempts(
+                lambda: self._attempt_jose_request(method, path, subject,
+                                                   data, timing),
+                retries, timing)
+            self._load_response_public_key(response, timing)
+            return outcome.finish(
+                self._process_jose_response(response, jti, subject, timing))
+
+    def _start_retries(self, method, path):
+        """
+        :return: launchkey.transports.retry.RetryState of a request or None
+        when it is not retried
+        """
+        if self._retry_policy is None:
+            return None
+        return self._retry_policy.start(method, path)
+
+    @staticmethod
+    def _span_attributes(method, path, subject):
+        """
+        :return: dict of the attributes of a JOSE request span
+        """
+        attributes = {"http.method": method.upper(),
+                      "launchkey.endpoint": endpoint_name(method, path)}
+        entity_type = subject_type(subject)
+        if entity_type is not None:
+            attributes["launchkey.subject_type"] = entity_type
+        return attributes
+
+    @contextmanager
+    def _observe_jose_request(self, method, path, subject, retries):
+        """
+        Traces a JOSE request when tracing is enabled and reports its timing
+        to the timing hooks
+        :param retries: launchkey.transports.retry.RetryState of the request
+        or None when it is not retried
+        :return: Context manager yielding the _JOSERequestOutcome of the
+        request, which must be given the final response
+        """
+        tracer = active_tracer()
+        with ExitStack() as stack:
+            span = None if tracer is None else stack.enter_context(
+                tracer.start_span(
+                    "launchkey.jose_request",
+                    self._span_attributes(method, path, subject)))
+            timing = self._start_timing(method, path, subject)
+            outcome = _JOSERequestOutcome(
+                NULL_TIMING if timing is None else timing)
+            try:
+                yield outcome
+            except Exception as error:
+                if timing is not None:
+                    self._report_timing(timing, error=error)
+                if span is not None and \
+                        isinstance(error, LaunchKeyAPIException):
+                    span.set_attribute(
+                        "http.status_code",
+                        error.status_code)  # pylint: disable=no-member
+                raise
+            finally:
+                if span is not None and retries is not None:
+                    span.set_attribute("launchkey.retry_attempts",
+                                       retries.retries)
+            if timing is not None:
+                self._report_timing(timing, outcome.status_code)
+            if span is not None:
+                span.set_attribute("http.status_code", outcome.status_code)
+
+    def _attempt_jose_request(self, method, path, subject, data, timing):
+        """
+        Builds and sends a JOSE request signed with a new JTI
+        :param timing: RequestTiming recording the phases of the request
+        :return: tuple of the JTI and the unprocessed response
+        """
+        if self._rate_limiter is not None:
+            self._rate_limiter.acquire(subject, endpoint_name(method, path))
+            timing.lap(PHASE_RATE_LIMIT)
+        self._load_request_metadata(data)
+        timing.lap(PHASE_METADATA)
+        jti, headers, body = self._prepare_jose_request(method, path, subject,
+                                                        data, timing)
+        response = getattr(self._http_client, method.lower())(path, data=body,
+                                                              headers=headers)
+        timing.lap(PHASE_HTTP)
+        self._record_rate_limit(method, path, subject, response)
+        return jti, response
+
+    def _load_request_metadata(self, data):
+        """
+        Retrieves the server time difference, and the active encryption key
+        of requests with a body, so that they are not timed as part of
+        signing and encrypting the request
+        :param data: The data that will be submitted in the body of the request
+        :return: None
+        """
+        self._lookup_server_time_difference()
+        if data:
+            self._load_public_key(
+                self.update_and_return_active_encryption_kid())
+
+    def _load_response_public_key(self, response, timing):
+        """
+        Retrieves the public key which signed a response so that it is not
+        timed as part of verifying the response. Responses rejected with a
+        401 are not verified.
+        :param response: Response object from the http client
+        :param timing: RequestTiming recording the phases of the request
+        :return: None
+        """
+        if response.status_code != 401:
+            kid = self._get_kid_from_compact_jwt(
+                response.headers.get("X-IOV-JWT"))
+            if kid is not None:
+                self._load_public_key(kid)
+            timing.lap(PHASE_METADATA)
+
+    def _load_public_key(self, kid):
+        """
+        Retrieves a public key which is not cached yet. The lookup using the
+        key counts it as a cache hit.
+        :param kid: string of the `kid`
+        :return: None
+        :raises UnexpectedAPIResponse: when the key was not found
+        """
+        if kid not in self._public_key_cache:
+            self._find_key_by_kid(kid)
+
+    @staticmethod
+    def _get_kid_from_compact_jwt(compact_jwt):
+        """
+        :param compact_jwt: The compact JWT
+        :return: string of the `kid` in the JWT header or None when the JWT
+        is malformed so that verification can report it
+        """
+        try:
+            kid = JWT().unpack(compact_jwt).headers["kid"]
+        except (BadSyntax, IndexError, ValueError, KeyError, TypeError,
+                AttributeError):
+            return None
+        return kid if isinstance(kid, str) else None
+
+    def _prepare_jose_request(self, method, path, subject, data, timing):
+        """
+        Builds a JOSE request signed with a new JTI and adds the trace
+        context of the active tracer to its headers
+        :param timing: RequestTiming recording the phases of the request
+        :return: tuple of the JTI, the request headers, and the request body
+        """
+        jti = self._get_jti()
+        headers, body = self._build_jose_request(method, path, subject, jti,
+                                                 data, timing)
+        tracer = active_tracer()
+        if tracer is not None:
+            tracer.inject(headers)
+        return jti, headers, body
+
+    def _record_rate_limit(self, method, path, subject, response):
+        """
+        Gives the status and Retry-After header of a response to the rate
+        limiter
+        :return: None
+        """
+        if self._rate_limiter is not None and response.status_code == 429:
+            retry_after = None
+            for name, value in (response.headers or {}).items():
+                if name.lower() == "retry-after":
+                    retry_after = value
+            self._rate_limiter.record_response(
+                subject, endpoint_name(method, path), response.status_code,
+                retry_after)
+
+    def _build_jose_request(self, method, path, subject, jti, data=None,
+                            timing=NULL_TIMING):
+        """
+        Builds the headers and encrypted body for a JOSE request
+        :param method: Request method IE get, put, post, delete
+        :param path: Path or endpoint that will be hit
+        :param subject: Subject for which the request is issued for
+        :param jti: JWT ID. This is a unique identifier for the request
+        :param data: The data that will be submitted in the body of the request
+        :param timing: RequestTiming recording the phases of the request
+        :return: tuple of the request headers and the request body
+        """
         body = None
         if data:
             body = self._encrypt_request(data)
+            timing.lap(PHASE_ENCRYPT)
             content_hash = self._get_content_hash(body,
                                                   self.content_hash_algorithm)
+            timing.lap(PHASE_HASH)
             signature = self._build_jwt_signature(method, path, jti, subject,
                                                   content_hash=content_hash)
             headers = {"content-type": "application/jwe",
@@ -456,21 +1198,37 @@ class JOSETransport(object):
             signature = self._build_jwt_signature(method, path, jti, subject)
             headers = {"content-type": "application/jwt",
                        "Authorization": signature}
-        headers["User-Agent"] = f"PythonServiceSDK/{SDK_VERSION} " \
-                                f"({platform.system()} {platform.release()})"
-        response = getattr(self._http_client, method.lower())(path, data=body,
-                                                              headers=headers)
-
+        headers["User-Agent"] = USER_AGENT
+        timing.lap(PHASE_SIGN)
+        return headers, body
+
+    def _process_jose_response(self, response, jti, subject,
+                               timing=NULL_TIMING):
+        """
+        Verifies and decrypts the response to a JOSE request
+        :param response: Response object from the http client
+        :param jti: The JTI value of the request that returned the response
+        :param subject: Subject for which the request was issued for
+        :param timing: RequestTiming recording the phases of the request
+        :return: Response object with decrypted data
+        :raises launchkey.exceptions.LaunchKeyAPIException: when the response
+        was an error response
+        """
+        payload = None
         if response.status_code != 401:
-            self.verify_jwt_response(response.headers, jti, response.data,
-                                     subject)
+            payload = self.verify_jwt_response(response.headers, jti,
+                                               response.data, subject)
+        self._record_response_server_time(response, payload)
+        timing.lap(PHASE_VERIFY)
 
         if response.data and not isinstance(response.data, dict):
             jwe = self.decrypt_response(response.data)
+            timing.lap(PHASE_DECRYPT)
             try:
                 result = json.loads(jwe)
             except (ValueError, TypeError):
                 result = jwe
+            timing.lap(PHASE_PARSE)
             response.data = result
 
         if isinstance(response, APIErrorResponse):
@@ -486,18 +1244,19 @@ class JOSETransport(object):
         :return: Decrypted string
         """
         package = JWEnc().unpack(response)
-        keys = []
         if 'kid' in package.headers:
-            for key in self.issuer_private_keys:
-                if key.kid == package.headers['kid']:
-                    keys = [key]
-            if len(keys) == 0:
+            self._remove_expired_private_keys()
+            key = self._private_keys.get(package.headers['kid'])
+            if key is None:
                 raise EntityKeyNotFound("The key id: %s could not be found in "
                                         "the entities available keys."
                                         % package.headers["kid"])
+            keys = [key]
         else:
-            keys = list(self.issuer_private_keys)
-        return JWE().decrypt(response, keys=keys).decode('utf-8')
+            self._remove_expired_private_keys()
+            keys = self._private_keys.values()
+        return self._crypto_backend.decrypt_compact(response, keys) \
+            .decode('utf-8')
 
     def decrypt_rsa_response(self, response, key_id):
         """
@@ -506,12 +1265,14 @@ class JOSETransport(object):
         :param key_id: Key ID designating who the response was encrypted for.
         :return: Decrypted string
         """
+        self._remove_expired_private_keys()
         if key_id not in self.loaded_issuer_private_keys:
             raise UnexpectedKeyID("The response was for a key id "
                                   "%s which is not recognized" %
                                   key_id)
         binary_package = b64decode(response)
-        return self.loaded_issuer_private_keys[key_id].decrypt(binary_package)
+        return self._crypto_backend.decrypt_rsa_oaep(
+            binary_package, self.loaded_issuer_private_keys[key_id])
 
     def verify_jwt_response(self, headers, jti, content_body, subject,
                             status_code=None):
@@ -532,15 +1293,14 @@ class JOSETransport(object):
                 DeprecationWarning)
 
         ci_headers = {k.lower(): v for k, v in headers.items()}
-        auth = headers.get('X-IOV-JWT')
+
+        jwt = self._unpack_api_response_jwt(headers)
 
         # Ensure key exists in cache, fetch from API by ID otherwise
-        kid = self.__get_kid_from_api_response_headers(headers)
-        public_key = self._find_key_by_kid(kid)
-        self._cache_public_key(kid, public_key)
+        public_key = self._find_key_by_kid(self._get_kid_from_jwt(jwt))
 
         try:
-            payload = self._get_jwt_payload(auth)
+            payload = self._get_jwt_payload(jwt, public_key)
         except JWKESTException as reason:
             raise JWTValidationFailure("Unable to parse JWT",
                                        reason=reason) from reason
@@ -600,11 +1360,10 @@ class JOSETransport(object):
         :return: The claims of the JWT
         """
         try:
+            jwt = JWT().unpack(compact_jwt)
             # Ensure key exists in cache, fetch from API by ID otherwise
-            kid = JWT().unpack(compact_jwt).headers["kid"]
-            public_key = self._find_key_by_kid(kid)
-            self._cache_public_key(kid, public_key)
-            payload = self._get_jwt_payload(compact_jwt)
+            public_key = self._find_key_by_kid(jwt.headers["kid"])
+            payload = self._get_jwt_payload(jwt, public_key)
         except JWKESTException as reason:
             raise JWTValidationFailure("Unable to parse JWT",
                                        reason=reason) from reason
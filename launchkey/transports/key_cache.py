@@ -0,0 +1,176 @@
+""" Bounded cache of LaunchKey API public keys """
+
+import threading
+from collections import OrderedDict
+from time import time
+
+DEFAULT_MAX_KEYS = 64
+DEFAULT_NEGATIVE_TTL = 60
+DEFAULT_MAX_NEGATIVE_KIDS = 1024
+
+
+class PublicKeyCache(object):  # pylint: disable=too-many-instance-attributes
+    """
+    Thread safe least recently used cache of LaunchKey API public keys by
+    `kid` with a size limit. Key IDs which the LaunchKey API reported as not
+    found are remembered for a short time so that repeated requests for them,
+    such as from forged webhooks, do not each result in a request to the
+    LaunchKey API.
+
+    Supports the mapping operations used by the JOSE transports and counts
+    hits, misses, evictions, and negative hits.
+    """
+
+    def __init__(self, max_size=DEFAULT_MAX_KEYS,
+                 negative_ttl=DEFAULT_NEGATIVE_TTL,
+                 max_negative_size=DEFAULT_MAX_NEGATIVE_KIDS):
+        """
+        :param max_size: Maximum number of public keys to keep. The least
+        recently used key is evicted when it is exceeded.
+        :param negative_ttl: Number of seconds a `kid` which was not found is
+        remembered.
+        :param max_negative_size: Maximum number of not found key IDs to
+        remember.
+        """
+        if max_size < 1:
+            raise ValueError("max_size must be at least 1")
+        self.max_size = max_size
+        self.negative_ttl = negative_ttl
+        self.max_negative_size = max_negative_size
+        self._keys = OrderedDict()
+        self._negative = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.negative_hits = 0
+
+    def get(self, kid, default=None):
+        """
+        Retrieves a key, marking it as recently used and counting the hit or
+        miss
+        :param kid: string of the `kid`
+        :param default: Value returned when the key is not cached
+        :return: The cached key or the default
+        """
+        with self._lock:
+            key = self._keys.get(kid)
+            if key is None:
+                self.misses += 1
+                return default
+            self._keys.move_to_end(kid)
+            self.hits += 1
+            return key
+
+    def peek(self, kid):
+        """
+        Retrieves a key without affecting recency or counters
+        :param kid: string of the `kid`
+        :return: The cached key or None
+        """
+        with self._lock:
+            return self._keys.get(kid)
+
+    def __getitem__(self, kid):
+        key = self.get(kid)
+        if key is None:
+            raise KeyError(kid)
+        return key
+
+    def __setitem__(self, kid, key):
+        with self._lock:
+            self._set(kid, key)
+
+    def setdefault(self, kid, key):
+        """
+        Caches a key unless one is already cached for the `kid`
+        :param kid: string of the `kid`
+        :param key: Key to cache
+        :return: The cached key
+        """
+        with self._lock:
+            if kid not in self._keys:
+                self._set(kid, key)
+            return self._keys[kid]
+
+    def _set(self, kid, key):
+        self._keys[kid] = key
+        self._keys.move_to_end(kid)
+        self._negative.pop(kid, None)
+        while len(self._keys) > self.max_size:
+            self._keys.popitem(last=False)
+            self.evictions += 1
+
+    def __contains__(self, kid):
+        with self._lock:
+            return kid in self._keys
+
+    def __len__(self):
+        with self._lock:
+            return len(self._keys)
+
+    def values(self):
+        """
+        :return: List of the cached keys from least to most recently used
+        """
+        with self._lock:
+            return list(self._keys.values())
+
+    def clear(self):
+        """
+        Removes all cached keys and not found key IDs
+        :return: None
+        """
+        with self._lock:
+            self._keys.clear()
+            self._negative.clear()
+
+    def add_not_found(self, kid, now=None):
+        """
+        Remembers that the LaunchKey API did not find a `kid`
+        :param kid: string of the `kid`
+        :param now: unix timestamp of when the `kid` was not found. Defaults
+        to now.
+        :return: None
+        """
+        if now is None:
+            now = time()
+        with self._lock:
+            self._negative[kid] = now + self.negative_ttl
+            self._negative.move_to_end(kid)
+            while len(self._negative) > self.max_negative_size:
+                self._negative.popitem(last=False)
+
+    def is_not_found(self, kid, now=None):
+        """
+        Determines whether the LaunchKey API recently did not find a `kid`
+        :param kid: string of the `kid`
+        :param now: unix timestamp to check expiration against. Defaults to
+        now.
+        :return: Boolean
+        """
+        if now is None:
+            now = time()
+        with self._lock:
+            expires = self._negative.get(kid)
+            if expires is None:
+                return False
+            if expires <= now:
+                del self._negative[kid]
+                return False
+            self.negative_hits += 1
+            return True
+
+    @property
+    def stats(self):
+        """
+        :return: dict of the "hits", "misses", "evictions", and
+        "negative_hits" counters as well as the current number of cached keys
+        as "size" and not found key IDs as "negative_size"
+        """
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses,
+                    "evictions": self.evictions,
+                    "negative_hits": self.negative_hits,
+                    "size": len(self._keys),
+                    "negative_size": len(self._negative)}
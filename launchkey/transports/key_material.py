@@ -0,0 +1,64 @@
+""" Private keys parsed once and shared by transports and factories """
+
+from hashlib import md5
+
+from Cryptodome.PublicKey import RSA
+from jwkest.jwk import RSAKey
+
+
+class PrivateKeyMaterial(object):  # pylint: disable=too-few-public-methods
+    """
+    RSA private key which is parsed and fingerprinted once. It may be given
+    anywhere a PEM formatted private key is accepted, allowing any number of
+    factories and transports to share a single parsed copy of the key.
+    """
+
+    def __init__(self, private_key):
+        """
+        :param private_key: PEM formatted private key
+        :raises ValueError: when the private key can not be parsed
+        """
+        self.pem = private_key
+        self.rsa_key = RSA.importKey(private_key)
+        self.kid = self.generate_key_id(self.rsa_key)
+        self.jwk = RSAKey(key=self.rsa_key, kid=self.kid)
+
+    @staticmethod
+    def generate_key_id(rsa_key):
+        """
+        Generates a key id to be used in JWE + JWT. It is based on the digest
+        of the public key.
+        :param rsa_key: Cryptodome RSA key
+        :return: string of the `kid`
+        """
+        md5digest = md5(rsa_key.publickey().exportKey('DER')).hexdigest()
+        return ":".join(
+            md5digest[i:i + 2] for i in range(0, len(md5digest), 2))
+
+
+def load_private_key_material(private_key, cache=None):
+    """
+    Retrieves the parsed material of a private key. PEM formatted keys are
+    only parsed the first time they are seen by the owner of the cache.
+    :param private_key: PEM formatted private key, PrivateKeyMaterial, or
+    jwkest RSAKey
+    :param cache: Optional dict of PrivateKeyMaterial indexed by PEM which
+    the owner evicts once a key is no longer in use
+    :return: PrivateKeyMaterial
+    :raises ValueError: when the private key can not be parsed
+    """
+    if isinstance(private_key, PrivateKeyMaterial):
+        return private_key
+    if isinstance(private_key, RSAKey):
+        private_key = private_key.key.exportKey("PEM").decode()
+    if cache is None:
+        return PrivateKeyMaterial(private_key)
+    try:
+        material = cache.get(private_key)
+    except TypeError:
+        # Unhashable keys can not be cached
+        return PrivateKeyMaterial(private_key)
+    if material is None:
+        material = cache.setdefault(private_key,
+                                    PrivateKeyMaterial(private_key))
+    return material
@@ -0,0 +1,155 @@
+""" Registry of issuer private keys used for decryption """
+
+import heapq
+import threading
+from collections import OrderedDict
+from time import time
+
+
+class PrivateKeyRegistry(object):
+    """
+    Thread safe registry of issuer private keys indexed by `kid`. Looking up,
+    adding, and removing a key takes constant time regardless of how many
+    rotated keys are loaded. Keys may be given an expiration time after which
+    they are removed from the registry.
+    """
+
+    def __init__(self):
+        self._keys = OrderedDict()
+        self._expires_at = {}
+        self._expirations = []
+        self._lock = threading.Lock()
+
+    def add(self, kid, key, expires_at=None):
+        """
+        Adds a key unless one is already registered for the `kid`
+        :param kid: string of the `kid`
+        :param key: Key to register
+        :param expires_at: Optional unix timestamp after which the key is
+        removed
+        :return: Boolean - Whether the key was added
+        """
+        with self._lock:
+            if kid in self._keys:
+                return False
+            self._keys[kid] = key
+            if expires_at is not None:
+                self._expires_at[kid] = expires_at
+                heapq.heappush(self._expirations, (expires_at, kid))
+            return True
+
+    def get(self, kid, default=None):
+        """
+        Retrieves a key
+        :param kid: string of the `kid`
+        :param default: Value returned when no key is registered
+        :return: The registered key or the default
+        """
+        with self._lock:
+            return self._keys.get(kid, default)
+
+    def remove(self, kid):
+        """
+        Removes a key. Its entry in the expiration schedule is discarded
+        lazily.
+        :param kid: string of the `kid`
+        :return: Boolean - Whether a key was removed
+        """
+        with self._lock:
+            self._expires_at.pop(kid, None)
+            return self._keys.pop(kid, None) is not None
+
+    def remove_expired(self, now=None):
+        """
+        Removes the keys whose expiration time has passed
+        :param now: unix timestamp to check expiration against. Defaults to
+        now.
+        :return: List of the removed `kid` values
+        """
+        return [kid for kid, _ in self.pop_expired(now)]
+
+    def pop_expired(self, now=None):
+        """
+        Removes the keys whose expiration time has passed
+        :param now: unix timestamp to check expiration against. Defaults to
+        now.
+        :return: List of tuples of the `kid` and key of the removed keys
+        """
+        if now is None:
+            now = time()
+        removed = []
+        with self._lock:
+            while self._expirations and self._expirations[0][0] <= now:
+                expires_at, kid = heapq.heappop(self._expirations)
+                # Skip schedule entries of keys which were removed, or removed
+                # and added again with a different expiration.
+                if self._expires_at.get(kid) == expires_at:
+                    del self._expires_at[kid]
+                    removed.append((kid, self._keys.pop(kid)))
+        return removed
+
+    def kids(self):
+        """
+        :return: List of the registered `kid` values in the order they were
+        added
+        """
+        with self._lock:
+            return list(self._keys)
+
+    def values(self):
+        """
+        :return: List of the registered keys in the order they were added
+        """
+        with self._lock:
+            return list(self._keys.values())
+
+    def __contains__(self, kid):
+        with self._lock:
+            return kid in self._keys
+
+    def __len__(self):
+        with self._lock:
+            return len(self._keys)
+
+
+class PrivateKeyList(list):
+    """
+    Copy of the issuer private keys of a transport. Keys appended to or
+    removed from the list are also added to or removed from the transport.
+    Changes which can not be applied to the transport raise TypeError.
+    """
+
+    def __init__(self, keys, add_key, remove_key):
+        """
+        :param keys: Iterable of the registered keys
+        :param add_key: Callable adding a key to the transport
+        :param remove_key: Callable removing a key from the transport by
+        `kid`
+        """
+        super().__init__(keys)
+        self._add_key = add_key
+        self._remove_key = remove_key
+
+    def append(self, key):
+        self._add_key(key)
+        super().append(key)
+
+    def extend(self, keys):
+        for key in keys:
+            self.append(key)
+
+    def __iadd__(self, keys):
+        self.extend(keys)
+        return self
+
+    def remove(self, key):
+        super().remove(key)
+        self._remove_key(key.kid)
+
+    def _unsupported(self, *args, **kwargs):
+        raise TypeError("Issuer private keys can only be appended or "
+                        "removed. Use add_encryption_private_key and "
+                        "remove_encryption_private_key instead.")
+
+    insert = pop = clear = __setitem__ = __delitem__ = __imul__ = \
+        _unsupported
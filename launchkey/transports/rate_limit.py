@@ -0,0 +1,262 @@
+""" Adaptive client side rate limiting of LaunchKey API requests """
+
+import asyncio
+import threading
+from email.utils import mktime_tz, parsedate_tz
+from time import monotonic, sleep, time
+
+from ..exceptions import RateLimited, DeadlineExceeded
+from .deadline import remaining_time
+
+DEFAULT_RATE = 10.0
+DEFAULT_BURST = 10
+DEFAULT_MIN_RATE = 0.5
+DEFAULT_DECREASE_FACTOR = 0.5
+DEFAULT_RECOVERY_TIME = 60.0
+
+
+def parse_retry_after(value, now=None):
+    """
+    Parses a Retry-After header given as either seconds or an HTTP date
+    :param value: Header value or None
+    :param now: Current unix timestamp used for HTTP dates
+    :return: Number of seconds to wait or None when it can not be parsed
+    """
+    if value is None:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except (TypeError, ValueError):
+        pass
+    parsed = parsedate_tz(str(value))
+    if parsed is None:
+        return None
+    now = time() if now is None else now
+    return max(mktime_tz(parsed) - now, 0.0)
+
+
+class TokenBucket(object):
+    """
+    Token bucket whose refill rate is reduced when the LaunchKey API rate
+    limits requests and recovers linearly over time. Tokens may go negative
+    so that callers queue behind each other fairly.
+    """
+
+    def __init__(self, rate, capacity, recovery_rate, now):
+        """
+        :param rate: Maximum number of tokens added per second
+        :param capacity: Maximum number of tokens held
+        :param recovery_rate: Tokens per second by which a reduced rate
+        increases each second
+        :param now: Current monotonic time
+        """
+        self.max_rate = rate
+        self.rate = rate
+        self.capacity = capacity
+        self.recovery_rate = recovery_rate
+        self.tokens = float(capacity)
+        self.blocked_until = now
+        self._updated = now
+
+    def advance(self, now):
+        """
+        Refills tokens and recovers the rate for the time elapsed
+        :param now: Current monotonic time
+        :return: None
+        """
+        elapsed = max(now - self._updated, 0.0)
+        self.rate = min(self.max_rate,
+                        self.rate + self.recovery_rate * elapsed)
+        refill_from = max(self._updated, self.blocked_until)
+        if now > refill_from:
+            self.tokens = min(self.capacity,
+                              self.tokens + self.rate * (now - refill_from))
+        self._updated = max(self._updated, now)
+
+    def reserve(self, now):
+        """
+        Takes a token
+        :param now: Current monotonic time
+        :return: Number of seconds to wait before the token may be used
+        """
+        self.advance(now)
+        self.tokens -= 1
+        return max(self.blocked_until - now, 0.0) + \
+            max(-self.tokens, 0.0) / self.rate
+
+    def refund(self):
+        """
+        Returns a token taken by reserve which was not used
+        :return: None
+        """
+        self.tokens = min(self.capacity, self.tokens + 1)
+
+    def penalize(self, now, decrease_factor, min_rate, retry_after=None):
+        """
+        Reduces the rate and drops any available tokens
+        :param now: Current monotonic time
+        :param decrease_factor: Multiplier applied to the rate
+        :param min_rate: Lowest rate allowed
+        :param retry_after: Optional number of seconds during which no
+        tokens are given out
+        :return: None
+        """
+        self.advance(now)
+        self.rate = max(min_rate, self.rate * decrease_factor)
+        self.tokens = min(self.tokens, 0.0)
+        if retry_after:
+            self.blocked_until = max(self.blocked_until, now + retry_after)
+
+
+# pylint: disable=too-many-instance-attributes, too-many-arguments
+class AdaptiveRateLimiter(object):
+    """
+    Thread safe client side rate limiter for the JOSE transports with a token
+    bucket per subject and per endpoint. A request waits for a token from
+    each of its buckets. When the LaunchKey API responds with a 429 the
+    buckets of the request are slowed down and paused for any Retry-After
+    period. Their rate then recovers gradually.
+
+    A single limiter may be given to any number of transports, and every
+    client created by a factory shares the limiter of its transport.
+    """
+
+    def __init__(self, rate=DEFAULT_RATE, burst=DEFAULT_BURST,
+                 per_subject=True, per_endpoint=True,
+                 min_rate=DEFAULT_MIN_RATE,
+                 decrease_factor=DEFAULT_DECREASE_FACTOR,
+                 recovery_time=DEFAULT_RECOVERY_TIME, max_wait=None):
+        """
+        :param rate: Maximum requests per second for each bucket
+        :param burst: Number of requests each bucket allows at once
+        :param per_subject: Whether requests are limited per subject
+        :param per_endpoint: Whether requests are limited per endpoint
+        :param min_rate: Lowest requests per second a bucket is slowed to
+        :param decrease_factor: Multiplier applied to the rate of a bucket
+        on each 429 response
+        :param recovery_time: Seconds a bucket takes to recover from
+        min_rate to rate
+        :param max_wait: Maximum seconds a request waits for a token. When
+        a longer wait is needed launchkey.exceptions.RateLimited is raised
+        without sending the request. None waits as long as needed.
+        """
+        if rate <= 0 or min_rate <= 0:
+            raise ValueError("rate and min_rate must be greater than 0")
+        self.rate = rate
+        self.burst = burst
+        self.per_subject = per_subject
+        self.per_endpoint = per_endpoint
+        self.min_rate = min(min_rate, rate)
+        self.decrease_factor = decrease_factor
+        self.recovery_rate = (rate - self.min_rate) / recovery_time \
+            if recovery_time > 0 else rate
+        self.max_wait = max_wait
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def _keys(self, subject, endpoint):
+        keys = []
+        if self.per_subject:
+            keys.append(("subject", subject))
+        if self.per_endpoint:
+            keys.append(("endpoint", endpoint))
+        return keys
+
+    def _bucket(self, key, now):
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = TokenBucket(
+                self.rate, self.burst, self.recovery_rate, now)
+        return bucket
+
+    def reserve(self, subject, endpoint):
+        """
+        Takes a token from each bucket of a request
+        :param subject: Subject the request is issued for
+        :param endpoint: Endpoint name of the request
+        :return: Number of seconds to wait before sending the request
+        :raises launchkey.exceptions.RateLimited: when the wait would exceed
+        max_wait
+        :raises launchkey.exceptions.DeadlineExceeded: when the wait would
+        exceed the deadline of a launchkey.transports.call_deadline context
+        """
+        remaining = remaining_time()
+        with self._lock:
+            now = monotonic()
+            buckets = [self._bucket(key, now)
+                       for key in self._keys(subject, endpoint)]
+            wait = max([bucket.reserve(now) for bucket in buckets] + [0.0])
+            error = None
+            if self.max_wait is not None and wait > self.max_wait:
+                error = RateLimited(
+                    "Client side rate limit for %s would delay the request "
+                    "by %.2f seconds" % (endpoint, wait))
+            elif remaining is not None and wait >= remaining:
+                error = DeadlineExceeded(
+                    "Client side rate limit for %s would delay the request "
+                    "past the deadline of the call" % endpoint)
+            if error is not None:
+                for bucket in buckets:
+                    bucket.refund()
+                raise error
+        return wait
+
+    def acquire(self, subject, endpoint):
+        """
+        Blocks until a request may be sent
+        :param subject: Subject the request is issued for
+        :param endpoint: Endpoint name of the request
+        :return: None
+        :raises launchkey.exceptions.RateLimited: when the wait would exceed
+        max_wait
+        """
+        wait = self.reserve(subject, endpoint)
+        if wait > 0:
+            sleep(wait)
+
+    async def acquire_async(self, subject, endpoint):
+        """
+        Waits without blocking the event loop until a request may be sent
+        :param subject: Subject the request is issued for
+        :param endpoint: Endpoint name of the request
+        :return: None
+        :raises launchkey.exceptions.RateLimited: when the wait would exceed
+        max_wait
+        """
+        wait = self.reserve(subject, endpoint)
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def record_response(self, subject, endpoint, status_code,
+                        retry_after=None):
+        """
+        Slows down the buckets of a request which was rate limited
+        :param subject: Subject the request was issued for
+        :param endpoint: Endpoint name of the request
+        :param status_code: HTTP status code of the response
+        :param retry_after: Value of the Retry-After response header, if any
+        :return: None
+        """
+        if status_code != 429:
+            return
+        retry_after = parse_retry_after(retry_after)
+        with self._lock:
+            now = monotonic()
+            for key in self._keys(subject, endpoint):
+                self._bucket(key, now).penalize(
+                    now, self.decrease_factor, self.min_rate, retry_after)
+
+    @property
+    def stats(self):
+        """
+        Current state of each bucket
+        :return: dict by bucket key, such as ("endpoint", "GET /path"), of
+        dicts with the bucket's current "rate" and available "tokens"
+        """
+        with self._lock:
+            now = monotonic()
+            stats = {}
+            for key, bucket in self._buckets.items():
+                bucket.advance(now)
+                stats[key] = {"rate": bucket.rate, "tokens": bucket.tokens}
+            return stats
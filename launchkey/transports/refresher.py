@@ -0,0 +1,229 @@
+""" Background refreshing of JOSE transport metadata """
+
+import asyncio
+import threading
+from time import time
+
+from .. import API_CACHE_TIME
+
+DEFAULT_REFRESH_AHEAD = 30
+DEFAULT_MIN_BACKOFF = 1
+DEFAULT_MAX_BACKOFF = 60
+
+
+# pylint: disable=too-many-instance-attributes, too-few-public-methods
+class _RefreshTask(object):
+    """
+    Tracks when a single piece of metadata is next due to be refreshed
+    """
+
+    def __init__(self, refresh, refreshed_at, refresh_ahead, min_backoff,
+                 max_backoff):
+        """
+        :param refresh: Callable fetching and caching the metadata
+        :param refreshed_at: Callable returning the unix timestamp of when the
+        cached metadata was retrieved, or None when nothing is cached
+        :param refresh_ahead: Number of seconds before expiration that the
+        metadata is refreshed
+        :param min_backoff: Seconds to wait before retrying the first failure
+        :param max_backoff: Maximum seconds to wait between retries
+        """
+        self._refresh = refresh
+        self._refreshed_at = refreshed_at
+        self._refresh_ahead = refresh_ahead
+        self._min_backoff = min_backoff
+        self._max_backoff = max_backoff
+        self.failures = 0
+        self.last_error = None
+        self._retry_at = 0
+
+    def _due_at(self):
+        refreshed_at = self._refreshed_at()
+        due_at = 0 if refreshed_at is None else \
+            refreshed_at + API_CACHE_TIME - self._refresh_ahead
+        if self.failures:
+            due_at = max(due_at, self._retry_at)
+        return due_at
+
+    def _failed(self, error, now):
+        self.failures += 1
+        self.last_error = error
+        self._retry_at = now + min(
+            self._min_backoff * 2 ** (self.failures - 1), self._max_backoff)
+
+    def _succeeded(self):
+        self.failures = 0
+        self.last_error = None
+
+    def run(self, now):
+        """
+        Refreshes the metadata when it is due
+        :param now: float of the current unix timestamp
+        :return: Number of seconds until the metadata is next due
+        """
+        if now >= self._due_at():
+            try:
+                self._refresh()
+            except Exception as error:  # pylint: disable=broad-except
+                self._failed(error, now)
+            else:
+                self._succeeded()
+        return max(self._due_at() - now, 0)
+
+    async def run_async(self, now):
+        """
+        Refreshes the metadata when it is due, awaiting the coroutine
+        returned by the refresh callable
+        :param now: float of the current unix timestamp
+        :return: Number of seconds until the metadata is next due
+        """
+        if now >= self._due_at():
+            try:
+                await self._refresh()
+            except Exception as error:  # pylint: disable=broad-except
+                self._failed(error, now)
+            else:
+                self._succeeded()
+        return max(self._due_at() - now, 0)
+
+
+class MetadataRefresher(object):
+    """
+    Daemon thread renewing the server time difference and active encryption
+    key of a launchkey.transports.JOSETransport before they expire. While it
+    is running the transport keeps serving the last known values, even if
+    they are past API_CACHE_TIME, so requests never wait on a metadata fetch
+    once the values have been retrieved once. Failed refreshes are retried
+    with exponential backoff.
+    """
+
+    def __init__(self, transport, refresh_ahead=DEFAULT_REFRESH_AHEAD,
+                 min_backoff=DEFAULT_MIN_BACKOFF,
+                 max_backoff=DEFAULT_MAX_BACKOFF):
+        """
+        :param transport: launchkey.transports.JOSETransport to refresh
+        :param refresh_ahead: Number of seconds before expiration that the
+        metadata is refreshed
+        :param min_backoff: Seconds to wait before retrying the first failed
+        refresh. The wait doubles with each consecutive failure.
+        :param max_backoff: Maximum seconds to wait between retries
+        :raises ValueError: when refresh_ahead is not less than
+        API_CACHE_TIME
+        """
+        if not 0 <= refresh_ahead < API_CACHE_TIME:
+            raise ValueError("refresh_ahead must be at least 0 and less than "
+                             "%s seconds" % API_CACHE_TIME)
+        # pylint: disable=protected-access
+        self.server_time_difference = _RefreshTask(
+            lambda: transport._refresh_server_time_difference(force=True),
+            lambda: transport._server_time_difference[1],
+            refresh_ahead, min_backoff, max_backoff)
+        self.active_encryption_kid = _RefreshTask(
+            lambda: transport._refresh_active_encryption_kid(force=True),
+            lambda: transport._current_kid[1],
+            refresh_ahead, min_backoff, max_backoff)
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    @property
+    def running(self):
+        """
+        :return: Boolean stating whether the refresher thread is running
+        """
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        """
+        Starts the refresher thread. Metadata that has never been retrieved
+        is fetched immediately.
+        :return: None
+        """
+        if not self.running:
+            self._stop_event.clear()
+            self._thread = threading.Thread(
+                target=self._run, name="launchkey-metadata-refresher",
+                daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout=None):
+        """
+        Stops the refresher thread
+        :param timeout: Maximum number of seconds to wait for the thread to
+        finish an in-flight refresh
+        :return: None
+        """
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def run_once(self):
+        """
+        Refreshes any metadata which is due
+        :return: Number of seconds until the next refresh is due
+        """
+        now = time()
+        return min(self.server_time_difference.run(now),
+                   self.active_encryption_kid.run(now))
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            self._stop_event.wait(self.run_once())
+
+
+# pylint: disable=invalid-overridden-method
+class AsyncMetadataRefresher(MetadataRefresher):
+    """
+    asyncio task renewing the server time difference and active encryption
+    key of a launchkey.transports.AsyncJOSETransport before they expire. It
+    behaves as MetadataRefresher without blocking the event loop.
+    """
+
+    def __init__(self, transport, refresh_ahead=DEFAULT_REFRESH_AHEAD,
+                 min_backoff=DEFAULT_MIN_BACKOFF,
+                 max_backoff=DEFAULT_MAX_BACKOFF):
+        """
+        See MetadataRefresher.
+        """
+        super().__init__(transport, refresh_ahead, min_backoff, max_backoff)
+        self._task = None
+
+    @property
+    def running(self):
+        """
+        :return: Boolean stating whether the refresher task is running
+        """
+        return self._task is not None and not self._task.done()
+
+    def start(self):
+        """
+        Starts the refresher task on the running event loop. Metadata that
+        has never been retrieved is fetched immediately.
+        :return: None
+        :raises RuntimeError: when no event loop is running
+        """
+        if not self.running:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    def stop(self, timeout=None):  # pylint: disable=unused-argument
+        """
+        Cancels the refresher task, including an in-flight refresh
+        :param timeout: Ignored. The task is cancelled without waiting.
+        :return: None
+        """
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def run_once(self):
+        """
+        Refreshes any metadata which is due
+        :return: Number of seconds until the next refresh is due
+        """
+        now = time()
+        return min(await self.server_time_difference.run_async(now),
+                   await self.active_encryption_kid.run_async(now))
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(await self.run_once())
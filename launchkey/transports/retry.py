@@ -0,0 +1,239 @@
+""" Retrying of idempotent LaunchKey API requests """
+
+import asyncio
+import random
+from time import monotonic, sleep
+
+import requests
+
+from .deadline import remaining_time
+from .httpx_base import httpx
+from .rate_limit import parse_retry_after
+from .timing import NULL_TIMING, PHASE_RETRY
+
+DEFAULT_MAX_ATTEMPTS = 3
+DEFAULT_BACKOFF = 0.1
+DEFAULT_MAX_BACKOFF = 2.0
+DEFAULT_DEADLINE = 10.0
+DEFAULT_RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+# Methods which can be repeated without changing the state of the API
+IDEMPOTENT_METHODS = ("GET",)
+# POST requests to these path suffixes only read from the API
+IDEMPOTENT_POST_SUFFIXES = ("/list",)
+
+
+def _network_errors():
+    errors = [ConnectionError, requests.exceptions.ConnectionError,
+              requests.exceptions.Timeout]
+    if httpx is not None:
+        errors.append(httpx.TransportError)
+    return tuple(errors)
+
+
+class RetryPolicy(object):
+    """
+    Decides which JOSE requests are retried, and how long to wait between
+    attempts. Only requests which can safely be repeated are retried: GET
+    requests and POST requests to /list endpoints. They are retried on
+    connection errors, timeouts, and the statuses in retry_statuses.
+
+    Waits grow exponentially from backoff up to max_backoff with full
+    jitter, and are never shorter than a Retry-After response header. No
+    attempt is made that would start after the deadline, or after the
+    deadline of a launchkey.transports.call_deadline context.
+    """
+
+    network_errors = _network_errors()
+
+    def __init__(self, max_attempts=DEFAULT_MAX_ATTEMPTS,
+                 backoff=DEFAULT_BACKOFF, max_backoff=DEFAULT_MAX_BACKOFF,
+                 deadline=DEFAULT_DEADLINE,
+                 retry_statuses=DEFAULT_RETRY_STATUSES):
+        """
+        :param max_attempts: Maximum number of times a request is sent
+        :param backoff: Upper bound in seconds of the wait before the first
+        retry. It doubles for every following retry.
+        :param max_backoff: Maximum upper bound in seconds of a wait
+        :param deadline: Seconds from the start of a request after which it
+        is no longer retried. None retries until max_attempts is reached.
+        :param retry_statuses: HTTP status codes of responses which are
+        retried
+        """
+        if max_attempts < 1:
+            raise ValueError("max_attempts must be at least 1")
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.deadline = deadline
+        self.retry_statuses = frozenset(retry_statuses)
+
+    @staticmethod
+    def is_idempotent(method, path):
+        """
+        :param method: Request method IE get, put, post, delete
+        :param path: Path or endpoint of the request
+        :return: bool stating whether the request may be sent again
+        """
+        method = method.upper()
+        if method in IDEMPOTENT_METHODS:
+            return True
+        return method == "POST" and \
+            path.split("?", 1)[0].rstrip("/").endswith(
+                IDEMPOTENT_POST_SUFFIXES)
+
+    def is_retryable_error(self, error):
+        """
+        :param error: Exception raised while sending a request
+        :return: bool stating whether the request should be retried
+        """
+        if isinstance(error, self.network_errors):
+            return True
+        status_code = getattr(getattr(error, "response", None),
+                              "status_code", None)
+        return status_code in self.retry_statuses
+
+    def is_retryable_response(self, response):
+        """
+        :param response: launchkey.transports.base.APIResponse
+        :return: bool stating whether the request should be retried
+        """
+        return response.status_code in self.retry_statuses
+
+    def get_backoff(self, retry):
+        """
+        :param retry: Number of the retry starting at 1
+        :return: Random number of seconds to wait before the retry
+        """
+        return random.uniform(
+            0, min(self.max_backoff, self.backoff * 2 ** (retry - 1)))
+
+    def start(self, method, path):
+        """
+        :param method: Request method IE get, put, post, delete
+        :param path: Path or endpoint of the request
+        :return: RetryState for a request or None when it is not retried
+        """
+        if self.max_attempts < 2 or not self.is_idempotent(method, path):
+            return None
+        return RetryState(self)
+
+
+class RetryState(object):
+    """
+    Attempts made for a single request by a RetryPolicy
+    """
+
+    def __init__(self, policy):
+        """
+        :param policy: RetryPolicy of the request
+        """
+        self.policy = policy
+        self.attempts = 1
+        self._deadline = None if policy.deadline is None \
+            else monotonic() + policy.deadline
+
+    @property
+    def retries(self):
+        """
+        :return: Number of attempts made after the first
+        """
+        return self.attempts - 1
+
+    def next_delay(self, error=None, response=None):
+        """
+        Decides whether the request is attempted again after an attempt
+        raised an error or received a response
+        :param error: Exception raised by the attempt
+        :param response: launchkey.transports.base.APIResponse received by
+        the attempt
+        :return: Seconds to wait before the next attempt or None when the
+        request should not be retried
+        """
+        if error is not None:
+            if not self.policy.is_retryable_error(error):
+                return None
+            headers = getattr(getattr(error, "response", None), "headers",
+                              None)
+        else:
+            if not self.policy.is_retryable_response(response):
+                return None
+            headers = response.headers
+        if self.attempts >= self.policy.max_attempts:
+            return None
+        delay = self.policy.get_backoff(self.attempts)
+        retry_after = parse_retry_after(_get_header(headers, "retry-after"))
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+        if self._deadline is not None and \
+                monotonic() + delay >= self._deadline:
+            return None
+        remaining = remaining_time()
+        if remaining is not None and delay >= remaining:
+            return None
+        self.attempts += 1
+        return delay
+
+
+def _get_header(headers, name):
+    for key, value in (headers or {}).items():
+        if key.lower() == name:
+            return value
+    return None
+
+
+def _next_delay(retries, error=None, response=None):
+    """
+    :return: Seconds to wait before the next attempt or None when the
+    response is final
+    :raises Exception: the given error when it is not retried
+    """
+    delay = None if retries is None else retries.next_delay(error, response)
+    if delay is None and error is not None:
+        raise error
+    return delay
+
+
+def retry_attempts(attempt, retries, timing=NULL_TIMING):
+    """
+    Makes attempts of a request until the retry state of the request does
+    not retry one, sleeping for the backoff in between
+    :param attempt: Callable making an attempt and returning a tuple whose
+    last item is the launchkey.transports.base.APIResponse received
+    :param retries: RetryState of the request or None when it is not retried
+    :param timing: RequestTiming recording the backoff as its retry phase
+    :return: The result of the final attempt
+    :raises Exception: the error raised by the final attempt
+    """
+    while True:
+        try:
+            result = attempt()
+        except Exception as error:  # pylint: disable=broad-except
+            delay = _next_delay(retries, error=error)
+        else:
+            delay = _next_delay(retries, response=result[-1])
+            if delay is None:
+                return result
+        sleep(delay)
+        timing.lap(PHASE_RETRY)
+
+
+async def retry_attempts_async(attempt, retries, timing=NULL_TIMING):
+    """
+    Coroutine equivalent of retry_attempts which awaits each attempt and
+    the backoff without blocking the event loop
+    :param attempt: Callable returning an awaitable which makes an attempt
+    :return: The result of the final attempt
+    :raises Exception: the error raised by the final attempt
+    """
+    while True:
+        try:
+            result = await attempt()
+        except Exception as error:  # pylint: disable=broad-except
+            delay = _next_delay(retries, error=error)
+        else:
+            delay = _next_delay(retries, response=result[-1])
+            if delay is None:
+                return result
+        await asyncio.sleep(delay)
+        timing.lap(PHASE_RETRY)
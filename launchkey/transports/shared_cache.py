@@ -0,0 +1,151 @@
+""" Caches for sharing JOSE transport metadata between processes """
+
+import json
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+from time import time
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover
+    fcntl = None
+
+DEFAULT_PUBLIC_KEY_TTL = 3600
+
+
+class SharedCache(object):
+    """
+    Interface for a store shared by the JOSE transports of multiple processes.
+    Values are JSON serializable and expire after their TTL. Implementations
+    must be safe to use from multiple threads and processes.
+    """
+
+    def get(self, key):
+        """
+        Retrieves an unexpired value
+        :param key: string key of the value
+        :return: The value or None if it is missing or has expired
+        """
+        raise NotImplementedError
+
+    def set(self, key, value, ttl):
+        """
+        Stores a value
+        :param key: string key of the value
+        :param value: JSON serializable value
+        :param ttl: Number of seconds after which the value expires
+        :return: None
+        """
+        raise NotImplementedError
+
+
+class FileSharedCache(SharedCache):
+    """
+    SharedCache storing values in a JSON file which is replaced atomically on
+    every write, allowing all worker processes on a host to share one warm
+    copy of the LaunchKey API public keys and server time difference. The file
+    is only parsed again when it has changed.
+
+    The values are trusted for verifying LaunchKey API responses, so the file
+    must be in a directory which only the user running the SDK can write to.
+    """
+
+    def __init__(self, path):
+        """
+        :param path: Path of the cache file. A lock file with the same path
+        and a .lock suffix is created alongside it.
+        """
+        self.path = path
+        self._lock_path = path + ".lock"
+        self._thread_lock = threading.Lock()
+        self._snapshot = None, {}
+
+    def _read(self):
+        """
+        Reads the cache file, reusing the previously parsed entries when the
+        file has not changed
+        :return: dict of entries
+        """
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return {}
+        signature = stat.st_ino, stat.st_mtime_ns, stat.st_size
+        if self._snapshot[0] != signature:
+            try:
+                with open(self.path, "rb") as cache_file:
+                    entries = json.loads(cache_file.read().decode("utf-8"))
+            except (OSError, ValueError):
+                entries = {}
+            if not isinstance(entries, dict):
+                entries = {}
+            self._snapshot = signature, entries
+        return self._snapshot[1]
+
+    @staticmethod
+    def _is_expired(entry, now):
+        try:
+            return entry["expires"] <= now
+        except (KeyError, TypeError):
+            return True
+
+    @contextmanager
+    def _file_lock(self):
+        """
+        Holds an exclusive lock shared with other processes while writing
+        """
+        lock_fd = os.open(self._lock_path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            if fcntl is not None:
+                fcntl.flock(lock_fd, fcntl.LOCK_EX)
+            yield
+        finally:
+            os.close(lock_fd)
+
+    def get(self, key):
+        """
+        Retrieves an unexpired value
+        :param key: string key of the value
+        :return: The value or None if it is missing or has expired
+        """
+        with self._thread_lock:
+            entry = self._read().get(key)
+        if self._is_expired(entry, time()):
+            return None
+        return entry.get("value")
+
+    def set(self, key, value, ttl):
+        """
+        Stores a value. Failures to write the cache file are ignored as the
+        value can be retrieved from the LaunchKey API again.
+        :param key: string key of the value
+        :param value: JSON serializable value
+        :param ttl: Number of seconds after which the value expires
+        :return: None
+        """
+        now = time()
+        try:
+            with self._thread_lock, self._file_lock():
+                entries = {
+                    entry_key: entry
+                    for entry_key, entry in self._read().items()
+                    if not self._is_expired(entry, now)
+                }
+                entries[key] = {"value": value, "expires": now + ttl}
+                temp_fd, temp_path = tempfile.mkstemp(
+                    dir=os.path.dirname(os.path.abspath(self.path)),
+                    prefix=".launchkey-cache-")
+                try:
+                    with os.fdopen(temp_fd, "w") as temp_file:
+                        json.dump(entries, temp_file)
+                    os.replace(temp_path, self.path)
+                except BaseException:
+                    os.unlink(temp_path)
+                    raise
+                stat = os.stat(self.path)
+                self._snapshot = (stat.st_ino, stat.st_mtime_ns,
+                                  stat.st_size), entries
+        except OSError:
+            pass
@@ -0,0 +1,237 @@
+""" Per-phase timing of JOSE requests """
+
+import re
+import threading
+from bisect import bisect_left
+from collections import OrderedDict
+from time import perf_counter
+
+# Waiting on launchkey.transports.rate_limit.AdaptiveRateLimiter
+PHASE_RATE_LIMIT = "rate_limit"
+PHASE_ENCRYPT = "encrypt"
+PHASE_HASH = "hash"
+PHASE_SIGN = "sign"
+PHASE_HTTP = "http"
+PHASE_VERIFY = "verify"
+PHASE_DECRYPT = "decrypt"
+PHASE_PARSE = "parse"
+# Failed attempts of a request retried by launchkey.transports.RetryPolicy
+# and the backoff before the next attempt
+PHASE_RETRY = "retry"
+# Retrieval of the server time, encryption key, and API public keys before
+# a request is signed and encrypted and before its response is verified
+PHASE_METADATA = "metadata"
+
+# Upper bounds in seconds of the latency histogram buckets
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                   1.0, 2.5, 5.0, 10.0)
+
+UUID_PATTERN = re.compile(
+    r"[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-"
+    r"[0-9a-fA-F]{12}")
+
+
+def endpoint_name(method, path):
+    """
+    Names an endpoint by its request method and path with identifiers
+    replaced by {id} so that requests for different entities share a name
+    :param method: Request method IE get, put, post, delete
+    :param path: Path or endpoint that was requested
+    :return: string such as "POST /service/v3/auths/{id}"
+    """
+    return "%s %s" % (method.upper(), UUID_PATTERN.sub("{id}", path))
+
+
+class RequestTiming(object):  # pylint: disable=too-many-instance-attributes
+    """
+    Timing breakdown of a single JOSE request given to the timing hooks of a
+    JOSETransport. Phases are stored in the order they ran with their
+    duration in seconds.
+    """
+
+    def __init__(self, method, path, subject):
+        """
+        :param method: Request method IE get, put, post, delete
+        :param path: Path or endpoint that was requested
+        :param subject: Subject the request was issued for
+        """
+        self.method = method.upper()
+        self.path = path
+        self.subject = subject
+        self.phases = OrderedDict()
+        self.status_code = None
+        self.error = None
+        self.total = None
+        self._started = self._last = perf_counter()
+
+    def lap(self, phase):
+        """
+        Records the time since the previous lap, or the start of the
+        request, as the duration of a phase
+        :param phase: Name of the phase which just finished
+        :return: None
+        """
+        now = perf_counter()
+        self.phases[phase] = self.phases.get(phase, 0) + now - self._last
+        self._last = now
+
+    def finish(self, status_code=None, error=None):
+        """
+        Records the total duration of the request
+        :param status_code: HTTP status code of the response, if any
+        :param error: Exception raised by the request, if any
+        :return: None
+        """
+        self.status_code = status_code
+        self.error = error
+        self.total = perf_counter() - self._started
+
+    @property
+    def endpoint(self):
+        """
+        :return: Endpoint name as given by endpoint_name
+        """
+        return endpoint_name(self.method, self.path)
+
+
+class _NullTiming(object):  # pylint: disable=too-few-public-methods
+    """
+    Stand-in for RequestTiming when no timing hooks are registered
+    """
+
+    @staticmethod
+    def lap(phase):  # pylint: disable=unused-argument
+        """
+        Does nothing
+        """
+
+
+NULL_TIMING = _NullTiming()
+
+
+class Histogram(object):
+    """
+    Thread safe histogram of observed values counted in cumulative buckets
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        """
+        :param buckets: Sorted upper bounds of the buckets. Values larger than
+        the last bound are only counted by count and sum.
+        """
+        self.buckets = tuple(buckets)
+        self._counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        """
+        :param value: Value to count
+        :return: None
+        """
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[index] += 1
+            self.count += 1
+            self.sum += value
+
+    def cumulative_counts(self):
+        """
+        :return: List of tuples of each bucket bound, ending with infinity,
+        and the number of values less than or equal to it
+        """
+        with self._lock:
+            counts = list(self._counts)
+        total = 0
+        cumulative = []
+        for bound, count in zip(self.buckets + (float("inf"),), counts):
+            total += count
+            cumulative.append((bound, total))
+        return cumulative
+
+    def quantile(self, quantile):
+        """
+        Estimates a quantile as the upper bound of the bucket containing it
+        :param quantile: float between 0 and 1
+        :return: float of the bucket bound or None when nothing was observed
+        """
+        cumulative = self.cumulative_counts()
+        total = cumulative[-1][1]
+        if not total:
+            return None
+        for bound, count in cumulative:
+            if count >= quantile * total:
+                return bound
+        return None  # pragma: no cover
+
+
+class EndpointLatencyHistograms(object):
+    """
+    Timing hook keeping latency histograms of each endpoint's total request
+    time and of each of its phases. Register it with
+    JOSETransport.add_timing_hook.
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        """
+        :param buckets: Sorted upper bounds in seconds of the histogram
+        buckets
+        """
+        self._buckets = buckets
+        self._endpoints = {}
+        self._lock = threading.Lock()
+
+    def _histograms(self, endpoint):
+        with self._lock:
+            histograms = self._endpoints.get(endpoint)
+            if histograms is None:
+                histograms = {"total": Histogram(self._buckets), "phases": {}}
+                self._endpoints[endpoint] = histograms
+            return histograms
+
+    def _phase_histogram(self, histograms, phase):
+        with self._lock:
+            histogram = histograms["phases"].get(phase)
+            if histogram is None:
+                histogram = histograms["phases"][phase] = \
+                    Histogram(self._buckets)
+            return histogram
+
+    def __call__(self, timing):
+        """
+        Records a request timing
+        :param timing: RequestTiming
+        :return: None
+        """
+        histograms = self._histograms(timing.endpoint)
+        histograms["total"].observe(timing.total)
+        for phase, duration in timing.phases.items():
+            self._phase_histogram(histograms, phase).observe(duration)
+
+    def endpoints(self):
+        """
+        :return: List of the endpoints with recorded timings
+        """
+        with self._lock:
+            return list(self._endpoints)
+
+    def total(self, endpoint):
+        """
+        :param endpoint: Endpoint as given by RequestTiming.endpoint
+        :return: Histogram of the total request time or None
+        """
+        with self._lock:
+            histograms = self._endpoints.get(endpoint)
+        return None if histograms is None else histograms["total"]
+
+    def phase(self, endpoint, phase):
+        """
+        :param endpoint: Endpoint as given by RequestTiming.endpoint
+        :param phase: Name of the phase
+        :return: Histogram of the phase duration or None
+        """
+        with self._lock:
+            histograms = self._endpoints.get(endpoint)
+            return None if histograms is None else \
+                histograms["phases"].get(phase)
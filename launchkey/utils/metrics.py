@@ -0,0 +1,373 @@
+""" In-process metrics of SDK usage exported in the Prometheus text format """
+
+import threading
+import weakref
+from contextlib import contextmanager
+from time import perf_counter
+
+from ..exceptions import RateLimited
+from ..transports.timing import Histogram, DEFAULT_BUCKETS
+
+COUNTER = "counter"
+GAUGE = "gauge"
+HISTOGRAM = "histogram"
+
+# SDKMetrics collecting metrics while enabled by enable_metrics
+_ACTIVE = {"metrics": None}
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n") \
+        .replace('"', '\\"')
+
+
+def _format_labels(names, values):
+    if not names:
+        return ""
+    return "{%s}" % ",".join('%s="%s"' % (name, _escape(value))
+                             for name, value in zip(names, values))
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(value)
+
+
+class Metric(object):
+    """
+    Base of the metrics held by a MetricsRegistry
+    """
+
+    metric_type = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        """
+        :param name: Metric name
+        :param documentation: Help text of the metric
+        :param labelnames: Tuple of the names of the metric's labels
+        """
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def samples(self):
+        """
+        :return: List of tuples of the sample name suffix, label names, label
+        values, and value of each sample
+        """
+        raise NotImplementedError
+
+    def expose(self):
+        """
+        :return: string of the metric in the Prometheus text format
+        """
+        lines = ["# HELP %s %s" % (self.name, _escape(self.documentation)),
+                 "# TYPE %s %s" % (self.name, self.metric_type)]
+        for suffix, names, values, value in self.samples():
+            lines.append("%s%s%s %s" % (self.name, suffix,
+                                        _format_labels(names, values),
+                                        _format_value(value)))
+        return "\n".join(lines)
+
+
+class Counter(Metric):
+    """
+    Monotonically increasing count for each combination of label values
+    """
+
+    metric_type = COUNTER
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self._values = {}
+
+    def inc(self, *labelvalues, amount=1):
+        """
+        :param labelvalues: Values of the labels in the order of labelnames
+        :param amount: Amount to add
+        :return: None
+        """
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0) + \
+                amount
+
+    def value(self, *labelvalues):
+        """
+        :param labelvalues: Values of the labels in the order of labelnames
+        :return: Current count
+        """
+        with self._lock:
+            return self._values.get(labelvalues, 0)
+
+    def samples(self):
+        with self._lock:
+            values = sorted(self._values.items())
+        return [("", self.labelnames, labels, value)
+                for labels, value in values]
+
+
+class HistogramMetric(Metric):
+    """
+    Histogram of observed values for each combination of label values
+    """
+
+    metric_type = HISTOGRAM
+
+    def __init__(self, name, documentation, labelnames=(),
+                 buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = buckets
+        self._histograms = {}
+
+    def histogram(self, *labelvalues):
+        """
+        :param labelvalues: Values of the labels in the order of labelnames
+        :return: launchkey.transports.timing.Histogram of the label values
+        """
+        with self._lock:
+            histogram = self._histograms.get(labelvalues)
+            if histogram is None:
+                histogram = self._histograms[labelvalues] = \
+                    Histogram(self.buckets)
+            return histogram
+
+    def observe(self, value, *labelvalues):
+        """
+        :param value: Value to observe
+        :param labelvalues: Values of the labels in the order of labelnames
+        :return: None
+        """
+        self.histogram(*labelvalues).observe(value)
+
+    def samples(self):
+        with self._lock:
+            histograms = sorted(self._histograms.items())
+        bucket_names = self.labelnames + ("le",)
+        samples = []
+        for labels, histogram in histograms:
+            for bound, count in histogram.cumulative_counts():
+                samples.append(("_bucket", bucket_names,
+                                labels + (_format_value(bound),), count))
+            samples.append(("_sum", self.labelnames, labels, histogram.sum))
+            samples.append(("_count", self.labelnames, labels,
+                            histogram.count))
+        return samples
+
+
+class CallbackMetric(Metric):
+    """
+    Metric whose values are read from a callable when exported, such as
+    counters kept by other objects
+    """
+
+    def __init__(self, name, documentation, metric_type, callback,
+                 labelnames=()):
+        """
+        :param metric_type: COUNTER or GAUGE
+        :param callback: Callable returning a dict of values by tuples of
+        label values
+        """
+        super().__init__(name, documentation, labelnames)
+        self.metric_type = metric_type
+        self._callback = callback
+
+    def samples(self):
+        return [("", self.labelnames, labels, value)
+                for labels, value in sorted(self._callback().items())]
+
+
+class MetricsRegistry(object):
+    """
+    Collection of metrics which are exported together
+    """
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        """
+        :param metric: Metric to add
+        :return: The metric
+        :raises ValueError: when a metric with the same name is registered
+        """
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError("Metric already registered: %s"
+                                 % metric.name)
+            self._metrics[metric.name] = metric
+        return metric
+
+    def get(self, name):
+        """
+        :param name: Metric name
+        :return: The registered metric or None
+        """
+        with self._lock:
+            return self._metrics.get(name)
+
+    def expose(self):
+        """
+        :return: string of all metrics in the Prometheus text exposition
+        format
+        """
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return "".join(metric.expose() + "\n" for metric in metrics)
+
+
+class SDKMetrics(object):  # pylint: disable=too-many-instance-attributes
+    """
+    Metrics of LaunchKey API calls made by the clients, webhook verification,
+    and the caches of the transports used by the clients
+    """
+
+    def __init__(self, registry=None):
+        """
+        :param registry: MetricsRegistry to add the metrics to. A new
+        registry is created when omitted.
+        """
+        self.registry = registry if registry is not None \
+            else MetricsRegistry()
+        self._transports = weakref.WeakSet()
+        self._transports_lock = threading.Lock()
+        self.api_calls = self.registry.register(Counter(
+            "launchkey_api_calls_total",
+            "LaunchKey API client method calls", ("method",)))
+        self.api_call_duration = self.registry.register(HistogramMetric(
+            "launchkey_api_call_duration_seconds",
+            "Duration of LaunchKey API client method calls", ("method",)))
+        self.api_errors = self.registry.register(Counter(
+            "launchkey_api_errors_total",
+            "LaunchKey API client method calls raising an exception",
+            ("method", "exception")))
+        self.rate_limited = self.registry.register(Counter(
+            "launchkey_api_rate_limited_total",
+            "LaunchKey API client method calls rejected with a 429 status",
+            ("method",)))
+        self.webhook_verifications = self.registry.register(Counter(
+            "launchkey_webhook_verifications_total",
+            "Webhook requests verified by outcome", ("outcome",)))
+        self.registry.register(CallbackMetric(
+            "launchkey_public_key_cache_requests_total",
+            "API public key cache lookups by result", COUNTER,
+            lambda: self._cache_counts("public_key_cache_stats",
+                                       ("hits", "misses", "negative_hits")),
+            ("result",)))
+        self.registry.register(CallbackMetric(
+            "launchkey_public_key_cache_hit_ratio",
+            "Ratio of API public key cache lookups which were hits", GAUGE,
+            lambda: self._hit_ratio("public_key_cache_stats")))
+        self.registry.register(CallbackMetric(
+            "launchkey_server_time_cache_requests_total",
+            "Server time difference lookups by result", COUNTER,
+            lambda: self._cache_counts("server_time_cache_stats",
+                                       ("hits", "misses")),
+            ("result",)))
+        self.registry.register(CallbackMetric(
+            "launchkey_server_time_cache_hit_ratio",
+            "Ratio of server time difference lookups which were served "
+            "from the cache", GAUGE,
+            lambda: self._hit_ratio("server_time_cache_stats")))
+
+    def track_transport(self, transport):
+        """
+        Includes the cache counters of a transport in the metrics. Transports
+        of clients making API calls or verifying webhooks are tracked
+        automatically.
+        :param transport: launchkey.transports.JOSETransport
+        :return: None
+        """
+        if transport is not None and \
+                hasattr(transport, "public_key_cache_stats"):
+            with self._transports_lock:
+                self._transports.add(transport)
+
+    def _cache_stats(self, stats_name):
+        with self._transports_lock:
+            transports = list(self._transports)
+        return [getattr(transport, stats_name) for transport in transports]
+
+    def _cache_counts(self, stats_name, results):
+        totals = {(result,): 0 for result in results}
+        for stats in self._cache_stats(stats_name):
+            for result in results:
+                totals[(result,)] += stats.get(result, 0)
+        return totals
+
+    def _hit_ratio(self, stats_name):
+        hits = misses = 0
+        for stats in self._cache_stats(stats_name):
+            hits += stats.get("hits", 0) + stats.get("negative_hits", 0)
+            misses += stats.get("misses", 0)
+        if not hits + misses:
+            return {}
+        return {(): hits / float(hits + misses)}
+
+    def record_api_call(self, method, duration, error=None):
+        """
+        :param method: Qualified name of the client method
+        :param duration: Seconds the call took
+        :param error: Exception raised by the call, if any
+        :return: None
+        """
+        self.api_calls.inc(method)
+        self.api_call_duration.observe(duration, method)
+        if error is not None:
+            self.api_errors.inc(method, type(error).__name__)
+            if isinstance(error, RateLimited):
+                self.rate_limited.inc(method)
+
+    @contextmanager
+    def time_api_call(self, method, client=None):
+        """
+        Records the duration and outcome of a client method call made within
+        the context
+        :param method: Qualified name of the client method
+        :param client: Client making the call whose transport is tracked
+        """
+        self.track_transport(getattr(client, "_transport", None))
+        start = perf_counter()
+        try:
+            yield
+        except Exception as error:
+            self.record_api_call(method, perf_counter() - start, error)
+            raise
+        self.record_api_call(method, perf_counter() - start)
+
+    def record_webhook_verification(self, outcome):
+        """
+        :param outcome: Outcome of the verification such as valid or invalid
+        :return: None
+        """
+        self.webhook_verifications.inc(outcome)
+
+
+def enable_metrics(metrics=None):
+    """
+    Starts collecting SDK metrics. Collection has no overhead until it is
+    enabled.
+    :param metrics: SDKMetrics to record to. A new SDKMetrics with its own
+    MetricsRegistry is created when omitted.
+    :return: SDKMetrics whose registry can be exported with
+    MetricsRegistry.expose
+    """
+    _ACTIVE["metrics"] = metrics if metrics is not None else SDKMetrics()
+    return _ACTIVE["metrics"]
+
+
+def disable_metrics():
+    """
+    Stops collecting SDK metrics
+    :return: None
+    """
+    _ACTIVE["metrics"] = None
+
+
+def active_metrics():
+    """
+    :return: SDKMetrics being recorded to or None when metrics are disabled
+    """
+    return _ACTIVE["metrics"]
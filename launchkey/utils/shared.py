@@ -8,7 +8,9 @@ from jwkest import JWKESTException
 
 from ..exceptions import InvalidIssuerFormat, InvalidIssuerVersion, \
     JWTValidationFailure, InvalidJWTResponse, WebhookAuthorizationError, \
-    XiovJWTValidationFailure, XiovJWTDecryptionFailure
+    XiovJWTValidationFailure, XiovJWTDecryptionFailure, UnexpectedAPIResponse
+from .metrics import active_metrics
+from .tracing import active_tracer, subject_type
 
 
 class XiovJWTService(object):
@@ -20,6 +22,26 @@ class XiovJWTService(object):
         self._transport = transport
         self._subject = subject
 
+    @staticmethod
+    def get_compact_jwt(headers):
+        """
+        Retrieves the x-iov-jwt header value from request headers
+        :param headers: A generic map of request headers
+        :return: The compact JWT or None if the header was not found
+        """
+        compact_jwt = None
+        for header_key, header_value in headers.items():
+            if header_key.lower() == 'x-iov-jwt':
+                compact_jwt = header_value
+        return compact_jwt
+
+    def _span_attributes(self, method, path):
+        attributes = {"http.method": method, "http.route": path}
+        subject = subject_type(self._subject)
+        if subject is not None:
+            attributes["launchkey.subject_type"] = subject
+        return attributes
+
     def verify_jwt_request(self, body, headers, method, path):
         """
         Retrieves and validates an x-iov-jwt payload
@@ -35,15 +57,25 @@ class XiovJWTService(object):
         :raises launchkey.exceptions.WebhookAuthorizationError: when the
         "Authorization" header in the headers.
         """
+        tracer = active_tracer()
+        if tracer is None:
+            return self._verify_jwt_request(body, headers, method, path)
+        with tracer.start_span("launchkey.webhook.verify_jwt_request",
+                               self._span_attributes(method, path)):
+            return self._verify_jwt_request(body, headers, method, path)
+
+    def _verify_jwt_request(self, body, headers, method, path):
+        metrics = active_metrics()
+        if metrics is not None:
+            metrics.track_transport(self._transport)
+
         if not isinstance(body, str):
             body = body.decode("utf-8")
 
-        compact_jwt = None
-        for header_key, header_value in headers.items():
-            if header_key.lower() == 'x-iov-jwt':
-                compact_jwt = header_value
+        compact_jwt = self.get_compact_jwt(headers)
 
         if compact_jwt is None:
+            self._record_verification(metrics, "missing_jwt")
             raise WebhookAuthorizationError(
                 "The X-IOV-JWT header was not found in the supplied headers "
                 "from the request!")
@@ -56,9 +88,20 @@ class XiovJWTService(object):
                 path,
                 body)
         except (JWTValidationFailure, InvalidJWTResponse) as reason:
+            self._record_verification(metrics, "invalid")
             raise XiovJWTValidationFailure(reason=reason) from reason
+        except (UnexpectedAPIResponse, KeyError):
+            # The JWT has no kid or was signed by a key the API does not know
+            self._record_verification(metrics, "unknown_key")
+            raise
+        self._record_verification(metrics, "valid")
         return body
 
+    @staticmethod
+    def _record_verification(metrics, outcome):
+        if metrics is not None:
+            metrics.record_webhook_verification(outcome)
+
     def decrypt_jwe(self, body, headers, method, path):
         """
         Verifies and decrypts a jwt request
@@ -74,10 +117,19 @@ class XiovJWTService(object):
         body cannot be decrypted.
         :return: Decrypted string
         """
+        tracer = active_tracer()
+        if tracer is None:
+            return self._decrypt_jwe(body, headers, method, path)
+        with tracer.start_span("launchkey.webhook.decrypt_jwe",
+                               self._span_attributes(method, path)):
+            return self._decrypt_jwe(body, headers, method, path)
+
+    def _decrypt_jwe(self, body, headers, method, path):
         body = self.verify_jwt_request(body, headers, method, path)
         try:
             return self._transport.decrypt_response(body)
         except JWKESTException as reason:
+            self._record_verification(active_metrics(), "decryption_failed")
             raise XiovJWTDecryptionFailure(reason) from reason
 
 
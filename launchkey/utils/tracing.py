@@ -0,0 +1,101 @@
+""" Optional distributed tracing spans around SDK operations """
+
+try:
+    from opentelemetry import propagate, trace
+except ImportError:  # pragma: no cover
+    trace = None
+    propagate = None
+
+INSTRUMENTATION_NAME = "launchkey"
+
+# Tracer receiving spans while enabled by enable_tracing
+_ACTIVE = {"tracer": None}
+
+
+class Tracer(object):
+    """
+    Interface of the tracers given to enable_tracing. Spans are context
+    managers which are active for the duration of the operation and record
+    any exception raised within them.
+    """
+
+    def start_span(self, name, attributes=None):
+        """
+        Starts a span which is the current span until it is exited
+        :param name: Name of the span
+        :param attributes: Optional dict of span attributes
+        :return: Context manager yielding an object with a
+        set_attribute(key, value) method
+        """
+        raise NotImplementedError
+
+    def inject(self, headers):
+        """
+        Adds the trace context of the current span to outgoing HTTP headers
+        :param headers: dict of the request headers to add to
+        :return: None
+        """
+        raise NotImplementedError
+
+
+class OpenTelemetryTracer(Tracer):
+    """
+    Tracer creating OpenTelemetry spans and propagating their context with
+    the globally configured OpenTelemetry propagator
+    """
+
+    def __init__(self, tracer=None):
+        """
+        :param tracer: Optional opentelemetry.trace.Tracer. Defaults to the
+        tracer of the global tracer provider.
+        """
+        if trace is None:
+            raise ImportError("The opentelemetry-api package is required for "
+                              "this tracer. Install it with: "
+                              "pip install launchkey[tracing]")
+        self._tracer = tracer if tracer is not None \
+            else trace.get_tracer(INSTRUMENTATION_NAME)
+
+    def start_span(self, name, attributes=None):
+        return self._tracer.start_as_current_span(name, attributes=attributes)
+
+    def inject(self, headers):
+        propagate.inject(headers)
+
+
+def enable_tracing(tracer=None):
+    """
+    Starts creating spans for client API calls, JOSE requests, and webhook
+    verification. No spans are created until it is enabled.
+    :param tracer: Tracer to create spans with. Defaults to an
+    OpenTelemetryTracer.
+    :return: The tracer
+    """
+    _ACTIVE["tracer"] = tracer if tracer is not None \
+        else OpenTelemetryTracer()
+    return _ACTIVE["tracer"]
+
+
+def disable_tracing():
+    """
+    Stops creating spans
+    :return: None
+    """
+    _ACTIVE["tracer"] = None
+
+
+def active_tracer():
+    """
+    :return: Tracer creating spans or None when tracing is disabled
+    """
+    return _ACTIVE["tracer"]
+
+
+def subject_type(subject):
+    """
+    :param subject: Subject such as svc:<uuid>
+    :return: Type of the subject, such as svc, or None
+    """
+    if not isinstance(subject, str):
+        return None
+    return subject.split(":", 1)[0]
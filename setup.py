@@ -57,6 +57,12 @@ setup(name='launchkey',
       zip_safe=False,
       test_suite='tests',
       install_requires=requires,
+      extras_require={
+          'async': ['httpx >= 0.23.0, < 1.0.0'],
+          'http2': ['httpx[http2] >= 0.23.0, < 1.0.0'],
+          'cryptography': ['cryptography >= 3.4.0'],
+          'tracing': ['opentelemetry-api >= 1.0.0'],
+      },
       tests_require=[
           'nose >= 1.3.0, < 2.0.0',
           'nose-exclude >= 0.5.0, < 1.0.0',
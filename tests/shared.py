@@ -1,9 +1,12 @@
+import asyncio
+import inspect
 import unittest
 from datetime import datetime
+from unittest.mock import AsyncMock
 
 import pytz
 from ddt import ddt, data
-from mock import ANY, patch
+from mock import ANY, MagicMock, patch
 
 from launchkey.entities.shared import KeyType
 from launchkey.entities.service import Service, ServiceSecurityPolicy, TimeFence, GeoFence
@@ -900,3 +903,39 @@ class SharedTests(object):
             expected_service_id = 'expected-service-id'
             with self.assertRaises(UnknownPolicyException):
                 self._client.get_service_policy(expected_service_id[:])
+
+
+class AsyncClientProxy(object):
+    """
+    Runs the coroutines of an asyncio client to completion so that the
+    synchronous client tests can be reused against it.
+    """
+
+    def __init__(self, client):
+        object.__setattr__(self, "_client", client)
+
+    def __getattr__(self, name):
+        attribute = getattr(self._client, name)
+        if not inspect.ismethod(attribute):
+            return attribute
+
+        def run(*args, **kwargs):
+            result = attribute(*args, **kwargs)
+            if inspect.isawaitable(result):
+                return asyncio.run(result)
+            return result
+        return run
+
+    def __setattr__(self, name, value):
+        setattr(self._client, name, value)
+
+
+def make_async_transport(spec=None):
+    """
+    Creates a mock asyncio transport whose request methods are coroutines
+    """
+    transport = MagicMock(spec=spec)
+    for method in ("get", "post", "put", "delete", "patch",
+                   "load_public_key_for_jwt"):
+        setattr(transport, method, AsyncMock())
+    return transport
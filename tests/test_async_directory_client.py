@@ -0,0 +1,48 @@
+from uuid import uuid4
+
+from launchkey.clients import AsyncDirectoryClient
+from launchkey.transports import AsyncJOSETransport
+from launchkey.transports.base import APIResponse
+from .shared import SharedTests, AsyncClientProxy, make_async_transport
+from .test_directory_client import TestDirectoryClient, TestHandleWebhook
+
+
+class TestAsyncDirectoryClientServices(SharedTests.Services):
+
+    def setUp(self):
+        self._directory_id = uuid4()
+        client = AsyncClientProxy(
+            AsyncDirectoryClient(self._directory_id, make_async_transport()))
+        self._expected_base_endpoint = '/directory/v3/services'
+        self._expected_subject = 'dir:{}'.format(str(self._directory_id))
+        self.setup_client(client)
+
+
+class TestAsyncDirectoryClient(TestDirectoryClient):
+
+    def setUp(self):
+        self._transport = make_async_transport()
+        self._response = APIResponse({}, {}, 200)
+        self._transport.post.return_value = self._response
+        self._transport.get.return_value = self._response
+        self._transport.put.return_value = self._response
+        self._transport.delete.return_value = self._response
+        self._transport.patch.return_value = self._response
+        self._directory_id = uuid4()
+        self._expected_subject = 'dir:{}'.format(str(self._directory_id))
+        self._directory_client = AsyncClientProxy(
+            AsyncDirectoryClient(self._directory_id, self._transport))
+
+
+class TestAsyncHandleWebhook(TestHandleWebhook):
+
+    def setUp(self):
+        super().setUp()
+        self._transport = make_async_transport(AsyncJOSETransport)
+        self.client = AsyncClientProxy(
+            AsyncDirectoryClient(self._directory_id, self._transport))
+
+    def test_public_key_is_loaded(self):
+        self.client.handle_webhook("body", self._headers, "method", "path")
+        self._transport.load_public_key_for_jwt.assert_awaited_once_with(
+            "jwt")
@@ -0,0 +1,137 @@
+import asyncio
+import unittest
+
+import httpx
+from mock import MagicMock, patch
+
+from launchkey import LAUNCHKEY_PRODUCTION
+from launchkey.transports import AsyncHTTPTransport
+from launchkey.transports.base import APIResponse, APIErrorResponse
+
+
+def async_return(value):
+    async def _coroutine(*args, **kwargs):
+        return value
+    return MagicMock(side_effect=_coroutine)
+
+
+class TestAsyncHTTPTransportParseResponse(unittest.TestCase):
+
+    def setUp(self):
+        self._transport = AsyncHTTPTransport()
+
+    def test_parse_response_json_success(self):
+        response = httpx.Response(200, json={"a": "b"}, headers={"X-Test": "1"})
+        parsed = self._transport._parse_response(response)
+        self.assertIsInstance(parsed, APIResponse)
+        self.assertNotIsInstance(parsed, APIErrorResponse)
+        self.assertEqual({"a": "b"}, parsed.data)
+        self.assertEqual("1", parsed.headers["x-test"])
+        self.assertEqual(200, parsed.status_code)
+
+    def test_parse_response_text_success(self):
+        response = httpx.Response(200, text="not json")
+        parsed = self._transport._parse_response(response)
+        self.assertEqual("not json", parsed.data)
+
+    def test_parse_response_400_failure(self):
+        response = httpx.Response(400, json={"error": "x"})
+        parsed = self._transport._parse_response(response)
+        self.assertIsInstance(parsed, APIErrorResponse)
+        self.assertEqual(400, parsed.status_code)
+        self.assertEqual("Bad Request", parsed.reason)
+
+    def test_parse_response_500_failure(self):
+        response = httpx.Response(
+            500, request=httpx.Request("GET", LAUNCHKEY_PRODUCTION))
+        with self.assertRaises(httpx.HTTPStatusError):
+            self._transport._parse_response(response)
+
+
+class TestAsyncHTTPTransport(unittest.TestCase):
+
+    def setUp(self):
+        self._transport = AsyncHTTPTransport()
+        self._client = MagicMock()
+        self._client.request = async_return(httpx.Response(200, json={}))
+        self._transport._client = self._client
+
+    def test_defaults(self):
+        transport = AsyncHTTPTransport()
+        self.assertEqual(LAUNCHKEY_PRODUCTION, transport.url)
+        self.assertFalse(transport.testing)
+        self.assertTrue(transport.verify_ssl)
+        self.assertFalse(transport.allow_redirects)
+
+    def test_set_url(self):
+        self._client.aclose = async_return(None)
+        self._transport.set_url("https://api.example.com", True)
+        self.assertEqual("https://api.example.com", self._transport.url)
+        self.assertTrue(self._transport.testing)
+        self.assertFalse(self._transport.verify_ssl)
+        self.assertIsNone(self._transport._client)
+        self._client.aclose.assert_called_once_with()
+
+    def test_set_url_closes_client_on_running_loop(self):
+        self._client.aclose = async_return(None)
+
+        async def _test():
+            self._transport.set_url("https://api.example.com", True)
+            self.assertIsNone(self._transport._client)
+            await asyncio.sleep(0)
+        asyncio.run(_test())
+        self._client.aclose.assert_called_once_with()
+        self.assertEqual(set(), self._transport._closing)
+
+    @patch("launchkey.transports.async_http.httpx.AsyncClient")
+    def test_client_created_with_settings(self, client_patch):
+        transport = AsyncHTTPTransport(max_connections=5,
+                                       max_keepalive_connections=2)
+        transport.set_url(LAUNCHKEY_PRODUCTION, True)
+        self.assertEqual(client_patch.return_value, transport._get_client())
+        self.assertEqual(client_patch.return_value, transport._get_client())
+        client_patch.assert_called_once()
+        kwargs = client_patch.call_args[1]
+        self.assertFalse(kwargs["verify"])
+        self.assertFalse(kwargs["follow_redirects"])
+        self.assertEqual(5, kwargs["limits"].max_connections)
+        self.assertEqual(2, kwargs["limits"].max_keepalive_connections)
+
+    def test_get_sends_params(self):
+        asyncio.run(self._transport.get("/path", {"h": "v"}, {"a": "b"}))
+        self._client.request.assert_called_once_with(
+            "GET", LAUNCHKEY_PRODUCTION + "/path", headers={"h": "v"},
+            params={"a": "b"})
+
+    def test_post_sends_string_body_as_content(self):
+        asyncio.run(self._transport.post("/path", None, "body"))
+        self._client.request.assert_called_once_with(
+            "POST", LAUNCHKEY_PRODUCTION + "/path", headers=None,
+            content="body")
+
+    def test_put_sends_dict_body_as_data(self):
+        asyncio.run(self._transport.put("/path", None, {"a": "b"}))
+        self._client.request.assert_called_once_with(
+            "PUT", LAUNCHKEY_PRODUCTION + "/path", headers=None,
+            data={"a": "b"})
+
+    def test_delete(self):
+        asyncio.run(self._transport.delete("/path", None, "body"))
+        self._client.request.assert_called_once_with(
+            "DELETE", LAUNCHKEY_PRODUCTION + "/path", headers=None,
+            content="body")
+
+    def test_patch_without_body(self):
+        asyncio.run(self._transport.patch("/path"))
+        self._client.request.assert_called_once_with(
+            "PATCH", LAUNCHKEY_PRODUCTION + "/path", headers=None)
+
+    def test_request_returns_parsed_response(self):
+        response = asyncio.run(self._transport.get("/path"))
+        self.assertIsInstance(response, APIResponse)
+
+    def test_aclose_closes_client(self):
+        self._client.aclose = async_return(None)
+        asyncio.run(self._transport.aclose())
+        self._client.aclose.assert_called_once()
+        self.assertIsNone(self._transport._client)
@@ -0,0 +1,255 @@
+import asyncio
+import unittest
+from time import time
+
+from mock import MagicMock, ANY
+
+from launchkey.exceptions import UnexpectedAPIResponse
+from launchkey.transports import AsyncJOSETransport, AsyncHTTPTransport
+from launchkey.transports.base import APIResponse
+from launchkey.transports.timing import NULL_TIMING
+
+from .test_jose_auth_transport import valid_public_key, faux_kid, \
+    transport_request_headers, DictSharedCache
+
+
+def async_return(value):
+    async def _coroutine(*args, **kwargs):
+        await asyncio.sleep(0)
+        return value
+    return MagicMock(side_effect=_coroutine)
+
+
+class TestAsyncJOSETransport(unittest.TestCase):
+
+    def setUp(self):
+        self._http_client = MagicMock()
+        self._transport = AsyncJOSETransport(http_client=self._http_client)
+
+    def test_default_http_client(self):
+        self.assertIsInstance(AsyncJOSETransport()._http_client,
+                              AsyncHTTPTransport)
+
+    def test_refresh_server_time_difference_fetches_ping(self):
+        self._http_client.get = async_return(
+            APIResponse({"api_time": "2017-01-01T00:00:00Z"}, {}, 200))
+        difference = asyncio.run(
+            self._transport.refresh_server_time_difference())
+        self._http_client.get.assert_called_once_with("/public/v3/ping",
+                                                      data={})
+        self.assertEqual(difference, self._transport.server_time_difference)
+
+    def test_refresh_server_time_difference_uses_cache(self):
+        self._transport._server_time_difference = 10, int(time())
+        self._http_client.get = async_return(None)
+        self.assertEqual(10, asyncio.run(
+            self._transport.refresh_server_time_difference()))
+        self._http_client.get.assert_not_called()
+
+    def test_concurrent_refreshes_share_one_request(self):
+        self._http_client.get = async_return(
+            APIResponse({"api_time": "2017-01-01T00:00:00Z"}, {}, 200))
+
+        async def refresh_many():
+            await asyncio.gather(
+                *[self._transport.refresh_server_time_difference()
+                  for _ in range(10)])
+
+        asyncio.run(refresh_many())
+        self._http_client.get.assert_called_once()
+
+    def test_refresh_server_time_difference_invalid_response(self):
+        self._http_client.get = async_return(APIResponse({}, {}, 200))
+        with self.assertRaises(UnexpectedAPIResponse):
+            asyncio.run(self._transport.refresh_server_time_difference())
+
+    def test_refresh_active_encryption_kid(self):
+        self._http_client.get = async_return(
+            APIResponse(valid_public_key, transport_request_headers, 200))
+        kid = asyncio.run(self._transport.refresh_active_encryption_kid())
+        self._http_client.get.assert_called_once_with(
+            "/public/v3/public-key", data={})
+        self.assertEqual(faux_kid, kid)
+        self.assertEqual(faux_kid,
+                         self._transport.update_and_return_active_encryption_kid())
+        self.assertIn(faux_kid, self._transport._public_key_cache)
+
+    def test_load_public_key_fetches_missing_key(self):
+        self._http_client.get = async_return(
+            APIResponse(valid_public_key, transport_request_headers, 200))
+        key = asyncio.run(self._transport.load_public_key(faux_kid))
+        self._http_client.get.assert_called_once_with(
+            "/public/v3/public-key/%s" % faux_kid, data={})
+        self.assertEqual(key, self._transport._find_key_by_kid(faux_kid))
+
+    def test_load_public_key_uses_cache(self):
+        self._transport._public_key_cache[faux_kid] = "key"
+        self._http_client.get = async_return(None)
+        self.assertEqual("key", asyncio.run(
+            self._transport.load_public_key(faux_kid)))
+        self._http_client.get.assert_not_called()
+
+    def test_load_public_key_not_found(self):
+        self._http_client.get = async_return(APIResponse(None, {}, 404))
+        with self.assertRaises(UnexpectedAPIResponse):
+            asyncio.run(self._transport.load_public_key(faux_kid))
+
+    def test_load_public_key_not_found_is_remembered(self):
+        self._http_client.get = async_return(APIResponse(None, {}, 404))
+        for _ in range(3):
+            with self.assertRaises(UnexpectedAPIResponse):
+                asyncio.run(self._transport.load_public_key(faux_kid))
+        self._http_client.get.assert_called_once()
+
+    def test_concurrent_loads_share_one_request(self):
+        self._http_client.get = async_return(
+            APIResponse(valid_public_key, transport_request_headers, 200))
+
+        async def load_many():
+            return await asyncio.gather(
+                *[self._transport.load_public_key(faux_kid)
+                  for _ in range(10)])
+
+        keys = asyncio.run(load_many())
+        self._http_client.get.assert_called_once_with(
+            "/public/v3/public-key/%s" % faux_kid, data={})
+        self.assertEqual(1, len({id(key) for key in keys}))
+        self.assertEqual({}, self._transport._public_key_fetch_locks)
+
+    def test_concurrent_loads_of_missing_key_share_one_request(self):
+        self._http_client.get = async_return(APIResponse(None, {}, 404))
+
+        async def load_many():
+            return await asyncio.gather(
+                *[self._transport.load_public_key(faux_kid)
+                  for _ in range(10)], return_exceptions=True)
+
+        for result in asyncio.run(load_many()):
+            self.assertIsInstance(result, UnexpectedAPIResponse)
+        self._http_client.get.assert_called_once()
+
+    def test_load_public_key_for_jwt_ignores_malformed_jwt(self):
+        self._http_client.get = async_return(None)
+        asyncio.run(self._transport.load_public_key_for_jwt("invalid"))
+        asyncio.run(self._transport.load_public_key_for_jwt(None))
+        self._http_client.get.assert_not_called()
+
+    def test_find_key_by_kid_never_fetches(self):
+        self._http_client.get = MagicMock()
+        with self.assertRaises(UnexpectedAPIResponse):
+            self._transport._find_key_by_kid(faux_kid)
+        self._http_client.get.assert_not_called()
+
+    def test_get_without_subject_calls_http_client(self):
+        self._http_client.get = async_return("response")
+        self.assertEqual("response", asyncio.run(
+            self._transport.get("/path", a="b")))
+        self._http_client.get.assert_called_once_with("/path",
+                                                      data={"a": "b"})
+
+
+class TestAsyncJOSETransportSharedCache(unittest.TestCase):
+
+    def setUp(self):
+        self._http_client = MagicMock()
+        self._shared_cache = DictSharedCache()
+        self._transport = AsyncJOSETransport(http_client=self._http_client,
+                                             shared_cache=self._shared_cache)
+
+    def test_refresh_server_time_difference_uses_shared_cache(self):
+        self._shared_cache.values["server-time-difference"] = [
+            42, int(time())]
+        self._http_client.get = async_return(None)
+        self.assertEqual(42, asyncio.run(
+            self._transport.refresh_server_time_difference()))
+        self._http_client.get.assert_not_called()
+
+    def test_refresh_server_time_difference_shares_result(self):
+        self._http_client.get = async_return(
+            APIResponse({"api_time": "2017-01-01T00:00:00Z"}, {}, 200))
+        asyncio.run(self._transport.refresh_server_time_difference())
+        self.assertIn("server-time-difference", self._shared_cache.values)
+
+    def test_refresh_active_encryption_kid_uses_shared_cache(self):
+        self._shared_cache.values["current-kid"] = [
+            faux_kid, valid_public_key, int(time())]
+        self._http_client.get = async_return(None)
+        self.assertEqual(faux_kid, asyncio.run(
+            self._transport.refresh_active_encryption_kid()))
+        self._http_client.get.assert_not_called()
+
+    def test_refresh_active_encryption_kid_shares_result(self):
+        self._http_client.get = async_return(
+            APIResponse(valid_public_key, transport_request_headers, 200))
+        asyncio.run(self._transport.refresh_active_encryption_kid())
+        self.assertEqual(faux_kid,
+                         self._shared_cache.values["current-kid"][0])
+
+    def test_load_public_key_uses_shared_cache(self):
+        self._shared_cache.values["public-key:" + faux_kid] = valid_public_key
+        self._http_client.get = async_return(None)
+        asyncio.run(self._transport.load_public_key(faux_kid))
+        self._http_client.get.assert_not_called()
+        self.assertIn(faux_kid, self._transport._public_key_cache)
+
+    def test_load_public_key_shares_result(self):
+        self._http_client.get = async_return(
+            APIResponse(valid_public_key, transport_request_headers, 200))
+        asyncio.run(self._transport.load_public_key(faux_kid))
+        self.assertEqual(valid_public_key,
+                         self._shared_cache.values["public-key:" + faux_kid])
+
+
+class TestAsyncJOSETransportProcessJOSERequest(unittest.TestCase):
+
+    def setUp(self):
+        self._http_client = MagicMock()
+        self._transport = AsyncJOSETransport(http_client=self._http_client)
+        self._transport.refresh_server_time_difference = async_return(0)
+        self._transport.refresh_active_encryption_kid = async_return(faux_kid)
+        self._transport.load_public_key_for_jwt = async_return(None)
+        self._transport._build_jose_request = MagicMock(
+            return_value=({"Authorization": "IOV-JWT x"}, "body"))
+        self._transport._process_jose_response = MagicMock()
+        self._response = APIResponse("data", {"X-IOV-JWT": "jwt"}, 200)
+        for method in ("get", "post", "put", "delete", "patch"):
+            setattr(self._http_client, method, async_return(self._response))
+
+    def test_get_with_subject(self):
+        result = asyncio.run(self._transport.get("/path", "svc:id"))
+        self._http_client.get.assert_called_once_with(
+            "/path", data="body", headers={"Authorization": "IOV-JWT x"})
+        self._transport._process_jose_response.assert_called_once_with(
+            self._response, ANY, "svc:id", NULL_TIMING)
+        self.assertEqual(self._transport._process_jose_response.return_value,
+                         result)
+        self._transport.refresh_server_time_difference.assert_called_once()
+        self._transport.refresh_active_encryption_kid.assert_not_called()
+
+    def test_post_refreshes_encryption_kid(self):
+        asyncio.run(self._transport.post("/path", "svc:id", a="b"))
+        self._transport._build_jose_request.assert_called_once_with(
+            "post", "/path", "svc:id", ANY, {"a": "b"}, NULL_TIMING)
+        self._transport.refresh_active_encryption_kid.assert_called_once()
+        self._http_client.post.assert_called_once()
+
+    def test_put(self):
+        asyncio.run(self._transport.put("/path", "svc:id", a="b"))
+        self._http_client.put.assert_called_once()
+
+    def test_delete(self):
+        asyncio.run(self._transport.delete("/path", "svc:id", a="b"))
+        self._http_client.delete.assert_called_once()
+
+    def test_patch(self):
+        asyncio.run(self._transport.patch("/path", "svc:id", a="b"))
+        self._http_client.patch.assert_called_once()
+
+    def test_response_signing_key_is_loaded(self):
+        asyncio.run(self._transport.get("/path", "svc:id"))
+        self._transport.load_public_key_for_jwt.assert_called_once_with("jwt")
+
+    def test_401_response_signing_key_is_not_loaded(self):
+        self._response.status_code = 401
+        asyncio.run(self._transport.get("/path", "svc:id"))
+        self._transport.load_public_key_for_jwt.assert_not_called()
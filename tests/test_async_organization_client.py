@@ -0,0 +1,34 @@
+from uuid import uuid4
+
+from launchkey.clients import AsyncOrganizationClient
+from launchkey.transports.base import APIResponse
+from .shared import SharedTests, AsyncClientProxy, make_async_transport
+from .test_organization_client import TestOrganizationClientDirectories
+
+
+class TestAsyncOrganizationClient(SharedTests.Services):
+
+    def setUp(self):
+        self._organization_id = uuid4()
+        client = AsyncClientProxy(AsyncOrganizationClient(
+            self._organization_id, make_async_transport()))
+        self._expected_base_endpoint = '/organization/v3/services'
+        self._expected_subject = 'org:{}'.format(str(self._organization_id))
+        self.setup_client(client)
+
+
+class TestAsyncOrganizationClientDirectories(
+        TestOrganizationClientDirectories):
+
+    def setUp(self):
+        self._transport = make_async_transport()
+        self._response = APIResponse({}, {}, 200)
+        self._transport.post.return_value = self._response
+        self._transport.get.return_value = self._response
+        self._transport.put.return_value = self._response
+        self._transport.delete.return_value = self._response
+        self._transport.patch.return_value = self._response
+        self._organization_id = uuid4()
+        self._expected_subject = 'org:{}'.format(str(self._organization_id))
+        self._organization_client = AsyncClientProxy(AsyncOrganizationClient(
+            self._organization_id, self._transport))
@@ -0,0 +1,73 @@
+import asyncio
+import unittest
+from json import dumps
+from unittest.mock import AsyncMock
+from uuid import uuid4
+
+from mock import MagicMock, patch
+
+from launchkey.clients import AsyncServiceClient
+from launchkey.clients.service import AuthPolicy
+from launchkey.entities.service import AuthorizationRequest
+from launchkey.transports.base import APIResponse
+from .shared import AsyncClientProxy, make_async_transport
+from .test_service_client import TestServiceClient
+
+
+class TestAsyncServiceClient(TestServiceClient):
+
+    def setUp(self):
+        self._transport = make_async_transport()
+        self._response = APIResponse({}, {}, 200)
+        self._transport.post.return_value = self._response
+        self._transport.get.return_value = self._response
+        self._transport.put.return_value = self._response
+        self._transport.delete.return_value = self._response
+        self._device_response = {"auth_request": str(uuid4()), "response": True, "device_id": str(uuid4()),
+                                 "service_pins": ["1234", "3456", "5678"]}
+        self._transport.loaded_issuer_private_key.decrypt.return_value = dumps(self._device_response)
+        self._service_id = uuid4()
+        self._issuer = "svc:{}".format(self._service_id)
+        self._service_client = AsyncClientProxy(
+            AsyncServiceClient(self._service_id, self._transport))
+        self._service_client._transport._verify_jwt_response = MagicMock()
+
+    def test_authorize_calls_authorization_request(self):
+        policy = AuthPolicy()
+        auth_response = AuthorizationRequest(str(uuid4()), None)
+        authorization_request = AsyncMock(return_value=auth_response)
+        self._service_client.authorization_request = authorization_request
+        self._service_client.authorize('user', 'context', policy, 'title', 30,
+                                       'push_title', 'push_body')
+        authorization_request.assert_called_once_with(
+            'user', 'context', policy, 'title', 30, 'push_title', 'push_body')
+
+
+class TestAsyncServiceClientHandleWebhook(unittest.TestCase):
+
+    def setUp(self):
+        patcher = patch("launchkey.clients.service.XiovJWTService")
+        self._x_iov_jwt_service_patch = patcher.start().return_value
+        self.addCleanup(patcher.stop)
+        self._x_iov_jwt_service_patch.decrypt_jwe.return_value = \
+            '{"auth_request": "%s", "auth": null}' % uuid4()
+        self._transport = make_async_transport()
+        self._service_client = AsyncServiceClient(uuid4(), self._transport)
+        self._headers = {"X-IOV-JWT": "jwt", "Other Header": "value"}
+        patcher = patch("launchkey.clients.service.AdvancedAuthorizationResponse")
+        self._auth_response_patch = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_handle_advanced_webhook_loads_public_key_before_verifying(self):
+        def verify(*args, **kwargs):
+            self._transport.load_public_key_for_jwt.assert_awaited_once_with("jwt")
+            return self._x_iov_jwt_service_patch.decrypt_jwe.return_value
+        self._x_iov_jwt_service_patch.decrypt_jwe.side_effect = verify
+        result = asyncio.run(self._service_client.handle_advanced_webhook(
+            "body", self._headers, "POST", "/webhook"))
+        self.assertEqual(self._auth_response_patch.return_value, result)
+
+    def test_handle_advanced_webhook_without_jwt_header(self):
+        asyncio.run(self._service_client.handle_advanced_webhook(
+            "body", {}, "POST", "/webhook"))
+        self._transport.load_public_key_for_jwt.assert_awaited_once_with(None)
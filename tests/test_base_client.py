@@ -1,10 +1,11 @@
+import asyncio
 import unittest
 from mock import MagicMock, ANY, patch
 from uuid import uuid4
 from formencode import Schema, Invalid
 
-from launchkey.clients.base import api_call, ERROR_CODE_MAP, STATUS_CODE_MAP, \
-    BaseClient
+from launchkey.clients.base import api_call, async_api_call, ERROR_CODE_MAP, \
+    STATUS_CODE_MAP, BaseClient
 from launchkey.exceptions import LaunchKeyAPIException, InvalidEntityID, \
     UnexpectedAPIResponse
 from launchkey.transports.base import APIResponse
@@ -65,6 +66,48 @@ class TestAPICallDecorator(unittest.TestCase):
             api_call(self._failure_method)()
 
 
+class TestAsyncAPICallDecorator(unittest.TestCase):
+
+    def setUp(self):
+        patch("launchkey.exceptions.warnings").start()
+        self.addCleanup(patch.stopall)
+
+    @staticmethod
+    def _coroutine_function(result=None, error=None):
+        async def function_():
+            if error is not None:
+                raise error
+            return result
+        return function_
+
+    def test_success(self):
+        result = asyncio.run(async_api_call(self._coroutine_function("result"))())
+        self.assertEqual("result", result)
+
+    def test_error_code_map(self):
+        for code, exception in ERROR_CODE_MAP.items():
+            function_ = self._coroutine_function(error=LaunchKeyAPIException(
+                {"error_code": code, "error_detail": {"error": "details"},
+                 "error_data": {"error": "data"}}, 400
+            ))
+            with self.assertRaises(exception) as raised:
+                asyncio.run(async_api_call(function_)())
+            self.assertEqual(raised.exception.message, {"error": "details"})
+            self.assertEqual(raised.exception.data, {"error": "data"})
+
+    def test_status_code_map(self):
+        for code, exception in STATUS_CODE_MAP.items():
+            function_ = self._coroutine_function(
+                error=LaunchKeyAPIException({}, code))
+            with self.assertRaises(exception):
+                asyncio.run(async_api_call(function_)())
+
+    def test_unexpected_error(self):
+        function_ = self._coroutine_function(error=LaunchKeyAPIException())
+        with self.assertRaises(LaunchKeyAPIException):
+            asyncio.run(async_api_call(function_)())
+
+
 class TestBaseClient(unittest.TestCase):
 
     def test_success(self):
@@ -0,0 +1,294 @@
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import unittest
+from concurrent.futures import Future
+from uuid import uuid4
+
+from mock import MagicMock, patch
+
+from launchkey.clients import ServiceClient, ResponseBroker, \
+    InProcessResponseBroker, SQLiteResponseBroker
+from launchkey.entities.service import AdvancedAuthorizationResponse, \
+    SessionEndRequest
+from launchkey.exceptions import UnexpectedDeviceResponse
+from launchkey.transports.base import APIResponse
+
+
+def _response(authorization_request_id, service_user_hash="user-hash"):
+    return MagicMock(spec=AdvancedAuthorizationResponse,
+                     authorization_request_id=authorization_request_id,
+                     service_user_hash=service_user_hash,
+                     data={"auth_request": authorization_request_id})
+
+
+class TestResponseBroker(unittest.TestCase):
+
+    def test_not_implemented(self):
+        with self.assertRaises(NotImplementedError):
+            ResponseBroker().publish(_response("auth-id"))
+        with self.assertRaises(NotImplementedError):
+            ResponseBroker().subscribe(MagicMock(), "auth-id")
+        self.assertIsNone(ResponseBroker().close())
+
+
+@patch("launchkey.clients.broker.monotonic")
+class TestInProcessResponseBroker(unittest.TestCase):
+
+    def setUp(self):
+        self._broker = InProcessResponseBroker(retention=60.0,
+                                               max_messages=2)
+        self._callback = MagicMock()
+
+    def test_subscribe_by_authorization_request_id(self, monotonic_patch):
+        monotonic_patch.return_value = 0.0
+        self._broker.subscribe(self._callback,
+                               authorization_request_id="auth-id")
+        self._broker.publish(_response("other-id"))
+        response = _response("auth-id")
+        self._broker.publish(response)
+        self._callback.assert_called_once_with(response)
+
+    def test_subscribe_by_service_user_hash(self, monotonic_patch):
+        monotonic_patch.return_value = 0.0
+        self._broker.subscribe(self._callback, service_user_hash="user-hash")
+        response = _response("auth-id")
+        session_end = SessionEndRequest("user-hash", 100)
+        self._broker.publish(response)
+        self._broker.publish(session_end)
+        self._broker.publish(SessionEndRequest("other-hash", 100))
+        self.assertEqual([((response,),), ((session_end,),)],
+                         self._callback.call_args_list)
+
+    def test_matching_both_keys_is_delivered_once(self, monotonic_patch):
+        monotonic_patch.return_value = 0.0
+        self._broker.subscribe(self._callback, "auth-id", "user-hash")
+        self._broker.publish(_response("auth-id"))
+        self._callback.assert_called_once()
+
+    def test_late_subscriber_receives_retained(self, monotonic_patch):
+        monotonic_patch.return_value = 0.0
+        response = _response("auth-id")
+        self._broker.publish(response)
+        monotonic_patch.return_value = 59.0
+        self._broker.subscribe(self._callback,
+                               authorization_request_id="auth-id")
+        self._callback.assert_called_once_with(response)
+
+    def test_retention_is_bounded_by_time(self, monotonic_patch):
+        monotonic_patch.return_value = 0.0
+        self._broker.publish(_response("auth-id"))
+        monotonic_patch.return_value = 60.0
+        self._broker.subscribe(self._callback,
+                               authorization_request_id="auth-id")
+        self._callback.assert_not_called()
+
+    def test_retention_is_bounded_by_count(self, monotonic_patch):
+        monotonic_patch.return_value = 0.0
+        for auth_id in ("a", "b", "c"):
+            self._broker.publish(_response(auth_id))
+        self._broker.subscribe(self._callback, authorization_request_id="a")
+        self._callback.assert_not_called()
+
+    def test_closed_subscription(self, monotonic_patch):
+        monotonic_patch.return_value = 0.0
+        subscription = self._broker.subscribe(
+            self._callback, authorization_request_id="auth-id")
+        subscription.close()
+        subscription.close()
+        self._broker.publish(_response("auth-id"))
+        self._callback.assert_not_called()
+
+    def test_failing_subscriber_does_not_stop_delivery(self, monotonic_patch):
+        monotonic_patch.return_value = 0.0
+        self._broker.subscribe(MagicMock(side_effect=ValueError),
+                               authorization_request_id="auth-id")
+        self._broker.subscribe(self._callback,
+                               authorization_request_id="auth-id")
+        response = _response("auth-id")
+        with self.assertLogs("launchkey.clients.broker", "ERROR"):
+            self._broker.publish(response)
+        self._callback.assert_called_once_with(response)
+
+    def test_subscription_requires_a_key(self, _):
+        with self.assertRaises(ValueError):
+            self._broker.subscribe(self._callback)
+
+
+class TestSQLiteResponseBroker(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self._path = os.path.join(directory, "webhooks.sqlite")
+        self._transport = MagicMock()
+        self._publisher = self._broker()
+        self._subscriber = self._broker()
+        self._callback = MagicMock()
+
+    def _broker(self, **kwargs):
+        broker = SQLiteResponseBroker(self._path, self._transport,
+                                      poll_interval=60.0, **kwargs)
+        self.addCleanup(broker.close)
+        return broker
+
+    @patch("launchkey.clients.broker.AdvancedAuthorizationResponse")
+    def test_publish_to_another_broker(self, response_patch):
+        self._subscriber.subscribe(self._callback,
+                                   authorization_request_id="auth-id")
+        self._publisher.publish(_response("other-id"))
+        self._publisher.publish(_response("auth-id"))
+        self.assertEqual(1, self._subscriber.poll())
+        response_patch.assert_called_once_with({"auth_request": "auth-id"},
+                                               self._transport)
+        self._callback.assert_called_once_with(response_patch.return_value)
+        self.assertEqual(0, self._subscriber.poll())
+
+    def test_session_end(self):
+        self._subscriber.subscribe(self._callback,
+                                   service_user_hash="user-hash")
+        self._publisher.publish(SessionEndRequest("user-hash", 1234))
+        self._subscriber.poll()
+        session_end = self._callback.call_args[0][0]
+        self.assertIsInstance(session_end, SessionEndRequest)
+        self.assertEqual("user-hash", session_end.service_user_hash)
+        self.assertEqual(1234, session_end.logout_requested)
+
+    @patch("launchkey.clients.broker.AdvancedAuthorizationResponse")
+    def test_late_subscriber_receives_retained(self, response_patch):
+        self._publisher.publish(_response("auth-id"))
+        subscriber = self._broker()
+        subscriber.subscribe(self._callback,
+                             authorization_request_id="auth-id")
+        self._callback.assert_called_once_with(response_patch.return_value)
+        self.assertEqual(0, subscriber.poll())
+
+    def test_result_polled_while_subscribing_is_delivered_once(self):
+        self._publisher.publish(SessionEndRequest("a", 1))
+        subscriptions = self._subscriber._subscriptions
+        add = subscriptions.add
+        poller = threading.Thread(target=self._subscriber.poll)
+
+        def add_then_poll(*args):
+            subscription = add(*args)
+            poller.start()
+            poller.join(0.1)
+            return subscription
+        with patch.object(subscriptions, "add", side_effect=add_then_poll):
+            self._subscriber.subscribe(self._callback, service_user_hash="a")
+        poller.join(5)
+        self._callback.assert_called_once()
+
+    def test_retention_is_bounded_by_count(self):
+        publisher = self._broker(max_messages=2)
+        for hash_ in ("a", "b", "c"):
+            publisher.publish(SessionEndRequest(hash_, 1))
+        self._broker().subscribe(self._callback, service_user_hash="a")
+        self._callback.assert_not_called()
+
+    @patch("launchkey.clients.broker.time")
+    def test_retention_is_bounded_by_time(self, time_patch):
+        time_patch.return_value = 1000.0
+        publisher = self._broker(retention=60.0)
+        publisher.publish(SessionEndRequest("a", 1))
+        time_patch.return_value = 1060.0
+        publisher.publish(SessionEndRequest("b", 1))
+        self._broker(retention=60.0).subscribe(self._callback,
+                                               service_user_hash="a")
+        self._callback.assert_not_called()
+
+    @patch("launchkey.clients.broker.AdvancedAuthorizationResponse")
+    def test_undecodable_response_is_skipped(self, response_patch):
+        response_patch.side_effect = UnexpectedDeviceResponse()
+        self._subscriber.subscribe(self._callback,
+                                   authorization_request_id="auth-id")
+        self._publisher.publish(_response("auth-id"))
+        self._subscriber.poll()
+        self._callback.assert_not_called()
+
+    def test_undecodable_payload_is_logged_and_skipped(self):
+        self._subscriber.subscribe(self._callback, service_user_hash="a")
+        self._publisher.publish(SessionEndRequest("a", 1))
+        self._publisher.publish(SessionEndRequest("a", 2))
+        self._subscriber._decode = MagicMock(
+            side_effect=[ValueError(), SessionEndRequest("a", 2)])
+        with self.assertLogs("launchkey.clients.broker", "ERROR"):
+            self.assertEqual(2, self._subscriber.poll())
+        self._callback.assert_called_once()
+        self.assertEqual(2, self._callback.call_args[0][0].logout_requested)
+
+    def test_listener_thread_survives_poll_errors(self):
+        subscriber = self._broker()
+        subscriber.poll_interval = 0.01
+        polled = threading.Event()
+        errors = [sqlite3.OperationalError("database is locked")]
+
+        def poll():
+            if errors:
+                raise errors.pop()
+            polled.set()
+            return 0
+        subscriber.poll = MagicMock(side_effect=poll)
+        with self.assertLogs("launchkey.clients.broker", "ERROR"):
+            subscriber.subscribe(self._callback, service_user_hash="a")
+            self.assertTrue(polled.wait(5))
+
+    def test_listener_thread_polls(self):
+        subscriber = SQLiteResponseBroker(self._path, self._transport,
+                                          poll_interval=0.01)
+        future = Future()
+        subscriber.subscribe(future.set_result, service_user_hash="a")
+        self._publisher.publish(SessionEndRequest("a", 1))
+        self.assertEqual("a", future.result(5).service_user_hash)
+        subscriber.close()
+
+
+class TestServiceClientBroker(unittest.TestCase):
+
+    def setUp(self):
+        transport = MagicMock()
+        transport.post.return_value = APIResponse(
+            {"auth_request": "auth-id", "push_package": "package"}, {}, 201)
+        self._client = ServiceClient(uuid4(), transport)
+        self._broker = InProcessResponseBroker()
+        poller = MagicMock()
+        poller.submit.side_effect = lambda *args, **kwargs: Future()
+        self._client.enable_webhook_waiters(poller=poller,
+                                            broker=self._broker)
+
+    def test_waiter_resolved_through_broker(self):
+        auth = self._client.authorization_request("user")
+        response = _response("auth-id")
+        self._broker.publish(response)
+        self.assertEqual(response, auth.response_future.result(0))
+
+    @patch("launchkey.clients.service.AdvancedAuthorizationResponse")
+    def test_webhook_is_published(self, response_patch):
+        callback = MagicMock()
+        self._broker.subscribe(callback, authorization_request_id="auth-id")
+        response_patch.return_value.authorization_request_id = "auth-id"
+        self._client.x_iov_jwt_service = MagicMock()
+        self._client.x_iov_jwt_service.decrypt_jwe.return_value = "{}"
+        self._client.handle_advanced_webhook("body", {}, "POST", "/webhook")
+        callback.assert_called_once_with(response_patch.return_value)
+
+    @patch("launchkey.clients.service.AdvancedAuthorizationResponse")
+    def test_publish_failure_resolves_local_waiter(self, response_patch):
+        auth = self._client.authorization_request("user")
+        response_patch.return_value.authorization_request_id = "auth-id"
+        self._broker.publish = MagicMock(
+            side_effect=sqlite3.OperationalError("database is locked"))
+        self._client.x_iov_jwt_service = MagicMock()
+        self._client.x_iov_jwt_service.decrypt_jwe.return_value = "{}"
+        with self.assertLogs("launchkey.clients.service", "ERROR"):
+            result = self._client.handle_advanced_webhook(
+                "body", {}, "POST", "/webhook")
+        self.assertEqual(response_patch.return_value, result)
+        self.assertEqual(result, auth.response_future.result(0))
+
+    def test_subscription_closed_when_done(self):
+        auth = self._client.authorization_request("user")
+        auth.response_future.cancel()
+        self.assertEqual(0, len(self._broker._subscriptions))
@@ -0,0 +1,184 @@
+import asyncio
+import unittest
+
+import httpx
+import requests
+from mock import MagicMock, patch
+
+from launchkey.exceptions import CircuitBreakerOpen
+from launchkey.transports import CircuitBreaker, RequestsTransport, \
+    AsyncHTTPTransport, HTTP2Transport
+from launchkey.transports.circuit_breaker import STATE_CLOSED, STATE_OPEN, \
+    STATE_HALF_OPEN
+
+from .test_async_jose_auth_transport import async_return
+
+
+@patch("launchkey.transports.circuit_breaker.monotonic")
+class TestCircuitBreaker(unittest.TestCase):
+
+    def setUp(self):
+        self._breaker = CircuitBreaker(failure_rate=0.5, slow_call_duration=1.0,
+                                       slow_call_rate=0.5, window_size=4,
+                                       min_calls=4, reset_timeout=30.0)
+
+    def _fail(self):
+        with self.assertRaises(ValueError):
+            with self._breaker.call():
+                raise ValueError()
+
+    def _succeed(self):
+        with self._breaker.call():
+            pass
+
+    def _open(self, monotonic_patch):
+        monotonic_patch.return_value = 0.0
+        for _ in range(4):
+            self._fail()
+        self.assertEqual(STATE_OPEN, self._breaker.state)
+
+    def test_opens_on_failure_rate(self, monotonic_patch):
+        monotonic_patch.return_value = 0.0
+        self._succeed()
+        self._succeed()
+        self._fail()
+        self.assertEqual(STATE_CLOSED, self._breaker.state)
+        self._fail()
+        self.assertEqual(STATE_OPEN, self._breaker.state)
+
+    def test_failure_rate_is_of_the_recent_calls(self, monotonic_patch):
+        monotonic_patch.return_value = 0.0
+        self._fail()
+        for _ in range(4):
+            self._succeed()
+        self._fail()
+        self.assertEqual(STATE_CLOSED, self._breaker.state)
+
+    def test_opens_on_slow_calls(self, monotonic_patch):
+        monotonic_patch.return_value = 0.0
+        self._breaker.record(0.1, False)
+        self._breaker.record(0.1, False)
+        self._breaker.record(1.0, False)
+        self._breaker.record(2.0, False)
+        self.assertEqual(STATE_OPEN, self._breaker.state)
+
+    def test_latency_can_be_ignored(self, monotonic_patch):
+        monotonic_patch.return_value = 0.0
+        breaker = CircuitBreaker(slow_call_duration=None, min_calls=1)
+        breaker.record(100.0, False)
+        self.assertEqual(STATE_CLOSED, breaker.state)
+
+    def test_fails_fast_while_open(self, monotonic_patch):
+        self._open(monotonic_patch)
+        monotonic_patch.return_value = 10.0
+        call = MagicMock()
+        with self.assertRaises(CircuitBreakerOpen) as context:
+            with self._breaker.call():
+                call()
+        call.assert_not_called()
+        self.assertEqual(20.0, context.exception.data["retry_after"])
+
+    def test_half_open_allows_one_probe(self, monotonic_patch):
+        self._open(monotonic_patch)
+        monotonic_patch.return_value = 30.0
+        self.assertEqual(STATE_HALF_OPEN, self._breaker.state)
+        self._breaker.before_call()
+        with self.assertRaises(CircuitBreakerOpen):
+            self._breaker.before_call()
+
+    def test_successful_probe_closes(self, monotonic_patch):
+        self._open(monotonic_patch)
+        monotonic_patch.return_value = 30.0
+        self._succeed()
+        self.assertEqual(STATE_CLOSED, self._breaker.state)
+        self._succeed()
+        self._succeed()
+
+    def test_failed_probe_reopens(self, monotonic_patch):
+        self._open(monotonic_patch)
+        monotonic_patch.return_value = 30.0
+        self._fail()
+        self.assertEqual(STATE_OPEN, self._breaker.state)
+        self.assertEqual(30.0, self._breaker.stats["retry_after"])
+
+    def test_slow_probe_reopens(self, monotonic_patch):
+        self._open(monotonic_patch)
+        monotonic_patch.return_value = 30.0
+        self._breaker.before_call()
+        self._breaker.record(5.0, False)
+        self.assertEqual(STATE_OPEN, self._breaker.state)
+
+    def test_cancelled_probe_is_released(self, monotonic_patch):
+        self._open(monotonic_patch)
+        monotonic_patch.return_value = 30.0
+        with self.assertRaises(KeyboardInterrupt):
+            with self._breaker.call():
+                raise KeyboardInterrupt()
+        self.assertEqual(STATE_HALF_OPEN, self._breaker.state)
+        self._succeed()
+        self.assertEqual(STATE_CLOSED, self._breaker.state)
+
+    def test_stats(self, monotonic_patch):
+        monotonic_patch.return_value = 0.0
+        self._succeed()
+        self._fail()
+        self._breaker.record(3.0, False)
+        self.assertEqual({"state": STATE_CLOSED, "calls": 3,
+                          "failure_rate": 1 / 3.0, "slow_call_rate": 1 / 3.0,
+                          "retry_after": None}, self._breaker.stats)
+
+    def test_reset(self, monotonic_patch):
+        self._open(monotonic_patch)
+        self._breaker.reset()
+        self.assertEqual(STATE_CLOSED, self._breaker.state)
+        self._succeed()
+
+
+class TestHTTPTransportCircuitBreaker(unittest.TestCase):
+
+    def setUp(self):
+        self._breaker = CircuitBreaker(min_calls=1, window_size=1)
+
+    @patch("launchkey.transports.http.requests")
+    def test_requests_transport(self, requests_patch):
+        requests_patch.get.side_effect = \
+            requests.exceptions.ConnectionError()
+        requests_patch.exceptions = requests.exceptions
+        transport = RequestsTransport(circuit_breaker=self._breaker)
+        with self.assertRaises(requests.exceptions.ConnectionError):
+            transport.get("/path")
+        with self.assertRaises(CircuitBreakerOpen):
+            transport.get("/path")
+        requests_patch.get.assert_called_once()
+
+    def test_requests_transport_records_success(self):
+        transport = RequestsTransport(circuit_breaker=self._breaker)
+        transport._send = MagicMock()
+        self.assertEqual(transport._send.return_value,
+                         transport.post("/path", data="body"))
+        self.assertEqual(1, self._breaker.stats["calls"])
+        self.assertEqual(0.0, self._breaker.stats["failure_rate"])
+
+    def test_async_http_transport(self):
+        transport = AsyncHTTPTransport(circuit_breaker=self._breaker)
+        transport._client = MagicMock()
+        transport._client.request = MagicMock(
+            side_effect=httpx.ConnectError("failed"))
+        with self.assertRaises(httpx.ConnectError):
+            asyncio.run(transport.get("/path"))
+        transport._client.request = async_return(
+            httpx.Response(200, json={}))
+        with self.assertRaises(CircuitBreakerOpen):
+            asyncio.run(transport.get("/path"))
+        transport._client.request.assert_not_called()
+
+    def test_http2_transport(self):
+        transport = HTTP2Transport(circuit_breaker=self._breaker)
+        transport._client = MagicMock()
+        transport._client.request.return_value = httpx.Response(
+            503, request=httpx.Request("GET", "https://example.com/path"))
+        with self.assertRaises(httpx.HTTPStatusError):
+            transport.get("/path")
+        with self.assertRaises(CircuitBreakerOpen):
+            transport.get("/path")
+        transport._client.request.assert_called_once()
@@ -0,0 +1,60 @@
+import unittest
+
+from mock import MagicMock
+
+from launchkey.transports.clock import ClockSkewEstimator
+
+
+class TestClockSkewEstimator(unittest.TestCase):
+
+    def setUp(self):
+        self._estimator = ClockSkewEstimator(max_samples=5, max_age=100)
+
+    def test_no_samples(self):
+        self.assertIsNone(self._estimator.offset(1000))
+
+    def test_single_sample(self):
+        self.assertEqual(10, self._estimator.add_sample(990, 1000))
+        self.assertEqual(10, self._estimator.offset(1000))
+
+    def test_negative_offset_when_server_is_ahead(self):
+        self.assertEqual(-10, self._estimator.add_sample(1010, 1000))
+
+    def test_median_ignores_outliers(self):
+        for server_time in (990, 991, 900, 989, 990):
+            self._estimator.add_sample(server_time, 1000)
+        self.assertEqual(10, self._estimator.offset(1000))
+
+    def test_only_most_recent_samples_used(self):
+        for _ in range(5):
+            self._estimator.add_sample(900, 1000)
+        for _ in range(3):
+            self._estimator.add_sample(990, 1000)
+        self.assertEqual(10, self._estimator.offset(1000))
+
+    def test_old_samples_expire(self):
+        self._estimator.add_sample(990, 1000)
+        self.assertEqual(10, self._estimator.offset(1100))
+        self.assertIsNone(self._estimator.offset(1101))
+
+    def test_float_server_time_truncated(self):
+        self.assertEqual(10, self._estimator.add_sample(990.7, 1000))
+
+    def test_parse_date_header(self):
+        self.assertEqual(784111777, ClockSkewEstimator.parse_date_header(
+            {"Date": "Sun, 06 Nov 1994 08:49:37 GMT"}))
+
+    def test_parse_date_header_case_insensitive(self):
+        self.assertEqual(784111777, ClockSkewEstimator.parse_date_header(
+            {"date": "Sun, 06 Nov 1994 08:49:37 GMT"}))
+
+    def test_parse_date_header_missing(self):
+        self.assertIsNone(ClockSkewEstimator.parse_date_header({}))
+
+    def test_parse_date_header_malformed(self):
+        self.assertIsNone(ClockSkewEstimator.parse_date_header(
+            {"Date": "not a date"}))
+
+    def test_parse_date_header_invalid_headers(self):
+        self.assertIsNone(ClockSkewEstimator.parse_date_header(MagicMock()))
+        self.assertIsNone(ClockSkewEstimator.parse_date_header(None))
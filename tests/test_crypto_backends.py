@@ -0,0 +1,210 @@
+import unittest
+from base64 import b64encode
+from json import loads
+from time import time
+
+from Cryptodome.Cipher import PKCS1_OAEP
+from Cryptodome.PublicKey import RSA
+from ddt import data, ddt
+from jwkest import BadSignature
+from jwkest.jwe import DecryptionFailed
+from jwkest.jwk import RSAKey, import_rsa_key
+from jwkest.jwt import JWT
+from mock import MagicMock, patch
+
+from launchkey import JOSE_SUPPORTED_JWT_ALGS
+from launchkey.transports import JOSETransport, JWKESTBackend, \
+    CryptographyBackend
+from launchkey.transports.base import APIResponse
+
+from .test_jose_auth_transport import valid_private_key, \
+    transport_request_headers
+
+BACKENDS = (JWKESTBackend, CryptographyBackend)
+
+
+def _signing_input(jwt):
+    return jwt.b64part[0] + b"." + jwt.b64part[1]
+
+
+@ddt
+class TestCryptoBackends(unittest.TestCase):
+
+    def setUp(self):
+        self._private_key = RSAKey(key=import_rsa_key(valid_private_key),
+                                   kid="kid")
+        self._public_key = RSAKey(
+            key=import_rsa_key(valid_private_key).publickey(), kid="kid")
+        self._claims = {"iss": "lka", "jti": "jti", "nested": {"a": 1}}
+
+    @data(*JOSE_SUPPORTED_JWT_ALGS)
+    def test_signatures_are_identical_across_backends(self, alg):
+        signatures = {backend().sign_compact(self._claims, alg,
+                                             self._private_key)
+                      for backend in BACKENDS}
+        self.assertEqual(1, len(signatures))
+
+    @data(*[(signer, verifier) for signer in BACKENDS
+            for verifier in BACKENDS])
+    def test_signature_verified_across_backends(self, backends):
+        signer, verifier = backends
+        jwt = JWT().unpack(signer().sign_compact(self._claims, "RS512",
+                                                 self._private_key))
+        verifier().verify_compact(_signing_input(jwt), jwt.part[2], "RS512",
+                                  self._public_key)
+        self.assertEqual(self._claims, jwt.payload())
+
+    @data(*BACKENDS)
+    def test_invalid_signature_raises_bad_signature(self, backend):
+        jwt = JWT().unpack(backend().sign_compact(self._claims, "RS512",
+                                                  self._private_key))
+        with self.assertRaises(BadSignature):
+            backend().verify_compact(_signing_input(jwt), jwt.part[2][::-1],
+                                     "RS512", self._public_key)
+
+    @data(*[(encrypter, decrypter) for encrypter in BACKENDS
+            for decrypter in BACKENDS])
+    def test_jwe_decrypted_across_backends(self, backends):
+        encrypter, decrypter = backends
+        token = encrypter().encrypt_compact(
+            '{"tobe": "encrypted"}', "RSA-OAEP", "A256CBC-HS512",
+            self._public_key)
+        self.assertEqual(5, len(token.split(".")))
+        self.assertEqual(b'{"tobe": "encrypted"}',
+                         decrypter().decrypt_compact(token,
+                                                     [self._private_key]))
+
+    def test_jwe_with_wrong_key_raises_decryption_failed(self):
+        backend = CryptographyBackend()
+        token = backend.encrypt_compact("data", "RSA-OAEP", "A256CBC-HS512",
+                                        self._public_key)
+        other_key = RSAKey(key=RSA.generate(1024), kid="kid")
+        with self.assertRaises(DecryptionFailed):
+            backend.decrypt_compact(token, [other_key])
+
+    def test_tampered_jwe_raises_decryption_failed(self):
+        backend = CryptographyBackend()
+        parts = backend.encrypt_compact(
+            "data", "RSA-OAEP", "A256CBC-HS512", self._public_key).split(".")
+        parts[3] = parts[3][::-1]
+        with self.assertRaises(DecryptionFailed):
+            backend.decrypt_compact(".".join(parts), [self._private_key])
+
+    def test_jwe_tries_each_key(self):
+        backend = CryptographyBackend()
+        token = backend.encrypt_compact("data", "RSA-OAEP", "A256CBC-HS512",
+                                        self._public_key)
+        other_key = RSAKey(key=RSA.generate(1024), kid="kid")
+        self.assertEqual(b"data", backend.decrypt_compact(
+            token, [other_key, self._private_key]))
+
+    @data(*BACKENDS)
+    def test_rsa_oaep_decrypt(self, backend):
+        ciphertext = PKCS1_OAEP.new(RSA.importKey(valid_private_key)) \
+            .encrypt(b"secret")
+        backend = backend()
+        key = backend.load_rsa_oaep_key(self._private_key)
+        self.assertEqual(b"secret", backend.decrypt_rsa_oaep(ciphertext, key))
+
+    @patch("launchkey.transports.crypto.rsa", None)
+    def test_cryptography_backend_requires_cryptography(self):
+        with self.assertRaises(ImportError):
+            CryptographyBackend()
+
+    def test_cryptography_backend_caches_keys_per_instance(self):
+        backend = CryptographyBackend()
+        self.assertIs(backend._private_key(self._private_key),
+                      backend._private_key(self._private_key))
+        self.assertEqual(0, len(CryptographyBackend()._private_keys))
+
+    def test_cryptography_backend_forgets_keys(self):
+        backend = CryptographyBackend()
+        backend.sign_compact(self._claims, "RS512", self._private_key)
+        backend.encrypt_compact("data", "RSA-OAEP", "A256CBC-HS512",
+                                self._public_key)
+        backend.forget_key(self._private_key)
+        self.assertEqual(0, len(backend._private_keys))
+        self.assertEqual(0, len(backend._public_keys))
+
+    def test_cryptography_backend_key_cache_is_bounded(self):
+        backend = CryptographyBackend(key_cache_size=1)
+        other_key = RSAKey(key=RSA.generate(1024), kid="other")
+        backend._private_key(self._private_key)
+        backend._private_key(other_key)
+        self.assertEqual(1, len(backend._private_keys))
+
+    def test_jwkest_backend_forget_key_does_nothing(self):
+        self.assertIsNone(JWKESTBackend().forget_key(self._private_key))
+
+
+@ddt
+class TestJOSETransportCryptoBackend(unittest.TestCase):
+
+    def test_defaults_to_jwkest_backend(self):
+        self.assertIsInstance(JOSETransport()._crypto_backend, JWKESTBackend)
+
+    @data(*BACKENDS)
+    def test_encrypt_and_decrypt_rsa_response(self, backend):
+        transport = JOSETransport(http_client=MagicMock(),
+                                  crypto_backend=backend())
+        transport._http_client.get.return_value = APIResponse(
+            valid_private_key, transport_request_headers, 200)
+        transport._server_time_difference = 0, time()
+        transport.add_encryption_private_key(valid_private_key)
+
+        encrypted = transport._encrypt_request({"tobe": "encrypted"})
+        self.assertEqual({"tobe": "encrypted"},
+                         loads(transport.decrypt_response(encrypted)))
+
+        kid = transport.issuer_private_keys[0].kid
+        ciphertext = PKCS1_OAEP.new(RSA.importKey(valid_private_key)) \
+            .encrypt(b"secret")
+        self.assertEqual(b"secret", transport.decrypt_rsa_response(
+            b64encode(ciphertext), kid))
+
+    def test_removed_encryption_key_is_forgotten(self):
+        backend = MagicMock()
+        transport = JOSETransport(crypto_backend=backend)
+        transport.add_encryption_private_key(valid_private_key)
+        key = transport.issuer_private_keys[0]
+        self.assertTrue(transport.remove_encryption_private_key(key.kid))
+        backend.forget_key.assert_called_once_with(key)
+        self.assertFalse(transport.remove_encryption_private_key(key.kid))
+        backend.forget_key.assert_called_once()
+
+    @patch("launchkey.transports.key_registry.time")
+    def test_expired_encryption_key_is_forgotten(self, time_patch):
+        time_patch.return_value = 100
+        backend = MagicMock()
+        transport = JOSETransport(crypto_backend=backend)
+        transport.add_encryption_private_key(valid_private_key,
+                                             expires_at=200)
+        key = transport.issuer_private_keys[0]
+        time_patch.return_value = 200
+        self.assertEqual([], transport.issuer_private_keys)
+        backend.forget_key.assert_called_once_with(key)
+
+    def test_rotated_signing_key_is_forgotten(self):
+        backend = MagicMock()
+        transport = JOSETransport(crypto_backend=backend)
+        issuer_id = "e5a0c2de-4f8e-11e8-9c2d-fa7ae01bbebc"
+        transport.set_issuer("svc", issuer_id, valid_private_key)
+        old_key = transport.signing_key
+        backend.forget_key.assert_not_called()
+        transport.set_issuer("svc", issuer_id,
+                             RSA.generate(1024).exportKey("PEM").decode())
+        backend.forget_key.assert_called_once_with(old_key)
+
+    @data(*BACKENDS)
+    def test_signs_requests_with_backend(self, backend):
+        transport = JOSETransport(crypto_backend=backend())
+        transport._server_time_difference = 0, time()
+        transport.set_issuer("svc", "e5a0c2de-4f8e-11e8-9c2d-fa7ae01bbebc",
+                             valid_private_key)
+        signature = transport._build_jwt_signature(
+            "POST", "/path", "jti", "svc:subject")
+        jwt = JWT().unpack(signature[len("IOV-JWT "):])
+        self.assertEqual("/path", jwt.payload()["request"]["path"])
+        JWKESTBackend().verify_compact(
+            _signing_input(jwt), jwt.part[2], "RS512",
+            RSAKey(key=import_rsa_key(valid_private_key).publickey()))
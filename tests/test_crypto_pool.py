@@ -0,0 +1,275 @@
+import multiprocessing
+import threading
+import unittest
+from base64 import b64encode
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from json import loads
+from time import sleep, time
+
+from Cryptodome.Cipher import PKCS1_OAEP
+from Cryptodome.PublicKey import RSA
+from jwkest.jwe import DecryptionFailed
+from jwkest.jwk import RSAKey, import_rsa_key
+from jwkest.jwt import JWT
+from mock import MagicMock, patch
+
+from launchkey.exceptions import DeadlineExceeded
+from launchkey.transports import JOSETransport, JWKESTBackend, \
+    ProcessPoolCryptoBackend, call_deadline
+from launchkey.transports.base import APIResponse
+from launchkey.transports.crypto_pool import PooledRSAOAEPKey, \
+    UnknownWorkerKey
+
+from .test_jose_auth_transport import valid_private_key, \
+    transport_request_headers
+
+
+def _signing_input(jwt):
+    return jwt.b64part[0] + b"." + jwt.b64part[1]
+
+
+class TestProcessPoolCryptoBackend(unittest.TestCase):
+
+    def setUp(self):
+        self._backend = ProcessPoolCryptoBackend(
+            max_workers=1, mp_context=multiprocessing.get_context("fork"))
+        self.addCleanup(self._backend.shutdown)
+        self._private_key = RSAKey(key=import_rsa_key(valid_private_key),
+                                   kid="kid")
+        self._public_key = RSAKey(
+            key=import_rsa_key(valid_private_key).publickey(), kid="kid")
+
+    def test_sign_compact_in_worker(self):
+        compact = self._backend.sign_compact({"a": 1}, "RS512",
+                                             self._private_key)
+        jwt = JWT().unpack(compact)
+        JWKESTBackend().verify_compact(_signing_input(jwt), jwt.part[2],
+                                       "RS512", self._public_key)
+        self.assertEqual({"offloaded": 1, "fallbacks": 0, "saturated": 0},
+                         self._backend.stats)
+
+    def test_signatures_match_inner_backend(self):
+        self.assertEqual(
+            JWKESTBackend().sign_compact({"a": 1}, "RS512",
+                                         self._private_key),
+            self._backend.sign_compact({"a": 1}, "RS512", self._private_key))
+
+    def test_decrypt_compact_in_worker(self):
+        token = self._backend.encrypt_compact("data", "RSA-OAEP",
+                                              "A256CBC-HS512",
+                                              self._public_key)
+        self.assertEqual(b"data", self._backend.decrypt_compact(
+            token, [self._private_key]))
+        self.assertEqual(1, self._backend.stats["offloaded"])
+
+    def test_decrypt_compact_errors_are_raised(self):
+        token = self._backend.encrypt_compact("data", "RSA-OAEP",
+                                              "A256CBC-HS512",
+                                              self._public_key)
+        other_key = RSAKey(key=RSA.generate(1024), kid="other")
+        with self.assertRaises((DecryptionFailed, ValueError)):
+            self._backend.decrypt_compact(token, [other_key])
+
+    def test_decrypt_rsa_oaep_in_worker(self):
+        ciphertext = PKCS1_OAEP.new(RSA.importKey(valid_private_key)) \
+            .encrypt(b"secret")
+        key = self._backend.load_rsa_oaep_key(self._private_key)
+        self.assertEqual("kid", key.kid)
+        self.assertEqual(b"secret",
+                         self._backend.decrypt_rsa_oaep(ciphertext, key))
+        self.assertEqual(1, self._backend.stats["offloaded"])
+
+    def test_new_key_replaces_pool(self):
+        self._backend.sign_compact({}, "RS512", self._private_key)
+        executor = self._backend._executor
+        other_key = RSAKey(key=RSA.generate(1024), kid="other")
+        self._backend.sign_compact({}, "RS512", other_key)
+        self.assertIsNot(executor, self._backend._executor)
+        self.assertEqual(2, self._backend.stats["offloaded"])
+
+    def test_known_key_reuses_pool(self):
+        self._backend.sign_compact({}, "RS512", self._private_key)
+        executor = self._backend._executor
+        self._backend.sign_compact({}, "RS512", self._private_key)
+        self.assertIs(executor, self._backend._executor)
+
+    def test_shutdown_without_pool(self):
+        self._backend.shutdown()
+        self.assertIsNone(self._backend._executor)
+
+    def test_forgotten_key_replaces_pool(self):
+        self._backend.sign_compact({}, "RS512", self._private_key)
+        self._backend.forget_key(self._private_key)
+        self.assertIsNone(self._backend._executor)
+        self.assertEqual({}, self._backend._keys)
+
+    def test_forget_unknown_key_keeps_pool(self):
+        self._backend.sign_compact({}, "RS512", self._private_key)
+        executor = self._backend._executor
+        self._backend.forget_key(RSAKey(key=RSA.generate(1024), kid="other"))
+        self.assertIs(executor, self._backend._executor)
+
+
+class TestProcessPoolCryptoBackendFallback(unittest.TestCase):
+
+    def setUp(self):
+        self._inner = MagicMock()
+        self._backend = ProcessPoolCryptoBackend(self._inner, max_workers=1,
+                                                 max_pending=1,
+                                                 pending_timeout=0.01)
+        self._key = RSAKey(key=import_rsa_key(valid_private_key), kid="kid")
+        patcher = patch.object(self._backend, "_get_executor")
+        self._get_executor = patcher.start()
+        self.addCleanup(patcher.stop)
+        self._executor = self._get_executor.return_value
+
+    def test_key_without_kid_runs_in_process(self):
+        key = RSAKey(key=import_rsa_key(valid_private_key))
+        result = self._backend.sign_compact({}, "RS512", key)
+        self.assertEqual(self._inner.sign_compact.return_value, result)
+        self._executor.submit.assert_not_called()
+
+    def test_rsa_oaep_key_without_kid_runs_in_process(self):
+        key = self._backend.load_rsa_oaep_key(
+            RSAKey(key=import_rsa_key(valid_private_key)))
+        self.assertIsNone(key.kid)
+        self._backend.decrypt_rsa_oaep(b"data", key)
+        self._inner.decrypt_rsa_oaep.assert_called_once_with(
+            b"data", self._inner.load_rsa_oaep_key.return_value)
+        self._executor.submit.assert_not_called()
+
+    def test_public_key_operations_run_in_process(self):
+        self._backend.verify_compact(b"input", b"signature", "RS512",
+                                     self._key)
+        self._backend.encrypt_compact("data", "RSA-OAEP", "A256CBC-HS512",
+                                      self._key)
+        self._inner.verify_compact.assert_called_once()
+        self._inner.encrypt_compact.assert_called_once()
+        self._executor.submit.assert_not_called()
+
+    def test_saturated_pool_runs_in_process(self):
+        self._backend._pending.acquire()
+        result = self._backend.sign_compact({}, "RS512", self._key)
+        self.assertEqual(self._inner.sign_compact.return_value, result)
+        self._executor.submit.assert_not_called()
+        self.assertEqual({"offloaded": 0, "fallbacks": 1, "saturated": 1},
+                         self._backend.stats)
+
+    def test_saturated_pool_waits_for_room(self):
+        self._backend._pending_timeout = 5
+        self._backend._pending.acquire()
+        timer = threading.Timer(0.05, self._backend._pending.release)
+        timer.start()
+        self.addCleanup(timer.join)
+        self._backend.sign_compact({}, "RS512", self._key)
+        self._executor.submit.assert_called_once()
+        self._inner.sign_compact.assert_not_called()
+
+    def test_saturated_pool_wait_limited_by_deadline(self):
+        self._backend._pending_timeout = None
+        self._backend._pending.acquire()
+        with call_deadline(0.01):
+            with self.assertRaises(DeadlineExceeded):
+                self._backend.sign_compact({}, "RS512", self._key)
+        self._executor.submit.assert_not_called()
+        self._inner.sign_compact.assert_not_called()
+
+    def test_pending_released_when_operation_completes(self):
+        self._executor.submit.return_value.add_done_callback.side_effect = \
+            lambda callback: callback(None)
+        self._backend.sign_compact({}, "RS512", self._key)
+        self._backend.sign_compact({}, "RS512", self._key)
+        self.assertEqual(2, self._executor.submit.call_count)
+
+    def test_submit_failure_runs_in_process(self):
+        self._executor.submit.side_effect = RuntimeError
+        result = self._backend.decrypt_compact("token", [self._key])
+        self.assertEqual(self._inner.decrypt_compact.return_value, result)
+        self.assertTrue(self._backend._pending.acquire(blocking=False))
+
+    def test_broken_pool_runs_in_process_and_is_discarded(self):
+        self._executor.submit.return_value.result.side_effect = \
+            BrokenProcessPool
+        self._backend._register(self._key)
+        self._backend._executor = self._executor
+        result = self._backend.sign_compact({}, "RS512", self._key)
+        self.assertEqual(self._inner.sign_compact.return_value, result)
+        self.assertIsNone(self._backend._executor)
+        self._executor.shutdown.assert_called_once_with(wait=False)
+
+    def test_unknown_worker_key_runs_in_process(self):
+        self._executor.submit.return_value.result.side_effect = \
+            UnknownWorkerKey("kid")
+        result = self._backend.decrypt_rsa_oaep(
+            b"data", PooledRSAOAEPKey("kid", "local key"))
+        self.assertEqual(self._inner.decrypt_rsa_oaep.return_value, result)
+        self._inner.decrypt_rsa_oaep.assert_called_once_with(b"data",
+                                                             "local key")
+
+    def test_result_wait_limited_by_result_timeout(self):
+        self._backend._result_timeout = 5
+        self._backend.sign_compact({}, "RS512", self._key)
+        self._executor.submit.return_value.result.assert_called_once_with(
+            timeout=5)
+
+    def test_result_wait_limited_by_deadline(self):
+        with call_deadline(1):
+            self._backend.sign_compact({}, "RS512", self._key)
+        timeout = self._executor.submit.return_value.result.call_args[1][
+            "timeout"]
+        self.assertLessEqual(timeout, 1)
+
+    def test_slow_worker_runs_in_process(self):
+        future = self._executor.submit.return_value
+        future.result.side_effect = FutureTimeoutError
+        result = self._backend.sign_compact({}, "RS512", self._key)
+        self.assertEqual(self._inner.sign_compact.return_value, result)
+        future.cancel.assert_called_once_with()
+        self.assertEqual({"offloaded": 0, "fallbacks": 1, "saturated": 0},
+                         self._backend.stats)
+
+    def test_slow_worker_past_deadline_raises(self):
+        def result(timeout):
+            sleep(timeout)
+            raise FutureTimeoutError
+        self._executor.submit.return_value.result.side_effect = result
+        with call_deadline(0.01):
+            with self.assertRaises(DeadlineExceeded):
+                self._backend.sign_compact({}, "RS512", self._key)
+        self._inner.sign_compact.assert_not_called()
+
+    def test_worker_errors_are_raised(self):
+        self._executor.submit.return_value.result.side_effect = \
+            DecryptionFailed
+        with self.assertRaises(DecryptionFailed):
+            self._backend.decrypt_compact("token", [self._key])
+        self._inner.decrypt_compact.assert_not_called()
+
+
+class TestJOSETransportProcessPoolCryptoBackend(unittest.TestCase):
+
+    def test_encrypt_decrypt_and_sign(self):
+        backend = ProcessPoolCryptoBackend(
+            max_workers=1, mp_context=multiprocessing.get_context("fork"))
+        self.addCleanup(backend.shutdown)
+        transport = JOSETransport(http_client=MagicMock(),
+                                  crypto_backend=backend)
+        transport._http_client.get.return_value = APIResponse(
+            valid_private_key, transport_request_headers, 200)
+        transport._server_time_difference = 0, time()
+        transport.set_issuer("svc", "e5a0c2de-4f8e-11e8-9c2d-fa7ae01bbebc",
+                             valid_private_key)
+        transport.add_encryption_private_key(valid_private_key)
+
+        encrypted = transport._encrypt_request({"tobe": "encrypted"})
+        self.assertEqual({"tobe": "encrypted"},
+                         loads(transport.decrypt_response(encrypted)))
+        kid = transport.issuer_private_keys[0].kid
+        ciphertext = PKCS1_OAEP.new(RSA.importKey(valid_private_key)) \
+            .encrypt(b"secret")
+        self.assertEqual(b"secret", transport.decrypt_rsa_response(
+            b64encode(ciphertext), kid))
+        transport._build_jwt_signature("POST", "/path", "jti", "svc:subject")
+        self.assertEqual({"offloaded": 3, "fallbacks": 0, "saturated": 0},
+                         backend.stats)
@@ -0,0 +1,239 @@
+import asyncio
+import threading
+import unittest
+from uuid import uuid4
+
+import httpx
+import requests
+from ddt import ddt, data, unpack
+from mock import MagicMock, patch
+
+from launchkey.clients import ServiceClient, AsyncServiceClient
+from launchkey.exceptions import DeadlineExceeded, LaunchKeyAPIException, \
+    RateLimited, RequestTimedOut
+from launchkey.transports import AdaptiveRateLimiter, HTTP2Transport, \
+    JOSETransport, RequestsTransport, RetryPolicy, call_deadline
+from launchkey.transports.base import APIResponse
+from launchkey.transports.deadline import acquire_within_deadline, \
+    acquire_within_deadline_async, check_deadline, deadline_timeouts, \
+    limit_timeout, remaining_time
+
+from .test_async_jose_auth_transport import async_return
+
+
+@ddt
+@patch("launchkey.transports.deadline.monotonic")
+class TestCallDeadline(unittest.TestCase):
+
+    def test_remaining_time(self, monotonic_patch):
+        monotonic_patch.return_value = 100.0
+        self.assertIsNone(remaining_time())
+        with call_deadline(5.0):
+            monotonic_patch.return_value = 102.0
+            self.assertEqual(3.0, remaining_time())
+        self.assertIsNone(remaining_time())
+
+    def test_none_is_no_deadline(self, monotonic_patch):
+        monotonic_patch.return_value = 100.0
+        with call_deadline(None):
+            self.assertIsNone(remaining_time())
+
+    def test_nested_deadline_only_shortens(self, monotonic_patch):
+        monotonic_patch.return_value = 100.0
+        with call_deadline(5.0):
+            with call_deadline(10.0):
+                self.assertEqual(5.0, remaining_time())
+            with call_deadline(2.0):
+                self.assertEqual(2.0, remaining_time())
+            self.assertEqual(5.0, remaining_time())
+
+    def test_check_deadline(self, monotonic_patch):
+        monotonic_patch.return_value = 100.0
+        self.assertIsNone(check_deadline())
+        with call_deadline(1.0):
+            self.assertEqual(1.0, check_deadline())
+            monotonic_patch.return_value = 101.0
+            with self.assertRaises(DeadlineExceeded):
+                check_deadline()
+
+    def test_deadline_exceeded_is_not_an_api_timeout(self, _):
+        error = DeadlineExceeded("The deadline of the call was exceeded")
+        self.assertIsInstance(error, LaunchKeyAPIException)
+        self.assertNotIsInstance(error, RequestTimedOut)
+        self.assertIsNone(error.status_code)
+
+    def test_deadline_timeouts(self, monotonic_patch):
+        monotonic_patch.return_value = 100.0
+        with self.assertRaises(requests.exceptions.Timeout):
+            with deadline_timeouts(requests.exceptions.Timeout):
+                raise requests.exceptions.Timeout()
+        with call_deadline(1.0):
+            monotonic_patch.return_value = 101.5
+            with self.assertRaises(DeadlineExceeded):
+                with deadline_timeouts(requests.exceptions.Timeout):
+                    raise requests.exceptions.Timeout()
+
+    @data((None, None, None), (5.0, None, 5.0), (None, 2.0, 2.0),
+          (5.0, 2.0, 2.0), (1.0, 2.0, 1.0))
+    @unpack
+    def test_limit_timeout(self, timeout, remaining, expected, _):
+        self.assertEqual(expected, limit_timeout(timeout, remaining))
+
+
+class TestLockDeadlines(unittest.TestCase):
+
+    def test_acquire_within_deadline(self):
+        lock = threading.Lock()
+        with acquire_within_deadline(lock):
+            self.assertTrue(lock.locked())
+        self.assertFalse(lock.locked())
+
+    def test_acquire_within_deadline_past_deadline(self):
+        lock = threading.Lock()
+        lock.acquire()
+        with call_deadline(0.01):
+            with self.assertRaises(DeadlineExceeded):
+                with acquire_within_deadline(lock):
+                    pass
+
+    def test_acquire_within_deadline_async(self):
+        async def _test():
+            lock = asyncio.Lock()
+            async with acquire_within_deadline_async(lock):
+                self.assertTrue(lock.locked())
+            self.assertFalse(lock.locked())
+            await lock.acquire()
+            with call_deadline(0.01):
+                with self.assertRaises(DeadlineExceeded):
+                    async with acquire_within_deadline_async(lock):
+                        pass
+        asyncio.run(_test())
+
+    def test_server_time_refresh_waits_within_deadline(self):
+        transport = JOSETransport(http_client=MagicMock())
+        transport._server_time_difference_lock.acquire()
+        with call_deadline(0.01):
+            with self.assertRaises(DeadlineExceeded):
+                transport.server_time_difference
+        transport._http_client.get.assert_not_called()
+
+    def test_public_key_fetch_waits_within_deadline(self):
+        transport = JOSETransport(http_client=MagicMock())
+        transport._get_public_key_fetch_lock("kid").acquire()
+        with call_deadline(0.01):
+            with self.assertRaises(DeadlineExceeded):
+                transport._find_key_by_kid("kid")
+        transport._http_client.get.assert_not_called()
+
+
+@patch("launchkey.transports.deadline.monotonic",
+       MagicMock(return_value=100.0))
+class TestTransportDeadlines(unittest.TestCase):
+
+    @patch("launchkey.transports.http.requests")
+    def test_requests_transport_default_timeouts(self, requests_patch):
+        RequestsTransport().get("/path")
+        self.assertEqual((5.0, 30.0), requests_patch.get.call_args[1]["timeout"])
+        RequestsTransport(connect_timeout=1.0, read_timeout=None).get("/path")
+        self.assertEqual((1.0, None), requests_patch.get.call_args[1]["timeout"])
+
+    @patch("launchkey.transports.http.requests")
+    def test_requests_transport_timeouts_limited_by_deadline(self,
+                                                            requests_patch):
+        with call_deadline(2.0):
+            RequestsTransport().post("/path", data="body")
+        self.assertEqual((2.0, 2.0),
+                         requests_patch.post.call_args[1]["timeout"])
+
+    @patch("launchkey.transports.http.requests")
+    def test_requests_transport_past_deadline(self, requests_patch):
+        with call_deadline(0.0):
+            with self.assertRaises(DeadlineExceeded):
+                RequestsTransport().get("/path")
+        requests_patch.get.assert_not_called()
+
+    def test_http2_transport_timeouts_limited_by_deadline(self):
+        transport = HTTP2Transport()
+        transport._client = MagicMock(timeout=httpx.Timeout(5.0, read=30.0))
+        transport._client.request.return_value = httpx.Response(200, json={})
+        with call_deadline(10.0):
+            transport.get("/path")
+        self.assertEqual(httpx.Timeout(5.0, read=10.0),
+                         transport._client.request.call_args[1]["timeout"])
+
+    def test_retry_stops_before_deadline(self):
+        policy = RetryPolicy(deadline=None)
+        policy.get_backoff = MagicMock(return_value=0.5)
+        error = requests.exceptions.ConnectionError()
+        with call_deadline(1.0):
+            self.assertEqual(0.5, policy.start("GET", "/").next_delay(error))
+        with call_deadline(0.4):
+            self.assertIsNone(policy.start("GET", "/").next_delay(error))
+
+    @patch("launchkey.transports.rate_limit.monotonic",
+           MagicMock(return_value=0.0))
+    def test_rate_limiter_wait_past_deadline(self):
+        limiter = AdaptiveRateLimiter(rate=1.0, burst=1)
+        limiter.reserve("svc:id", "GET /path")
+        with call_deadline(0.5):
+            with self.assertRaises(DeadlineExceeded):
+                limiter.reserve("svc:id", "GET /path")
+        self.assertEqual(1.0, limiter.reserve("svc:id", "GET /path"))
+
+    @patch("launchkey.transports.rate_limit.monotonic",
+           MagicMock(return_value=0.0))
+    def test_rate_limiter_max_wait_takes_precedence(self):
+        limiter = AdaptiveRateLimiter(rate=1.0, burst=1, max_wait=0.1)
+        limiter.reserve("svc:id", "GET /path")
+        with call_deadline(0.5):
+            with self.assertRaises(RateLimited):
+                limiter.reserve("svc:id", "GET /path")
+
+
+@patch("launchkey.transports.deadline.monotonic",
+       MagicMock(return_value=100.0))
+class TestServiceClientDeadlines(unittest.TestCase):
+
+    def setUp(self):
+        self._transport = MagicMock()
+        self._client = ServiceClient(uuid4(), self._transport)
+        self._client._build_authorization_request = MagicMock()
+        self._client._build_advanced_authorization_response = MagicMock()
+        self._client._build_totp_verification = MagicMock()
+        self._remaining = []
+
+        def _request(*args, **kwargs):
+            self._remaining.append(remaining_time())
+            return APIResponse({}, {}, 200)
+        self._transport.get.side_effect = _request
+        self._transport.post.side_effect = _request
+
+    def test_authorization_request(self):
+        self._client.authorization_request("user", deadline=3.0)
+        self._client.authorization_request("user")
+        self.assertEqual([3.0, None], self._remaining)
+
+    def test_get_advanced_authorization_response(self):
+        self._client.get_advanced_authorization_response("id", deadline=2.0)
+        self.assertEqual([2.0], self._remaining)
+
+    def test_verify_totp(self):
+        self._client.verify_totp("user", "123456", deadline=1.0)
+        self.assertEqual([1.0], self._remaining)
+        self.assertIsNone(remaining_time())
+
+    def test_async_client(self):
+        client = AsyncServiceClient(uuid4(), self._transport)
+        client._build_totp_verification = MagicMock()
+        client._build_authorization_request = MagicMock()
+
+        async def _request(*args, **kwargs):
+            self._remaining.append(remaining_time())
+            return APIResponse({}, {}, 200)
+        self._transport.post = MagicMock(side_effect=_request)
+        self._transport.get = async_return(APIResponse({}, {}, 204))
+        asyncio.run(client.verify_totp("user", "123456", deadline=1.0))
+        asyncio.run(client.authorization_request("user", deadline=4.0))
+        asyncio.run(client.get_advanced_authorization_response(
+            "id", deadline=4.0))
+        self.assertEqual([1.0, 4.0], self._remaining)
@@ -1,8 +1,10 @@
 import unittest
 from mock import MagicMock, ANY, patch
 from launchkey.factories.base import BaseFactory
-from launchkey.factories import DirectoryFactory, OrganizationFactory, ServiceFactory
-from launchkey.clients import DirectoryClient, OrganizationClient, ServiceClient
+from launchkey.factories import DirectoryFactory, OrganizationFactory, ServiceFactory, \
+    AsyncDirectoryFactory, AsyncOrganizationFactory, AsyncServiceFactory
+from launchkey.clients import DirectoryClient, OrganizationClient, ServiceClient, \
+    AsyncDirectoryClient, AsyncOrganizationClient, AsyncServiceClient
 from launchkey.transports import JOSETransport
 from uuid import uuid1, uuid4
 from ddt import ddt, data
@@ -39,6 +41,28 @@ class TestBaseFactory(unittest.TestCase):
             encryption_key
         )
 
+    @patch("launchkey.factories.base.RequestsTransport")
+    @patch("launchkey.factories.base.JOSETransport")
+    def test_default_transport_not_pooled(self, jose_patch, requests_patch):
+        BaseFactory(ANY, uuid1(), ANY, ANY, ANY, None)
+        requests_patch.assert_called_once_with(pooled=False)
+        jose_patch.assert_called_once_with(
+            http_client=requests_patch.return_value, rate_limiter=None)
+
+    @patch("launchkey.factories.base.RequestsTransport")
+    @patch("launchkey.factories.base.JOSETransport")
+    def test_default_transport_pooled(self, _, requests_patch):
+        BaseFactory(ANY, uuid1(), ANY, ANY, ANY, None, True)
+        requests_patch.assert_called_once_with(pooled=True)
+
+    @patch("launchkey.factories.base.RequestsTransport")
+    @patch("launchkey.factories.base.JOSETransport")
+    def test_default_transport_rate_limiter(self, jose_patch, requests_patch):
+        rate_limiter = MagicMock()
+        BaseFactory(ANY, uuid1(), ANY, ANY, ANY, None, False, rate_limiter)
+        jose_patch.assert_called_once_with(
+            http_client=requests_patch.return_value, rate_limiter=rate_limiter)
+
     @data(uuid1(), uuid4())
     def test_multiple_uuid_support(self, entity_id):
         BaseFactory(ANY, entity_id, ANY, ANY, ANY, MagicMock(spec=JOSETransport))
@@ -82,3 +106,60 @@ class TestOrganizationFactory(unittest.TestCase):
 
     def test_make_service_client(self):
         self.assertIsInstance(self._factory.make_service_client(uuid1()), ServiceClient)
+
+
+class TestAsyncDirectoryFactory(unittest.TestCase):
+
+    def setUp(self):
+        self._factory = AsyncDirectoryFactory(uuid1(), ANY, transport=MagicMock())
+
+    @patch("launchkey.factories.directory.AsyncJOSETransport")
+    def test_default_transport(self, transport_patch):
+        factory = AsyncDirectoryFactory(uuid1(), ANY)
+        self.assertEqual(transport_patch.return_value, factory._transport)
+
+    @patch("launchkey.factories.directory.AsyncJOSETransport")
+    def test_default_transport_rate_limiter(self, transport_patch):
+        rate_limiter = MagicMock()
+        AsyncDirectoryFactory(uuid1(), ANY, rate_limiter=rate_limiter)
+        transport_patch.assert_called_once_with(rate_limiter=rate_limiter)
+
+    def test_make_directory_client(self):
+        self.assertIsInstance(self._factory.make_directory_client(), AsyncDirectoryClient)
+
+    def test_make_service_client(self):
+        self.assertIsInstance(self._factory.make_service_client(uuid1()), AsyncServiceClient)
+
+
+class TestAsyncServiceFactory(unittest.TestCase):
+
+    def setUp(self):
+        self._factory = AsyncServiceFactory(uuid1(), ANY, transport=MagicMock())
+
+    @patch("launchkey.factories.service.AsyncJOSETransport")
+    def test_default_transport(self, transport_patch):
+        factory = AsyncServiceFactory(uuid1(), ANY)
+        self.assertEqual(transport_patch.return_value, factory._transport)
+
+    def test_make_service_client(self):
+        self.assertIsInstance(self._factory.make_service_client(), AsyncServiceClient)
+
+
+class TestAsyncOrganizationFactory(unittest.TestCase):
+
+    def setUp(self):
+        self._factory = AsyncOrganizationFactory(uuid1(), ANY, transport=MagicMock())
+
+    @patch("launchkey.factories.organization.AsyncJOSETransport")
+    def test_default_transport(self, transport_patch):
+        factory = AsyncOrganizationFactory(uuid1(), ANY)
+        self.assertEqual(transport_patch.return_value, factory._transport)
+
+    def test_make_directory_client(self):
+        self.assertIsInstance(self._factory.make_directory_client(uuid1()), AsyncDirectoryClient)
+
+    def test_make_organization_client(self):
+        self.assertIsInstance(self._factory.make_organization_client(), AsyncOrganizationClient)
+
+    def test_make_service_client(self):
+        self.assertIsInstance(self._factory.make_service_client(uuid1()), AsyncServiceClient)
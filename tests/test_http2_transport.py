@@ -0,0 +1,111 @@
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+from mock import MagicMock, patch
+
+from launchkey import LAUNCHKEY_PRODUCTION
+from launchkey.transports import HTTP2Transport, JOSETransport
+from launchkey.transports.base import APIResponse, APIErrorResponse
+
+
+class TestHTTP2Transport(unittest.TestCase):
+
+    def setUp(self):
+        self._transport = HTTP2Transport()
+        self._client = MagicMock()
+        self._client.request.return_value = httpx.Response(200, json={})
+        self._transport._client = self._client
+
+    def test_defaults(self):
+        transport = HTTP2Transport()
+        self.assertEqual(LAUNCHKEY_PRODUCTION, transport.url)
+        self.assertFalse(transport.testing)
+        self.assertTrue(transport.verify_ssl)
+        self.assertFalse(transport.allow_redirects)
+        self.assertFalse(transport.prior_knowledge)
+
+    def test_usable_as_jose_http_client(self):
+        transport = HTTP2Transport()
+        jose = JOSETransport(http_client=transport)
+        self.assertEqual(transport, jose._http_client)
+
+    def test_set_url_resets_client(self):
+        self._transport.set_url("https://api.example.com", True)
+        self.assertEqual("https://api.example.com", self._transport.url)
+        self.assertFalse(self._transport.verify_ssl)
+        self.assertIsNone(self._transport._client)
+        self._client.close.assert_called_once_with()
+
+    @patch("launchkey.transports.http2.httpx.Client")
+    def test_client_negotiates_http2(self, client_patch):
+        transport = HTTP2Transport(max_connections=5,
+                                   max_keepalive_connections=2)
+        self.assertEqual(client_patch.return_value, transport._get_client())
+        kwargs = client_patch.call_args[1]
+        self.assertTrue(kwargs["http2"])
+        self.assertTrue(kwargs["http1"])
+        self.assertTrue(kwargs["verify"])
+        self.assertFalse(kwargs["follow_redirects"])
+        self.assertEqual(5, kwargs["limits"].max_connections)
+        self.assertEqual(2, kwargs["limits"].max_keepalive_connections)
+
+    @patch("launchkey.transports.http2.httpx.Client")
+    def test_client_prior_knowledge_disables_http1(self, client_patch):
+        HTTP2Transport(prior_knowledge=True)._get_client()
+        self.assertFalse(client_patch.call_args[1]["http1"])
+
+    @patch("launchkey.transports.http2.httpx.Client")
+    def test_client_is_shared_between_threads(self, client_patch):
+        transport = HTTP2Transport()
+        with ThreadPoolExecutor(max_workers=10) as executor:
+            clients = set(executor.map(lambda _: transport._get_client(),
+                                       range(50)))
+        self.assertEqual({client_patch.return_value}, clients)
+        client_patch.assert_called_once()
+
+    def test_get_sends_params(self):
+        self._transport.get("/path", {"h": "v"}, {"a": "b"})
+        self._client.request.assert_called_once_with(
+            "GET", LAUNCHKEY_PRODUCTION + "/path", headers={"h": "v"},
+            params={"a": "b"})
+
+    def test_post_sends_string_body_as_content(self):
+        self._transport.post("/path", None, "body")
+        self._client.request.assert_called_once_with(
+            "POST", LAUNCHKEY_PRODUCTION + "/path", headers=None,
+            content="body")
+
+    def test_put_sends_dict_body_as_data(self):
+        self._transport.put("/path", None, {"a": "b"})
+        self._client.request.assert_called_once_with(
+            "PUT", LAUNCHKEY_PRODUCTION + "/path", headers=None,
+            data={"a": "b"})
+
+    def test_delete(self):
+        self._transport.delete("/path", None, "body")
+        self._client.request.assert_called_once_with(
+            "DELETE", LAUNCHKEY_PRODUCTION + "/path", headers=None,
+            content="body")
+
+    def test_patch_without_body(self):
+        self._transport.patch("/path")
+        self._client.request.assert_called_once_with(
+            "PATCH", LAUNCHKEY_PRODUCTION + "/path", headers=None)
+
+    def test_request_returns_parsed_response(self):
+        self.assertIsInstance(self._transport.get("/path"), APIResponse)
+
+    def test_request_returns_error_response(self):
+        self._client.request.return_value = httpx.Response(404, json={})
+        response = self._transport.get("/path")
+        self.assertIsInstance(response, APIErrorResponse)
+        self.assertEqual("Not Found", response.reason)
+
+    def test_close_closes_client(self):
+        self._transport.close()
+        self._client.close.assert_called_once()
+        self.assertIsNone(self._transport._client)
+
+    def test_close_without_client(self):
+        HTTP2Transport().close()
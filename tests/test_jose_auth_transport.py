@@ -1,14 +1,19 @@
 import unittest
 import platform
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
+from Cryptodome.PublicKey import RSA
 from Cryptodome.PublicKey.RSA import RsaKey
 from ddt import data, ddt
 from jwkest import JWKESTException
 from jwkest.jws import JWS
 from jwkest.jwt import JWT, BadSyntax
 from mock import MagicMock, ANY, patch, call
-from launchkey.transports import JOSETransport, RequestsTransport
+from launchkey.transports import JOSETransport, RequestsTransport, \
+    SharedCache, PrivateKeyMaterial
 from launchkey.transports.base import APIResponse, APIErrorResponse
+from launchkey.transports.key_cache import PublicKeyCache
 from launchkey.exceptions import InvalidAlgorithm, UnexpectedAPIResponse, \
     InvalidEntityID, InvalidIssuer, InvalidPrivateKey, NoIssuerKey, \
     InvalidJWTResponse, JWTValidationFailure, LaunchKeyAPIException, \
@@ -17,7 +22,7 @@ from launchkey import JOSE_SUPPORTED_JWT_ALGS, JOSE_SUPPORTED_JWE_ALGS, JOSE_SUP
     JOSE_SUPPORTED_CONTENT_HASH_ALGS, API_CACHE_TIME, VALID_JWT_ISSUER_LIST, JOSE_JWT_LEEWAY, SDK_VERSION
 
 from datetime import datetime
-from jwkest.jwk import RSAKey
+from jwkest.jwk import RSAKey, import_rsa_key
 from uuid import uuid4
 from time import time
 from json import loads
@@ -122,9 +127,12 @@ class TestJOSETransport3rdParty(unittest.TestCase):
         with self.assertRaises(InvalidJWTResponse):
             self._transport.verify_jwt_response(headers, ANY, ANY, ANY)
 
-    @patch.object(JWS, 'verify_compact')
-    def test_jwt_error_raises_expected_exception(self, verify_compact_patch):
-        verify_compact_patch.side_effect = JWKESTException
+    @patch("launchkey.transports.crypto.SIGNER_ALGS")
+    def test_jwt_error_raises_expected_exception(self, signer_algs_patch):
+        jwt = self._jwt_patch.return_value.unpack.return_value
+        jwt.part = jwt.b64part = [b"header", b"payload", b"signature"]
+        signer_algs_patch.__getitem__.return_value.verify.side_effect = \
+            JWKESTException
         with self.assertRaises(JWTValidationFailure):
             self._transport.verify_jwt_response({}, ANY, ANY, ANY)
 
@@ -201,7 +209,7 @@ class TestJWKESTSupportedAlgs(unittest.TestCase):
                  }
             self._encrypt_decrypt()
 
-    @patch("launchkey.transports.jose_auth.JWE")
+    @patch("launchkey.transports.crypto.JWE")
     def test_no_kid_in_headers_uses_all_keys_to_decrypt(self, jwe_patch):
         self._jwenc_patch.return_value.unpack.return_value.headers = \
             {"alg": "RS512",
@@ -247,6 +255,7 @@ class TestJOSEProcessJOSERequest(unittest.TestCase):
         self._transport._build_jwt_signature = MagicMock()
         self._transport.decrypt_response = MagicMock(return_value="Decrypted Response")
         self._transport._encrypt_request = MagicMock(return_value="Encrypted Response")
+        self._transport._load_request_metadata = MagicMock()
 
     def test_process_jose_request_success_encrypted_response(self):
         response = self._transport._process_jose_request('GET', '/path', 'subject', 'body')
@@ -308,6 +317,300 @@ class TestJOSEProcessJOSERequest(unittest.TestCase):
             self._transport._process_jose_request('PUT', '/path', 'subject')
 
 
+class TestJOSETransportPassiveClockSkew(unittest.TestCase):
+
+    def setUp(self):
+        self._http_client = MagicMock(spec=RequestsTransport)
+        self._transport = JOSETransport(http_client=self._http_client)
+        self._transport.verify_jwt_response = MagicMock(return_value={})
+        self._now = int(time())
+
+    def test_response_jwt_iat_updates_server_time_difference(self):
+        self._transport.verify_jwt_response.return_value = {
+            "iat": self._now - 100}
+        self._transport._process_jose_response(
+            APIResponse(None, {}, 200), ANY, ANY)
+        self.assertAlmostEqual(100, self._transport.server_time_difference,
+                               delta=1)
+        self._http_client.get.assert_not_called()
+
+    def test_date_header_used_when_response_not_verified(self):
+        response = APIErrorResponse(None, {
+            "Date": "Sun, 06 Nov 1994 08:49:37 GMT"}, 401)
+        with self.assertRaises(LaunchKeyAPIException):
+            self._transport._process_jose_response(response, ANY, ANY)
+        self.assertAlmostEqual(self._now - 784111777,
+                               self._transport.server_time_difference,
+                               delta=1)
+        self._http_client.get.assert_not_called()
+
+    def test_iat_preferred_over_date_header(self):
+        self._transport.verify_jwt_response.return_value = {
+            "iat": self._now - 100}
+        self._transport._process_jose_response(APIResponse(None, {
+            "Date": "Sun, 06 Nov 1994 08:49:37 GMT"}, 200), ANY, ANY)
+        self.assertAlmostEqual(100, self._transport.server_time_difference,
+                               delta=1)
+
+    def test_response_without_server_time_is_ignored(self):
+        self._transport._process_jose_response(
+            APIResponse(None, {}, 200), ANY, ANY)
+        self.assertEqual((None, None),
+                         self._transport._server_time_difference)
+
+    @patch("launchkey.transports.jose_auth.time")
+    def test_ping_used_when_samples_are_too_old(self, time_patch):
+        time_patch.return_value = self._now
+        self._transport._record_server_time(self._now - 100)
+        time_patch.return_value = self._now + API_CACHE_TIME + 1
+        self._http_client.get.return_value = APIResponse(
+            {"api_time": "2017-01-01T00:00:00Z"}, {}, 200)
+        self._transport.server_time_difference
+        self._http_client.get.assert_called_once_with("/public/v3/ping",
+                                                      data={})
+
+    def test_recent_samples_avoid_ping(self):
+        for offset in (5, 6, 500, 5, 4):
+            self._transport._record_server_time(self._now - offset,
+                                                self._now)
+        self.assertEqual(5, self._transport.server_time_difference)
+        self._http_client.get.assert_not_called()
+
+
+class DictSharedCache(SharedCache):
+
+    def __init__(self):
+        self.values = {}
+        self.ttls = {}
+
+    def get(self, key):
+        return self.values.get(key)
+
+    def set(self, key, value, ttl):
+        self.values[key] = value
+        self.ttls[key] = ttl
+
+
+class TestJOSETransportPublicKeyCache(unittest.TestCase):
+
+    def setUp(self):
+        self._http_client = MagicMock(spec=RequestsTransport)
+        self._transport = JOSETransport(http_client=self._http_client)
+
+    def test_default_cache(self):
+        self.assertIsInstance(self._transport._public_key_cache,
+                              PublicKeyCache)
+
+    def test_custom_cache(self):
+        cache = PublicKeyCache(max_size=1)
+        transport = JOSETransport(http_client=self._http_client,
+                                  public_key_cache=cache)
+        self.assertIs(cache, transport._public_key_cache)
+
+    def test_unknown_kid_requested_once_while_not_found(self):
+        self._http_client.get.return_value = APIResponse("Not Found", {}, 404)
+        for _ in range(10):
+            with self.assertRaises(UnexpectedAPIResponse):
+                self._transport._find_key_by_kid("forged")
+        self._http_client.get.assert_called_once_with(
+            "/public/v3/public-key/forged", data={})
+        self.assertEqual(9, self._transport.public_key_cache_stats[
+            "negative_hits"])
+
+    @patch("launchkey.transports.key_cache.time")
+    def test_unknown_kid_requested_again_after_negative_ttl(self, time_patch):
+        time_patch.return_value = 1000
+        self._http_client.get.return_value = APIResponse("Not Found", {}, 404)
+        with self.assertRaises(UnexpectedAPIResponse):
+            self._transport._find_key_by_kid("forged")
+        time_patch.return_value = 1000 + 60
+        with self.assertRaises(UnexpectedAPIResponse):
+            self._transport._find_key_by_kid("forged")
+        self.assertEqual(2, self._http_client.get.call_count)
+
+    def test_other_errors_not_negatively_cached(self):
+        self._http_client.get.return_value = APIResponse(None, {}, 200)
+        for _ in range(2):
+            with self.assertRaises(UnexpectedAPIResponse):
+                self._transport._find_key_by_kid(faux_kid)
+        self.assertEqual(2, self._http_client.get.call_count)
+
+    def test_stats_count_hits_and_misses(self):
+        self._http_client.get.return_value = APIResponse(
+            valid_public_key, transport_request_headers, 200)
+        self._transport._find_key_by_kid(faux_kid)
+        self._transport._find_key_by_kid(faux_kid)
+        stats = self._transport.public_key_cache_stats
+        self.assertEqual(1, stats["hits"])
+        self.assertEqual(1, stats["misses"])
+        self.assertEqual(1, stats["size"])
+
+    def test_evicted_encryption_key_fetched_again(self):
+        self._http_client.get.return_value = APIResponse(
+            valid_public_key, transport_request_headers, 200)
+        self._transport.update_and_return_active_encryption_kid()
+        self._transport._public_key_cache.clear()
+        self._transport._encrypt_request({"a": "b"})
+        self._http_client.get.assert_called_with(
+            "/public/v3/public-key/%s" % faux_kid, data={})
+
+
+class TestJOSETransportSharedCache(unittest.TestCase):
+
+    def setUp(self):
+        self._http_client = MagicMock(spec=RequestsTransport)
+        self._shared_cache = DictSharedCache()
+        self._transport = JOSETransport(http_client=self._http_client,
+                                        shared_cache=self._shared_cache)
+        self._now = int(time())
+
+    def test_server_time_difference_loaded_from_shared_cache(self):
+        self._shared_cache.values["server-time-difference"] = [
+            42, self._now - 10]
+        self.assertEqual(42, self._transport.server_time_difference)
+        self.assertEqual((42, self._now - 10),
+                         self._transport._server_time_difference)
+        self._http_client.get.assert_not_called()
+
+    def test_server_time_difference_shared_after_ping(self):
+        self._http_client.get.return_value = APIResponse(
+            {"api_time": "2017-01-01T00:00:00Z"}, {}, 200)
+        difference = self._transport.server_time_difference
+        self.assertEqual(
+            [difference, self._transport._server_time_difference[1]],
+            self._shared_cache.values["server-time-difference"])
+        self.assertAlmostEqual(
+            API_CACHE_TIME, self._shared_cache.ttls["server-time-difference"],
+            delta=1)
+
+    def test_older_shared_server_time_difference_ignored_on_forced_refresh(
+            self):
+        self._transport._server_time_difference = 1, self._now
+        self._shared_cache.values["server-time-difference"] = [
+            42, self._now - 10]
+        self._http_client.get.return_value = APIResponse(
+            {"api_time": "2017-01-01T00:00:00Z"}, {}, 200)
+        self._transport._refresh_server_time_difference(force=True)
+        self._http_client.get.assert_called_once()
+
+    def test_malformed_shared_server_time_difference_ignored(self):
+        self._shared_cache.values["server-time-difference"] = "invalid"
+        self._http_client.get.return_value = APIResponse(
+            {"api_time": "2017-01-01T00:00:00Z"}, {}, 200)
+        self._transport.server_time_difference
+        self._http_client.get.assert_called_once()
+
+    def test_current_kid_loaded_from_shared_cache(self):
+        self._shared_cache.values["current-kid"] = [
+            faux_kid, valid_public_key, self._now - 10]
+        self.assertEqual(
+            faux_kid, self._transport.update_and_return_active_encryption_kid())
+        self.assertIsInstance(self._transport._public_key_cache[faux_kid],
+                              RSAKey)
+        self._http_client.get.assert_not_called()
+
+    def test_current_kid_and_public_key_shared_after_fetch(self):
+        self._http_client.get.return_value = APIResponse(
+            valid_public_key, transport_request_headers, 200)
+        self._transport.update_and_return_active_encryption_kid()
+        self.assertEqual(
+            [faux_kid, valid_public_key, self._transport._current_kid[1]],
+            self._shared_cache.values["current-kid"])
+        self.assertEqual(valid_public_key,
+                         self._shared_cache.values["public-key:" + faux_kid])
+
+    def test_invalid_shared_current_kid_ignored(self):
+        self._http_client.get.return_value = APIResponse(
+            valid_public_key, transport_request_headers, 200)
+        for entry in ("abc", [1, valid_public_key, self._now],
+                      [faux_kid, "invalid key", self._now]):
+            self._transport._current_kid = None, None
+            self._transport._public_key_cache.clear()
+            self._http_client.get.reset_mock()
+            self._shared_cache.values["current-kid"] = entry
+            self._transport.update_and_return_active_encryption_kid()
+            self._http_client.get.assert_called_once()
+
+    def test_public_key_loaded_from_shared_cache(self):
+        self._shared_cache.values["public-key:" + faux_kid] = valid_public_key
+        self.assertIsInstance(self._transport._find_key_by_kid(faux_kid),
+                              RSAKey)
+        self._http_client.get.assert_not_called()
+
+    def test_public_key_shared_after_fetch(self):
+        self._http_client.get.return_value = APIResponse(
+            valid_public_key, transport_request_headers, 200)
+        self._transport._find_key_by_kid(faux_kid)
+        self.assertEqual(valid_public_key,
+                         self._shared_cache.values["public-key:" + faux_kid])
+        self.assertEqual(3600,
+                         self._shared_cache.ttls["public-key:" + faux_kid])
+
+
+class TestJOSETransportJWTSignatureVerification(unittest.TestCase):
+
+    def setUp(self):
+        self._transport = JOSETransport(http_client=MagicMock())
+        self._private_key = RSAKey(key=import_rsa_key(valid_private_key),
+                                   kid="signing-kid")
+        self._public_key = RSAKey(
+            key=import_rsa_key(valid_private_key).publickey(),
+            kid="signing-kid")
+        self._transport._public_key_cache["signing-kid"] = self._public_key
+        self._claims = {"jti": "jti", "request": {"meth": "POST", "path": "/"}}
+
+    def _sign(self, alg="RS512", kid="signing-kid"):
+        return JWS(self._claims, alg=alg, kid=kid).sign_compact(
+            keys=[self._private_key])
+
+    def _verify(self, compact_jwt):
+        return self._transport._get_jwt_payload(JWT().unpack(compact_jwt),
+                                                self._public_key)
+
+    def test_valid_signature_returns_claims(self):
+        for alg in JOSE_SUPPORTED_JWT_ALGS:
+            self.assertEqual(self._claims, self._verify(self._sign(alg)))
+
+    def test_tampered_signature_raises(self):
+        header, payload, signature = self._sign().split(".")
+        tampered = ".".join([header, payload, signature[::-1]])
+        with self.assertRaises(JWKESTException):
+            self._verify(tampered)
+
+    def test_tampered_payload_raises(self):
+        header, _, signature = self._sign().split(".")
+        payload = JWS({"jti": "other"}, alg="RS512").sign_compact(
+            keys=[self._private_key]).split(".")[1]
+        with self.assertRaises(JWKESTException):
+            self._verify(".".join([header, payload, signature]))
+
+    def test_unsupported_algorithm_raises(self):
+        with self.assertRaises(JWKESTException):
+            self._verify(self._sign("PS512"))
+
+    def test_unsigned_jwt_raises(self):
+        with self.assertRaises(InvalidJWTResponse):
+            self._verify(JWT(alg="none").pack(parts=[self._claims]))
+
+    @patch.object(JWT, "unpack", autospec=True, side_effect=JWT.unpack)
+    @patch.object(JWS, "verify_compact")
+    def test_request_jwt_is_unpacked_once(self, verify_compact_patch,
+                                          unpack_patch):
+        patch.object(JOSETransport, "_verify_jwt_payload").start()
+        self.addCleanup(patch.stopall)
+        self._transport.verify_jwt_request(self._sign(), ANY, "POST", None,
+                                           None)
+        unpack_patch.assert_called_once()
+        verify_compact_patch.assert_not_called()
+
+    def test_request_jwt_with_bad_signature_raises_validation_failure(self):
+        header, payload, signature = self._sign().split(".")
+        with self.assertRaises(JWTValidationFailure):
+            self._transport.verify_jwt_request(
+                ".".join([header, payload, signature[::-1]]), ANY, "POST",
+                None, None)
+
+
 class TestJOSETransportJWTResponse(unittest.TestCase):
 
     def setUp(self):
@@ -652,6 +955,27 @@ class TestJOSETransportJWT(unittest.TestCase):
         jwt = jwt.strip('IOV-JWT ')
         self.assertEqual(len(jwt.split(".")), 3)
 
+    @patch("launchkey.transports.jose_auth.time", MagicMock(return_value=1000))
+    def test_build_jwt_signature_claims(self):
+        self._transport.issuer = "svc:issuer"
+        self.assertEqual("IOV-JWT x.x.x", self._transport._build_jwt_signature(
+            "put", "/test", "jti", "svc:subject", "hash"))
+        self._transport._get_jwt_signature.assert_called_once_with({
+            "alg": "RS512", "nbf": 1000, "exp": 1005, "iss": "svc:issuer",
+            "sub": "svc:subject", "aud": self._transport.audience,
+            "iat": 1000, "jti": "jti",
+            "request": {"meth": "PUT", "path": "/test", "hash": "hash",
+                        "func": "S256"}})
+
+    def test_encrypt_request_uses_compact_json(self):
+        self._transport._crypto_backend = MagicMock()
+        self._transport.update_and_return_active_encryption_kid = MagicMock()
+        self._transport._find_key_by_kid = MagicMock()
+        self._transport._encrypt_request({"a": "b", "c": [1, 2]})
+        self.assertEqual(
+            '{"a":"b","c":[1,2]}',
+            self._transport._crypto_backend.encrypt_compact.call_args[0][0])
+
 
 class TestJOSETransportRESTCalls(unittest.TestCase):
 
@@ -663,6 +987,8 @@ class TestJOSETransportRESTCalls(unittest.TestCase):
         self._transport.content_hash_function = MagicMock()
         self._transport.decrypt_response = MagicMock()
         self._transport._encrypt_request = MagicMock()
+        self._transport._load_request_metadata = MagicMock()
+        self._transport._load_response_public_key = MagicMock()
 
     def test_get(self):
         self.assertEqual(self._transport.get('/path'), self._http_client.get.return_value)
@@ -721,6 +1047,74 @@ class TestJOSETransportIssuers(unittest.TestCase):
         self.assertEqual(self._transport.issuer_private_keys[0].kid,
                          '59:12:e2:f6:3f:79:d5:1e:18:75:c5:25:ff:b3:b7:f2')
 
+    def test_remove_encryption_private_key(self):
+        self._transport.add_encryption_private_key(valid_private_key)
+        kid = self._transport.issuer_private_keys[0].kid
+        self.assertTrue(self._transport.remove_encryption_private_key(kid))
+        self.assertEqual(len(self._transport.issuer_private_keys), 0)
+        self.assertNotIn(kid, self._transport.loaded_issuer_private_keys)
+        self.assertFalse(self._transport.remove_encryption_private_key(kid))
+
+    def test_expired_encryption_private_key_is_removed(self):
+        self._transport.add_encryption_private_key(valid_private_key,
+                                                   expires_at=time() - 1)
+        self.assertEqual(len(self._transport.issuer_private_keys), 0)
+        self.assertEqual(len(self._transport.loaded_issuer_private_keys), 0)
+
+    def test_expired_encryption_private_key_can_not_decrypt_rsa(self):
+        self._transport.add_encryption_private_key(valid_private_key,
+                                                   expires_at=time() - 1)
+        with self.assertRaises(UnexpectedKeyID):
+            self._transport.decrypt_rsa_response(
+                'dGVzdGluZw==', '59:12:e2:f6:3f:79:d5:1e:18:75:c5:25:ff:b3:b7:f2')
+
+    def test_unexpired_encryption_private_key_is_kept(self):
+        self._transport.add_encryption_private_key(valid_private_key,
+                                                   expires_at=time() + 60)
+        self.assertEqual(len(self._transport.issuer_private_keys), 1)
+
+    def test_add_duplicate_issuer_key_does_not_load_key_again(self):
+        load_patch = patch.object(self._transport._crypto_backend,
+                                  "load_rsa_oaep_key").start()
+        self.addCleanup(patch.stopall)
+        self._transport.add_encryption_private_key(valid_private_key)
+        self._transport.add_encryption_private_key(valid_private_key)
+        load_patch.assert_called_once()
+
+    def test_set_issuer_private_keys(self):
+        other_key = RSA.generate(1024).exportKey("PEM").decode()
+        self._transport.add_encryption_private_key(valid_private_key)
+        kept = self._transport.issuer_private_keys[0]
+        self._transport.issuer_private_keys = [kept, other_key]
+        self.assertEqual(2, len(self._transport.issuer_private_keys))
+        self._transport.issuer_private_keys = [other_key]
+        self.assertEqual([PrivateKeyMaterial(other_key).kid], [
+            key.kid for key in self._transport.issuer_private_keys])
+        self.assertNotIn(faux_kid,
+                         self._transport.loaded_issuer_private_keys)
+
+    def test_appended_issuer_private_key_is_added(self):
+        self._transport.issuer_private_keys.append(
+            RSAKey(key=import_rsa_key(valid_private_key)))
+        self.assertEqual(faux_kid,
+                         self._transport.issuer_private_keys[0].kid)
+        self.assertIn(faux_kid, self._transport.loaded_issuer_private_keys)
+
+    def test_removed_issuer_private_key_is_removed(self):
+        self._transport.add_encryption_private_key(valid_private_key)
+        keys = self._transport.issuer_private_keys
+        keys.remove(keys[0])
+        self.assertEqual([], self._transport.issuer_private_keys)
+
+    def test_unsupported_issuer_private_keys_changes_raise(self):
+        self._transport.add_encryption_private_key(valid_private_key)
+        keys = self._transport.issuer_private_keys
+        with self.assertRaises(TypeError):
+            keys.pop()
+        with self.assertRaises(TypeError):
+            keys[0] = valid_private_key
+        self.assertEqual(1, len(self._transport.issuer_private_keys))
+
     def test_set_url(self):
         self._transport._http_client = MagicMock()
         self._transport.set_url(ANY, ANY)
@@ -738,14 +1132,9 @@ class TestJOSETransportIssuers(unittest.TestCase):
         with self.assertRaises(InvalidPrivateKey):
             self._transport.set_issuer(ANY, uuid4(), "InvalidKey")
 
-    @patch("launchkey.transports.jose_auth.md5")
-    @patch("launchkey.transports.jose_auth.RSA")
-    @patch("launchkey.transports.jose_auth.RSAKey")
-    @patch("launchkey.transports.jose_auth.import_rsa_key")
-    def test_issuer_list(self, rsa_key_patch, import_key_patch, _, md5_patch):
-        rsa_key_patch.return_value = MagicMock(spec=RSAKey)
-        import_key_patch.return_value = MagicMock()
-        md5_patch.return_value.hexdigest.return_value = "9cdfb439c7876e703e307864c9167a15"
+    @patch("launchkey.transports.jose_auth.load_private_key_material")
+    def test_issuer_list(self, load_private_key_material_patch):
+        load_private_key_material_patch.return_value.jwk = MagicMock(spec=RSAKey)
         self._transport.add_encryption_private_key = MagicMock()
         for issuer in VALID_JWT_ISSUER_LIST:
             self._transport.set_issuer(issuer, uuid4(), ANY)
@@ -837,6 +1226,73 @@ class TestJOSETransportAPIPing(unittest.TestCase):
         self.assertEqual(self._transport.get.call_count, call_count)
 
 
+class TestJOSETransportSingleFlightCaches(unittest.TestCase):
+
+    def setUp(self):
+        self._http_client = MagicMock(spec=RequestsTransport)
+        self._transport = JOSETransport(http_client=self._http_client)
+        self._release = threading.Event()
+
+    def _slow_response(self, response):
+        def get(*args, **kwargs):
+            self._release.wait(5)
+            return response
+        return get
+
+    def _call_concurrently(self, function, count=10):
+        with ThreadPoolExecutor(max_workers=count) as executor:
+            futures = [executor.submit(function) for _ in range(count)]
+            # Give every thread the chance to block on the in-flight fetch
+            threading.Event().wait(0.1)
+            self._release.set()
+            return [future.result() for future in futures]
+
+    def test_server_time_difference_fetched_once_for_concurrent_callers(self):
+        self._http_client.get.side_effect = self._slow_response(APIResponse(
+            {"api_time": str(datetime.utcnow())[:19].replace(" ", "T") + "Z"},
+            {}, 200))
+        results = self._call_concurrently(
+            lambda: self._transport.server_time_difference)
+        self._http_client.get.assert_called_once_with("/public/v3/ping",
+                                                      data={})
+        self.assertEqual(1, len(set(results)))
+
+    def test_active_encryption_kid_fetched_once_for_concurrent_callers(self):
+        self._http_client.get.side_effect = self._slow_response(APIResponse(
+            valid_public_key, transport_request_headers, 200))
+        results = self._call_concurrently(
+            self._transport.update_and_return_active_encryption_kid)
+        self._http_client.get.assert_called_once_with("/public/v3/public-key",
+                                                      data={})
+        self.assertEqual([faux_kid] * 10, results)
+
+    def test_public_key_by_kid_fetched_once_for_concurrent_callers(self):
+        self._http_client.get.side_effect = self._slow_response(APIResponse(
+            valid_public_key, transport_request_headers, 200))
+        results = self._call_concurrently(
+            lambda: self._transport._find_key_by_kid(faux_kid))
+        self._http_client.get.assert_called_once_with(
+            "/public/v3/public-key/%s" % faux_kid, data={})
+        self.assertIsInstance(results[0], RSAKey)
+        self.assertEqual(1, len(set(map(id, results))))
+        self.assertEqual({}, self._transport._public_key_fetch_locks)
+
+    def test_public_key_fetch_lock_released_on_failure(self):
+        self._http_client.get.return_value = APIResponse("Not Found", {}, 404)
+        with self.assertRaises(UnexpectedAPIResponse):
+            self._transport._find_key_by_kid(faux_kid)
+        self.assertEqual({}, self._transport._public_key_fetch_locks)
+
+    def test_failed_refresh_is_retried_by_next_caller(self):
+        self._http_client.get.side_effect = [
+            APIResponse({}, {}, 200),
+            APIResponse({"api_time": "2017-01-01T00:00:00Z"}, {}, 200)]
+        with self.assertRaises(UnexpectedAPIResponse):
+            self._transport.server_time_difference
+        self.assertIsNotNone(self._transport.server_time_difference)
+        self.assertEqual(2, self._http_client.get.call_count)
+
+
 @ddt
 class TestJOSETransportSupportedAlgorithms(unittest.TestCase):
     @data("RS256", "RS384", "RS512")
@@ -892,8 +1348,9 @@ class TestCacheAndRetrieveKeyByKid(unittest.TestCase):
             return_value=MagicMock(spec=RsaKey)).start()
         self._jwt_patch = patch("launchkey.transports.jose_auth.JWT", return_value=MagicMock(spec=JWT)).start()
         self._jwt_patch.return_value.unpack.return_value.headers = faux_jwt_headers
-        self._jws_patch = patch("launchkey.transports.jose_auth.JWS", return_value=MagicMock(spec=JWS)).start()
-        self._jws_patch.return_value.verify_compact.return_value = minified_jwt_payload
+        self._get_jwt_payload_patch = patch.object(
+            JOSETransport, "_get_jwt_payload",
+            return_value=minified_jwt_payload).start()
 
         patch.object(JOSETransport, "_verify_jwt_payload").start()
         patch.object(JOSETransport, "_verify_jwt_response_headers").start()
@@ -941,10 +1398,11 @@ class TestCacheAndRetrieveKeyByKid(unittest.TestCase):
         self._requests_transport.get.return_value.data = valid_public_key
         self._transport.verify_jwt_response(MagicMock(), self.jti, ANY, None)
 
-        # Verify that verify_compact is called one time with key created
-        # by our jwkest key patch
-        self._jws_patch.return_value.verify_compact\
-            .assert_called_once_with(ANY, keys=[rsa_key_patch.return_value])
+        # Verify that the payload is verified one time with only the key
+        # created by our jwkest key patch
+        self._get_jwt_payload_patch.assert_called_once_with(
+            self._jwt_patch.return_value.unpack.return_value,
+            rsa_key_patch.return_value)
 
         # Assert that the jwkest key patch is built using the import_rsa_key
         # patch return value and the key id from the header
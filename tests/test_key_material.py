@@ -0,0 +1,123 @@
+import unittest
+
+from Cryptodome.PublicKey import RSA
+from jwkest.jwk import RSAKey
+from mock import patch
+
+from launchkey.transports import JOSETransport, PrivateKeyMaterial
+from launchkey.transports.key_material import load_private_key_material
+
+from .test_jose_auth_transport import valid_private_key
+
+ISSUER_ID = "e5a0c2de-4f8e-11e8-9c2d-fa7ae01bbebc"
+VALID_KID = "59:12:e2:f6:3f:79:d5:1e:18:75:c5:25:ff:b3:b7:f2"
+
+
+class TestPrivateKeyMaterial(unittest.TestCase):
+
+    def test_kid_is_public_key_fingerprint(self):
+        self.assertEqual(VALID_KID, PrivateKeyMaterial(valid_private_key).kid)
+
+    def test_jwk_uses_kid(self):
+        material = PrivateKeyMaterial(valid_private_key)
+        self.assertEqual(VALID_KID, material.jwk.kid)
+        self.assertIs(material.rsa_key, material.jwk.key)
+
+    def test_retains_pem(self):
+        self.assertEqual(valid_private_key,
+                         PrivateKeyMaterial(valid_private_key).pem)
+
+    def test_invalid_key_raises_value_error(self):
+        with self.assertRaises(ValueError):
+            PrivateKeyMaterial("invalid")
+
+
+class TestLoadPrivateKeyMaterial(unittest.TestCase):
+
+    def setUp(self):
+        self._cache = {}
+
+    def test_returns_material_as_is(self):
+        material = PrivateKeyMaterial(valid_private_key)
+        self.assertIs(material, load_private_key_material(material,
+                                                          self._cache))
+        self.assertEqual({}, self._cache)
+
+    def test_same_pem_returns_same_material(self):
+        self.assertIs(load_private_key_material(valid_private_key, self._cache),
+                      load_private_key_material(valid_private_key, self._cache))
+
+    @patch("launchkey.transports.key_material.RSA.importKey",
+           wraps=RSA.importKey)
+    def test_same_pem_parsed_once(self, import_key_patch):
+        load_private_key_material(valid_private_key, self._cache)
+        load_private_key_material(valid_private_key, self._cache)
+        import_key_patch.assert_called_once_with(valid_private_key)
+
+    def test_without_cache_parses_every_time(self):
+        self.assertIsNot(load_private_key_material(valid_private_key),
+                         load_private_key_material(valid_private_key))
+
+    def test_rsa_key_is_parsed(self):
+        key = RSAKey(key=RSA.importKey(valid_private_key))
+        self.assertEqual(VALID_KID,
+                         load_private_key_material(key, self._cache).kid)
+
+    def test_unhashable_key_is_parsed(self):
+        self.assertEqual(
+            VALID_KID,
+            load_private_key_material(bytearray(valid_private_key, "utf-8"),
+                                      self._cache).kid)
+        self.assertEqual({}, self._cache)
+
+    def test_invalid_key_raises_value_error(self):
+        with self.assertRaises(ValueError):
+            load_private_key_material("invalid")
+
+
+class TestJOSETransportPrivateKeyMaterial(unittest.TestCase):
+
+    def setUp(self):
+        self._material = PrivateKeyMaterial(valid_private_key)
+        self._transport = JOSETransport()
+
+    def test_set_issuer_accepts_material(self):
+        self._transport.set_issuer("svc", ISSUER_ID, self._material)
+        self.assertIs(self._material.jwk, self._transport.signing_key)
+
+    def test_add_encryption_private_key_accepts_material(self):
+        self.assertTrue(
+            self._transport.add_encryption_private_key(self._material))
+        self.assertEqual([self._material.jwk],
+                         self._transport.issuer_private_keys)
+
+    def test_material_shared_across_transports(self):
+        other = JOSETransport()
+        self._transport.set_issuer("svc", ISSUER_ID, self._material)
+        other.set_issuer("dir", ISSUER_ID, self._material)
+        self.assertIs(self._transport.signing_key, other.signing_key)
+
+    def test_signing_and_encryption_key_parsed_once(self):
+        self._transport.set_issuer("svc", ISSUER_ID, valid_private_key)
+        self._transport.add_encryption_private_key(valid_private_key)
+        self.assertEqual([self._transport.signing_key],
+                         self._transport.issuer_private_keys)
+
+    def test_removed_key_still_signing_is_retained(self):
+        self._transport.set_issuer("svc", ISSUER_ID, valid_private_key)
+        self._transport.add_encryption_private_key(valid_private_key)
+        self._transport.remove_encryption_private_key(VALID_KID)
+        self.assertEqual([VALID_KID], [
+            material.kid
+            for material in self._transport._key_materials.values()])
+
+    def test_removed_key_is_evicted(self):
+        self._transport.add_encryption_private_key(valid_private_key)
+        self._transport.remove_encryption_private_key(VALID_KID)
+        self.assertEqual({}, self._transport._key_materials)
+
+    def test_rotated_signing_key_is_evicted(self):
+        self._transport.set_issuer("svc", ISSUER_ID, valid_private_key)
+        new_key = RSA.generate(1024).exportKey("PEM").decode()
+        self._transport.set_issuer("svc", ISSUER_ID, new_key)
+        self.assertEqual([new_key], list(self._transport._key_materials))
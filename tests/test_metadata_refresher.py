@@ -0,0 +1,255 @@
+import asyncio
+import unittest
+from time import time
+
+from mock import MagicMock, patch
+
+from launchkey import API_CACHE_TIME
+from launchkey.exceptions import UnexpectedAPIResponse
+from launchkey.transports import JOSETransport, RequestsTransport, \
+    AsyncJOSETransport
+from launchkey.transports.base import APIResponse
+from launchkey.transports.refresher import MetadataRefresher, \
+    AsyncMetadataRefresher, _RefreshTask
+
+from .test_jose_auth_transport import valid_public_key, faux_kid, \
+    transport_request_headers
+
+
+class TestRefreshTask(unittest.TestCase):
+
+    def setUp(self):
+        self._refresh = MagicMock()
+        self._refreshed_at = MagicMock(return_value=None)
+        self._task = _RefreshTask(self._refresh, self._refreshed_at, 30, 1, 8)
+
+    def test_never_refreshed_is_due_immediately(self):
+        self._task.run(1000)
+        self._refresh.assert_called_once_with()
+
+    def test_not_refreshed_before_refresh_ahead(self):
+        self._refreshed_at.return_value = 1000
+        next_due = self._task.run(1000 + API_CACHE_TIME - 31)
+        self._refresh.assert_not_called()
+        self.assertEqual(1, next_due)
+
+    def test_refreshed_within_refresh_ahead(self):
+        self._refreshed_at.return_value = 1000
+        self._task.run(1000 + API_CACHE_TIME - 30)
+        self._refresh.assert_called_once_with()
+
+    def test_returns_time_until_next_refresh(self):
+        def refresh():
+            self._refreshed_at.return_value = 1000
+        self._refresh.side_effect = refresh
+        self.assertEqual(API_CACHE_TIME - 30, self._task.run(1000))
+
+    def test_failures_back_off_exponentially_up_to_max(self):
+        error = UnexpectedAPIResponse("error")
+        self._refresh.side_effect = error
+        now = 1000
+        delays = []
+        for _ in range(5):
+            delay = self._task.run(now)
+            delays.append(delay)
+            self.assertEqual(0.5, self._task.run(now + delay - 0.5))
+            now += delay
+        self.assertEqual([1, 2, 4, 8, 8], delays)
+        self.assertEqual(5, self._refresh.call_count)
+        self.assertEqual(5, self._task.failures)
+        self.assertEqual(error, self._task.last_error)
+
+    def test_success_resets_failures(self):
+        self._refresh.side_effect = [UnexpectedAPIResponse("error"), None]
+        self._task.run(1000)
+        self._task.run(1001)
+        self.assertEqual(2, self._refresh.call_count)
+        self.assertEqual(0, self._task.failures)
+        self.assertIsNone(self._task.last_error)
+
+    def test_run_async_awaits_refresh(self):
+        async def refresh():
+            self._refreshed_at.return_value = 1000
+        self._refresh.side_effect = refresh
+        self.assertEqual(API_CACHE_TIME - 30,
+                         asyncio.run(self._task.run_async(1000)))
+
+    def test_run_async_failure_backs_off(self):
+        error = UnexpectedAPIResponse("error")
+
+        async def refresh():
+            raise error
+        self._refresh.side_effect = refresh
+        self.assertEqual(1, asyncio.run(self._task.run_async(1000)))
+        self.assertEqual(error, self._task.last_error)
+
+
+class TestMetadataRefresher(unittest.TestCase):
+
+    def setUp(self):
+        self._transport = MagicMock()
+        self._transport._server_time_difference = None, None
+        self._transport._current_kid = None, None
+
+    def test_invalid_refresh_ahead(self):
+        with self.assertRaises(ValueError):
+            MetadataRefresher(self._transport, refresh_ahead=API_CACHE_TIME)
+        with self.assertRaises(ValueError):
+            MetadataRefresher(self._transport, refresh_ahead=-1)
+
+    def test_run_once_forces_refresh_of_due_metadata(self):
+        MetadataRefresher(self._transport).run_once()
+        self._transport._refresh_server_time_difference.assert_called_once_with(
+            force=True)
+        self._transport._refresh_active_encryption_kid.assert_called_once_with(
+            force=True)
+
+    def test_run_once_skips_fresh_metadata(self):
+        now = int(time())
+        self._transport._server_time_difference = 0, now
+        self._transport._current_kid = faux_kid, now
+        MetadataRefresher(self._transport).run_once()
+        self._transport._refresh_server_time_difference.assert_not_called()
+        self._transport._refresh_active_encryption_kid.assert_not_called()
+
+    def test_start_and_stop(self):
+        refresher = MetadataRefresher(self._transport)
+        refresher.start()
+        self.assertTrue(refresher.running)
+        refresher.stop(5)
+        self.assertFalse(refresher.running)
+
+
+class TestJOSETransportBackgroundRefresh(unittest.TestCase):
+
+    def setUp(self):
+        self._http_client = MagicMock(spec=RequestsTransport)
+        self._http_client.get.side_effect = self._get
+        self._transport = JOSETransport(http_client=self._http_client)
+        self.addCleanup(self._transport.stop_background_refresh)
+
+    @staticmethod
+    def _get(path, **kwargs):
+        if path == "/public/v3/ping":
+            return APIResponse({"api_time": "2017-01-01T00:00:00Z"}, {}, 200)
+        return APIResponse(valid_public_key, transport_request_headers, 200)
+
+    def test_start_fetches_metadata_in_background(self):
+        refresher = self._transport.start_background_refresh()
+        self.assertTrue(refresher.running)
+        self._transport.stop_background_refresh(5)
+        self.assertFalse(refresher.running)
+        self.assertIsNotNone(self._transport._server_time_difference[1])
+        self.assertEqual(faux_kid, self._transport._current_kid[0])
+
+    def test_expired_values_served_while_refresher_runs(self):
+        self._transport._server_time_difference = 10, 0
+        self._transport._current_kid = "old-kid", 0
+        self._transport._metadata_refresher = MagicMock(running=True)
+        self.assertEqual(10, self._transport.server_time_difference)
+        self.assertEqual("old-kid",
+                         self._transport.update_and_return_active_encryption_kid())
+        self._http_client.get.assert_not_called()
+
+    def test_missing_values_fetched_inline_while_refresher_runs(self):
+        self._transport._metadata_refresher = MagicMock(running=True)
+        self._transport.server_time_difference
+        self.assertEqual(faux_kid,
+                         self._transport.update_and_return_active_encryption_kid())
+        self.assertEqual(2, self._http_client.get.call_count)
+
+    def test_expired_values_fetched_inline_when_refresher_stopped(self):
+        self._transport._server_time_difference = 10, 0
+        self._transport._metadata_refresher = MagicMock(running=False)
+        self.assertNotEqual(10, self._transport.server_time_difference)
+        self._http_client.get.assert_called_once()
+
+    def test_forced_refresh_ignores_cache(self):
+        self._transport._server_time_difference = 10, int(time())
+        self._transport._refresh_server_time_difference(force=True)
+        self._http_client.get.assert_called_once_with("/public/v3/ping",
+                                                      data={})
+
+    def test_restart_replaces_refresher(self):
+        with patch("launchkey.transports.jose_auth.MetadataRefresher") as \
+                refresher_patch:
+            first = self._transport.start_background_refresh()
+            self._transport.start_background_refresh(refresh_ahead=10)
+            first.stop.assert_called_once_with(None)
+            refresher_patch.assert_called_with(self._transport, 10, 1, 60)
+
+
+class TestAsyncMetadataRefresher(unittest.TestCase):
+
+    def setUp(self):
+        self._transport = MagicMock()
+        self._transport._server_time_difference = None, None
+        self._transport._current_kid = None, None
+        self._transport._refresh_server_time_difference.side_effect = \
+            lambda force: asyncio.sleep(0)
+        self._transport._refresh_active_encryption_kid.side_effect = \
+            lambda force: asyncio.sleep(0)
+
+    def test_run_once_forces_refresh_of_due_metadata(self):
+        asyncio.run(AsyncMetadataRefresher(self._transport).run_once())
+        self._transport._refresh_server_time_difference.assert_called_once_with(
+            force=True)
+        self._transport._refresh_active_encryption_kid.assert_called_once_with(
+            force=True)
+
+    def test_start_and_stop(self):
+        async def _test():
+            refresher = AsyncMetadataRefresher(self._transport)
+            refresher.start()
+            self.assertTrue(refresher.running)
+            await asyncio.sleep(0)
+            refresher.stop()
+            self.assertFalse(refresher.running)
+        asyncio.run(_test())
+        self._transport._refresh_server_time_difference.assert_called_once_with(
+            force=True)
+
+    def test_start_requires_running_loop(self):
+        with self.assertRaises(RuntimeError):
+            AsyncMetadataRefresher(self._transport).start()
+
+
+class TestAsyncJOSETransportBackgroundRefresh(unittest.TestCase):
+
+    def setUp(self):
+        self._http_client = MagicMock()
+        self._http_client.get.side_effect = self._get
+        self._transport = AsyncJOSETransport(http_client=self._http_client)
+
+    @staticmethod
+    async def _get(path, **kwargs):
+        return TestJOSETransportBackgroundRefresh._get(path, **kwargs)
+
+    def test_start_fetches_metadata_in_background(self):
+        async def _test():
+            refresher = self._transport.start_background_refresh()
+            self.assertIsInstance(refresher, AsyncMetadataRefresher)
+            while self._transport._current_kid[0] is None:
+                await asyncio.sleep(0)
+            self._transport.stop_background_refresh()
+            self.assertFalse(refresher.running)
+        asyncio.run(_test())
+        self.assertIsNotNone(self._transport._server_time_difference[1])
+        self.assertEqual(faux_kid, self._transport._current_kid[0])
+
+    def test_expired_values_served_while_refresher_runs(self):
+        self._transport._server_time_difference = 10, 0
+        self._transport._current_kid = "old-kid", 0
+        self._transport._metadata_refresher = MagicMock(running=True)
+        self.assertEqual(10, asyncio.run(
+            self._transport.refresh_server_time_difference()))
+        self.assertEqual("old-kid", asyncio.run(
+            self._transport.refresh_active_encryption_kid()))
+        self._http_client.get.assert_not_called()
+
+    def test_forced_refresh_ignores_cache(self):
+        self._transport._server_time_difference = 10, int(time())
+        asyncio.run(self._transport._refresh_server_time_difference(
+            force=True))
+        self._http_client.get.assert_called_once_with("/public/v3/ping",
+                                                      data={})
@@ -0,0 +1,260 @@
+import asyncio
+import unittest
+from time import time
+
+from mock import MagicMock
+
+from launchkey.clients.base import api_call, async_api_call
+from launchkey.exceptions import LaunchKeyAPIException, RateLimited, \
+    EntityNotFound, JWTValidationFailure, XiovJWTValidationFailure, \
+    WebhookAuthorizationError, XiovJWTDecryptionFailure, UnexpectedAPIResponse
+from launchkey.transports import JOSETransport, AsyncJOSETransport
+from launchkey.utils.metrics import MetricsRegistry, Counter, \
+    HistogramMetric, CallbackMetric, SDKMetrics, GAUGE, enable_metrics, \
+    disable_metrics, active_metrics
+from launchkey.utils.shared import XiovJWTService
+from jwkest import JWKESTException
+
+
+class TestMetricsRegistry(unittest.TestCase):
+
+    def setUp(self):
+        self._registry = MetricsRegistry()
+
+    def test_counter_exposition(self):
+        counter = self._registry.register(
+            Counter("calls_total", "Calls made", ("method",)))
+        counter.inc("b")
+        counter.inc("a", amount=2)
+        counter.inc("b")
+        self.assertEqual(
+            '# HELP calls_total Calls made\n'
+            '# TYPE calls_total counter\n'
+            'calls_total{method="a"} 2\n'
+            'calls_total{method="b"} 2\n',
+            self._registry.expose())
+        self.assertEqual(2, counter.value("a"))
+
+    def test_counter_without_labels(self):
+        counter = self._registry.register(Counter("events_total", "Events"))
+        counter.inc()
+        self.assertIn("\nevents_total 1\n", self._registry.expose())
+
+    def test_label_values_are_escaped(self):
+        counter = self._registry.register(
+            Counter("calls_total", "Calls", ("method",)))
+        counter.inc('a"b\\c\nd')
+        self.assertIn('calls_total{method="a\\"b\\\\c\\nd"} 1',
+                      self._registry.expose())
+
+    def test_histogram_exposition(self):
+        histogram = self._registry.register(HistogramMetric(
+            "duration_seconds", "Duration", ("method",), buckets=(0.1, 1.0)))
+        histogram.observe(0.05, "a")
+        histogram.observe(0.5, "a")
+        histogram.observe(5, "a")
+        self.assertEqual(
+            '# HELP duration_seconds Duration\n'
+            '# TYPE duration_seconds histogram\n'
+            'duration_seconds_bucket{method="a",le="0.1"} 1\n'
+            'duration_seconds_bucket{method="a",le="1.0"} 2\n'
+            'duration_seconds_bucket{method="a",le="+Inf"} 3\n'
+            'duration_seconds_sum{method="a"} 5.55\n'
+            'duration_seconds_count{method="a"} 3\n',
+            self._registry.expose())
+
+    def test_callback_metric_exposition(self):
+        self._registry.register(CallbackMetric(
+            "ratio", "Ratio", GAUGE, lambda: {(): 0.5}))
+        self.assertEqual("# HELP ratio Ratio\n# TYPE ratio gauge\nratio 0.5\n",
+                         self._registry.expose())
+
+    def test_duplicate_name_raises_value_error(self):
+        self._registry.register(Counter("calls_total", "Calls"))
+        with self.assertRaises(ValueError):
+            self._registry.register(Counter("calls_total", "Calls"))
+
+    def test_get(self):
+        counter = self._registry.register(Counter("calls_total", "Calls"))
+        self.assertIs(counter, self._registry.get("calls_total"))
+        self.assertIsNone(self._registry.get("other"))
+
+
+class TestEnableMetrics(unittest.TestCase):
+
+    def tearDown(self):
+        disable_metrics()
+
+    def test_disabled_by_default(self):
+        self.assertIsNone(active_metrics())
+
+    def test_enable_creates_metrics(self):
+        metrics = enable_metrics()
+        self.assertIsInstance(metrics, SDKMetrics)
+        self.assertIs(metrics, active_metrics())
+
+    def test_enable_with_metrics(self):
+        metrics = SDKMetrics(MetricsRegistry())
+        self.assertIs(metrics, enable_metrics(metrics))
+
+    def test_disable(self):
+        enable_metrics()
+        disable_metrics()
+        self.assertIsNone(active_metrics())
+
+
+class Client(object):
+
+    def __init__(self, transport=None):
+        self._transport = transport
+
+    @api_call
+    def call(self, error=None):
+        if error is not None:
+            raise error
+        return "result"
+
+    @async_api_call
+    async def async_call(self, error=None):
+        if error is not None:
+            raise error
+        return "result"
+
+
+class TestAPICallMetrics(unittest.TestCase):
+
+    def setUp(self):
+        self._metrics = enable_metrics()
+        self.addCleanup(disable_metrics)
+        self._client = Client()
+
+    def test_success(self):
+        self.assertEqual("result", self._client.call())
+        self.assertEqual(1, self._metrics.api_calls.value("Client.call"))
+        self.assertEqual(1, self._metrics.api_call_duration
+                         .histogram("Client.call").count)
+        self.assertNotIn("launchkey_api_errors_total{",
+                         self._metrics.registry.expose())
+
+    def test_mapped_error(self):
+        with self.assertRaises(EntityNotFound):
+            self._client.call(LaunchKeyAPIException({}, 404))
+        self.assertEqual(1, self._metrics.api_errors.value(
+            "Client.call", "EntityNotFound"))
+        self.assertEqual(0, self._metrics.rate_limited.value("Client.call"))
+
+    def test_rate_limited(self):
+        with self.assertRaises(RateLimited):
+            self._client.call(LaunchKeyAPIException({}, 429))
+        self.assertEqual(1, self._metrics.rate_limited.value("Client.call"))
+        self.assertEqual(1, self._metrics.api_errors.value(
+            "Client.call", "RateLimited"))
+
+    def test_async_call(self):
+        with self.assertRaises(RateLimited):
+            asyncio.run(self._client.async_call(
+                LaunchKeyAPIException({}, 429)))
+        self.assertEqual("result", asyncio.run(self._client.async_call()))
+        self.assertEqual(2, self._metrics.api_calls.value(
+            "Client.async_call"))
+        self.assertEqual(1, self._metrics.rate_limited.value(
+            "Client.async_call"))
+
+    def test_no_metrics_when_disabled(self):
+        disable_metrics()
+        self.assertEqual("result", self._client.call())
+        self.assertEqual(0, self._metrics.api_calls.value("Client.call"))
+
+    def test_client_transport_cache_stats_are_exported(self):
+        transport = JOSETransport()
+        transport._server_time_difference = 0, int(time())
+        transport.server_time_difference
+        transport._public_key_cache.get("kid")
+        Client(transport).call()
+        exposed = self._metrics.registry.expose()
+        self.assertIn('launchkey_server_time_cache_requests_total'
+                      '{result="hits"} 1', exposed)
+        self.assertIn("launchkey_server_time_cache_hit_ratio 1.0", exposed)
+        self.assertIn('launchkey_public_key_cache_requests_total'
+                      '{result="misses"} 1', exposed)
+        self.assertIn("launchkey_public_key_cache_hit_ratio 0.0", exposed)
+
+    def test_no_ratio_without_lookups(self):
+        Client(JOSETransport()).call()
+        self.assertNotIn("launchkey_public_key_cache_hit_ratio 0",
+                         self._metrics.registry.expose())
+
+
+class TestWebhookVerificationMetrics(unittest.TestCase):
+
+    def setUp(self):
+        self._metrics = enable_metrics()
+        self.addCleanup(disable_metrics)
+        self._transport = MagicMock()
+        self._service = XiovJWTService(self._transport, "svc:id")
+        self._headers = {"X-IOV-JWT": "jwt"}
+
+    def _verifications(self, outcome):
+        return self._metrics.webhook_verifications.value(outcome)
+
+    def test_valid(self):
+        self._service.verify_jwt_request("body", self._headers, "POST", "/")
+        self.assertEqual(1, self._verifications("valid"))
+        self.assertIn(self._transport, self._metrics._transports)
+
+    def test_missing_jwt(self):
+        with self.assertRaises(WebhookAuthorizationError):
+            self._service.verify_jwt_request("body", {}, "POST", "/")
+        self.assertEqual(1, self._verifications("missing_jwt"))
+
+    def test_invalid(self):
+        self._transport.verify_jwt_request.side_effect = JWTValidationFailure
+        with self.assertRaises(XiovJWTValidationFailure):
+            self._service.verify_jwt_request("body", self._headers, "POST",
+                                             "/")
+        self.assertEqual(1, self._verifications("invalid"))
+
+    def test_unknown_key(self):
+        self._transport.verify_jwt_request.side_effect = \
+            UnexpectedAPIResponse("Key was not found.")
+        with self.assertRaises(UnexpectedAPIResponse):
+            self._service.verify_jwt_request("body", self._headers, "POST",
+                                             "/")
+        self.assertEqual(1, self._verifications("unknown_key"))
+
+    def test_missing_kid(self):
+        self._transport.verify_jwt_request.side_effect = KeyError("kid")
+        with self.assertRaises(KeyError):
+            self._service.verify_jwt_request("body", self._headers, "POST",
+                                             "/")
+        self.assertEqual(1, self._verifications("unknown_key"))
+
+    def test_decryption_failed(self):
+        self._transport.decrypt_response.side_effect = JWKESTException
+        with self.assertRaises(XiovJWTDecryptionFailure):
+            self._service.decrypt_jwe("body", self._headers, "POST", "/")
+        self.assertEqual(1, self._verifications("valid"))
+        self.assertEqual(1, self._verifications("decryption_failed"))
+
+
+class TestServerTimeCacheStats(unittest.TestCase):
+
+    def test_sync_hits_and_misses(self):
+        transport = JOSETransport()
+        transport._refresh_server_time_difference = MagicMock()
+        transport.server_time_difference
+        transport._server_time_difference = 0, int(time())
+        transport.server_time_difference
+        transport.server_time_difference
+        self.assertEqual({"hits": 2, "misses": 1},
+                         transport.server_time_cache_stats)
+
+    def test_async_hits_and_misses(self):
+        transport = AsyncJOSETransport(http_client=MagicMock())
+        transport._load_shared_server_time_difference = MagicMock(
+            return_value=True)
+        asyncio.run(transport.refresh_server_time_difference())
+        transport._server_time_difference = 0, int(time())
+        asyncio.run(transport.refresh_server_time_difference())
+        self.assertEqual({"hits": 1, "misses": 1},
+                         transport.server_time_cache_stats)
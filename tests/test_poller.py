@@ -0,0 +1,323 @@
+import asyncio
+import unittest
+
+import requests
+from ddt import ddt, data, unpack
+from mock import MagicMock, patch
+
+from launchkey.clients import AuthorizationResponsePoller, \
+    AsyncAuthorizationResponsePoller, ResponseLatencyModel
+from launchkey.clients.poller import PendingAuthorization, PollSchedule
+from launchkey.exceptions import AuthorizationRequestCanceled, \
+    DeadlineExceeded, EntityNotFound, RateLimited, RequestTimedOut
+
+
+class TestPollSchedule(unittest.TestCase):
+
+    def test_pops_due_in_time_order(self):
+        schedule = PollSchedule()
+        first, second, third = (PendingAuthorization(i, None, 0.0)
+                                for i in range(3))
+        schedule.push(2.0, second)
+        schedule.push(5.0, third)
+        schedule.push(1.0, first)
+        self.assertEqual(1.0, schedule.next_time())
+        self.assertEqual([first, second], schedule.pop_due(2.0))
+        self.assertEqual(1, len(schedule))
+        self.assertEqual([third], schedule.clear())
+        self.assertIsNone(schedule.next_time())
+
+    def test_same_time_is_first_in_first_out(self):
+        schedule = PollSchedule()
+        entries = [PendingAuthorization(i, None, 0.0) for i in range(3)]
+        for entry in entries:
+            schedule.push(1.0, entry)
+        self.assertEqual(entries, schedule.pop_due(1.0))
+
+    def test_expired(self):
+        self.assertFalse(PendingAuthorization("id", None, 0.0).expired(9e9))
+        pending = PendingAuthorization("id", None, 0.0, 5.0)
+        self.assertFalse(pending.expired(4.9))
+        self.assertTrue(pending.expired(5.0))
+
+
+class TestAuthorizationResponsePoller(unittest.TestCase):
+
+    def setUp(self):
+        self._client = MagicMock()
+        self._poller = AuthorizationResponsePoller(
+            self._client, interval=0.01, max_workers=2)
+        self.addCleanup(self._poller.close)
+
+    def test_resolves_with_response(self):
+        response = MagicMock()
+        self._client.get_advanced_authorization_response.side_effect = \
+            [None, None, response]
+        future = self._poller.submit("auth-id")
+        self.assertEqual(response, future.result(5))
+        self._client.get_advanced_authorization_response.assert_called_with(
+            "auth-id")
+        self.assertEqual(3, self._poller.stats["polls"])
+        self.assertEqual(0, self._poller.pending)
+
+    def test_callback_is_given_the_future(self):
+        self._client.get_advanced_authorization_response.return_value = "resp"
+        callback = MagicMock()
+        future = self._poller.submit("auth-id", callback=callback)
+        future.result(5)
+        callback.assert_called_once_with(future)
+
+    def test_many_requests(self):
+        self._client.get_advanced_authorization_response.side_effect = \
+            lambda auth_id: auth_id
+        futures = [self._poller.submit(i) for i in range(200)]
+        self.assertEqual(list(range(200)), [f.result(5) for f in futures])
+        self.assertEqual(200, self._poller.stats["completed"])
+
+    def test_final_errors_are_set_on_the_future(self):
+        for error in (RequestTimedOut(), AuthorizationRequestCanceled(),
+                      EntityNotFound()):
+            self._client.get_advanced_authorization_response.side_effect = \
+                error
+            with self.assertRaises(type(error)):
+                self._poller.submit("auth-id").result(5)
+
+    def test_transient_errors_are_polled_again(self):
+        http_error = requests.exceptions.HTTPError(
+            response=MagicMock(status_code=503))
+        self._client.get_advanced_authorization_response.side_effect = [
+            requests.exceptions.ConnectionError(), RateLimited(), http_error,
+            "resp"]
+        self.assertEqual("resp", self._poller.submit("auth-id").result(5))
+
+    def test_deadline_cancels_authorization_request(self):
+        self._client.get_advanced_authorization_response.return_value = None
+        future = self._poller.submit("auth-id", deadline=0.05)
+        with self.assertRaises(DeadlineExceeded):
+            future.result(5)
+        self._client.cancel_authorization_request.assert_called_once_with(
+            "auth-id")
+        self.assertEqual(1, self._poller.stats["expired"])
+
+    def test_deadline_ignores_cancel_errors(self):
+        self._client.get_advanced_authorization_response.return_value = None
+        self._client.cancel_authorization_request.side_effect = \
+            AuthorizationRequestCanceled()
+        with self.assertRaises(DeadlineExceeded):
+            self._poller.submit("auth-id", deadline=0.0).result(5)
+
+    def test_canceled_future_stops_polling(self):
+        poller = AuthorizationResponsePoller(self._client, interval=60.0)
+        future = poller.submit("auth-id")
+        self.assertTrue(future.cancel())
+        poller._poll(poller._schedule.pop_due(9e99)[0])
+        poller.close()
+        self._client.get_advanced_authorization_response.assert_not_called()
+        self.assertEqual(1, poller.stats["cancelled"])
+
+    def test_resolved_elsewhere_stops_polling(self):
+        poller = AuthorizationResponsePoller(self._client, interval=60.0)
+        future = poller.submit("auth-id")
+        future.set_result("webhook response")
+        pending = poller._schedule.pop_due(9e99)[0]
+        pending.polls = 2
+        poller._poll(pending)
+        poller.close()
+        self._client.get_advanced_authorization_response.assert_not_called()
+        self.assertEqual(1, poller.stats["resolved_elsewhere"])
+        self.assertEqual(2.0, poller.stats["polls_per_authorization"])
+
+    def test_close_cancels_pending(self):
+        poller = AuthorizationResponsePoller(self._client, interval=60.0)
+        future = poller.submit("auth-id")
+        poller.close()
+        self.assertTrue(future.cancelled())
+        self.assertEqual(1, poller.stats["cancelled"])
+        with self.assertRaises(RuntimeError):
+            poller.submit("auth-id")
+
+    @patch("launchkey.clients.poller.monotonic", MagicMock(return_value=0.0))
+    def test_first_poll_is_not_after_deadline(self):
+        poller = AuthorizationResponsePoller(self._client, interval=60.0)
+        poller.submit("auth-id", deadline=2.0)
+        self.assertEqual(2.0, poller._schedule.next_time())
+        poller.close()
+
+
+class TestAsyncAuthorizationResponsePoller(unittest.TestCase):
+
+    def setUp(self):
+        self._client = MagicMock()
+        self._responses = []
+        self._active = []
+        self._max_active = []
+
+        async def _get(authorization_request_id):
+            self._active.append(authorization_request_id)
+            self._max_active.append(len(self._active))
+            await asyncio.sleep(0)
+            self._active.remove(authorization_request_id)
+            response = self._responses.pop(0) if self._responses else None
+            if isinstance(response, Exception):
+                raise response
+            return response
+        self._client.get_advanced_authorization_response = _get
+        self._client.cancel_authorization_request = MagicMock(
+            side_effect=lambda _: asyncio.sleep(0))
+
+    def _run(self, coroutine_function):
+        async def _test():
+            async with AsyncAuthorizationResponsePoller(
+                    self._client, interval=0.01,
+                    max_concurrency=3) as poller:
+                return await coroutine_function(poller)
+        return asyncio.run(_test())
+
+    def test_resolves_with_response(self):
+        self._responses = [None, RateLimited(), "resp"]
+
+        async def _test(poller):
+            return await poller.submit("auth-id")
+        self.assertEqual("resp", self._run(_test))
+
+    def test_final_error(self):
+        self._responses = [RequestTimedOut()]
+
+        async def _test(poller):
+            await poller.submit("auth-id")
+        with self.assertRaises(RequestTimedOut):
+            self._run(_test)
+
+    def test_concurrency_is_bounded(self):
+        self._responses = ["resp"] * 20
+
+        async def _test(poller):
+            return await asyncio.gather(
+                *(poller.submit(i) for i in range(20)))
+        self.assertEqual(["resp"] * 20, self._run(_test))
+        self.assertLessEqual(max(self._max_active), 3)
+
+    def test_deadline_cancels_authorization_request(self):
+        async def _test(poller):
+            await poller.submit("auth-id", deadline=0.03)
+        with self.assertRaises(DeadlineExceeded):
+            self._run(_test)
+        self._client.cancel_authorization_request.assert_called_once_with(
+            "auth-id")
+
+    def test_close_cancels_pending(self):
+        async def _test(poller):
+            future = poller.submit("auth-id")
+            await poller.aclose()
+            self.assertEqual(1, poller.stats["cancelled"])
+            return future
+        self.assertTrue(self._run(_test).cancelled())
+
+    def test_resolved_elsewhere_stops_polling(self):
+        async def _test(poller):
+            future = poller.submit("auth-id", delay=0.0)
+            future.set_result("webhook response")
+            while not poller.stats["resolved_elsewhere"]:
+                await asyncio.sleep(0)
+            return await future
+        self.assertEqual("webhook response", self._run(_test))
+        self.assertEqual([], self._active + self._max_active)
+
+
+@ddt
+class TestResponseLatencyModel(unittest.TestCase):
+
+    def setUp(self):
+        self._model = ResponseLatencyModel(
+            min_interval=0.5, max_interval=30.0, target_probability=0.1,
+            min_samples=10, window_size=100)
+
+    def test_default_until_enough_samples(self):
+        for _ in range(9):
+            self._model.record("svc:a", 5.0)
+        self.assertEqual(2.0, self._model.get_interval("svc:a", 0.0, 2.0))
+        self.assertEqual(2.0, self._model.get_interval("svc:b", 0.0, 2.0))
+
+    @data((0.0, 1.0), (4.0, 1.0), (9.0, 1.0), (9.5, 0.5), (19.0, 1.0),
+          (20.0, 10.0), (99.0, 1.0), (100.0, 30.0))
+    @unpack
+    def test_interval_follows_distribution(self, elapsed, expected):
+        # Responses every second from 1 to 10, then every 10 seconds to 100
+        for seconds in list(range(1, 11)) + list(range(20, 101, 10)):
+            self._model.record("svc:a", float(seconds))
+        self.assertEqual(expected,
+                         self._model.get_interval("svc:a", elapsed, 2.0))
+
+    def test_dense_where_responses_arrive(self):
+        for seconds in range(100):
+            self._model.record("svc:a", 5.0 + seconds / 100.0)
+        self.assertAlmostEqual(1.09,
+                               self._model.get_interval("svc:a", 4.0, 2.0))
+        self.assertEqual(0.5, self._model.get_interval("svc:a", 5.0, 2.0))
+        self.assertEqual(30.0, self._model.get_interval("svc:a", 7.0, 2.0))
+
+    def test_window_forgets_oldest(self):
+        model = ResponseLatencyModel(min_samples=1, window_size=2)
+        for seconds in (1.0, 2.0, 3.0):
+            model.record("svc:a", seconds)
+        self.assertEqual({"svc:a": {"samples": 2, "median": 2.0, "p90": 2.0}},
+                         model.stats)
+
+    def test_invalid_target_probability(self):
+        with self.assertRaises(ValueError):
+            ResponseLatencyModel(target_probability=0)
+
+
+@patch("launchkey.clients.poller.monotonic", MagicMock(return_value=0.0))
+class TestAdaptivePolling(unittest.TestCase):
+
+    def setUp(self):
+        self._client = MagicMock(_subject="svc:id")
+        self._model = MagicMock()
+        self._model.get_interval.return_value = 3.0
+        self._poller = AuthorizationResponsePoller(
+            self._client, interval=60.0, latency_model=self._model)
+        self.addCleanup(self._poller.close)
+
+    def test_interval_from_latency_model(self):
+        self._poller.submit("auth-id")
+        self.assertEqual(3.0, self._poller._schedule.next_time())
+        self._model.get_interval.assert_called_once_with("svc:id", 0.0, 60.0)
+
+    def _submit(self, submitted):
+        future = self._poller.submit("auth-id")
+        pending = self._poller._schedule.pop_due(9e99)[0]
+        pending.submitted = submitted
+        return future, pending
+
+    def test_response_latency_is_recorded(self):
+        _, pending = self._submit(-7.0)
+        self._poller._handle_outcome(pending, response="resp")
+        self._model.record.assert_called_once_with("svc:id", 7.0)
+
+    def test_webhook_response_latency_is_recorded(self):
+        future, _ = self._submit(-2.5)
+        future.set_result("webhook response")
+        self._model.record.assert_called_once_with("svc:id", 2.5)
+
+    def test_errors_and_cancels_are_not_recorded(self):
+        self._submit(-2.5)[0].set_exception(RequestTimedOut())
+        self._submit(-2.5)[0].cancel()
+        self._model.record.assert_not_called()
+
+    def test_budget_stretches_intervals(self):
+        self._poller.max_polls_per_second = 2.0
+        for i in range(10):
+            self._poller.submit(i)
+        self.assertEqual(5.0, max(when for when, _, _ in
+                                  self._poller._schedule._heap))
+
+    def test_polls_per_authorization(self):
+        for polls, outcome in ((2, "resp"), (4, RequestTimedOut())):
+            pending = PendingAuthorization("auth-id", MagicMock(), 0.0)
+            pending.polls = polls - 1
+            if isinstance(outcome, Exception):
+                self._poller._handle_outcome(pending, error=outcome)
+            else:
+                self._poller._handle_outcome(pending, response=outcome)
+        self.assertEqual(3.0, self._poller.stats["polls_per_authorization"])
@@ -0,0 +1,96 @@
+import unittest
+
+from mock import MagicMock
+
+from launchkey.transports.key_registry import PrivateKeyRegistry, \
+    PrivateKeyList
+
+
+class TestPrivateKeyRegistry(unittest.TestCase):
+
+    def setUp(self):
+        self._registry = PrivateKeyRegistry()
+
+    def test_add_and_get(self):
+        self.assertTrue(self._registry.add("kid", "key"))
+        self.assertEqual("key", self._registry.get("kid"))
+        self.assertIn("kid", self._registry)
+        self.assertEqual(1, len(self._registry))
+
+    def test_get_missing_returns_default(self):
+        self.assertIsNone(self._registry.get("kid"))
+        self.assertEqual("default", self._registry.get("kid", "default"))
+
+    def test_add_duplicate_keeps_original(self):
+        self._registry.add("kid", "key")
+        self.assertFalse(self._registry.add("kid", "other key"))
+        self.assertEqual("key", self._registry.get("kid"))
+
+    def test_values_and_kids_in_insertion_order(self):
+        for kid in ("c", "a", "b"):
+            self._registry.add(kid, kid.upper())
+        self.assertEqual(["c", "a", "b"], self._registry.kids())
+        self.assertEqual(["C", "A", "B"], self._registry.values())
+
+    def test_remove(self):
+        self._registry.add("kid", "key")
+        self.assertTrue(self._registry.remove("kid"))
+        self.assertNotIn("kid", self._registry)
+        self.assertFalse(self._registry.remove("kid"))
+
+    def test_remove_expired(self):
+        self._registry.add("expired", "key", expires_at=100)
+        self._registry.add("later", "key", expires_at=200)
+        self._registry.add("never", "key")
+        self.assertEqual(["expired"], self._registry.remove_expired(now=100))
+        self.assertEqual(["later", "never"], self._registry.kids())
+        self.assertEqual(["later"], self._registry.remove_expired(now=300))
+        self.assertEqual(["never"], self._registry.kids())
+
+    def test_remove_expired_skips_removed_keys(self):
+        self._registry.add("kid", "key", expires_at=100)
+        self._registry.remove("kid")
+        self.assertEqual([], self._registry.remove_expired(now=100))
+
+    def test_remove_expired_uses_expiration_of_re_added_key(self):
+        self._registry.add("kid", "key", expires_at=100)
+        self._registry.remove("kid")
+        self._registry.add("kid", "key", expires_at=200)
+        self.assertEqual([], self._registry.remove_expired(now=150))
+        self.assertEqual(["kid"], self._registry.remove_expired(now=200))
+
+    def test_pop_expired_returns_keys(self):
+        self._registry.add("expired", "key", expires_at=100)
+        self._registry.add("never", "other")
+        self.assertEqual([("expired", "key")],
+                         self._registry.pop_expired(now=100))
+        self.assertEqual(["never"], self._registry.kids())
+
+
+class TestPrivateKeyList(unittest.TestCase):
+
+    def setUp(self):
+        self._add_key = MagicMock()
+        self._remove_key = MagicMock()
+        self._keys = PrivateKeyList([MagicMock(kid="kid")], self._add_key,
+                                    self._remove_key)
+
+    def test_extend_adds_each_key(self):
+        self._keys += ["a", "b"]
+        self._keys.extend(["c"])
+        self.assertEqual(["a", "b", "c"],
+                         [args[0] for args, _ in
+                          self._add_key.call_args_list])
+        self.assertEqual(4, len(self._keys))
+
+    def test_remove_removes_key_by_kid(self):
+        self._keys.remove(self._keys[0])
+        self._remove_key.assert_called_once_with("kid")
+        self.assertEqual([], self._keys)
+
+    def test_other_changes_raise_type_error(self):
+        for change in (lambda: self._keys.insert(0, "a"), self._keys.clear,
+                       lambda: self._keys.__delitem__(0)):
+            with self.assertRaises(TypeError):
+                change()
+        self.assertEqual(1, len(self._keys))
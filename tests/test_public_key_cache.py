@@ -0,0 +1,96 @@
+import unittest
+
+from launchkey.transports.key_cache import PublicKeyCache
+
+
+class TestPublicKeyCache(unittest.TestCase):
+
+    def setUp(self):
+        self._cache = PublicKeyCache(max_size=2, negative_ttl=10,
+                                     max_negative_size=2)
+
+    def test_invalid_max_size(self):
+        with self.assertRaises(ValueError):
+            PublicKeyCache(max_size=0)
+
+    def test_get_hit_and_miss_counted(self):
+        self._cache["a"] = "key a"
+        self.assertEqual("key a", self._cache.get("a"))
+        self.assertIsNone(self._cache.get("b"))
+        self.assertEqual("default", self._cache.get("b", "default"))
+        self.assertEqual(1, self._cache.hits)
+        self.assertEqual(2, self._cache.misses)
+
+    def test_getitem(self):
+        self._cache["a"] = "key a"
+        self.assertEqual("key a", self._cache["a"])
+        with self.assertRaises(KeyError):
+            self._cache["b"]
+
+    def test_peek_does_not_count(self):
+        self._cache["a"] = "key a"
+        self.assertEqual("key a", self._cache.peek("a"))
+        self.assertIsNone(self._cache.peek("b"))
+        self.assertEqual(0, self._cache.hits)
+        self.assertEqual(0, self._cache.misses)
+
+    def test_least_recently_used_evicted(self):
+        self._cache["a"] = "key a"
+        self._cache["b"] = "key b"
+        self._cache.get("a")
+        self._cache["c"] = "key c"
+        self.assertIn("a", self._cache)
+        self.assertNotIn("b", self._cache)
+        self.assertIn("c", self._cache)
+        self.assertEqual(1, self._cache.evictions)
+        self.assertEqual(2, len(self._cache))
+
+    def test_setdefault_keeps_existing_key(self):
+        self.assertEqual("key a", self._cache.setdefault("a", "key a"))
+        self.assertEqual("key a", self._cache.setdefault("a", "other"))
+
+    def test_values(self):
+        self._cache["a"] = "key a"
+        self._cache["b"] = "key b"
+        self.assertEqual(["key a", "key b"], self._cache.values())
+
+    def test_empty_is_falsy(self):
+        self.assertFalse(self._cache)
+        self._cache["a"] = "key a"
+        self.assertTrue(self._cache)
+
+    def test_not_found_remembered_until_ttl(self):
+        self._cache.add_not_found("a", now=100)
+        self.assertTrue(self._cache.is_not_found("a", now=109))
+        self.assertFalse(self._cache.is_not_found("a", now=110))
+        self.assertFalse(self._cache.is_not_found("a", now=105))
+        self.assertEqual(1, self._cache.negative_hits)
+
+    def test_not_found_bounded(self):
+        for kid in ("a", "b", "c"):
+            self._cache.add_not_found(kid, now=100)
+        self.assertFalse(self._cache.is_not_found("a", now=100))
+        self.assertTrue(self._cache.is_not_found("c", now=100))
+        self.assertEqual(2, self._cache.stats["negative_size"])
+
+    def test_caching_key_clears_not_found(self):
+        self._cache.add_not_found("a")
+        self._cache["a"] = "key a"
+        self.assertFalse(self._cache.is_not_found("a"))
+
+    def test_clear(self):
+        self._cache["a"] = "key a"
+        self._cache.add_not_found("b")
+        self._cache.clear()
+        self.assertEqual(0, len(self._cache))
+        self.assertFalse(self._cache.is_not_found("b"))
+
+    def test_stats(self):
+        self._cache["a"] = "key a"
+        self._cache.get("a")
+        self._cache.get("b")
+        self._cache.add_not_found("b")
+        self._cache.is_not_found("b")
+        self.assertEqual({"hits": 1, "misses": 1, "evictions": 0,
+                          "negative_hits": 1, "size": 1, "negative_size": 1},
+                         self._cache.stats)
@@ -0,0 +1,205 @@
+import asyncio
+import unittest
+
+from mock import MagicMock, patch
+from ddt import ddt, data, unpack
+
+from launchkey.exceptions import RateLimited
+from launchkey.transports import AdaptiveRateLimiter, JOSETransport, \
+    AsyncJOSETransport
+from launchkey.transports.base import APIResponse, APIErrorResponse
+from launchkey.transports.rate_limit import TokenBucket, parse_retry_after
+
+from .test_async_jose_auth_transport import async_return
+
+
+@ddt
+class TestParseRetryAfter(unittest.TestCase):
+
+    @data(("30", 30.0), (5, 5.0), ("-1", 0.0), (None, None),
+          ("invalid", None))
+    @unpack
+    def test_values(self, value, expected):
+        self.assertEqual(expected, parse_retry_after(value))
+
+    def test_http_date(self):
+        self.assertEqual(10.0, parse_retry_after(
+            "Wed, 21 Oct 2015 07:28:00 GMT", now=1445412470))
+
+    def test_http_date_in_the_past(self):
+        self.assertEqual(0.0, parse_retry_after(
+            "Wed, 21 Oct 2015 07:28:00 GMT", now=1445412490))
+
+
+class TestTokenBucket(unittest.TestCase):
+
+    def test_burst_then_waits_for_refill(self):
+        bucket = TokenBucket(1.0, 2, 0.0, 0.0)
+        self.assertEqual(0.0, bucket.reserve(0.0))
+        self.assertEqual(0.0, bucket.reserve(0.0))
+        self.assertEqual(1.0, bucket.reserve(0.0))
+        self.assertEqual(2.0, bucket.reserve(0.0))
+
+    def test_refills_up_to_capacity(self):
+        bucket = TokenBucket(1.0, 2, 0.0, 0.0)
+        bucket.reserve(0.0)
+        bucket.advance(100.0)
+        self.assertEqual(2.0, bucket.tokens)
+
+    def test_penalize_with_retry_after(self):
+        bucket = TokenBucket(10.0, 10, 0.0, 0.0)
+        bucket.penalize(0.0, 0.5, 1.0, 30.0)
+        self.assertEqual(5.0, bucket.rate)
+        self.assertAlmostEqual(30.2, bucket.reserve(0.0))
+
+    def test_penalize_respects_min_rate(self):
+        bucket = TokenBucket(10.0, 10, 0.0, 0.0)
+        for _ in range(10):
+            bucket.penalize(0.0, 0.5, 1.0)
+        self.assertEqual(1.0, bucket.rate)
+
+    def test_refund(self):
+        bucket = TokenBucket(1.0, 1, 0.0, 0.0)
+        bucket.reserve(0.0)
+        bucket.refund()
+        self.assertEqual(1.0, bucket.tokens)
+
+
+@patch("launchkey.transports.rate_limit.sleep")
+@patch("launchkey.transports.rate_limit.monotonic")
+class TestAdaptiveRateLimiter(unittest.TestCase):
+
+    def test_invalid_rate_raises_value_error(self, *_):
+        with self.assertRaises(ValueError):
+            AdaptiveRateLimiter(rate=0)
+
+    def test_acquire_sleeps_when_burst_is_used(self, monotonic_patch,
+                                               sleep_patch):
+        monotonic_patch.return_value = 0.0
+        limiter = AdaptiveRateLimiter(rate=2.0, burst=1)
+        limiter.acquire("svc:id", "GET /path")
+        sleep_patch.assert_not_called()
+        limiter.acquire("svc:id", "GET /path")
+        sleep_patch.assert_called_once_with(0.5)
+
+    def test_per_endpoint_buckets(self, monotonic_patch, sleep_patch):
+        monotonic_patch.return_value = 0.0
+        limiter = AdaptiveRateLimiter(rate=1.0, burst=1, per_subject=False)
+        limiter.acquire("svc:id", "GET /a")
+        limiter.acquire("svc:id", "GET /b")
+        sleep_patch.assert_not_called()
+        self.assertEqual({("endpoint", "GET /a"), ("endpoint", "GET /b")},
+                         set(limiter.stats))
+
+    def test_per_subject_buckets(self, monotonic_patch, sleep_patch):
+        monotonic_patch.return_value = 0.0
+        limiter = AdaptiveRateLimiter(rate=1.0, burst=1, per_endpoint=False)
+        limiter.acquire("svc:a", "GET /path")
+        limiter.acquire("svc:b", "GET /path")
+        sleep_patch.assert_not_called()
+        limiter.acquire("svc:a", "GET /other")
+        sleep_patch.assert_called_once_with(1.0)
+
+    def test_request_waits_for_slowest_bucket(self, monotonic_patch,
+                                              sleep_patch):
+        monotonic_patch.return_value = 0.0
+        limiter = AdaptiveRateLimiter(rate=1.0, burst=1)
+        limiter.acquire("svc:a", "GET /path")
+        limiter.record_response("svc:b", "GET /path", 429, "5")
+        limiter.acquire("svc:b", "GET /path")
+        sleep_patch.assert_called_once_with(7.0)
+
+    def test_record_response_ignores_other_statuses(self, monotonic_patch, _):
+        monotonic_patch.return_value = 0.0
+        limiter = AdaptiveRateLimiter(rate=4.0)
+        limiter.record_response("svc:id", "GET /path", 503, "5")
+        self.assertEqual({}, limiter.stats)
+
+    def test_rate_recovers_after_429(self, monotonic_patch, _):
+        monotonic_patch.return_value = 0.0
+        limiter = AdaptiveRateLimiter(rate=10.0, min_rate=1.0,
+                                      recovery_time=9.0, per_subject=False)
+        limiter.record_response("svc:id", "GET /path", 429)
+        key = ("endpoint", "GET /path")
+        self.assertEqual(5.0, limiter.stats[key]["rate"])
+        monotonic_patch.return_value = 2.0
+        self.assertEqual(7.0, limiter.stats[key]["rate"])
+        monotonic_patch.return_value = 100.0
+        self.assertEqual(10.0, limiter.stats[key]["rate"])
+
+    def test_max_wait_raises_rate_limited_and_refunds(self, monotonic_patch,
+                                                      sleep_patch):
+        monotonic_patch.return_value = 0.0
+        limiter = AdaptiveRateLimiter(rate=1.0, burst=1, max_wait=0.5,
+                                      per_subject=False)
+        limiter.acquire("svc:id", "GET /path")
+        with self.assertRaises(RateLimited):
+            limiter.acquire("svc:id", "GET /path")
+        sleep_patch.assert_not_called()
+        self.assertEqual(0.0,
+                         limiter.stats[("endpoint", "GET /path")]["tokens"])
+
+    def test_acquire_async_does_not_block(self, monotonic_patch, sleep_patch):
+        monotonic_patch.return_value = 0.0
+        limiter = AdaptiveRateLimiter(rate=4.0, burst=1)
+        async def _sleep(_):
+            pass
+        with patch("launchkey.transports.rate_limit.asyncio.sleep",
+                   MagicMock(side_effect=_sleep)) as async_sleep:
+            asyncio.run(limiter.acquire_async("svc:id", "GET /path"))
+            asyncio.run(limiter.acquire_async("svc:id", "GET /path"))
+        async_sleep.assert_called_once_with(0.25)
+        sleep_patch.assert_not_called()
+
+
+class TestJOSETransportRateLimiting(unittest.TestCase):
+
+    def setUp(self):
+        self._limiter = MagicMock(spec=AdaptiveRateLimiter)
+        self._transport = JOSETransport(http_client=MagicMock(),
+                                        rate_limiter=self._limiter)
+        self._transport._load_request_metadata = MagicMock()
+        self._transport._build_jose_request = MagicMock(
+            return_value=({}, None))
+        self._transport._process_jose_response = MagicMock(
+            side_effect=lambda response, *args: response)
+
+    def test_acquires_before_sending(self):
+        self._transport._http_client.get.return_value = APIResponse(
+            {}, {}, 200)
+        self._transport._process_jose_request(
+            "GET", "/service/v3/auths/e5a0c2de-4f8e-11e8-9c2d-fa7ae01bbebc",
+            "svc:id")
+        self._limiter.acquire.assert_called_once_with(
+            "svc:id", "GET /service/v3/auths/{id}")
+        self._limiter.record_response.assert_not_called()
+
+    def test_records_429_with_retry_after(self):
+        self._transport._http_client.post.return_value = APIErrorResponse(
+            {}, {"retry-after": "3"}, 429)
+        self._transport._process_jose_request("POST", "/path", "svc:id")
+        self._limiter.record_response.assert_called_once_with(
+            "svc:id", "POST /path", 429, "3")
+
+    def test_rate_limited_request_is_not_sent(self):
+        self._limiter.acquire.side_effect = RateLimited
+        with self.assertRaises(RateLimited):
+            self._transport._process_jose_request("GET", "/path", "svc:id")
+        self._transport._http_client.get.assert_not_called()
+
+    def test_async_transport(self):
+        limiter = MagicMock(spec=AdaptiveRateLimiter)
+        limiter.acquire_async = async_return(None)
+        transport = AsyncJOSETransport(http_client=MagicMock(),
+                                       rate_limiter=limiter)
+        transport.refresh_server_time_difference = async_return(0)
+        transport.load_public_key_for_jwt = async_return(None)
+        transport._build_jose_request = MagicMock(return_value=({}, None))
+        transport._process_jose_response = MagicMock(
+            side_effect=lambda response, *args: response)
+        transport._http_client.get = async_return(
+            APIErrorResponse({}, {"Retry-After": "2"}, 429))
+        asyncio.run(transport.get("/path", "org:id"))
+        limiter.acquire_async.assert_called_once_with("org:id", "GET /path")
+        limiter.record_response.assert_called_once_with(
+            "org:id", "GET /path", 429, "2")
@@ -98,3 +98,71 @@ class TestRequestsHTTPTransport(unittest.TestCase):
     def test_patch(self):
         self._transport.patch(MagicMock())
         self._session_patch.patch.assert_called_once()
+
+    def test_not_pooled_by_default(self):
+        self.assertFalse(self._transport.pooled)
+        self._session_patch.Session.assert_not_called()
+
+    def test_connection_stats_not_pooled(self):
+        self.assertEqual({"opened": 0, "requests": 0, "reused": 0},
+                         self._transport.connection_stats)
+
+
+class TestRequestsHTTPTransportPooled(unittest.TestCase):
+
+    def setUp(self):
+        self._transport = RequestsTransport(pooled=True, pool_connections=2,
+                                            pool_maxsize=4, pool_block=True)
+        self._session = MagicMock()
+        self._transport._session = self._session
+
+    def test_pool_settings_applied_to_adapters(self):
+        transport = RequestsTransport(pooled=True, pool_connections=2,
+                                      pool_maxsize=4, pool_block=True)
+        adapter = transport._session.get_adapter(LAUNCHKEY_PRODUCTION)
+        self.assertEqual(4, adapter._pool_maxsize)
+        self.assertEqual(2, adapter._pool_connections)
+        self.assertTrue(adapter._pool_block)
+
+    def test_get_uses_session(self):
+        self._transport.get("/path")
+        self._session.get.assert_called_once()
+
+    def test_post_uses_session(self):
+        self._transport.post("/path")
+        self._session.post.assert_called_once()
+
+    def test_put_uses_session(self):
+        self._transport.put("/path")
+        self._session.put.assert_called_once()
+
+    def test_delete_uses_session(self):
+        self._transport.delete("/path")
+        self._session.delete.assert_called_once()
+
+    def test_patch_uses_session(self):
+        self._transport.patch("/path")
+        self._session.patch.assert_called_once()
+
+    def test_set_url_same_url_keeps_session(self):
+        self._transport.set_url(LAUNCHKEY_PRODUCTION, False)
+        self.assertEqual(self._session, self._transport._session)
+        self._session.close.assert_not_called()
+
+    def test_set_url_new_url_replaces_session(self):
+        self._transport.set_url("https://api.example.com", True)
+        self._session.close.assert_called_once()
+        self.assertNotEqual(self._session, self._transport._session)
+
+    def test_close_closes_session(self):
+        self._transport.close()
+        self._session.close.assert_called_once()
+
+    def test_connection_stats(self):
+        pool = MagicMock(num_connections=2, num_requests=5)
+        adapter = MagicMock()
+        adapter.poolmanager.pools.keys.return_value = ["key"]
+        adapter.poolmanager.pools.get.return_value = pool
+        self._session.adapters = {"https://": adapter, "http://": adapter}
+        self.assertEqual({"opened": 2, "requests": 5, "reused": 3},
+                         self._transport.connection_stats)
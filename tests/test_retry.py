@@ -0,0 +1,211 @@
+import asyncio
+import unittest
+
+import requests
+from ddt import ddt, data, unpack
+from mock import MagicMock, patch
+
+from launchkey.exceptions import LaunchKeyAPIException
+from launchkey.transports import RetryPolicy, JOSETransport, \
+    AsyncJOSETransport
+from launchkey.transports.base import APIResponse, APIErrorResponse
+from launchkey.utils.tracing import enable_tracing, disable_tracing
+
+from .test_async_jose_auth_transport import async_return
+from .test_tracing import RecordingTracer
+
+
+def http_error(status_code, headers=None):
+    return requests.exceptions.HTTPError(
+        response=MagicMock(status_code=status_code, headers=headers or {}))
+
+
+@ddt
+class TestRetryPolicy(unittest.TestCase):
+
+    def setUp(self):
+        self._policy = RetryPolicy()
+
+    @data(("GET", "/path", True), ("get", "/path", True),
+          ("POST", "/service/v3/sessions/list", True),
+          ("POST", "/organization/v3/directories/list/", True),
+          ("POST", "/service/v3/auths", False),
+          ("PUT", "/service/v3/sessions/list", False),
+          ("DELETE", "/path", False), ("PATCH", "/path", False))
+    @unpack
+    def test_is_idempotent(self, method, path, expected):
+        self.assertEqual(expected, self._policy.is_idempotent(method, path))
+
+    @data(requests.exceptions.ConnectionError(), requests.exceptions.Timeout(),
+          ConnectionResetError(), http_error(503), http_error(500))
+    def test_retryable_errors(self, error):
+        self.assertTrue(self._policy.is_retryable_error(error))
+
+    @data(ValueError(), LaunchKeyAPIException({}, 400), http_error(501))
+    def test_non_retryable_errors(self, error):
+        self.assertFalse(self._policy.is_retryable_error(error))
+
+    @data((429, True), (503, True), (400, False), (200, False))
+    @unpack
+    def test_is_retryable_response(self, status_code, expected):
+        self.assertEqual(expected, self._policy.is_retryable_response(
+            APIResponse({}, {}, status_code)))
+
+    @patch("launchkey.transports.retry.random.uniform")
+    def test_backoff_is_jittered_exponential_and_capped(self, uniform_patch):
+        policy = RetryPolicy(backoff=0.5, max_backoff=1.5)
+        for retry in (1, 2, 3):
+            policy.get_backoff(retry)
+        self.assertEqual([((0, 0.5),), ((0, 1.0),), ((0, 1.5),)],
+                         uniform_patch.call_args_list)
+
+    def test_invalid_max_attempts_raises_value_error(self):
+        with self.assertRaises(ValueError):
+            RetryPolicy(max_attempts=0)
+
+    def test_start_only_for_idempotent_requests(self):
+        self.assertIsNotNone(self._policy.start("GET", "/path"))
+        self.assertIsNone(self._policy.start("POST", "/path"))
+        self.assertIsNone(RetryPolicy(max_attempts=1).start("GET", "/path"))
+
+
+@patch("launchkey.transports.retry.random.uniform",
+       MagicMock(side_effect=lambda low, high: high))
+@patch("launchkey.transports.retry.monotonic")
+class TestRetryState(unittest.TestCase):
+
+    def test_stops_at_max_attempts(self, monotonic_patch):
+        monotonic_patch.return_value = 0.0
+        state = RetryPolicy(max_attempts=3, backoff=0.1).start("GET", "/")
+        error = requests.exceptions.ConnectionError()
+        self.assertEqual(0.1, state.next_delay(error=error))
+        self.assertEqual(0.2, state.next_delay(error=error))
+        self.assertIsNone(state.next_delay(error=error))
+        self.assertEqual(2, state.retries)
+
+    def test_non_retryable_outcomes(self, monotonic_patch):
+        monotonic_patch.return_value = 0.0
+        state = RetryPolicy().start("GET", "/")
+        self.assertIsNone(state.next_delay(error=ValueError()))
+        self.assertIsNone(state.next_delay(
+            response=APIResponse({}, {}, 200)))
+        self.assertEqual(0, state.retries)
+
+    def test_retry_after_is_a_minimum(self, monotonic_patch):
+        monotonic_patch.return_value = 0.0
+        state = RetryPolicy().start("GET", "/")
+        self.assertEqual(3.0, state.next_delay(response=APIErrorResponse(
+            {}, {"Retry-After": "3"}, 429)))
+        self.assertEqual(2.0, state.next_delay(error=http_error(
+            503, {"retry-after": "2"})))
+
+    def test_no_retry_past_deadline(self, monotonic_patch):
+        monotonic_patch.return_value = 0.0
+        state = RetryPolicy(max_attempts=10, deadline=5.0).start("GET", "/")
+        monotonic_patch.return_value = 4.0
+        self.assertEqual(0.1, state.next_delay(error=http_error(503)))
+        self.assertIsNone(state.next_delay(error=http_error(
+            503, {"Retry-After": "1"})))
+
+    def test_without_deadline(self, monotonic_patch):
+        monotonic_patch.return_value = 0.0
+        state = RetryPolicy(deadline=None).start("GET", "/")
+        monotonic_patch.return_value = 1000.0
+        self.assertEqual(0.1, state.next_delay(error=http_error(503)))
+
+
+@patch("launchkey.transports.retry.sleep")
+class TestJOSETransportRetries(unittest.TestCase):
+
+    def setUp(self):
+        self._policy = RetryPolicy(max_attempts=3, deadline=None)
+        self._policy.get_backoff = MagicMock(return_value=0.5)
+        self._transport = JOSETransport(http_client=MagicMock(),
+                                        retry_policy=self._policy)
+        self._transport._load_request_metadata = MagicMock()
+        self._transport._build_jose_request = MagicMock(
+            return_value=({}, None))
+        self._transport._process_jose_response = MagicMock(
+            side_effect=lambda response, *args: response)
+        self._ok = APIResponse({}, {}, 200)
+
+    def _jtis(self):
+        return [call[0][3] for call in
+                self._transport._build_jose_request.call_args_list]
+
+    def test_retries_connection_error_with_new_jti(self, sleep_patch):
+        self._transport._http_client.get.side_effect = [
+            requests.exceptions.ConnectionError(), self._ok]
+        self.assertEqual(self._ok, self._transport.get("/path", "svc:id"))
+        sleep_patch.assert_called_once_with(0.5)
+        jtis = self._jtis()
+        self.assertEqual(2, len(jtis))
+        self.assertNotEqual(jtis[0], jtis[1])
+
+    def test_retries_post_to_list_endpoint(self, sleep_patch):
+        self._transport._http_client.post.side_effect = [
+            http_error(502), self._ok]
+        self._transport.post("/service/v3/sessions/list", "svc:id", a="b")
+        self.assertEqual(2, self._transport._http_client.post.call_count)
+
+    def test_does_not_retry_other_posts(self, sleep_patch):
+        self._transport._http_client.post.side_effect = http_error(503)
+        with self.assertRaises(requests.exceptions.HTTPError):
+            self._transport.post("/service/v3/auths", "svc:id", a="b")
+        self._transport._http_client.post.assert_called_once()
+        sleep_patch.assert_not_called()
+
+    def test_last_rate_limited_response_is_processed(self, sleep_patch):
+        rate_limited = APIErrorResponse({}, {}, 429)
+        self._transport._http_client.get.return_value = rate_limited
+        self._transport.get("/path", "svc:id")
+        self.assertEqual(3, self._transport._http_client.get.call_count)
+        self.assertEqual(2, sleep_patch.call_count)
+        self._transport._process_jose_response.assert_called_once()
+        self.assertEqual(3, len(set(self._jtis())))
+
+    def test_last_error_is_raised(self, sleep_patch):
+        self._transport._http_client.get.side_effect = \
+            requests.exceptions.Timeout()
+        with self.assertRaises(requests.exceptions.Timeout):
+            self._transport.get("/path", "svc:id")
+        self.assertEqual(3, self._transport._http_client.get.call_count)
+
+    def test_span_retry_attempts(self, _):
+        tracer = enable_tracing(RecordingTracer())
+        self.addCleanup(disable_tracing)
+        self._transport._http_client.get.side_effect = [
+            http_error(503), self._ok]
+        self._transport.get("/path", "svc:id")
+        self.assertEqual(1, tracer.span("launchkey.jose_request")
+                         .attributes["launchkey.retry_attempts"])
+
+    def test_async_retries_with_new_jti(self, sleep_patch):
+        transport = AsyncJOSETransport(http_client=MagicMock(),
+                                       retry_policy=self._policy)
+        transport.refresh_server_time_difference = async_return(0)
+        transport.load_public_key_for_jwt = async_return(None)
+        transport._build_jose_request = MagicMock(return_value=({}, None))
+        transport._process_jose_response = MagicMock(
+            side_effect=lambda response, *args: response)
+        responses = [requests.exceptions.ConnectionError(), self._ok]
+
+        async def _get(*args, **kwargs):
+            response = responses.pop(0)
+            if isinstance(response, Exception):
+                raise response
+            return response
+        transport._http_client.get = MagicMock(side_effect=_get)
+
+        async def _sleep(_):
+            pass
+        with patch("launchkey.transports.async_jose_auth.asyncio.sleep",
+                   MagicMock(side_effect=_sleep)) as async_sleep:
+            self.assertEqual(self._ok,
+                             asyncio.run(transport.get("/path", "org:id")))
+        async_sleep.assert_any_call(0.5)
+        sleep_patch.assert_not_called()
+        jtis = [call[0][3] for call in
+                transport._build_jose_request.call_args_list]
+        self.assertNotEqual(jtis[0], jtis[1])
+        transport.load_public_key_for_jwt.assert_called_once()
@@ -0,0 +1,123 @@
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+
+from mock import patch
+
+from launchkey.transports import FileSharedCache, SharedCache
+
+
+class TestSharedCache(unittest.TestCase):
+
+    def test_get_not_implemented(self):
+        with self.assertRaises(NotImplementedError):
+            SharedCache().get("key")
+
+    def test_set_not_implemented(self):
+        with self.assertRaises(NotImplementedError):
+            SharedCache().set("key", "value", 1)
+
+
+class TestFileSharedCache(unittest.TestCase):
+
+    def setUp(self):
+        self._directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self._directory)
+        self._path = os.path.join(self._directory, "cache.json")
+        self._cache = FileSharedCache(self._path)
+
+    def test_get_missing_file(self):
+        self.assertIsNone(self._cache.get("key"))
+
+    def test_set_and_get(self):
+        self._cache.set("key", {"a": ["b", 1]}, 60)
+        self.assertEqual({"a": ["b", 1]}, self._cache.get("key"))
+
+    def test_get_missing_key(self):
+        self._cache.set("key", "value", 60)
+        self.assertIsNone(self._cache.get("other"))
+
+    def test_shared_between_instances(self):
+        self._cache.set("key", "value", 60)
+        self.assertEqual("value", FileSharedCache(self._path).get("key"))
+
+    def test_shared_between_processes(self):
+        subprocess.check_call([
+            sys.executable, "-c",
+            "from launchkey.transports import FileSharedCache; "
+            "FileSharedCache(%r).set('key', 'from child', 60)" % self._path
+        ], cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        self.assertEqual("from child", self._cache.get("key"))
+
+    @patch("launchkey.transports.shared_cache.time")
+    def test_expired_value_not_returned(self, time_patch):
+        time_patch.return_value = 1000
+        self._cache.set("key", "value", 60)
+        time_patch.return_value = 1059
+        self.assertEqual("value", self._cache.get("key"))
+        time_patch.return_value = 1060
+        self.assertIsNone(self._cache.get("key"))
+
+    @patch("launchkey.transports.shared_cache.time")
+    def test_expired_values_pruned_on_write(self, time_patch):
+        time_patch.return_value = 1000
+        self._cache.set("old", "value", 10)
+        time_patch.return_value = 1010
+        self._cache.set("new", "value", 10)
+        with open(self._path) as cache_file:
+            self.assertEqual(["new"], list(json.load(cache_file)))
+
+    def test_file_is_only_readable_by_owner(self):
+        self._cache.set("key", "value", 60)
+        self.assertEqual(0o600, os.stat(self._path).st_mode & 0o777)
+
+    def test_file_not_parsed_again_when_unchanged(self):
+        self._cache.set("key", "value", 60)
+        other = FileSharedCache(self._path)
+        with patch("launchkey.transports.shared_cache.json.loads",
+                   wraps=json.loads) as loads_patch:
+            other.get("key")
+            other.get("key")
+        loads_patch.assert_called_once()
+
+    def test_changes_from_other_instances_are_read(self):
+        other = FileSharedCache(self._path)
+        self._cache.set("key", "first", 60)
+        self.assertEqual("first", other.get("key"))
+        self._cache.set("key", "second value", 60)
+        self.assertEqual("second value", other.get("key"))
+
+    def test_corrupt_file_treated_as_empty(self):
+        with open(self._path, "w") as cache_file:
+            cache_file.write("not json")
+        self.assertIsNone(self._cache.get("key"))
+        self._cache.set("key", "value", 60)
+        self.assertEqual("value", self._cache.get("key"))
+
+    def test_malformed_entries_ignored(self):
+        with open(self._path, "w") as cache_file:
+            json.dump({"a": "string", "b": {"value": 1}, "c": ["list"]},
+                      cache_file)
+        self.assertIsNone(self._cache.get("a"))
+        self.assertIsNone(self._cache.get("b"))
+        self.assertIsNone(self._cache.get("c"))
+
+    def test_non_dict_file_treated_as_empty(self):
+        with open(self._path, "w") as cache_file:
+            json.dump(["key"], cache_file)
+        self.assertIsNone(self._cache.get("key"))
+
+    def test_unwritable_directory_ignored(self):
+        cache = FileSharedCache(os.path.join(self._directory, "missing",
+                                             "cache.json"))
+        cache.set("key", "value", 60)
+        self.assertIsNone(cache.get("key"))
+
+    def test_unserializable_value_raises_and_leaves_no_temp_file(self):
+        with self.assertRaises(TypeError):
+            self._cache.set("key", object(), 60)
+        self.assertEqual(["cache.json.lock"], os.listdir(self._directory))
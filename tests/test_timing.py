@@ -0,0 +1,221 @@
+import asyncio
+import unittest
+from time import time
+
+from mock import MagicMock, patch
+
+from launchkey.exceptions import LaunchKeyAPIException
+from launchkey.transports import JOSETransport, AsyncJOSETransport
+from launchkey.transports.base import APIResponse, APIErrorResponse
+from launchkey.transports.timing import RequestTiming, Histogram, \
+    EndpointLatencyHistograms, NULL_TIMING
+
+from .test_async_jose_auth_transport import async_return
+
+
+class TestRequestTiming(unittest.TestCase):
+
+    @patch("launchkey.transports.timing.perf_counter")
+    def test_laps_record_phase_durations(self, perf_counter_patch):
+        perf_counter_patch.side_effect = [10.0, 10.5, 11.0, 11.25, 12.0]
+        timing = RequestTiming("post", "/path", "svc:id")
+        timing.lap("encrypt")
+        timing.lap("http")
+        timing.lap("encrypt")
+        timing.finish(201)
+        self.assertEqual({"encrypt": 0.75, "http": 0.5}, dict(timing.phases))
+        self.assertEqual(["encrypt", "http"], list(timing.phases))
+        self.assertEqual(2.0, timing.total)
+        self.assertEqual(201, timing.status_code)
+        self.assertIsNone(timing.error)
+
+    def test_finish_records_error(self):
+        timing = RequestTiming("get", "/path", None)
+        error = ValueError()
+        timing.finish(error=error)
+        self.assertIs(error, timing.error)
+
+    def test_endpoint_replaces_identifiers(self):
+        timing = RequestTiming(
+            "get", "/service/v3/auths/e5a0c2de-4f8e-11e8-9c2d-fa7ae01bbebc",
+            None)
+        self.assertEqual("GET /service/v3/auths/{id}", timing.endpoint)
+
+    def test_null_timing_lap_does_nothing(self):
+        self.assertIsNone(NULL_TIMING.lap("phase"))
+
+
+class TestHistogram(unittest.TestCase):
+
+    def test_cumulative_counts(self):
+        histogram = Histogram(buckets=(1, 2))
+        for value in (0.5, 1, 1.5, 3):
+            histogram.observe(value)
+        self.assertEqual([(1, 2), (2, 3), (float("inf"), 4)],
+                         histogram.cumulative_counts())
+        self.assertEqual(4, histogram.count)
+        self.assertEqual(6.0, histogram.sum)
+
+    def test_quantile(self):
+        histogram = Histogram(buckets=(1, 2, 3))
+        for value in (0.5, 1.5, 1.5, 2.5):
+            histogram.observe(value)
+        self.assertEqual(1, histogram.quantile(0.25))
+        self.assertEqual(2, histogram.quantile(0.5))
+        self.assertEqual(3, histogram.quantile(0.99))
+
+    def test_quantile_without_values(self):
+        self.assertIsNone(Histogram().quantile(0.5))
+
+
+class TestEndpointLatencyHistograms(unittest.TestCase):
+
+    def setUp(self):
+        self._histograms = EndpointLatencyHistograms(buckets=(0.1, 1))
+
+    def _timing(self, path, total, **phases):
+        timing = RequestTiming("get", path, None)
+        timing.phases.update(phases)
+        timing.total = total
+        return timing
+
+    def test_records_total_and_phases_by_endpoint(self):
+        self._histograms(self._timing("/a", 0.5, http=0.4, sign=0.05))
+        self._histograms(self._timing("/a", 2, http=1.5))
+        self._histograms(self._timing("/b", 0.05))
+        self.assertEqual(["GET /a", "GET /b"],
+                         sorted(self._histograms.endpoints()))
+        self.assertEqual(2, self._histograms.total("GET /a").count)
+        self.assertEqual(2.5, self._histograms.total("GET /a").sum)
+        self.assertEqual(2, self._histograms.phase("GET /a", "http").count)
+        self.assertEqual(1, self._histograms.phase("GET /a", "sign").count)
+        self.assertEqual(1, self._histograms.total("GET /b").count)
+
+    def test_unknown_endpoint_and_phase(self):
+        self._histograms(self._timing("/a", 0.5))
+        self.assertIsNone(self._histograms.total("GET /b"))
+        self.assertIsNone(self._histograms.phase("GET /b", "http"))
+        self.assertIsNone(self._histograms.phase("GET /a", "http"))
+
+
+class TestJOSETransportTimingHooks(unittest.TestCase):
+
+    def setUp(self):
+        self._transport = JOSETransport(http_client=MagicMock())
+        self._transport.verify_jwt_response = MagicMock()
+        self._transport._build_jwt_signature = MagicMock()
+        self._transport._encrypt_request = MagicMock(return_value="jwe")
+        self._transport._load_request_metadata = MagicMock()
+        self._transport.decrypt_response = MagicMock(return_value='{"a": 1}')
+        self._transport._http_client.post.return_value = APIResponse(
+            "jwe", {}, 201)
+        self._hook = MagicMock()
+        self._transport.add_timing_hook(self._hook)
+
+    def _timing(self):
+        self._hook.assert_called_once()
+        return self._hook.call_args[0][0]
+
+    def test_reports_all_phases(self):
+        self._transport._process_jose_request("POST", "/path", "svc:id",
+                                              {"a": "b"})
+        timing = self._timing()
+        self.assertEqual(["metadata", "encrypt", "hash", "sign", "http",
+                          "verify", "decrypt", "parse"], list(timing.phases))
+        self.assertEqual(("POST", "/path", "svc:id", 201),
+                         (timing.method, timing.path, timing.subject,
+                          timing.status_code))
+        self.assertGreaterEqual(timing.total, sum(timing.phases.values()))
+
+    def test_reports_errors(self):
+        self._transport._http_client.post.return_value = APIErrorResponse(
+            {}, {}, 400)
+        with self.assertRaises(LaunchKeyAPIException) as context:
+            self._transport._process_jose_request("POST", "/path", "svc:id")
+        timing = self._timing()
+        self.assertIs(context.exception, timing.error)
+        self.assertEqual(400, timing.status_code)
+
+    def test_hook_errors_are_ignored(self):
+        self._hook.side_effect = ValueError
+        other_hook = MagicMock()
+        self._transport.add_timing_hook(other_hook)
+        response = self._transport._process_jose_request("POST", "/path",
+                                                         "svc:id")
+        self.assertEqual({"a": 1}, response.data)
+        other_hook.assert_called_once()
+
+    def test_removed_hook_is_not_called(self):
+        self._transport.remove_timing_hook(self._hook)
+        self._transport._process_jose_request("POST", "/path", "svc:id")
+        self._hook.assert_not_called()
+
+    @patch("launchkey.transports.jose_auth.RequestTiming")
+    def test_no_timing_without_hooks(self, request_timing_patch):
+        self._transport.remove_timing_hook(self._hook)
+        self._transport._process_jose_request("POST", "/path", "svc:id")
+        request_timing_patch.assert_not_called()
+
+
+class TestJOSETransportMetadataPhase(unittest.TestCase):
+
+    def setUp(self):
+        self._transport = JOSETransport(http_client=MagicMock())
+        self._transport._server_time_difference = 0, int(time())
+        self._transport._get_jwt_signature = MagicMock(return_value="jwt")
+        self._transport._find_key_by_kid = MagicMock()
+        self._transport._process_jose_response = MagicMock(
+            side_effect=lambda response, *args: response)
+        self._hook = MagicMock()
+        self._transport.add_timing_hook(self._hook)
+
+    def _get(self, status_code=200, headers=None):
+        self._transport._http_client.get.return_value = APIResponse(
+            {}, headers or {}, status_code)
+        self._transport._process_jose_request("GET", "/path", "svc:id")
+        return self._hook.call_args[0][0]
+
+    def test_metadata_timed_before_signing(self):
+        timing = self._get()
+        self.assertEqual(["metadata", "sign", "http"], list(timing.phases))
+
+    def test_server_time_lookup_counted_once(self):
+        self._get()
+        self.assertEqual({"hits": 1, "misses": 0},
+                         self._transport.server_time_cache_stats)
+
+    def test_response_public_key_loaded(self):
+        self._get(headers={"X-IOV-JWT": "eyJraWQiOiAia2lkIn0.e30.c2ln"})
+        self._transport._find_key_by_kid.assert_called_once_with("kid")
+
+    def test_cached_response_public_key_not_loaded(self):
+        self._transport._public_key_cache["kid"] = MagicMock()
+        self._get(headers={"X-IOV-JWT": "eyJraWQiOiAia2lkIn0.e30.c2ln"})
+        self._transport._find_key_by_kid.assert_not_called()
+
+    def test_response_public_key_not_loaded_on_401(self):
+        self._get(401, {"X-IOV-JWT": "eyJraWQiOiAia2lkIn0.e30.c2ln"})
+        self._transport._find_key_by_kid.assert_not_called()
+
+    def test_malformed_response_jwt_ignored(self):
+        self._get(headers={"X-IOV-JWT": "malformed"})
+        self._transport._find_key_by_kid.assert_not_called()
+
+
+class TestAsyncJOSETransportTimingHooks(unittest.TestCase):
+
+    def test_reports_metadata_and_http_phases(self):
+        transport = AsyncJOSETransport(http_client=MagicMock())
+        transport.refresh_server_time_difference = async_return(0)
+        transport.load_public_key_for_jwt = async_return(None)
+        transport._build_jose_request = MagicMock(return_value=({}, None))
+        transport._process_jose_response = MagicMock(
+            return_value=APIResponse({}, {}, 200))
+        transport._http_client.get = async_return(
+            APIResponse({}, {"X-IOV-JWT": "jwt"}, 200))
+        hook = MagicMock()
+        transport.add_timing_hook(hook)
+        asyncio.run(transport.get("/path", "svc:id"))
+        timing = hook.call_args[0][0]
+        self.assertEqual(["metadata", "http"], list(timing.phases))
+        self.assertEqual(200, timing.status_code)
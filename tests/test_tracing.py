@@ -0,0 +1,268 @@
+import asyncio
+import unittest
+from contextlib import contextmanager
+
+from mock import MagicMock, patch
+
+from launchkey.clients.base import api_call, async_api_call
+from launchkey.exceptions import LaunchKeyAPIException, EntityNotFound, \
+    JWTValidationFailure, XiovJWTValidationFailure
+from launchkey.transports import JOSETransport, AsyncJOSETransport, \
+    RequestsTransport
+from launchkey.transports.base import APIResponse, APIErrorResponse
+from launchkey.utils.shared import XiovJWTService
+from launchkey.utils.tracing import Tracer, OpenTelemetryTracer, \
+    enable_tracing, disable_tracing, active_tracer, subject_type
+
+from .test_async_jose_auth_transport import async_return
+
+
+class RecordingSpan(object):
+
+    def __init__(self, name, attributes):
+        self.name = name
+        self.attributes = dict(attributes or {})
+        self.error = None
+
+    def set_attribute(self, key, value):
+        self.attributes[key] = value
+
+
+class RecordingTracer(Tracer):
+
+    def __init__(self):
+        self.spans = []
+        self.active = []
+
+    @contextmanager
+    def start_span(self, name, attributes=None):
+        span = RecordingSpan(name, attributes)
+        self.spans.append(span)
+        self.active.append(span)
+        try:
+            yield span
+        except Exception as error:
+            span.error = error
+            raise
+        finally:
+            self.active.pop()
+
+    def inject(self, headers):
+        headers["traceparent"] = self.active[-1].name
+
+    def span(self, name):
+        return [span for span in self.spans if span.name == name][0]
+
+
+class TracingTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self._tracer = enable_tracing(RecordingTracer())
+        self.addCleanup(disable_tracing)
+
+
+class TestEnableTracing(unittest.TestCase):
+
+    def tearDown(self):
+        disable_tracing()
+
+    def test_disabled_by_default(self):
+        self.assertIsNone(active_tracer())
+
+    def test_enable_and_disable(self):
+        tracer = RecordingTracer()
+        self.assertIs(tracer, enable_tracing(tracer))
+        self.assertIs(tracer, active_tracer())
+        disable_tracing()
+        self.assertIsNone(active_tracer())
+
+    @patch("launchkey.utils.tracing.trace")
+    def test_enable_defaults_to_open_telemetry(self, trace_patch):
+        self.assertIsInstance(enable_tracing(), OpenTelemetryTracer)
+        trace_patch.get_tracer.assert_called_once_with("launchkey")
+
+    def test_subject_type(self):
+        self.assertEqual("svc", subject_type("svc:id"))
+        self.assertIsNone(subject_type(None))
+
+
+class TestOpenTelemetryTracer(unittest.TestCase):
+
+    @patch("launchkey.utils.tracing.trace", None)
+    def test_requires_open_telemetry(self):
+        with self.assertRaises(ImportError):
+            OpenTelemetryTracer()
+
+    @patch("launchkey.utils.tracing.trace")
+    def test_start_span_starts_current_span(self, trace_patch):
+        otel_tracer = MagicMock()
+        span = OpenTelemetryTracer(otel_tracer).start_span("name", {"a": 1})
+        otel_tracer.start_as_current_span.assert_called_once_with(
+            "name", attributes={"a": 1})
+        self.assertEqual(otel_tracer.start_as_current_span.return_value,
+                         span)
+
+    @patch("launchkey.utils.tracing.propagate")
+    @patch("launchkey.utils.tracing.trace")
+    def test_inject_uses_global_propagator(self, trace_patch,
+                                           propagate_patch):
+        headers = {}
+        OpenTelemetryTracer().inject(headers)
+        propagate_patch.inject.assert_called_once_with(headers)
+
+
+class Client(object):
+    _subject = "dir:e5a0c2de-4f8e-11e8-9c2d-fa7ae01bbebc"
+
+    @api_call
+    def call(self, error=None):
+        if error is not None:
+            raise error
+        return "result"
+
+    @async_api_call
+    async def async_call(self):
+        return "result"
+
+
+class TestAPICallSpans(TracingTestCase):
+
+    def test_span_attributes(self):
+        Client().call()
+        span = self._tracer.span("launchkey.Client.call")
+        self.assertEqual({"launchkey.method": "Client.call",
+                          "launchkey.subject_type": "dir"}, span.attributes)
+
+    def test_span_records_mapped_exception(self):
+        with self.assertRaises(EntityNotFound):
+            Client().call(LaunchKeyAPIException({}, 404))
+        self.assertIsInstance(self._tracer.spans[0].error, EntityNotFound)
+
+    def test_async_span(self):
+        asyncio.run(Client().async_call())
+        self.assertEqual(["launchkey.Client.async_call"],
+                         [span.name for span in self._tracer.spans])
+
+    def test_no_spans_when_disabled(self):
+        disable_tracing()
+        Client().call()
+        self.assertEqual([], self._tracer.spans)
+
+
+class TestJOSERequestSpans(TracingTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self._transport = JOSETransport(http_client=MagicMock())
+        self._transport._load_request_metadata = MagicMock()
+        self._transport._build_jose_request = MagicMock(
+            return_value=({}, None))
+        self._transport._process_jose_response = MagicMock(
+            side_effect=lambda response, *args: response)
+
+    def test_span_attributes_and_propagation(self):
+        self._transport._http_client.get.return_value = APIResponse(
+            {}, {}, 200)
+        self._transport._process_jose_request(
+            "GET", "/service/v3/auths/e5a0c2de-4f8e-11e8-9c2d-fa7ae01bbebc",
+            "svc:id")
+        span = self._tracer.span("launchkey.jose_request")
+        self.assertEqual({
+            "http.method": "GET",
+            "launchkey.endpoint": "GET /service/v3/auths/{id}",
+            "launchkey.subject_type": "svc",
+            "http.status_code": 200}, span.attributes)
+        self._transport._http_client.get.assert_called_once_with(
+            "/service/v3/auths/e5a0c2de-4f8e-11e8-9c2d-fa7ae01bbebc",
+            data=None, headers={"traceparent": "launchkey.jose_request"})
+
+    def test_error_status_code(self):
+        self._transport._process_jose_response.side_effect = \
+            LaunchKeyAPIException({}, 409)
+        with self.assertRaises(LaunchKeyAPIException):
+            self._transport._process_jose_request("POST", "/path", None)
+        span = self._tracer.span("launchkey.jose_request")
+        self.assertEqual(409, span.attributes["http.status_code"])
+        self.assertNotIn("launchkey.subject_type", span.attributes)
+
+    def test_no_propagation_when_disabled(self):
+        disable_tracing()
+        self._transport._http_client.get.return_value = APIResponse(
+            {}, {}, 200)
+        self._transport._process_jose_request("GET", "/path", "svc:id")
+        self._transport._http_client.get.assert_called_once_with(
+            "/path", data=None, headers={})
+
+    def test_async_span_and_propagation(self):
+        transport = AsyncJOSETransport(http_client=MagicMock())
+        transport.refresh_server_time_difference = async_return(0)
+        transport.load_public_key_for_jwt = async_return(None)
+        transport._build_jose_request = MagicMock(return_value=({}, None))
+        transport._process_jose_response = MagicMock(
+            side_effect=lambda response, *args: response)
+        transport._http_client.get = async_return(APIResponse({}, {}, 200))
+        asyncio.run(transport.get("/path", "org:id"))
+        span = self._tracer.span("launchkey.jose_request")
+        self.assertEqual(200, span.attributes["http.status_code"])
+        self.assertEqual("org", span.attributes["launchkey.subject_type"])
+        transport._http_client.get.assert_called_once_with(
+            "/path", data=None,
+            headers={"traceparent": "launchkey.jose_request"})
+
+    def test_async_error_status_code(self):
+        transport = AsyncJOSETransport(http_client=MagicMock())
+        transport.refresh_server_time_difference = async_return(0)
+        transport.load_public_key_for_jwt = async_return(None)
+        transport._build_jose_request = MagicMock(return_value=({}, None))
+        transport._process_jose_response = MagicMock(
+            side_effect=LaunchKeyAPIException({}, 404))
+        transport._http_client.get = async_return(
+            APIErrorResponse({}, {}, 404))
+        with self.assertRaises(LaunchKeyAPIException):
+            asyncio.run(transport.get("/path", "org:id"))
+        self.assertEqual(404, self._tracer.span("launchkey.jose_request")
+                         .attributes["http.status_code"])
+
+
+class TestParseResponseSpan(TracingTestCase):
+
+    def test_span_status_code(self):
+        response = MagicMock(status_code=200)
+        response.json.return_value = {"a": 1}
+        self.assertEqual({"a": 1},
+                         RequestsTransport._parse_response(response).data)
+        self.assertEqual({"http.status_code": 200}, self._tracer.span(
+            "launchkey.parse_response").attributes)
+
+
+class TestWebhookSpans(TracingTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self._transport = MagicMock()
+        self._transport.decrypt_response.return_value = "decrypted"
+        self._service = XiovJWTService(self._transport, "svc:id")
+
+    def test_verify_jwt_request_span(self):
+        self._service.verify_jwt_request("body", {"X-IOV-JWT": "jwt"},
+                                         "POST", "/webhook")
+        self.assertEqual({"http.method": "POST", "http.route": "/webhook",
+                          "launchkey.subject_type": "svc"},
+                         self._tracer.span(
+                             "launchkey.webhook.verify_jwt_request")
+                         .attributes)
+
+    def test_verify_jwt_request_span_records_failure(self):
+        self._transport.verify_jwt_request.side_effect = JWTValidationFailure
+        with self.assertRaises(XiovJWTValidationFailure):
+            self._service.verify_jwt_request("body", {"X-IOV-JWT": "jwt"},
+                                             "POST", "/webhook")
+        self.assertIsInstance(self._tracer.spans[0].error,
+                              XiovJWTValidationFailure)
+
+    def test_decrypt_jwe_span_contains_verification(self):
+        self.assertEqual("decrypted", self._service.decrypt_jwe(
+            "body", {"X-IOV-JWT": "jwt"}, "POST", "/webhook"))
+        self.assertEqual(["launchkey.webhook.decrypt_jwe",
+                          "launchkey.webhook.verify_jwt_request"],
+                         [span.name for span in self._tracer.spans])
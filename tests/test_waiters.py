@@ -0,0 +1,170 @@
+import asyncio
+import threading
+import unittest
+from concurrent.futures import Future
+from uuid import uuid4
+
+from mock import MagicMock, patch
+
+from launchkey.clients import AsyncServiceClient, ServiceClient, \
+    AuthorizationResponsePoller, AsyncAuthorizationResponsePoller, \
+    AuthorizationResponseRegistry
+from launchkey.entities.service import AdvancedAuthorizationResponse, \
+    AuthorizationRequest, SessionEndRequest
+from launchkey.transports.base import APIResponse
+
+
+def _response(authorization_request_id):
+    return MagicMock(spec=AdvancedAuthorizationResponse,
+                     authorization_request_id=authorization_request_id)
+
+
+class TestAuthorizationResponseRegistry(unittest.TestCase):
+
+    def setUp(self):
+        self._registry = AuthorizationResponseRegistry(max_unclaimed=2)
+
+    def test_resolve_registered_future(self):
+        future = Future()
+        self._registry.register("auth-id", future)
+        self.assertEqual(1, self._registry.pending)
+        response = _response("auth-id")
+        self.assertTrue(self._registry.resolve(response))
+        self.assertEqual(response, future.result(0))
+        self.assertEqual(0, self._registry.pending)
+
+    def test_response_before_register(self):
+        response = _response("auth-id")
+        self.assertFalse(self._registry.resolve(response))
+        future = Future()
+        self._registry.register("auth-id", future)
+        self.assertEqual(response, future.result(0))
+        self.assertEqual(0, self._registry.pending)
+
+    def test_unclaimed_responses_are_bounded(self):
+        for auth_id in ("a", "b", "c"):
+            self._registry.resolve(_response(auth_id))
+        future = Future()
+        self._registry.register("a", future)
+        self.assertFalse(future.done())
+        self._registry.register("c", Future())
+        self.assertEqual(1, self._registry.pending)
+
+    def test_done_future_is_discarded(self):
+        future = Future()
+        self._registry.register("auth-id", future)
+        future.cancel()
+        self.assertEqual(0, self._registry.pending)
+        self.assertFalse(self._registry.resolve(_response("auth-id")))
+
+    def test_discard_only_given_future(self):
+        first, second = Future(), Future()
+        self._registry.register("auth-id", first)
+        self._registry.register("auth-id", second)
+        self._registry.discard("auth-id", first)
+        self.assertEqual(1, self._registry.pending)
+        self._registry.discard("auth-id")
+        self.assertEqual(0, self._registry.pending)
+
+    def test_resolves_asyncio_future_from_another_thread(self):
+        async def _test():
+            future = asyncio.get_running_loop().create_future()
+            self._registry.register("auth-id", future)
+            thread = threading.Thread(
+                target=self._registry.resolve,
+                args=(_response("auth-id"),))
+            thread.start()
+            result = await asyncio.wait_for(future, 5)
+            thread.join()
+            return result
+        self.assertEqual("auth-id",
+                         asyncio.run(_test()).authorization_request_id)
+
+
+class TestServiceClientWebhookWaiters(unittest.TestCase):
+
+    def setUp(self):
+        self._transport = MagicMock()
+        self._transport.post.return_value = APIResponse(
+            {"auth_request": "auth-id", "push_package": "package"}, {}, 201)
+        self._client = ServiceClient(uuid4(), self._transport)
+        self._poller = MagicMock(spec=AuthorizationResponsePoller)
+        self._poller.submit.side_effect = lambda *args, **kwargs: Future()
+
+    def test_disabled_by_default(self):
+        auth = self._client.authorization_request("user")
+        self.assertIsNone(auth.response_future)
+
+    def test_default_registry_and_poller(self):
+        self._client.enable_webhook_waiters()
+        self.assertIsInstance(self._client.response_registry,
+                              AuthorizationResponseRegistry)
+        self.assertIsInstance(self._client.response_poller,
+                              AuthorizationResponsePoller)
+        self._client.response_poller.close()
+
+    def test_polls_as_fallback(self):
+        self._client.enable_webhook_waiters(poller=self._poller,
+                                            fallback_after=20.0)
+        auth = self._client.authorization_request("user")
+        self._poller.submit.assert_called_once_with("auth-id", delay=20.0)
+        self.assertEqual(1, self._client.response_registry.pending)
+        self.assertFalse(auth.response_future.done())
+
+    @patch("launchkey.clients.service.AdvancedAuthorizationResponse")
+    def test_webhook_resolves_future(self, response_patch):
+        response = response_patch.return_value
+        response.authorization_request_id = "auth-id"
+        self._client.enable_webhook_waiters(poller=self._poller)
+        auth = self._client.authorization_request("user")
+        self._client.x_iov_jwt_service = MagicMock()
+        self._client.x_iov_jwt_service.decrypt_jwe.return_value = "{}"
+        result = self._client.handle_advanced_webhook("body", {}, "POST",
+                                                      "/webhook")
+        self.assertEqual(response, result)
+        self.assertEqual(response, auth.response_future.result(0))
+
+    @patch("launchkey.clients.service.loads",
+           MagicMock(return_value={"service_user_hash": "hash",
+                                   "api_time": "time"}))
+    def test_session_end_webhook_is_ignored(self):
+        registry = MagicMock()
+        self._client.enable_webhook_waiters(registry, self._poller)
+        self._client.x_iov_jwt_service = MagicMock()
+        self._client._validate_response = MagicMock(
+            side_effect=lambda body, _: body)
+        result = self._client.handle_advanced_webhook(
+            "service_user_hash", {}, "POST", "/webhook")
+        self.assertIsInstance(result, SessionEndRequest)
+        registry.resolve.assert_not_called()
+
+    def test_polling_resolves_late_webhook(self):
+        self._transport.get.return_value = APIResponse({}, {}, 204)
+        self._client._build_advanced_authorization_response = MagicMock(
+            return_value="response")
+        with AuthorizationResponsePoller(self._client,
+                                         interval=0.01) as poller:
+            self._client.enable_webhook_waiters(poller=poller,
+                                                fallback_after=0.01)
+            auth = self._client.authorization_request("user")
+            self.assertEqual("response", auth.response_future.result(5))
+
+    def test_async_client(self):
+        client = AsyncServiceClient(uuid4(), self._transport)
+        self._transport.post = MagicMock(
+            return_value=asyncio.sleep(0, APIResponse(
+                {"auth_request": "auth-id", "push_package": "package"},
+                {}, 201)))
+
+        async def _test():
+            client.enable_webhook_waiters()
+            self.assertIsInstance(client.response_poller,
+                                  AsyncAuthorizationResponsePoller)
+            auth = await client.authorization_request("user")
+            self.assertIsInstance(auth, AuthorizationRequest)
+            client.response_registry.resolve(_response("auth-id"))
+            result = await asyncio.wait_for(auth.response_future, 5)
+            await client.response_poller.aclose()
+            return result
+        self.assertEqual("auth-id",
+                         asyncio.run(_test()).authorization_request_id)